@@ -10,5 +10,5 @@ __all__ = [
 ]
 
 from src.config import CeleryConfig, WorkerConfig, TaskConfig
+from src.task_management import TaskRegistry
 from src.tasks.decorators import task
-from src.tasks.task_registry import TaskRegistry
@@ -0,0 +1,119 @@
+"""Shared helpers for benchmarks: percentiles, JSON history, regression checks."""
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentiles(
+    samples: Sequence[float], points: Iterable[int] = (50, 95, 99)
+) -> Dict[str, float]:
+    """Compute percentiles (``{"p50": ..., ...}``) of a sample list."""
+    points = list(points)
+    if not samples:
+        return {f"p{p}": 0.0 for p in points}
+    if len(samples) == 1:
+        return {f"p{p}": float(samples[0]) for p in points}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {f"p{p}": cuts[p - 1] for p in points}
+
+
+def environment_info() -> Dict[str, Any]:
+    """Describe where a benchmark ran, so history entries stay comparable."""
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+    try:
+        import celery
+
+        info["celery"] = celery.__version__
+    except ImportError:
+        pass
+    try:
+        info["git_rev"] = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+class BenchmarkHistory:
+    """Append-only JSON history of benchmark runs."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def load(self) -> List[Dict[str, Any]]:
+        """Load all recorded runs."""
+        if not self.path.exists():
+            return []
+        with open(self.path) as f:
+            return json.load(f)
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Append a run record and persist the history."""
+        runs = self.load()
+        record.setdefault("timestamp", datetime.now(timezone.utc).isoformat())
+        runs.append(record)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(runs, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def previous(
+        self, name: str, params: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Get the most recent run of ``name`` with identical parameters."""
+        for run in reversed(self.load()):
+            if run.get("name") == name and run.get("params") == params:
+                return run
+        return None
+
+
+def find_regressions(
+    current: Dict[str, float],
+    baseline: Dict[str, float],
+    directions: Dict[str, str],
+    threshold_pct: float,
+) -> List[str]:
+    """
+    Compare metrics against a baseline.
+
+    Args:
+        current: Metric values of this run
+        baseline: Metric values of the reference run
+        directions: ``"higher"`` or ``"lower"`` (is better) per metric name
+        threshold_pct: Allowed relative change before flagging
+
+    Returns:
+        Human-readable descriptions of regressed metrics
+    """
+    regressions = []
+    for metric, direction in directions.items():
+        old = baseline.get(metric)
+        new = current.get(metric)
+        if not old or new is None:
+            continue
+        change = (new - old) / old * 100.0
+        worse = -change if direction == "higher" else change
+        if worse > threshold_pct:
+            regressions.append(
+                f"{metric}: {old:.4g} -> {new:.4g} ({change:+.1f}%, "
+                f"limit {threshold_pct:.1f}%)"
+            )
+    return regressions
@@ -0,0 +1,466 @@
+"""
+Micro-benchmarks for the task catalog hot paths.
+
+Covers ``TaskRegistry.register/get/filter``, ``ConfigTaskSource.load_tasks``,
+``DatabaseTaskSource.load_tasks`` and ``SQLiteStorage`` CRUD for both task
+management implementations: the library (SQLAlchemy source) and the copy
+bundled with the app (sqlite3 source). Each result is checked against a
+stored baseline and the run fails when a path regresses by more than the
+configured percentage, widened for benchmarks whose timings are noisy.
+Suspected regressions are timed again before they are reported.
+
+No baseline is shipped: timings only compare on the machine that took
+them. To use the check, record a baseline on the hardware that will run
+it, then make sure an unchanged tree passes there several times in a row
+before relying on it:
+
+    python benchmarks/catalog_micro.py --update-baseline --note "CI runner"
+    python benchmarks/catalog_micro.py   # repeat; every run must pass
+
+Without a baseline a run only prints its timings.
+
+Run:
+    python benchmarks/catalog_micro.py
+    python benchmarks/catalog_micro.py --sizes 1000,10000 --threshold 15
+"""
+
+import argparse
+import gc
+import importlib.util
+import inspect
+import json
+import logging
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional
+
+from bench_utils import environment_info, find_regressions
+
+ROOT = Path(__file__).parent.parent
+IMPLEMENTATIONS = {
+    "lib": ROOT / "libs" / "grepx-task-managment-libs" / "src" / "task_management",
+    "app": ROOT / "src" / "task_management",
+}
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_BASELINE = Path(__file__).parent / "baselines" / "catalog_micro.json"
+
+# Number of single-row storage operations timed per catalog size
+STORAGE_OPS = 200
+
+# Runs per benchmark; the fastest is compared, the others measure noise
+DEFAULT_REPEAT = 7
+# Fast benchmarks run more often, until they took this long (seconds)...
+MIN_TIME = 0.25
+# ...but at most this many times
+MAX_REPEAT = 100
+# A benchmark's threshold is at least this many times its noise (percent)
+NOISE_FACTOR = 3.0
+# Slowdowns smaller than this (seconds) are timer and scheduler jitter
+MIN_DELTA = 0.001
+
+Prepare = Callable[[], Callable[[], Any]]
+
+
+def load_implementation(impl: str) -> ModuleType:
+    """
+    Import a task_management package under an alias.
+
+    Both implementations are named ``task_management``; loading each under
+    its own name lets one process benchmark them side by side.
+    """
+    alias = f"{impl}_task_management"
+    if alias in sys.modules:
+        return sys.modules[alias]
+    path = IMPLEMENTATIONS[impl]
+    spec = importlib.util.spec_from_file_location(
+        alias, path / "__init__.py", submodule_search_locations=[str(path)]
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[alias] = module
+    spec.loader.exec_module(module)
+    for sub in ("sources", "storage"):
+        importlib.import_module(f"{alias}.{sub}")
+    return module
+
+
+def task_rows(size: int, prefix: str = "bench") -> List[Dict[str, Any]]:
+    """Synthetic catalog rows shaped like config.yaml task entries."""
+    return [
+        {
+            "name": f"tasks.{prefix}_{i}",
+            "module_path": f"bench.module_{i % 50}",
+            "function_name": f"func_{i}",
+            "description": f"Benchmark task {i}",
+            "enabled": i % 5 != 0,
+            "tags": [f"tag{i % 10}", "celery"],
+            "options": {"max_retries": 3, "time_limit": 60},
+            "metadata": {"owner": "bench", "index": i},
+        }
+        for i in range(size)
+    ]
+
+
+def seed_database(db_path: Path, rows: List[Dict[str, Any]], table: str = "tasks"):
+    """Bulk insert catalog rows into an existing tasks table."""
+    conn = sqlite3.connect(db_path)
+    conn.executemany(
+        f"""
+        INSERT INTO {table}
+        (name, module_path, function_name, description, enabled, options, tags, metadata)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                r["name"],
+                r["module_path"],
+                r["function_name"],
+                r["description"],
+                1 if r["enabled"] else 0,
+                json.dumps(r["options"]),
+                json.dumps(r["tags"]),
+                json.dumps(r["metadata"]),
+            )
+            for r in rows
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+
+def delete_rows(db_path: Path, names: List[str], table: str = "tasks"):
+    conn = sqlite3.connect(db_path)
+    conn.executemany(f"DELETE FROM {table} WHERE name = ?", [(n,) for n in names])
+    conn.commit()
+    conn.close()
+
+
+class CatalogBenchmarks:
+    """Benchmarks for one implementation at one catalog size."""
+
+    def __init__(self, tm: ModuleType, size: int, workdir: Path):
+        self.tm = tm
+        self.size = size
+        self.rows = task_rows(size)
+        self.definitions = [self.tm.TaskDefinition(**r) for r in self.rows]
+        self.db_path = workdir / f"{tm.__name__}_{size}.db"
+        self.storage = tm.storage.SQLiteStorage(str(self.db_path))
+        seed_database(self.db_path, self.rows)
+
+    def registry_register(self) -> Prepare:
+        def prepare():
+            registry = self.tm.TaskRegistry()
+            return lambda: [registry.register(d) for d in self.definitions]
+
+        return prepare
+
+    def registry_get(self) -> Prepare:
+        registry = self._filled_registry()
+        names = [d.name for d in self.definitions]
+        return lambda: lambda: [registry.get(n) for n in names]
+
+    def registry_filter(self) -> Prepare:
+        registry = self._filled_registry()
+
+        def run():
+            registry.filter(enabled=True)
+            registry.filter(tags=["tag3"])
+            registry.filter(enabled=True, tags=["tag1", "tag2"])
+
+        return lambda: run
+
+    def config_load(self) -> Prepare:
+        source = self.tm.sources.ConfigTaskSource({"tasks": self.rows})
+        return lambda: source.load_tasks
+
+    def database_load(self) -> Prepare:
+        source = self.tm.sources.DatabaseTaskSource(f"sqlite:///{self.db_path}")
+        return lambda: source.load_tasks
+
+    def database_load_filtered(self) -> Optional[Prepare]:
+        source = self.tm.sources.DatabaseTaskSource(f"sqlite:///{self.db_path}")
+        if "tags" not in inspect.signature(source.load_tasks).parameters:
+            return None
+        # One tag and one module: a queue-specific worker's slice
+        return lambda: lambda: source.load_tasks(
+            enabled=True, tags=["tag3"], module_path="bench.module_3"
+        )
+
+    def storage_add(self) -> Prepare:
+        rows = task_rows(STORAGE_OPS, prefix="added")
+        names = [r["name"] for r in rows]
+
+        def prepare():
+            delete_rows(self.db_path, names)
+            return lambda: [self.storage.add_task(**r) for r in rows]
+
+        return prepare
+
+    def storage_list(self) -> Prepare:
+        return lambda: self.storage.list_tasks
+
+    def storage_get(self) -> Optional[Prepare]:
+        if not hasattr(self.storage, "get_task"):
+            return None
+        names = [self.rows[i]["name"] for i in self._sample()]
+        return lambda: lambda: [self.storage.get_task(n) for n in names]
+
+    def storage_update(self) -> Optional[Prepare]:
+        if not hasattr(self.storage, "disable_task"):
+            return None
+        names = [self.rows[i]["name"] for i in self._sample()]
+        return lambda: lambda: [self.storage.disable_task(n) for n in names]
+
+    def storage_delete(self) -> Prepare:
+        rows = task_rows(STORAGE_OPS, prefix="deleted")
+        names = [r["name"] for r in rows]
+
+        def prepare():
+            delete_rows(self.db_path, names)
+            seed_database(self.db_path, rows)
+            return lambda: [self.storage.delete_task(n) for n in names]
+
+        return prepare
+
+    def all(self) -> Dict[str, Prepare]:
+        """All benchmarks supported by this implementation."""
+        benches = {
+            "registry.register": self.registry_register(),
+            "registry.get": self.registry_get(),
+            "registry.filter": self.registry_filter(),
+            "config_source.load_tasks": self.config_load(),
+            "database_source.load_tasks": self.database_load(),
+            "database_source.load_tasks_filtered": self.database_load_filtered(),
+            "storage.add": self.storage_add(),
+            "storage.list": self.storage_list(),
+            "storage.get": self.storage_get(),
+            "storage.update": self.storage_update(),
+            "storage.delete": self.storage_delete(),
+        }
+        return {name: bench for name, bench in benches.items() if bench is not None}
+
+    def _filled_registry(self):
+        registry = self.tm.TaskRegistry()
+        for d in self.definitions:
+            registry.register(d)
+        return registry
+
+    def _sample(self) -> range:
+        step = max(self.size // STORAGE_OPS, 1)
+        return range(0, min(self.size, STORAGE_OPS * step), step)
+
+
+def measure(prepare: Prepare, repeat: int) -> List[float]:
+    """
+    Wall time of each run, in seconds.
+
+    Runs at least ``repeat`` times, and up to ``MAX_REPEAT`` times until
+    the runs took ``MIN_TIME`` together.
+    """
+    samples: List[float] = []
+    while len(samples) < repeat or (
+        sum(samples) < MIN_TIME and len(samples) < MAX_REPEAT
+    ):
+        run = prepare()
+        gc.collect()
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def spread(samples: List[float]) -> float:
+    """Noise of a benchmark: how much slower the median run is than the best, %."""
+    best = min(samples)
+    return (statistics.median(samples) - best) / best * 100.0 if best else 0.0
+
+
+def run_benchmarks(
+    sizes=DEFAULT_SIZES,
+    impls=tuple(IMPLEMENTATIONS),
+    repeat: int = DEFAULT_REPEAT,
+    only: Optional[List[str]] = None,
+    progress: Optional[Callable[[str, float], None]] = None,
+    noise: Optional[Dict[str, float]] = None,
+) -> Dict[str, float]:
+    """
+    Run benchmarks and return timings keyed by ``impl.benchmark.size``.
+
+    Args:
+        sizes: Catalog sizes
+        impls: Implementations to benchmark (``lib``, ``app``)
+        repeat: Least runs per benchmark; the fastest is kept
+        only: Benchmark name prefixes to include
+        progress: Callback invoked with each result
+        noise: Filled with the ``spread`` of each result
+    """
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="catalog-bench-") as tmp:
+        for impl in impls:
+            tm = load_implementation(impl)
+            for size in sizes:
+                benches = CatalogBenchmarks(tm, size, Path(tmp)).all()
+                for name, prepare in benches.items():
+                    if only and not any(name.startswith(p) for p in only):
+                        continue
+                    key = f"{impl}.{name}.{size}"
+                    samples = measure(prepare, repeat)
+                    results[key] = min(samples)
+                    if noise is not None:
+                        noise[key] = spread(samples)
+                    if progress:
+                        progress(key, results[key])
+    return results
+
+
+def rerun(keys: List[str], results: Dict[str, float], repeat: int) -> None:
+    """Time ``keys`` again, keeping each one's best time of both runs."""
+    for key in keys:
+        impl, rest = key.split(".", 1)
+        name, size = rest.rsplit(".", 1)
+        again = run_benchmarks([int(size)], [impl], repeat, only=[name])
+        results[key] = min(results[key], again[key])
+
+
+def load_baseline(path: Path) -> Dict[str, Any]:
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(
+    path: Path,
+    results: Dict[str, float],
+    noise: Optional[Dict[str, float]] = None,
+    repeat: int = DEFAULT_REPEAT,
+    note: str = "",
+) -> None:
+    baseline = load_baseline(path)
+    merged = dict(baseline.get("results", {}))
+    merged.update(results)
+    merged_noise = dict(baseline.get("noise", {}))
+    merged_noise.update(noise or {})
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "environment": environment_info(),
+                "note": note,
+                "repeat": repeat,
+                "results": dict(sorted(merged.items())),
+                "noise": {k: round(v, 1) for k, v in sorted(merged_noise.items())},
+            },
+            f,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def check_regressions(
+    results: Dict[str, float],
+    baseline: Dict[str, float],
+    threshold_pct: float,
+    noise: Optional[Dict[str, float]] = None,
+    min_delta: float = MIN_DELTA,
+) -> List[str]:
+    """
+    Benchmarks slower than their baseline by more than their threshold.
+
+    Args:
+        results: Timings of this run
+        baseline: Timings of the reference run
+        threshold_pct: Allowed slowdown, percent
+        noise: ``spread`` per benchmark (the larger of both runs'); a
+            benchmark's threshold is at least ``NOISE_FACTOR`` times it
+        min_delta: Slowdowns under this many seconds are ignored
+    """
+    noise = noise or {}
+    regressions = []
+    for key in results:
+        if key not in baseline or results[key] - baseline[key] < min_delta:
+            continue
+        limit = max(threshold_pct, NOISE_FACTOR * noise.get(key, 0.0))
+        regressions += find_regressions(results, baseline, {key: "lower"}, limit)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--sizes", default=",".join(str(s) for s in DEFAULT_SIZES)
+    )
+    parser.add_argument("--impl", default=",".join(IMPLEMENTATIONS))
+    parser.add_argument(
+        "--only", default="", help="Comma-separated benchmark name prefixes"
+    )
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=25.0,
+        help="Percent slowdown versus baseline that fails the run",
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument(
+        "--note", default="", help="Where the baseline was recorded"
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    def report(key: str, seconds: float) -> None:
+        print(f"  {key:<48} {seconds * 1000:>10.2f} ms")
+
+    print("\nCatalog micro-benchmarks")
+    print("-" * 62)
+    noise: Dict[str, float] = {}
+    results = run_benchmarks(
+        sizes=[int(s) for s in args.sizes.split(",") if s],
+        impls=[i for i in args.impl.split(",") if i],
+        repeat=args.repeat,
+        only=[p for p in args.only.split(",") if p] or None,
+        progress=report,
+        noise=noise,
+    )
+
+    if args.update_baseline:
+        save_baseline(args.baseline, results, noise, args.repeat, args.note)
+        print(f"\nBaseline updated: {args.baseline}")
+        return 0
+
+    stored = load_baseline(args.baseline)
+    baseline = stored.get("results", {})
+    if not baseline:
+        print(
+            f"\nNo baseline at {args.baseline}; record one on this machine "
+            "with --update-baseline to check for regressions"
+        )
+        return 0
+
+    stored_noise = stored.get("noise", {})
+    for key in noise:
+        noise[key] = max(noise[key], stored_noise.get(key, 0.0))
+    regressions = check_regressions(results, baseline, args.threshold, noise)
+    if regressions:
+        # Timings drift between runs more than within one: confirm first
+        suspects = [line.split(":", 1)[0] for line in regressions]
+        print(f"\nTiming {len(suspects)} suspected regression(s) again")
+        rerun(suspects, results, args.repeat)
+        regressions = check_regressions(results, baseline, args.threshold, noise)
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s):")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\n✓ No regressions beyond {args.threshold:.0f}% (or their noise)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Config access-cost benchmark.
+
+Compares reading settings through the merged OmegaConf ``DictConfig`` with
+reading them from the frozen runtime ``Config``.
+
+Run:
+    python benchmarks/config_access.py
+    python benchmarks/config_access.py --number 100000
+"""
+
+import argparse
+import sys
+import timeit
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent / "src"
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+# Lookups the app and task code perform
+ACCESSES = {
+    "celery.broker_url": "cfg.celery.broker_url",
+    "task.time_limit": "cfg.task.time_limit",
+    "tasks.source": "cfg.tasks.source",
+    "tasks.database.uri": "cfg.tasks.database.uri",
+    "app.environment": "cfg.app.environment",
+}
+
+
+def measure_access(
+    number: int = 10000, repeat: int = 3
+) -> Dict[str, Dict[str, float]]:
+    """
+    Time attribute access on both config representations.
+
+    Returns:
+        ``{access: {"dictconfig_ns": ..., "runtime_ns": ..., "speedup": ...}}``
+    """
+    from config_loader import _load_config
+    from config import build_config
+
+    dict_cfg = _load_config()
+    runtime_cfg = build_config(dict_cfg)
+
+    results = {}
+    for name, expr in ACCESSES.items():
+        timings = {}
+        for label, cfg in (("dictconfig_ns", dict_cfg), ("runtime_ns", runtime_cfg)):
+            best = min(
+                timeit.repeat(expr, globals={"cfg": cfg}, number=number, repeat=repeat)
+            )
+            timings[label] = best / number * 1e9
+        timings["speedup"] = timings["dictconfig_ns"] / timings["runtime_ns"]
+        results[name] = timings
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--number", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    results = measure_access(args.number, args.repeat)
+    print(f"\n{'access':<22} {'DictConfig':>12} {'Config':>10} {'speedup':>9}")
+    print("-" * 56)
+    for name, r in results.items():
+        print(
+            f"{name:<22} {r['dictconfig_ns']:>10.0f}ns {r['runtime_ns']:>8.0f}ns "
+            f"{r['speedup']:>8.0f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
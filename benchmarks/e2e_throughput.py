@@ -0,0 +1,273 @@
+"""
+End-to-end throughput and latency benchmark.
+
+Boots the app through ``create_app`` against local stand-ins (in-memory
+broker, filesystem/SQLite/memory result backend), drives the example tasks
+and records tasks/sec plus p50/p95/p99 latency in a JSON history.
+
+Run:
+    python benchmarks/e2e_throughput.py --tasks 2000 --concurrency 8
+    python benchmarks/e2e_throughput.py --mix multiply=1,process_data=1 \\
+        --payload-bytes 65536 --fail-on-regression
+"""
+
+import argparse
+import logging
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent / "src"
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from bench_utils import (  # noqa: E402
+    RESULTS_DIR,
+    BenchmarkHistory,
+    environment_info,
+    find_regressions,
+    percentiles,
+)
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_NAME = "e2e_throughput"
+DEFAULT_MIX = "add=1,multiply=1,process_data=1"
+DEFAULT_HISTORY = RESULTS_DIR / "e2e_history.json"
+
+# Lower-is-better latency, higher-is-better throughput
+DIRECTIONS = {
+    "tasks_per_sec": "higher",
+    "latency_p50_ms": "lower",
+    "latency_p95_ms": "lower",
+    "latency_p99_ms": "lower",
+}
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse ``add=3,process_data=1`` into task-name weights."""
+    weights = {}
+    for item in mix.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, weight = item.partition("=")
+        task_name = name if name.startswith("tasks.") else f"tasks.{name}"
+        weights[task_name] = float(weight or 1)
+    if not weights:
+        raise ValueError(f"Empty task mix: {mix!r}")
+    return weights
+
+
+def result_backend_url(kind: str, workdir: Path) -> str:
+    """Result backend URL for a local stand-in."""
+    if kind == "file":
+        results = workdir / "results"
+        results.mkdir(parents=True, exist_ok=True)
+        return f"file://{results}"
+    if kind == "sqlite":
+        return f"db+sqlite:///{workdir / 'results.db'}"
+    if kind == "memory":
+        return "cache+memory://"
+    raise ValueError(f"Unknown result backend: {kind}")
+
+
+def build_app(backend: str, workdir: Path):
+    """Create the app from the project config with local stand-ins."""
+    from app import create_app
+    from config_loader import load_runtime_config
+
+    cfg = load_runtime_config()
+    cfg = replace(
+        cfg,
+        celery=replace(
+            cfg.celery,
+            broker_url="memory://",
+            result_backend=result_backend_url(backend, workdir),
+        ),
+        tasks=replace(cfg.tasks, source="config"),
+        metrics=replace(cfg.metrics, enabled=False),
+    )
+    app = create_app(cfg).app
+    # Virtual transports poll empty queues once per second by default
+    app.conf.broker_transport_options = {"polling_interval": 0.001}
+    return app
+
+
+def task_arguments(task_name: str, payload: Dict[str, Any], rng: random.Random):
+    """Arguments for one of the example tasks."""
+    if task_name == "tasks.process_data":
+        return (payload,)
+    return (rng.randint(0, 1000), rng.randint(0, 1000))
+
+
+def run_benchmark(
+    tasks: int = 1000,
+    concurrency: int = 4,
+    worker_concurrency: Optional[int] = None,
+    payload_bytes: int = 256,
+    mix: str = DEFAULT_MIX,
+    backend: str = "file",
+    warmup: int = 20,
+    seed: int = 0,
+) -> Dict[str, Any]:
+    """
+    Run the benchmark and return a history record.
+
+    Args:
+        tasks: Number of measured tasks
+        concurrency: Client threads with one task in flight each
+        worker_concurrency: Worker thread-pool size (default: 2x concurrency)
+        payload_bytes: Size of the blob passed to ``process_data``
+        mix: Task mix as ``name=weight`` pairs
+        backend: Result backend stand-in (``file``, ``sqlite`` or ``memory``)
+        warmup: Unmeasured tasks submitted first
+        seed: Seed for the task plan
+
+    Returns:
+        Record with params, results and environment info
+    """
+    from celery.contrib.testing.worker import start_worker
+
+    if worker_concurrency is None:
+        worker_concurrency = concurrency * 2
+    weights = parse_mix(mix)
+    rng = random.Random(seed)
+    payload = {"blob": "x" * payload_bytes}
+    names = rng.choices(list(weights), weights=list(weights.values()), k=tasks)
+    plan = [(name, task_arguments(name, payload, rng)) for name in names]
+
+    with tempfile.TemporaryDirectory(prefix="celery-bench-") as tmp:
+        app = build_app(backend, Path(tmp))
+        missing = [name for name in weights if name not in app.tasks]
+        if missing:
+            raise ValueError(f"Tasks not registered: {missing}")
+
+        # The in-memory transport has no async event loop: once the prefetch
+        # window is full the worker only notices freed slots on its 2s drain
+        # timeout, which would show up as artificial latency.
+        window = worker_concurrency * app.conf.worker_prefetch_multiplier
+        if window <= concurrency:
+            logger.warning(
+                f"Prefetch window ({window}) <= client concurrency "
+                f"({concurrency}); expect ~2s stalls from the memory transport"
+            )
+
+        def call(item) -> Optional[float]:
+            task_name, args = item
+            start = time.perf_counter()
+            try:
+                app.send_task(task_name, args=args).get(timeout=60, interval=0.001)
+            except Exception:
+                return None
+            return time.perf_counter() - start
+
+        with start_worker(
+            app,
+            pool="threads",
+            concurrency=worker_concurrency,
+            perform_ping_check=False,
+        ):
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(call, plan[:warmup]))
+                started = time.perf_counter()
+                latencies = list(pool.map(call, plan))
+                elapsed = time.perf_counter() - started
+
+    ok = [lat for lat in latencies if lat is not None]
+    lat_ms = {k: v * 1000.0 for k, v in percentiles(ok).items()}
+    results = {
+        "tasks_per_sec": len(ok) / elapsed if elapsed else 0.0,
+        "latency_p50_ms": lat_ms["p50"],
+        "latency_p95_ms": lat_ms["p95"],
+        "latency_p99_ms": lat_ms["p99"],
+        "errors": len(latencies) - len(ok),
+        "elapsed_sec": elapsed,
+    }
+    return {
+        "name": BENCHMARK_NAME,
+        "params": {
+            "tasks": tasks,
+            "concurrency": concurrency,
+            "worker_concurrency": worker_concurrency,
+            "payload_bytes": payload_bytes,
+            "mix": weights,
+            "backend": backend,
+        },
+        "results": results,
+        "environment": environment_info(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--worker-concurrency", type=int, default=None)
+    parser.add_argument("--payload-bytes", type=int, default=256)
+    parser.add_argument("--mix", default=DEFAULT_MIX)
+    parser.add_argument(
+        "--backend", choices=["file", "sqlite", "memory"], default="file"
+    )
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Percent change versus the previous comparable run to flag",
+    )
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    record = run_benchmark(
+        tasks=args.tasks,
+        concurrency=args.concurrency,
+        worker_concurrency=args.worker_concurrency,
+        payload_bytes=args.payload_bytes,
+        mix=args.mix,
+        backend=args.backend,
+        warmup=args.warmup,
+        seed=args.seed,
+    )
+    results = record["results"]
+    print(f"\n{BENCHMARK_NAME} ({args.backend} backend)")
+    print("-" * 40)
+    print(f"  tasks/sec:   {results['tasks_per_sec']:.1f}")
+    print(f"  p50 latency: {results['latency_p50_ms']:.2f} ms")
+    print(f"  p95 latency: {results['latency_p95_ms']:.2f} ms")
+    print(f"  p99 latency: {results['latency_p99_ms']:.2f} ms")
+    print(f"  errors:      {results['errors']}")
+
+    history = BenchmarkHistory(args.history)
+    previous = history.previous(BENCHMARK_NAME, record["params"])
+    regressions = []
+    if previous:
+        regressions = find_regressions(
+            results, previous["results"], DIRECTIONS, args.threshold
+        )
+        print(f"\nCompared with run from {previous.get('timestamp')}:")
+        for line in regressions or ["  no regressions"]:
+            print(f"  ✗ {line}" if regressions else line)
+
+    if not args.no_save:
+        history.append(record)
+        print(f"\nSaved to {args.history}")
+
+    if regressions and args.fail_on_regression:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
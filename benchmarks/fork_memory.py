@@ -0,0 +1,277 @@
+"""
+Per-child memory of forked workers with and without preloading.
+
+Generates a synthetic catalog of task modules with sizeable module-level
+state, then forks worker children the way the prefork pool does and
+reports each child's unique set size (USS: memory freed if that child
+exits), PSS, RSS and start-up time for these modes:
+
+- ``cold``: children build the app and import task modules themselves
+- ``preload``: the parent builds the app; no ``gc.freeze()``
+- ``freeze``: the parent preloads and calls ``gc.freeze()`` before forking
+- ``fork_server``: children are forked from a warm, frozen ``ForkServer``
+
+Children run every task and a full garbage collection before they are
+measured, as a pool child does during its first few tasks.
+
+Run:
+    python benchmarks/fork_memory.py
+    python benchmarks/fork_memory.py --modules 200 --children 8
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add src directory to path
+src_dir = Path(__file__).parent.parent / "src"
+if str(src_dir) not in sys.path:
+    sys.path.insert(0, str(src_dir))
+
+from bench_utils import RESULTS_DIR, BenchmarkHistory, environment_info  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+BENCHMARK_NAME = "fork_memory"
+MODES = ("cold", "preload", "freeze", "fork_server")
+DEFAULT_HISTORY = RESULTS_DIR / "fork_memory_history.json"
+PACKAGE = "bench_fork_tasks"
+
+# App built by the measuring process and inherited by forked children
+_wrapper = None
+
+MODULE_TEMPLATE = '''"""Generated task module {index}."""
+
+TABLE = {{f"key{{i}}": [i, str(i), {{"n": i}}] for i in range({entries})}}
+
+
+def run(x):
+    return len(TABLE) + x
+'''
+
+
+def write_catalog(
+    workdir: Path, modules: int, entries: int
+) -> List[Dict[str, Any]]:
+    """Write task modules under ``workdir``; return their task_list entries."""
+    package = workdir / PACKAGE
+    package.mkdir(parents=True, exist_ok=True)
+    (package / "__init__.py").write_text("")
+    task_list = []
+    for index in range(modules):
+        (package / f"mod{index}.py").write_text(
+            MODULE_TEMPLATE.format(index=index, entries=entries)
+        )
+        task_list.append(
+            {
+                "name": f"bench.task{index}",
+                "module_path": f"{PACKAGE}.mod{index}",
+                "function_name": "run",
+            }
+        )
+    return task_list
+
+
+def build_app(task_list: List[Dict[str, Any]]):
+    """Create the app from the project config with the generated catalog."""
+    from app import create_app
+    from config_loader import load_runtime_config
+
+    cfg = load_runtime_config()
+    cfg = replace(
+        cfg,
+        celery=replace(cfg.celery, broker_url="memory://", result_backend=None),
+        tasks=replace(cfg.tasks, source="config", sources=(), task_list=task_list),
+        worker=replace(cfg.worker, preload=False),
+        metrics=replace(cfg.metrics, enabled=False),
+    )
+    return create_app(cfg)
+
+
+def child_main(ready_dir: str, task_list: List[Dict[str, Any]]) -> int:
+    """Run every task once, collect garbage, report ready and wait."""
+    wrapper = _wrapper or build_app(task_list)
+    for name in wrapper.list_tasks():
+        wrapper.adapter.execute(name, 1)
+    gc.collect()
+    Path(ready_dir, str(os.getpid())).touch()
+    signal.pause()
+    return 0
+
+
+def _fork(target, *args) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = target(*args)
+        except BaseException:
+            logger.exception(f"✗ {target.__name__} failed")
+        finally:
+            os._exit(code)
+    return pid
+
+
+def _wait_ready(ready_dir: Path, count: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while len(list(ready_dir.iterdir())) < count:
+        if time.monotonic() > deadline:
+            ready = len(list(ready_dir.iterdir()))
+            raise TimeoutError(f"Only {ready}/{count} children became ready")
+        time.sleep(0.005)
+
+
+def measure_mode(
+    mode: str,
+    task_list: List[Dict[str, Any]],
+    children: int,
+    workdir: Path,
+    timeout: float = 120.0,
+) -> Dict[str, float]:
+    """
+    Fork ``children`` workers in ``mode`` and measure them.
+
+    Runs in a fresh forked process so that modes do not share state.
+    """
+    from monitoring import read_memory
+
+    ready_dir = workdir / f"ready_{mode}"
+    ready_dir.mkdir()
+    result_path = workdir / f"result_{mode}.json"
+
+    def run() -> int:
+        from worker import ForkServer, preload
+
+        global _wrapper
+        server = None
+        if mode != "cold":
+            _wrapper = build_app(task_list)
+            if mode in ("freeze", "fork_server"):
+                preload(_wrapper.app, _wrapper.registry)
+            if mode == "fork_server":
+                server = ForkServer()
+                server.start()
+
+        start = time.perf_counter()
+        if server is not None:
+            pids = [
+                server.spawn(child_main, str(ready_dir), task_list)
+                for _ in range(children)
+            ]
+        else:
+            pids = [
+                _fork(child_main, str(ready_dir), task_list)
+                for _ in range(children)
+            ]
+        _wait_ready(ready_dir, children, timeout)
+        start_ms = (time.perf_counter() - start) * 1000.0 / children
+
+        readings = [read_memory(pid) for pid in pids]
+        for pid in pids:
+            os.kill(pid, signal.SIGTERM)
+        if server is not None:
+            server.stop()
+        else:
+            for pid in pids:
+                os.waitpid(pid, 0)
+
+        mb = 1024.0 * 1024.0
+        result_path.write_text(
+            json.dumps(
+                {
+                    "uss_mb": sum(r.uss for r in readings) / len(readings) / mb,
+                    "pss_mb": sum(r.pss for r in readings) / len(readings) / mb,
+                    "rss_mb": sum(r.rss for r in readings) / len(readings) / mb,
+                    "start_ms": start_ms,
+                }
+            )
+        )
+        return 0
+
+    pid = _fork(run)
+    _, status = os.waitpid(pid, 0)
+    if os.waitstatus_to_exitcode(status) != 0 or not result_path.exists():
+        raise RuntimeError(f"Mode {mode} failed")
+    return json.loads(result_path.read_text())
+
+
+def run_benchmark(
+    modules: int = 50,
+    entries: int = 2000,
+    children: int = 4,
+    modes: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Measure every mode; returns a history record."""
+    from monitoring import read_memory
+
+    if read_memory() is None:
+        raise RuntimeError("Per-process memory needs /proc (Linux)")
+
+    modes = list(modes or MODES)
+    workdir = Path(tempfile.mkdtemp(prefix="fork_memory_"))
+    sys.path.insert(0, str(workdir))
+    try:
+        task_list = write_catalog(workdir, modules, entries)
+        results = {
+            mode: measure_mode(mode, task_list, children, workdir) for mode in modes
+        }
+    finally:
+        sys.path.remove(str(workdir))
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "name": BENCHMARK_NAME,
+        "params": {"modules": modules, "entries": entries, "children": children},
+        "results": results,
+        "environment": environment_info(),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--modules", type=int, default=50)
+    parser.add_argument("--entries", type=int, default=2000)
+    parser.add_argument("--children", type=int, default=4)
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    record = run_benchmark(
+        modules=args.modules,
+        entries=args.entries,
+        children=args.children,
+        modes=[m.strip() for m in args.modes.split(",") if m.strip()],
+    )
+    print(f"\n{BENCHMARK_NAME} ({args.children} children, {args.modules} modules)")
+    print("-" * 64)
+    print(
+        f"  {'mode':<12} {'USS MB':>10} {'PSS MB':>10} "
+        f"{'RSS MB':>10} {'start ms':>10}"
+    )
+    for mode, r in record["results"].items():
+        print(
+            f"  {mode:<12} {r['uss_mb']:>10.1f} {r['pss_mb']:>10.1f} "
+            f"{r['rss_mb']:>10.1f} {r['start_ms']:>10.1f}"
+        )
+
+    if not args.no_save:
+        BenchmarkHistory(args.history).append(record)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
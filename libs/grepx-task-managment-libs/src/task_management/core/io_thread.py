@@ -0,0 +1,118 @@
+"""Dedicated I/O thread for running blocking calls from asyncio."""
+
+import logging
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Jobs waiting for the I/O thread before callers are held back
+DEFAULT_MAX_PENDING = 64
+
+_STOP = object()
+
+
+class IOThread:
+    """
+    Run blocking calls one at a time on a single background thread.
+
+    Callers ``await run(func, ...)``; the event loop never blocks. Pending
+    jobs live in a bounded queue: when it is full, ``run`` waits (without
+    blocking the loop) until the thread catches up. Using one thread keeps
+    SQLite connections on the thread that created them.
+    """
+
+    def __init__(
+        self, name: str = "task-io", max_pending: int = DEFAULT_MAX_PENDING
+    ):
+        self.name = name
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    async def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run ``func(*args, **kwargs)`` on the I/O thread and await its result."""
+        # asyncio is imported on use to keep ``import task_management`` cheap
+        import asyncio
+
+        if self._closed:
+            raise RuntimeError(f"I/O thread {self.name} is closed")
+        self._start()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        job = (func, args, kwargs, loop, future)
+
+        delay = 0.001
+        while True:
+            try:
+                self._queue.put_nowait(job)
+                break
+            except queue.Full:
+                # Backpressure: let the thread drain before queueing more
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 0.05)
+
+        return await future
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop the thread after the queued jobs finish."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    async def aclose(self) -> None:
+        """Stop the thread without blocking the event loop."""
+        import asyncio
+
+        await asyncio.get_running_loop().run_in_executor(None, self.close)
+
+    def _start(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._worker, name=self.name, daemon=True
+                )
+                self._thread.start()
+
+    def _worker(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                return
+            func, args, kwargs, loop, future = job
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                _resolve(loop, future, error=e)
+            else:
+                _resolve(loop, future, result=result)
+
+
+def _resolve(
+    loop, future, result: Any = None, error: Optional[BaseException] = None
+) -> None:
+    """Complete ``future`` from the I/O thread."""
+
+    def complete():
+        if future.cancelled():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    try:
+        loop.call_soon_threadsafe(complete)
+    except RuntimeError:
+        # The caller's event loop has been closed
+        logger.debug("Dropping I/O result for a closed event loop")
@@ -19,15 +19,25 @@ class TaskManager:
         """
         Load tasks from a source into registry.
 
+        Tasks are registered as the source streams them, so only the
+        source's current chunk is held besides the registry itself. A
+        source failing part way is logged; the tasks registered before the
+        failure stay registered.
+
         Returns:
             Number of tasks loaded
         """
-        tasks = source.load_tasks()
-        for task_def in tasks:
-            self.registry.register(task_def)
+        count = 0
+        try:
+            for task_def in source.iter_tasks():
+                self.registry.register(task_def)
+                count += 1
+        except Exception as e:
+            logger.error(f"✗ Failed to load tasks from source after {count}: {e}")
+            return count
 
-        logger.info(f"✓ Loaded {len(tasks)} tasks from source")
-        return len(tasks)
+        logger.info(f"✓ Loaded {count} tasks from source")
+        return count
 
     def create_task(self, task_def: TaskDefinition) -> None:
         """Create a new task."""
@@ -3,6 +3,12 @@
 from .base import TaskSource
 from .config import ConfigTaskSource
 from .database import DatabaseTaskSource
+from .async_database import AsyncDatabaseTaskSource
 
-__all__ = ["TaskSource", "ConfigTaskSource", "DatabaseTaskSource"]
+__all__ = [
+    "TaskSource",
+    "ConfigTaskSource",
+    "DatabaseTaskSource",
+    "AsyncDatabaseTaskSource",
+]
 
@@ -0,0 +1,100 @@
+"""Async database task source."""
+
+import logging
+from itertools import islice
+from typing import AsyncIterator, List, Optional
+
+from .base import DEFAULT_CHUNK_SIZE
+from .database import DatabaseTaskSource
+from ..core.io_thread import DEFAULT_MAX_PENDING, IOThread
+from ..core.task_definition import TaskDefinition
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabaseTaskSource:
+    """
+    Awaitable variant of ``DatabaseTaskSource`` for asyncio services.
+
+    Every database call runs on a dedicated I/O thread with a bounded job
+    queue, so the event loop is never blocked.
+
+    Example:
+        async with AsyncDatabaseTaskSource("sqlite:///tasks.db") as source:
+            await source.save_task(task_def)
+            async for task_def in source.iter_tasks():
+                ...
+    """
+
+    def __init__(
+        self,
+        db_uri: str,
+        table: str = "tasks",
+        io_thread: Optional[IOThread] = None,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ):
+        """
+        Initialize async database source.
+
+        Args:
+            db_uri: SQLAlchemy database URI
+            table: Table name containing tasks
+            io_thread: Shared I/O thread; a private one is created if omitted
+            max_pending: Queue bound for a private I/O thread
+        """
+        # Connects lazily, i.e. on the I/O thread
+        self.source = DatabaseTaskSource(db_uri, table)
+        self._owns_io = io_thread is None
+        self._io = io_thread or IOThread("task-db-io", max_pending)
+
+    async def load_tasks(self) -> List[TaskDefinition]:
+        """Load enabled tasks from database."""
+        return await self._io.run(self.source.load_tasks)
+
+    async def iter_tasks(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> AsyncIterator[TaskDefinition]:
+        """
+        Stream enabled tasks, fetching ``chunk_size`` rows per I/O job.
+
+        Args:
+            chunk_size: Rows fetched per round trip to the I/O thread
+        """
+        rows = await self._io.run(self.source.iter_tasks, chunk_size)
+        try:
+            while True:
+                chunk = await self._io.run(list, islice(rows, chunk_size))
+                if not chunk:
+                    return
+                for task_def in chunk:
+                    yield task_def
+        finally:
+            # Release the cursor on the thread that owns it
+            await self._io.run(rows.close)
+
+    async def save_task(self, task_def: TaskDefinition) -> bool:
+        """Save task to database."""
+        return await self._io.run(self.source.save_task, task_def)
+
+    async def save_tasks(self, task_defs: List[TaskDefinition]) -> int:
+        """Save several tasks in one transaction; returns the number saved."""
+        return await self._io.run(self.source.save_tasks, list(task_defs))
+
+    async def delete_task(self, name: str) -> bool:
+        """Delete task from database."""
+        return await self._io.run(self.source.delete_task, name)
+
+    async def delete_tasks(self, names: List[str]) -> int:
+        """Delete several tasks; returns the number deleted."""
+        return await self._io.run(self.source.delete_tasks, list(names))
+
+    async def aclose(self) -> None:
+        """Stop the private I/O thread."""
+        if self._owns_io:
+            await self._io.aclose()
+
+    async def __aenter__(self) -> "AsyncDatabaseTaskSource":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
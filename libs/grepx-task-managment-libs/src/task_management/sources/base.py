@@ -1,9 +1,12 @@
 """Abstract task source."""
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterator, List
 from ..core.task_definition import TaskDefinition
 
+# Rows fetched per round trip when streaming
+DEFAULT_CHUNK_SIZE = 1000
+
 
 class TaskSource(ABC):
     """Abstract base class for task sources."""
@@ -18,6 +21,23 @@ class TaskSource(ABC):
         """
         pass
 
+    def iter_tasks(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[TaskDefinition]:
+        """
+        Stream task definitions from source.
+
+        Sources backed by large stores override this to fetch in chunks of
+        ``chunk_size``; the default yields from ``load_tasks``.
+
+        Args:
+            chunk_size: Number of rows fetched at a time
+
+        Yields:
+            TaskDefinition objects
+        """
+        yield from self.load_tasks()
+
     @abstractmethod
     def save_task(self, task_def: TaskDefinition) -> bool:
         """
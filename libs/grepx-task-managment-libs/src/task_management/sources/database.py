@@ -2,9 +2,9 @@
 
 import json
 import logging
-from typing import List
+from typing import Iterator, List
 from datetime import datetime
-from .base import TaskSource
+from .base import DEFAULT_CHUNK_SIZE, TaskSource
 from ..core.task_definition import TaskDefinition
 
 logger = logging.getLogger(__name__)
@@ -16,9 +16,22 @@ class DatabaseTaskSource(TaskSource):
     def __init__(self, db_uri: str, table: str = "tasks"):
         self.db_uri = db_uri
         self.table = table
-        self._engine = None
-        self._table = None
-        self._init_db()
+        # (engine, table) - SQLAlchemy is imported and connected on first use
+        self._db = None
+
+    @property
+    def _engine(self):
+        return self._connect()[0]
+
+    @property
+    def _table(self):
+        return self._connect()[1]
+
+    def _connect(self):
+        """Initialize the database on first use."""
+        if self._db is None:
+            self._db = self._init_db()
+        return self._db
 
     def _init_db(self):
         """Initialize database connection and table."""
@@ -35,10 +48,10 @@ class DatabaseTaskSource(TaskSource):
                 MetaData,
             )
 
-            self._engine = create_engine(self.db_uri)
+            engine = create_engine(self.db_uri)
             metadata = MetaData()
 
-            self._table = Table(
+            table = Table(
                 self.table,
                 metadata,
                 Column("id", Integer, primary_key=True, autoincrement=True),
@@ -59,43 +72,65 @@ class DatabaseTaskSource(TaskSource):
                 ),
             )
 
-            metadata.create_all(self._engine)
+            metadata.create_all(engine)
+            if engine.dialect.name == "sqlite":
+                self._install_changelog(engine)
             logger.info(f"✓ Database initialized: {self.db_uri}")
+            return engine, table
         except ImportError:
             logger.error(
                 "SQLAlchemy not installed. Install with: pip install task-management[database]"
             )
             raise
 
+    def _install_changelog(self, engine) -> None:
+        """Record inserts/updates/deletes for ``ChangeFeed`` consumers."""
+        from ..storage.changelog import changelog_ddl
+
+        with engine.begin() as conn:
+            for statement in changelog_ddl(self.table):
+                conn.exec_driver_sql(statement)
+
     def load_tasks(self) -> List[TaskDefinition]:
         """Load tasks from database."""
-        from sqlalchemy import select
-
         tasks = []
         try:
-            with self._engine.connect() as conn:
-                result = conn.execute(
-                    select(self._table).where(self._table.c.enabled == True)
-                )
-                for row in result:
-                    task_def = TaskDefinition(
-                        name=row.name,
-                        module_path=row.module_path,
-                        function_name=row.function_name,
-                        description=row.description or "",
-                        enabled=bool(row.enabled),
-                        options=json.loads(row.options) if row.options else {},
-                        tags=json.loads(row.tags) if row.tags else [],
-                        metadata=json.loads(row.metadata) if row.metadata else {},
-                        created_at=row.created_at,
-                        updated_at=row.updated_at,
-                    )
-                    tasks.append(task_def)
+            for task_def in self.iter_tasks():
+                tasks.append(task_def)
             logger.info(f"✓ Loaded {len(tasks)} tasks from database")
         except Exception as e:
             logger.error(f"✗ Failed to load tasks from database: {e}")
         return tasks
 
+    def iter_tasks(
+        self, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[TaskDefinition]:
+        """
+        Stream enabled tasks from database.
+
+        Rows are fetched ``chunk_size`` at a time through a server-side
+        cursor (``yield_per``), so memory stays bounded by the chunk size
+        rather than the table size.
+        """
+        from sqlalchemy import select
+
+        stmt = select(self._table).where(self._table.c.enabled == True)
+        with self._engine.connect() as conn:
+            result = conn.execution_options(yield_per=chunk_size).execute(stmt)
+            for row in result:
+                yield TaskDefinition(
+                    name=row.name,
+                    module_path=row.module_path,
+                    function_name=row.function_name,
+                    description=row.description or "",
+                    enabled=bool(row.enabled),
+                    options=json.loads(row.options) if row.options else {},
+                    tags=json.loads(row.tags) if row.tags else [],
+                    metadata=json.loads(row.metadata) if row.metadata else {},
+                    created_at=row.created_at,
+                    updated_at=row.updated_at,
+                )
+
     def save_task(self, task_def: TaskDefinition) -> bool:
         """Save task to database."""
         from sqlalchemy.dialects.sqlite import insert as sqlite_insert
@@ -135,6 +170,47 @@ class DatabaseTaskSource(TaskSource):
             logger.error(f"✗ Failed to save task {task_def.name}: {e}")
             return False
 
+    def save_tasks(self, task_defs: List[TaskDefinition]) -> int:
+        """
+        Save several tasks in one transaction (insert or update by name).
+
+        Returns:
+            Number of tasks saved
+        """
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+        rows = [
+            dict(
+                name=task_def.name,
+                module_path=task_def.module_path,
+                function_name=task_def.function_name,
+                description=task_def.description,
+                enabled=task_def.enabled,
+                options=json.dumps(task_def.options),
+                tags=json.dumps(task_def.tags),
+                metadata=json.dumps(task_def.metadata),
+            )
+            for task_def in task_defs
+        ]
+        if not rows:
+            return 0
+
+        try:
+            with self._engine.begin() as conn:
+                stmt = sqlite_insert(self._table)
+                updates = {
+                    key: stmt.excluded[key] for key in rows[0] if key != "name"
+                }
+                updates["updated_at"] = datetime.utcnow()
+                stmt = stmt.on_conflict_do_update(index_elements=["name"], set_=updates)
+                conn.execute(stmt, rows)
+
+            logger.info(f"✓ Saved {len(rows)} tasks")
+            return len(rows)
+        except Exception as e:
+            logger.error(f"✗ Failed to save {len(rows)} tasks: {e}")
+            return 0
+
     def delete_task(self, name: str) -> bool:
         """Delete task from database."""
         from sqlalchemy import delete
@@ -154,3 +230,23 @@ class DatabaseTaskSource(TaskSource):
             logger.error(f"✗ Failed to delete task {name}: {e}")
             return False
 
+    def delete_tasks(self, names: List[str]) -> int:
+        """
+        Delete several tasks in one statement.
+
+        Returns:
+            Number of tasks deleted
+        """
+        from sqlalchemy import delete
+
+        if not names:
+            return 0
+        try:
+            with self._engine.begin() as conn:
+                stmt = delete(self._table).where(self._table.c.name.in_(names))
+                deleted = conn.execute(stmt).rowcount
+            logger.info(f"✓ Deleted {deleted} tasks")
+            return deleted
+        except Exception as e:
+            logger.error(f"✗ Failed to delete tasks: {e}")
+            return 0
@@ -1,6 +1,14 @@
 """Storage backends."""
 
 from .sqlite import SQLiteStorage
+from .async_sqlite import AsyncSQLiteStorage
+from .changelog import Change, ChangeBatch, ChangeFeed
 
-__all__ = ["SQLiteStorage"]
+__all__ = [
+    "SQLiteStorage",
+    "AsyncSQLiteStorage",
+    "Change",
+    "ChangeBatch",
+    "ChangeFeed",
+]
 
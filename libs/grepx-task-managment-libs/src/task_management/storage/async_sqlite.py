@@ -0,0 +1,116 @@
+"""Async SQLite storage helper."""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from .sqlite import SQLiteStorage
+from ..core.io_thread import DEFAULT_MAX_PENDING, IOThread
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSQLiteStorage:
+    """
+    Awaitable variant of ``SQLiteStorage`` for asyncio services.
+
+    Calls run on a dedicated I/O thread with a bounded job queue. The
+    schema is created on the first call, also on that thread.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        table: str = "tasks",
+        io_thread: Optional[IOThread] = None,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ):
+        """
+        Initialize async storage.
+
+        Args:
+            db_path: Path to the SQLite database file
+            table: Table name containing tasks
+            io_thread: Shared I/O thread; a private one is created if omitted
+            max_pending: Queue bound for a private I/O thread
+        """
+        self.db_path = db_path
+        self.table = table
+        self._storage: Optional[SQLiteStorage] = None
+        self._owns_io = io_thread is None
+        self._io = io_thread or IOThread("task-storage-io", max_pending)
+
+    async def add_task(
+        self,
+        name: str,
+        module_path: str,
+        function_name: str,
+        description: str = "",
+        enabled: bool = True,
+        options: Dict[str, Any] = None,
+        tags: List[str] = None,
+        metadata: Dict[str, Any] = None,
+    ) -> bool:
+        """Add a task to database."""
+        return await self._call(
+            "add_task",
+            name,
+            module_path,
+            function_name,
+            description,
+            enabled,
+            options,
+            tags,
+            metadata,
+        )
+
+    async def add_tasks(self, tasks: Iterable[Dict[str, Any]]) -> int:
+        """Add several tasks in one transaction; returns the number added."""
+        return await self._call("add_tasks", list(tasks))
+
+    async def list_tasks(self) -> List[Dict[str, Any]]:
+        """List all tasks."""
+        return await self._call("list_tasks")
+
+    async def enable_task(self, name: str) -> bool:
+        """Enable a task."""
+        return await self._call("enable_task", name)
+
+    async def enable_tasks(self, names: Iterable[str]) -> int:
+        """Enable several tasks; returns the number updated."""
+        return await self._call("enable_tasks", list(names))
+
+    async def disable_task(self, name: str) -> bool:
+        """Disable a task."""
+        return await self._call("disable_task", name)
+
+    async def disable_tasks(self, names: Iterable[str]) -> int:
+        """Disable several tasks; returns the number updated."""
+        return await self._call("disable_tasks", list(names))
+
+    async def delete_task(self, name: str) -> bool:
+        """Delete a task."""
+        return await self._call("delete_task", name)
+
+    async def delete_tasks(self, names: Iterable[str]) -> int:
+        """Delete several tasks; returns the number deleted."""
+        return await self._call("delete_tasks", list(names))
+
+    async def aclose(self) -> None:
+        """Stop the private I/O thread."""
+        if self._owns_io:
+            await self._io.aclose()
+
+    async def __aenter__(self) -> "AsyncSQLiteStorage":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _call(self, method: str, *args: Any) -> Any:
+        return await self._io.run(self._invoke, method, args)
+
+    def _invoke(self, method: str, args: tuple) -> Any:
+        """Run a storage method; executes on the I/O thread."""
+        if self._storage is None:
+            self._storage = SQLiteStorage(self.db_path, self.table)
+        return getattr(self._storage, method)(*args)
@@ -0,0 +1,369 @@
+"""Trigger-fed changelog and change feed consumer."""
+
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from ..core.task_definition import TaskDefinition
+
+logger = logging.getLogger(__name__)
+
+# Cursor row recording the highest compacted sequence number
+COMPACTED = "__compacted__"
+
+# Current Unix time in SQL (unixepoch() needs SQLite 3.38+)
+_NOW = "((julianday('now') - 2440587.5) * 86400.0)"
+
+
+def changelog_table(table: str) -> str:
+    """Name of the changelog table for a tasks table."""
+    return f"{table}_changes"
+
+
+def cursor_table(table: str) -> str:
+    """Name of the consumer cursor table for a tasks table."""
+    return f"{table}_feed"
+
+
+def changelog_ddl(table: str) -> List[str]:
+    """
+    Statements creating the changelog, cursor table and triggers.
+
+    Every insert, update and delete on ``table`` appends a row to
+    ``<table>_changes`` with a monotonically increasing ``seq``
+    (AUTOINCREMENT never reuses numbers, even after compaction). Renames
+    are recorded as a delete of the old name and an insert of the new one.
+    """
+    changes = changelog_table(table)
+    cursors = cursor_table(table)
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS {changes} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            op TEXT NOT NULL,
+            name TEXT NOT NULL,
+            changed_at REAL NOT NULL DEFAULT ({_NOW})
+        )
+        """,
+        f"""
+        CREATE TABLE IF NOT EXISTS {cursors} (
+            consumer TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL,
+            updated_at REAL NOT NULL DEFAULT ({_NOW})
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{changes}_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {changes} (op, name) VALUES ('insert', NEW.name);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{changes}_update AFTER UPDATE ON {table}
+        BEGIN
+            INSERT INTO {changes} (op, name)
+                SELECT 'delete', OLD.name WHERE OLD.name <> NEW.name;
+            INSERT INTO {changes} (op, name)
+                SELECT 'insert', NEW.name WHERE OLD.name <> NEW.name;
+            INSERT INTO {changes} (op, name)
+                SELECT 'update', NEW.name WHERE OLD.name = NEW.name;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{changes}_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT INTO {changes} (op, name) VALUES ('delete', OLD.name);
+        END
+        """,
+    ]
+
+
+def install_changelog(conn: sqlite3.Connection, table: str = "tasks") -> None:
+    """Install the changelog on an SQLite connection (idempotent)."""
+    for statement in changelog_ddl(table):
+        conn.execute(statement)
+    conn.commit()
+
+
+@dataclass
+class Change:
+    """Latest change to one task since the consumer's cursor."""
+
+    seq: int
+    op: str  # "upsert" or "delete"
+    name: str
+    task: Optional[TaskDefinition] = None
+
+
+@dataclass
+class ChangeBatch:
+    """Changes returned by ``ChangeFeed.poll``."""
+
+    changes: List[Change] = field(default_factory=list)
+    last_seq: int = 0
+    # True when ``changes`` is a full snapshot: drop tasks not listed
+    reset: bool = False
+
+
+class ChangeFeed:
+    """
+    Consume the catalog changelog from a persisted sequence number.
+
+    Each consumer (e.g. one per worker node) stores its cursor in
+    ``<table>_feed``, so a restarted node resumes where it stopped. A poll
+    costs two small indexed reads: the new changelog rows and the current
+    rows of the tasks they name. A new consumer, or one whose cursor fell
+    behind a compaction, gets a full snapshot with ``reset=True``.
+
+    Example:
+        feed = ChangeFeed("tasks.db", consumer="worker-1")
+        while True:
+            feed.sync(registry)
+            time.sleep(5)
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        table: str = "tasks",
+        consumer: str = "default",
+        batch_size: int = 1000,
+    ):
+        """
+        Initialize change feed.
+
+        Args:
+            db_path: SQLite database file (or ``sqlite:///`` URI)
+            table: Tasks table name
+            consumer: Unique consumer name; its cursor is persisted
+            batch_size: Maximum changelog rows read per poll
+        """
+        if consumer == COMPACTED:
+            raise ValueError(f"Reserved consumer name: {consumer}")
+        if db_path.startswith("sqlite:///"):
+            db_path = db_path[len("sqlite:///"):]
+        self.db_path = db_path
+        self.table = table
+        self.consumer = consumer
+        self.batch_size = batch_size
+        self._changes = changelog_table(table)
+        self._cursors = cursor_table(table)
+
+        conn = self._connect()
+        try:
+            install_changelog(conn, table)
+        finally:
+            conn.close()
+
+    def position(self) -> Optional[int]:
+        """Persisted sequence number of this consumer (None if new)."""
+        conn = self._connect()
+        try:
+            return self._cursor(conn, self.consumer)
+        finally:
+            conn.close()
+
+    def poll(self) -> ChangeBatch:
+        """
+        Read changes after the persisted cursor.
+
+        Several changes to one task collapse into its latest state. The
+        cursor is not moved; call ``ack`` once the batch is applied.
+        """
+        conn = self._connect()
+        try:
+            # One read transaction: changelog and rows are consistent
+            conn.execute("BEGIN")
+            cursor = self._cursor(conn, self.consumer)
+            compacted = self._cursor(conn, COMPACTED) or 0
+            if cursor is None or cursor < compacted:
+                return self._snapshot(conn)
+
+            rows = conn.execute(
+                f"SELECT seq, op, name FROM {self._changes} "
+                f"WHERE seq > ? ORDER BY seq LIMIT ?",
+                (cursor, self.batch_size),
+            ).fetchall()
+            if not rows:
+                return ChangeBatch(last_seq=cursor)
+
+            latest: Dict[str, int] = {}
+            for seq, _, name in rows:
+                latest[name] = seq
+            tasks = self._load(conn, list(latest))
+
+            changes = []
+            for name, seq in sorted(latest.items(), key=lambda item: item[1]):
+                task = tasks.get(name)
+                op = "upsert" if task is not None else "delete"
+                changes.append(Change(seq, op, name, task))
+            return ChangeBatch(changes, last_seq=rows[-1][0])
+        finally:
+            conn.rollback()
+            conn.close()
+
+    def ack(self, batch_or_seq: Any) -> None:
+        """Persist the cursor after a batch (or sequence number) is applied."""
+        seq = getattr(batch_or_seq, "last_seq", batch_or_seq)
+        conn = self._connect()
+        try:
+            self._set_cursor(conn, self.consumer, seq)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def sync(self, registry, enabled_only: bool = True) -> int:
+        """
+        Apply pending changes to a registry and acknowledge them.
+
+        Args:
+            registry: ``TaskRegistry`` to update
+            enabled_only: Treat disabled tasks as deleted, matching
+                ``DatabaseTaskSource.load_tasks``
+
+        Returns:
+            Number of changes applied
+        """
+        applied = 0
+        while True:
+            batch = self.poll()
+            if batch.reset:
+                keep = {c.name for c in batch.changes}
+                for name in list(registry.all()):
+                    if name not in keep:
+                        registry.unregister(name)
+            for change in batch.changes:
+                registry.unregister(change.name)
+                if change.task is not None and (
+                    change.task.enabled or not enabled_only
+                ):
+                    registry.register(change.task)
+            applied += len(batch.changes)
+            self.ack(batch)
+            if batch.reset or len(batch.changes) < self.batch_size:
+                break
+        if applied:
+            logger.info(f"✓ Applied {applied} catalog changes ({self.consumer})")
+        return applied
+
+    def compact(self, max_age: Optional[float] = None) -> int:
+        """
+        Delete changelog entries every consumer has acknowledged.
+
+        Args:
+            max_age: Also drop entries older than this many seconds, even if
+                a consumer has not read them; that consumer then resyncs
+                from a snapshot
+
+        Returns:
+            Number of entries deleted
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            horizon = conn.execute(
+                f"SELECT MIN(seq) FROM {self._cursors} WHERE consumer <> ?",
+                (COMPACTED,),
+            ).fetchone()[0]
+            if horizon is None:
+                horizon = conn.execute(
+                    f"SELECT COALESCE(MAX(seq), 0) FROM {self._changes}"
+                ).fetchone()[0]
+
+            if max_age is not None:
+                expired = conn.execute(
+                    f"SELECT COALESCE(MAX(seq), 0) FROM {self._changes} "
+                    f"WHERE changed_at < ?",
+                    (time.time() - max_age,),
+                ).fetchone()[0]
+                horizon = max(horizon, expired)
+
+            deleted = conn.execute(
+                f"DELETE FROM {self._changes} WHERE seq <= ?", (horizon,)
+            ).rowcount
+            if horizon > (self._cursor(conn, COMPACTED) or 0):
+                self._set_cursor(conn, COMPACTED, horizon)
+            conn.commit()
+        finally:
+            conn.close()
+
+        if deleted:
+            logger.info(f"✓ Compacted {deleted} changelog entries")
+        return deleted
+
+    def _connect(self) -> sqlite3.Connection:
+        # Explicit transactions only (BEGIN in poll/compact)
+        conn = sqlite3.connect(self.db_path, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _cursor(self, conn: sqlite3.Connection, consumer: str) -> Optional[int]:
+        row = conn.execute(
+            f"SELECT seq FROM {self._cursors} WHERE consumer = ?", (consumer,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _set_cursor(self, conn: sqlite3.Connection, consumer: str, seq: int) -> None:
+        conn.execute(
+            f"""
+            INSERT INTO {self._cursors} (consumer, seq) VALUES (?, ?)
+            ON CONFLICT(consumer) DO UPDATE SET
+                seq = excluded.seq, updated_at = {_NOW}
+            """,
+            (consumer, seq),
+        )
+
+    def _snapshot(self, conn: sqlite3.Connection) -> ChangeBatch:
+        last_seq = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = ?", (self._changes,)
+        ).fetchone()
+        last_seq = last_seq[0] if last_seq else 0
+        rows = conn.execute(f"SELECT * FROM {self.table}").fetchall()
+        changes = [
+            Change(last_seq, "upsert", row["name"], _row_to_definition(row))
+            for row in rows
+        ]
+        logger.info(f"Change feed snapshot for {self.consumer}: {len(rows)} tasks")
+        return ChangeBatch(changes, last_seq=last_seq, reset=True)
+
+    def _load(
+        self, conn: sqlite3.Connection, names: List[str]
+    ) -> Dict[str, TaskDefinition]:
+        tasks = {}
+        # Stay below SQLite's bound-parameter limit
+        for start in range(0, len(names), 500):
+            chunk = names[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            for row in conn.execute(
+                f"SELECT * FROM {self.table} WHERE name IN ({placeholders})", chunk
+            ):
+                tasks[row["name"]] = _row_to_definition(row)
+        return tasks
+
+
+def _row_to_definition(row: sqlite3.Row) -> TaskDefinition:
+    return TaskDefinition(
+        name=row["name"],
+        module_path=row["module_path"],
+        function_name=row["function_name"],
+        description=row["description"] or "",
+        enabled=bool(row["enabled"]),
+        options=json.loads(row["options"]) if row["options"] else {},
+        tags=json.loads(row["tags"]) if row["tags"] else [],
+        metadata=json.loads(row["metadata"]) if row["metadata"] else {},
+        created_at=_timestamp(row["created_at"]),
+        updated_at=_timestamp(row["updated_at"]),
+    )
+
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return value
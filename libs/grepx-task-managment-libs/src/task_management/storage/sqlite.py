@@ -3,9 +3,11 @@
 import sqlite3
 import json
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable
 from datetime import datetime
 
+from .changelog import install_changelog
+
 logger = logging.getLogger(__name__)
 
 
@@ -39,6 +41,7 @@ class SQLiteStorage:
         """
         )
         conn.commit()
+        install_changelog(conn, self.table)
         conn.close()
         logger.info(f"✓ SQLite database initialized: {self.db_path}")
 
@@ -136,3 +139,82 @@ class SQLiteStorage:
             logger.info(f"✓ Deleted task: {name}")
         return success
 
+    def add_tasks(self, tasks: Iterable[Dict[str, Any]]) -> int:
+        """
+        Add several tasks in one transaction.
+
+        Args:
+            tasks: Dicts with the ``add_task`` arguments
+
+        Returns:
+            Number of tasks added; existing names are skipped
+        """
+        rows = [
+            (
+                task["name"],
+                task["module_path"],
+                task["function_name"],
+                task.get("description", ""),
+                1 if task.get("enabled", True) else 0,
+                json.dumps(task["options"]) if task.get("options") else None,
+                json.dumps(task["tags"]) if task.get("tags") else None,
+                json.dumps(task["metadata"]) if task.get("metadata") else None,
+            )
+            for task in tasks
+        ]
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                cursor = conn.executemany(
+                    f"""
+                    INSERT OR IGNORE INTO {self.table}
+                    (name, module_path, function_name, description, enabled, options, tags, metadata)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                    rows,
+                )
+            added = cursor.rowcount
+        finally:
+            conn.close()
+        logger.info(f"✓ Added {added} tasks")
+        return added
+
+    def enable_tasks(self, names: Iterable[str]) -> int:
+        """Enable several tasks; returns the number updated."""
+        return self._set_enabled(names, True)
+
+    def disable_tasks(self, names: Iterable[str]) -> int:
+        """Disable several tasks; returns the number updated."""
+        return self._set_enabled(names, False)
+
+    def delete_tasks(self, names: Iterable[str]) -> int:
+        """Delete several tasks; returns the number deleted."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                cursor = conn.executemany(
+                    f"DELETE FROM {self.table} WHERE name = ?",
+                    [(name,) for name in names],
+                )
+            deleted = cursor.rowcount
+        finally:
+            conn.close()
+        logger.info(f"✓ Deleted {deleted} tasks")
+        return deleted
+
+    def _set_enabled(self, names: Iterable[str], enabled: bool) -> int:
+        now = datetime.utcnow()
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with conn:
+                cursor = conn.executemany(
+                    f"UPDATE {self.table} SET enabled = ?, updated_at = ? "
+                    "WHERE name = ?",
+                    [(1 if enabled else 0, now, name) for name in names],
+                )
+            updated = cursor.rowcount
+        finally:
+            conn.close()
+        state = "Enabled" if enabled else "Disabled"
+        logger.info(f"✓ {state} {updated} tasks")
+        return updated
@@ -0,0 +1,49 @@
+"""Import cost of a statement, measured in a fresh interpreter.
+
+Shared by the import-time tests of the library and of the application
+(whose pytest configuration puts this directory on ``sys.path``).
+"""
+
+import os
+import subprocess
+import sys
+from typing import Optional, Sequence
+
+
+def import_profile(
+    statement: str, pythonpath: Sequence[str] = (), cwd: Optional[str] = None
+):
+    """Run ``statement`` under ``-X importtime``; return (ms, module names)."""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(str(p) for p in pythonpath))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=cwd,
+        check=True,
+    )
+    total_us = 0
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        # Top-level entries are not indented; their sum is the total cost
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+    return total_us / 1000.0, modules
+
+
+def best_import_profile(
+    statement: str,
+    pythonpath: Sequence[str] = (),
+    cwd: Optional[str] = None,
+    runs: int = 3,
+):
+    """The fastest of ``runs`` import profiles of ``statement``."""
+    return min(
+        (import_profile(statement, pythonpath, cwd) for _ in range(runs)),
+        key=lambda profile: profile[0],
+    )
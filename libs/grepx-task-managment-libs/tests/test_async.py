@@ -0,0 +1,201 @@
+"""Tests for the async source and storage."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+from task_management import TaskDefinition
+from task_management.core.io_thread import IOThread
+from task_management.sources import AsyncDatabaseTaskSource
+from task_management.storage import AsyncSQLiteStorage
+
+
+def definitions(count, enabled=True):
+    return [
+        TaskDefinition(
+            name=f"test.task{i}",
+            module_path="test_module",
+            function_name="test_func",
+            enabled=enabled,
+            tags=["async"],
+        )
+        for i in range(count)
+    ]
+
+
+class TestIOThread:
+    """Test the dedicated I/O thread."""
+
+    def test_does_not_block_loop(self):
+        """Test the event loop keeps running during a blocking call."""
+        io = IOThread()
+
+        async def main():
+            ticks = 0
+
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+
+            task = asyncio.create_task(ticker())
+            result = await io.run(time.sleep, 0.2)
+            task.cancel()
+            return result, ticks
+
+        result, ticks = asyncio.run(main())
+        io.close()
+        assert result is None
+        assert ticks >= 5
+
+    def test_runs_on_one_thread(self):
+        """Test every job runs on the same background thread."""
+        io = IOThread(name="single")
+
+        async def main():
+            return await asyncio.gather(
+                *(io.run(lambda: threading.current_thread().name) for _ in range(10))
+            )
+
+        assert set(asyncio.run(main())) == {"single"}
+        io.close()
+
+    def test_bounded_queue(self):
+        """Test callers wait instead of growing the queue past its bound."""
+        io = IOThread(max_pending=2)
+        depths = []
+
+        def job(i):
+            depths.append(io._queue.qsize())
+            time.sleep(0.005)
+            return i
+
+        async def main():
+            return await asyncio.gather(*(io.run(job, i) for i in range(20)))
+
+        assert asyncio.run(main()) == list(range(20))
+        assert max(depths) <= 2
+        io.close()
+
+    def test_errors_propagate(self):
+        """Test exceptions raised on the I/O thread reach the caller."""
+        io = IOThread()
+
+        async def main():
+            await io.run(int, "not a number")
+
+        with pytest.raises(ValueError):
+            asyncio.run(main())
+        io.close()
+
+    def test_closed(self):
+        """Test a closed I/O thread rejects work."""
+        io = IOThread()
+        io.close()
+        with pytest.raises(RuntimeError):
+            asyncio.run(io.run(int, "1"))
+
+
+class TestAsyncDatabaseTaskSource:
+    """Test AsyncDatabaseTaskSource against a local SQLite file."""
+
+    def test_crud(self, tmp_path):
+        """Test saving, loading and deleting tasks."""
+
+        async def main():
+            uri = f"sqlite:///{tmp_path / 'tasks.db'}"
+            async with AsyncDatabaseTaskSource(uri) as source:
+                assert await source.save_tasks(definitions(10)) == 10
+                assert await source.save_task(definitions(11)[10])
+                # Upsert: disabling an existing task
+                assert await source.save_tasks(definitions(1, enabled=False)) == 1
+
+                loaded = await source.load_tasks()
+                assert len(loaded) == 10
+                assert loaded[0].tags == ["async"]
+
+                assert await source.delete_tasks(["test.task1", "test.task2"]) == 2
+                assert await source.delete_task("test.task3")
+                return [t.name for t in await source.load_tasks()]
+
+        names = asyncio.run(main())
+        assert len(names) == 7
+        assert "test.task0" not in names
+
+    def test_iter_tasks(self, tmp_path):
+        """Test streaming tasks in chunks, including stopping early."""
+
+        async def main():
+            uri = f"sqlite:///{tmp_path / 'tasks.db'}"
+            async with AsyncDatabaseTaskSource(uri) as source:
+                await source.save_tasks(definitions(25))
+                streamed = [t.name async for t in source.iter_tasks(chunk_size=10)]
+
+                partial = []
+                stream = source.iter_tasks(chunk_size=10)
+                async for task_def in stream:
+                    partial.append(task_def.name)
+                    if len(partial) == 3:
+                        break
+                await stream.aclose()
+
+                # The cursor was released: writes still succeed
+                assert await source.delete_tasks(streamed[:5]) == 5
+                return streamed, partial
+
+        streamed, partial = asyncio.run(main())
+        assert len(streamed) == 25
+        assert partial == streamed[:3]
+
+
+class TestAsyncSQLiteStorage:
+    """Test AsyncSQLiteStorage against a local SQLite file."""
+
+    def test_bulk_operations(self, tmp_path):
+        """Test bulk add, enable, disable and delete."""
+        rows = [
+            {
+                "name": f"task{i}",
+                "module_path": "test_module",
+                "function_name": "test_func",
+                "tags": ["bulk"],
+            }
+            for i in range(50)
+        ]
+
+        async def main():
+            async with AsyncSQLiteStorage(str(tmp_path / "tasks.db")) as storage:
+                assert await storage.add_tasks(rows) == 50
+                assert await storage.add_tasks(rows[:5]) == 0
+                assert await storage.add_task("single", "test_module", "test_func")
+                assert await storage.disable_tasks([r["name"] for r in rows[:10]]) == 10
+                assert await storage.enable_task("task0")
+                assert await storage.delete_tasks(["task1", "task2", "missing"]) == 2
+                return await storage.list_tasks()
+
+        tasks = asyncio.run(main())
+        assert len(tasks) == 49
+        disabled = {t["name"] for t in tasks if not t["enabled"]}
+        assert disabled == {f"task{i}" for i in range(3, 10)}
+
+    def test_shared_io_thread(self, tmp_path):
+        """Test a source and storage can share one I/O thread."""
+        io = IOThread()
+
+        async def main():
+            storage = AsyncSQLiteStorage(str(tmp_path / "tasks.db"), io_thread=io)
+            source = AsyncDatabaseTaskSource(
+                f"sqlite:///{tmp_path / 'tasks.db'}", io_thread=io
+            )
+            await storage.add_task("shared", "test_module", "test_func")
+            tasks = await source.load_tasks()
+            await storage.aclose()
+            await source.aclose()
+            return tasks
+
+        assert [t.name for t in asyncio.run(main())] == ["shared"]
+        # Neither wrapper owns the shared thread
+        assert asyncio.run(io.run(int, "1")) == 1
+        io.close()
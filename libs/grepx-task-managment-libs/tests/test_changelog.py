@@ -0,0 +1,212 @@
+"""Tests for the catalog changelog and change feed."""
+
+import sqlite3
+
+import pytest
+from task_management import TaskDefinition, TaskRegistry
+from task_management.sources import DatabaseTaskSource
+from task_management.storage import ChangeFeed, SQLiteStorage
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    storage = SQLiteStorage(path)
+    storage.add_tasks(
+        [
+            {"name": f"task{i}", "module_path": "m", "function_name": "f"}
+            for i in range(5)
+        ]
+    )
+    return path
+
+
+def changelog(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT seq, op, name FROM tasks_changes ORDER BY seq")
+    result = rows.fetchall()
+    conn.close()
+    return result
+
+
+def execute(db_path, sql, params=()):
+    conn = sqlite3.connect(db_path)
+    conn.execute(sql, params)
+    conn.commit()
+    conn.close()
+
+
+class TestChangelogTriggers:
+    """Test triggers record every write."""
+
+    def test_insert_update_delete(self, db_path):
+        """Test each write appends a numbered event."""
+        storage = SQLiteStorage(db_path)
+        storage.disable_task("task1")
+        storage.delete_task("task2")
+        execute(db_path, "UPDATE tasks SET name = 'renamed' WHERE name = 'task3'")
+
+        events = changelog(db_path)
+        seqs = [seq for seq, _, _ in events]
+        assert seqs == sorted(seqs) == list(range(1, len(events) + 1))
+        assert [(op, name) for _, op, name in events[5:]] == [
+            ("update", "task1"),
+            ("delete", "task2"),
+            ("delete", "task3"),
+            ("insert", "renamed"),
+        ]
+
+    def test_database_source_installs_triggers(self, tmp_path):
+        """Test the SQLAlchemy source records changes too."""
+        path = tmp_path / "tasks.db"
+        source = DatabaseTaskSource(f"sqlite:///{path}")
+        source.save_task(TaskDefinition(name="a", module_path="m", function_name="f"))
+        source.delete_task("a")
+        assert [(op, name) for _, op, name in changelog(str(path))] == [
+            ("insert", "a"),
+            ("delete", "a"),
+        ]
+
+
+class TestChangeFeed:
+    """Test consuming the changelog."""
+
+    def test_new_consumer_gets_snapshot(self, db_path):
+        """Test the first poll is a full snapshot and is acknowledged."""
+        feed = ChangeFeed(db_path, consumer="node-1")
+        assert feed.position() is None
+
+        batch = feed.poll()
+        assert batch.reset
+        names = sorted(c.name for c in batch.changes)
+        assert names == [f"task{i}" for i in range(5)]
+        feed.ack(batch)
+
+        assert feed.position() == 5
+        assert feed.poll().changes == []
+
+    def test_incremental_changes(self, db_path):
+        """Test later polls return only the latest state of changed tasks."""
+        feed = ChangeFeed(db_path, consumer="node-1")
+        feed.ack(feed.poll())
+
+        storage = SQLiteStorage(db_path)
+        storage.disable_task("task0")
+        storage.enable_task("task0")
+        storage.delete_task("task4")
+
+        batch = feed.poll()
+        assert not batch.reset
+        assert [(c.op, c.name) for c in batch.changes] == [
+            ("upsert", "task0"),
+            ("delete", "task4"),
+        ]
+        assert batch.changes[0].task.enabled is True
+        assert batch.last_seq == 8
+
+    def test_resumes_from_persisted_cursor(self, db_path):
+        """Test a new feed object for the same consumer resumes."""
+        ChangeFeed(db_path, consumer="node-1").ack(5)
+        SQLiteStorage(db_path).disable_task("task1")
+
+        batch = ChangeFeed(db_path, consumer="node-1").poll()
+        assert [c.name for c in batch.changes] == ["task1"]
+
+    def test_one_row_change_is_a_tiny_read(self, db_path, monkeypatch):
+        """Test polling one change issues a handful of indexed statements."""
+        feeds = [ChangeFeed(db_path, consumer=f"node-{i}") for i in range(3)]
+        for feed in feeds:
+            feed.ack(feed.poll())
+        SQLiteStorage(db_path).disable_task("task1")
+
+        statements = []
+        connect = ChangeFeed._connect
+
+        def traced(self):
+            conn = connect(self)
+            conn.set_trace_callback(statements.append)
+            return conn
+
+        monkeypatch.setattr(ChangeFeed, "_connect", traced)
+        for feed in feeds:
+            batch = feed.poll()
+            assert [c.name for c in batch.changes] == ["task1"]
+        selects = [s for s in statements if s.lstrip().startswith("SELECT")]
+        # Two cursor lookups, the changelog rows and the changed task row
+        assert len(selects) == 4 * len(feeds)
+        # The tasks table is only read by primary key
+        assert all("FROM tasks WHERE name IN" in s for s in selects if " tasks " in s)
+
+    def test_sync_registry(self, db_path):
+        """Test applying the feed to a registry."""
+        registry = TaskRegistry()
+        feed = ChangeFeed(db_path, consumer="node-1")
+        assert feed.sync(registry) == 5
+        assert len(registry.all()) == 5
+
+        storage = SQLiteStorage(db_path)
+        storage.disable_task("task0")
+        storage.delete_task("task1")
+        storage.add_task("task9", "m", "f")
+        feed.sync(registry)
+
+        assert sorted(registry.all()) == ["task2", "task3", "task4", "task9"]
+        assert feed.sync(registry) == 0
+
+    def test_sync_in_batches(self, db_path):
+        """Test a backlog larger than one batch is applied fully."""
+        registry = TaskRegistry()
+        feed = ChangeFeed(db_path, consumer="node-1", batch_size=2)
+        feed.sync(registry)
+        SQLiteStorage(db_path).add_tasks(
+            [
+                {"name": f"new{i}", "module_path": "m", "function_name": "f"}
+                for i in range(7)
+            ]
+        )
+        assert feed.sync(registry) == 7
+        assert len(registry.all()) == 12
+
+    def test_reserved_consumer(self, db_path):
+        """Test the compaction marker cannot be used as a consumer."""
+        with pytest.raises(ValueError):
+            ChangeFeed(db_path, consumer="__compacted__")
+
+
+class TestCompaction:
+    """Test changelog compaction."""
+
+    def test_keeps_unacknowledged_entries(self, db_path):
+        """Test only entries every consumer has read are removed."""
+        fast = ChangeFeed(db_path, consumer="fast")
+        slow = ChangeFeed(db_path, consumer="slow")
+        fast.ack(fast.poll())
+        slow.ack(slow.poll())
+        SQLiteStorage(db_path).disable_tasks(["task0", "task1"])
+        fast.ack(fast.poll())
+
+        assert fast.compact() == 5
+        assert [name for _, _, name in changelog(db_path)] == ["task0", "task1"]
+        assert [c.name for c in slow.poll().changes] == ["task0", "task1"]
+
+    def test_max_age_forces_resync(self, db_path):
+        """Test a consumer behind a forced compaction gets a snapshot."""
+        fast = ChangeFeed(db_path, consumer="fast")
+        slow = ChangeFeed(db_path, consumer="slow")
+        fast.ack(fast.poll())
+        slow.ack(slow.poll())
+        SQLiteStorage(db_path).delete_task("task0")
+
+        assert fast.compact(max_age=-1) == 6
+        assert changelog(db_path) == []
+
+        batch = slow.poll()
+        assert batch.reset
+        names = sorted(c.name for c in batch.changes)
+        assert names == ["task1", "task2", "task3", "task4"]
+        slow.ack(batch)
+        assert slow.poll().changes == []
+
+        # Sequence numbers continue after compaction
+        SQLiteStorage(db_path).delete_task("task1")
+        assert changelog(db_path)[0][0] == 7
@@ -0,0 +1,32 @@
+"""Import-time budget for the library."""
+
+from pathlib import Path
+
+from .importtime import best_import_profile, import_profile
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+# Generous enough for slow CI machines; the library itself needs ~50ms
+IMPORT_BUDGET_MS = 150
+
+HEAVY_MODULES = ("sqlalchemy", "celery", "hydra", "omegaconf", "pydantic")
+
+
+class TestImportTime:
+    """Test import cost of the library."""
+
+    def test_import_within_budget(self):
+        """Test ``import task_management`` stays under the budget."""
+        elapsed_ms, _ = best_import_profile("import task_management", [SRC_DIR])
+        assert elapsed_ms < IMPORT_BUDGET_MS, f"import took {elapsed_ms:.1f}ms"
+
+    def test_no_heavy_imports(self):
+        """Test optional dependencies are not imported eagerly."""
+        _, modules = import_profile(
+            "import task_management\n"
+            "from task_management.sources import DatabaseTaskSource\n"
+            "DatabaseTaskSource('sqlite:///:memory:')",
+            [SRC_DIR],
+        )
+        loaded = {m.split(".")[0] for m in modules}
+        assert not loaded & set(HEAVY_MODULES)
@@ -1,7 +1,10 @@
 """Tests for TaskManager."""
 
+import sqlite3
+
 import pytest
 from task_management import TaskRegistry, TaskManager, TaskDefinition
+from task_management.sources import ConfigTaskSource, DatabaseTaskSource
 
 
 class TestTaskManager:
@@ -91,3 +94,49 @@ class TestTaskManager:
         )
         assert manager.count() == 1
 
+
+    def test_load_from_source_streams(self):
+        """Test tasks are registered as the source yields them."""
+        registry = TaskRegistry()
+        manager = TaskManager(registry)
+        seen = []
+
+        class StreamingSource(ConfigTaskSource):
+            def iter_tasks(self, chunk_size=1000):
+                for task_def in self.load_tasks():
+                    seen.append(manager.count())
+                    yield task_def
+
+        source = StreamingSource(
+            {
+                "tasks": [
+                    {"name": f"t{i}", "module_path": "m", "function_name": "f"}
+                    for i in range(3)
+                ]
+            }
+        )
+        assert manager.load_from_source(source) == 3
+        assert seen == [0, 1, 2]
+
+    def test_load_from_source_failure(self, tmp_path):
+        """Test a failing source is logged and keeps what was registered."""
+        registry = TaskRegistry()
+        manager = TaskManager(registry)
+
+        class FailingSource(ConfigTaskSource):
+            def iter_tasks(self, chunk_size=1000):
+                yield from self.load_tasks()
+                raise sqlite3.OperationalError("disk I/O error")
+
+        source = FailingSource(
+            {"tasks": [{"name": "t0", "module_path": "m", "function_name": "f"}]}
+        )
+        assert manager.load_from_source(source) == 1
+        assert registry.get("t0") is not None
+
+        # Table dropped under an initialised source
+        db_source = DatabaseTaskSource(f"sqlite:///{tmp_path / 'tasks.db'}")
+        with db_source._engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE tasks")
+        assert manager.load_from_source(db_source) == 0
+        assert db_source.load_tasks() == []
@@ -1,5 +1,7 @@
 """Tests for task sources."""
 
+import sqlite3
+
 import pytest
 from task_management import TaskDefinition
 from task_management.sources import ConfigTaskSource, DatabaseTaskSource
@@ -54,3 +56,61 @@ class TestDatabaseTaskSource:
         assert source._engine is not None
         assert source._table is not None
 
+
+    def test_iter_tasks_streams_enabled_tasks(self, tmp_path):
+        """Test streaming tasks in chunks."""
+        source = DatabaseTaskSource(f"sqlite:///{tmp_path / 'tasks.db'}")
+        for i in range(25):
+            source.save_task(
+                TaskDefinition(
+                    name=f"test.task{i}",
+                    module_path="test_module",
+                    function_name="test_func",
+                    enabled=i != 0,
+                    tags=["bulk"],
+                )
+            )
+
+        streamed = list(source.iter_tasks(chunk_size=10))
+        assert len(streamed) == 24
+        assert streamed[0].tags == ["bulk"]
+        assert [t.name for t in streamed] == [t.name for t in source.load_tasks()]
+
+    def test_iter_tasks_fetches_in_chunks(self, tmp_path):
+        """Test rows are fetched ``chunk_size`` at a time, not all at once."""
+        from sqlalchemy import create_engine
+
+        path = tmp_path / "tasks.db"
+        source = DatabaseTaskSource(f"sqlite:///{path}")
+        source.save_tasks(
+            [
+                TaskDefinition(name=f"t{i}", module_path="m", function_name="f")
+                for i in range(25)
+            ]
+        )
+        fetches = []
+
+        class Cursor(sqlite3.Cursor):
+            def fetchmany(self, size=1):
+                rows = super().fetchmany(size)
+                fetches.append(len(rows))
+                return rows
+
+            def fetchall(self):
+                raise AssertionError("fetched every row at once")
+
+        class Connection(sqlite3.Connection):
+            def cursor(self, factory=Cursor):
+                return super().cursor(factory)
+
+        engine = create_engine(
+            "sqlite://", creator=lambda: sqlite3.connect(path, factory=Connection)
+        )
+        source._db = (engine, source._table)
+        stream = source.iter_tasks(chunk_size=10)
+        next(stream)
+        # Only the first batch has been read when the first task arrives
+        assert sum(fetches) <= 10
+        assert len(list(stream)) == 24
+        assert sum(fetches) == 25
+        assert max(fetches) == 10 and len(fetches) >= 3
@@ -7,6 +7,10 @@ VENV_DIR="venv"
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PID_FILE="$SCRIPT_DIR/logs/celery.pid"
 LOG_DIR="$SCRIPT_DIR/logs"
+# Written by the supervisor (supervisor.status_file): "name pid state" lines
+STATUS_FILE="$LOG_DIR/services.status"
+READY_TIMEOUT="${READY_TIMEOUT:-120}"
+STOP_TIMEOUT="${STOP_TIMEOUT:-90}"
 
 # Logging functions
 log() {
@@ -79,8 +83,7 @@ start_service() {
     log "Starting $name..."
     eval "$cmd >> $log_file 2>&1 &"
     local pid=$!
-    sleep 2
-    
+
     if ! is_running "$pid"; then
         log_error "$name failed to start. Check $log_file"
         return 1
@@ -90,7 +93,38 @@ start_service() {
     log "$name started (PID: $pid)"
 }
 
-# Stop a service
+# Wait until the supervisor reports every service ready
+wait_ready() {
+    local pid=$1
+    local deadline=$((SECONDS + READY_TIMEOUT))
+    while [ "$SECONDS" -lt "$deadline" ]; do
+        if ! is_running "$pid"; then
+            log_error "Supervisor exited. Check $LOG_DIR/supervisor.log"
+            return 1
+        fi
+        if grep -q "^supervisor ${pid} ready$" "$STATUS_FILE" 2>/dev/null; then
+            return 0
+        fi
+        sleep 0.1
+    done
+    log_error "Services not ready after ${READY_TIMEOUT}s"
+    return 1
+}
+
+# Wait for a process to exit; returns 1 on timeout
+wait_exit() {
+    local pid=$1
+    local timeout=$2
+    local deadline=$((SECONDS + timeout))
+    while is_running "$pid"; do
+        if [ "$SECONDS" -ge "$deadline" ]; then
+            return 1
+        fi
+        sleep 0.1
+    done
+}
+
+# Stop a service: SIGTERM drains it, SIGKILL only after STOP_TIMEOUT
 stop_service() {
     local name=$1
     if [ ! -f "$PID_FILE" ]; then
@@ -101,23 +135,32 @@ stop_service() {
     if [ -n "$pid" ] && is_running "$pid"; then
         log "Stopping $name (PID: $pid)..."
         kill "$pid" 2>/dev/null || true
-        sleep 2
-        
-        if is_running "$pid"; then
-            log "Force stopping $name..."
+
+        if ! wait_exit "$pid" "$STOP_TIMEOUT"; then
+            log "Force stopping $name after ${STOP_TIMEOUT}s..."
             kill -9 "$pid" 2>/dev/null || true
         fi
-        
-        remove_pid_from_file "$name" "$PID_FILE"
+
         log "$name stopped"
     fi
+    remove_pid_from_file "$name" "$PID_FILE"
 }
 
 # Check service status
 check_status() {
     log "Checking Celery service status..."
     echo ""
-    
+
+    local supervisor_pid=$(grep "^supervisor:" "$PID_FILE" 2>/dev/null | cut -d: -f2)
+    if [ -n "$supervisor_pid" ] && is_running "$supervisor_pid" && [ -f "$STATUS_FILE" ]; then
+        while read -r service pid state; do
+            echo "  Celery $service: ${state^^} (PID: $pid)"
+        done < "$STATUS_FILE"
+        echo ""
+        echo "  Flower UI: http://localhost:5555"
+        return 0
+    fi
+
     local services=("worker" "beat" "flower")
     local all_running=true
 
@@ -196,28 +239,24 @@ case "${1:-}" in
         cd "$SCRIPT_DIR"
 
         log "Starting Celery services..."
-        start_service "worker" "celery -A src.main worker --loglevel=info --pool=solo"
-        sleep 2
-        start_service "beat" "celery -A src.main beat --loglevel=info"
-        sleep 2
-        start_service "flower" "celery -A src.main flower --port=5555 --address=0.0.0.0"
-        sleep 2
+        # Worker processes, beat and flower, each in its own process
+        start_service "supervisor" "python src/main.py"
+        supervisor_pid=$(grep "^supervisor:" "$PID_FILE" | cut -d: -f2)
+        if ! wait_ready "$supervisor_pid"; then
+            exit 1
+        fi
         echo ""
         check_status
         ;;
 
     stop)
         log "Stopping Celery services..."
+        # The supervisor drains its services before exiting
+        stop_service "supervisor"
         stop_service "flower"
         stop_service "beat"
         stop_service "worker"
 
-        # Always do cleanup to ensure all processes are stopped
-        log "Cleaning up any remaining processes..."
-        pkill -9 -f "celery.*worker" 2>/dev/null || true
-        pkill -9 -f "celery.*beat" 2>/dev/null || true
-        pkill -9 -f "celery.*flower" 2>/dev/null || true
-
         [ -f "$PID_FILE" ] && rm -f "$PID_FILE" || true
 
         log "All Celery services stopped"
@@ -230,7 +269,6 @@ case "${1:-}" in
     restart)
         log "Restarting Celery services..."
         $0 stop
-        sleep 3
         $0 start
         ;;
 
@@ -279,8 +317,15 @@ case "${1:-}" in
         start_service "flower" "celery -A src.main flower --port=5555 --address=0.0.0.0"
         ;;
 
+    calibrate)
+        activate_venv
+        cd "$SCRIPT_DIR"
+        shift
+        python src/main.py calibrate "$@"
+        ;;
+
     *)
-        echo "Usage: ./run.sh {start|stop|restart|status|logs|kill|worker|beat|flower}"
+        echo "Usage: ./run.sh {start|stop|restart|status|logs|kill|worker|beat|flower|calibrate}"
         echo ""
         echo "Commands:"
         echo "  start    - Start worker, beat, and flower"
@@ -292,6 +337,7 @@ case "${1:-}" in
         echo "  worker   - Start worker only"
         echo "  beat     - Start beat only"
         echo "  flower   - Start flower only"
+        echo "  calibrate - Report and save per-task time limits [--dry-run]"
         exit 1
         ;;
 esac
\ No newline at end of file
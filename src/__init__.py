@@ -1,8 +1,16 @@
 """Celery Framework - A flexible Celery task management framework."""
-from .app import CeleryAppWrapper, create_app
 
 __version__ = "1.0.0"
 __all__ = [
     "CeleryAppWrapper",
     "create_app",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name: str):
+    # Defer importing Celery until the app factory is actually used
+    if name in __all__:
+        from . import app
+
+        return getattr(app, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
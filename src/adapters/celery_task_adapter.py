@@ -1,19 +1,114 @@
+import inspect
 import logging
-from typing import Dict, Any
+from dataclasses import replace
+from typing import Any, Dict, Iterable, Mapping, Optional
 
 from celery import Celery
 from task_management import TaskRegistry, TaskDefinition
 
+try:
+    from ..admission import ADMISSION_KEY, admission_policy
+    from ..breakers import (
+        BREAKER_KEY,
+        BreakerMetrics,
+        BreakerPolicy,
+        BreakerStore,
+        CircuitBreaker,
+        CircuitOpen,
+        breaker_config,
+        install_breaker,
+    )
+    from ..monitoring.calibration import CALIBRATE_KEY, TimeLimits, calibrated
+    from ..monitoring.profiler import PROFILE_KEY, TaskProfiler, profile_config
+    from ..monitoring.tracing import Tracer, get_tracer, trace_body
+    from ..retries import RETRY_KEY, install_retry, resolve_exceptions, retry_policy
+    from ..streaming import STREAM_KEY, StreamBackend, stream_generator, stream_options
+    from ..workflows import map_reduce
+except ImportError:
+    from admission import ADMISSION_KEY, admission_policy
+    from breakers import (
+        BREAKER_KEY,
+        BreakerMetrics,
+        BreakerPolicy,
+        BreakerStore,
+        CircuitBreaker,
+        CircuitOpen,
+        breaker_config,
+        install_breaker,
+    )
+    from monitoring.calibration import CALIBRATE_KEY, TimeLimits, calibrated
+    from monitoring.profiler import PROFILE_KEY, TaskProfiler, profile_config
+    from monitoring.tracing import Tracer, get_tracer, trace_body
+    from retries import RETRY_KEY, install_retry, resolve_exceptions, retry_policy
+    from streaming import STREAM_KEY, StreamBackend, stream_generator, stream_options
+    from workflows import map_reduce
+
 logger = logging.getLogger(__name__)
 
+DEFAULT_PROFILE_DIR = ".cache/profiles"
+
+# Task settings read by this framework rather than Celery
+FRAMEWORK_OPTIONS = (
+    PROFILE_KEY,
+    STREAM_KEY,
+    ADMISSION_KEY,
+    RETRY_KEY,
+    BREAKER_KEY,
+    CALIBRATE_KEY,
+)
+
+# Task options naming exception classes
+EXCEPTION_OPTIONS = ("autoretry_for", "dont_autoretry_for", "throws")
+
+# Celery's own autoretry options, replaced by a retry policy
+AUTORETRY_OPTIONS = (
+    "autoretry_for",
+    "dont_autoretry_for",
+    "retry_backoff",
+    "retry_backoff_max",
+    "retry_jitter",
+)
+
 
 class CeleryTaskAdapter:
     """Adapter to register tasks with Celery."""
 
-    def __init__(self, celery_app: Celery, registry: TaskRegistry):
+    def __init__(
+        self,
+        celery_app: Celery,
+        registry: TaskRegistry,
+        profile_dir: str = DEFAULT_PROFILE_DIR,
+        tracer: Optional[Tracer] = None,
+        stream_backend: Optional[StreamBackend] = None,
+        retry_policies: Optional[Mapping[str, Mapping]] = None,
+        default_retry_policy: str = "",
+        breaker_store: Optional[BreakerStore] = None,
+        breaker_policies: Optional[Mapping[str, Mapping]] = None,
+        time_limits: Optional[Mapping[str, TimeLimits]] = None,
+    ):
         self.celery_app = celery_app
         self.registry = registry
+        # Where tasks with a ``profile`` setting write their profiles
+        self.profile_dir = profile_dir
+        # Traces execute_async; defaults to the process-wide tracer
+        self.tracer = tracer
+        # Where generator tasks publish their chunks
+        self.stream_backend = stream_backend
+        # Named retry policies tasks refer to with ``retry: <name>``, and
+        # the one used by tasks with only ``autoretry_for``
+        self.retry_policies = retry_policies or {}
+        self.default_retry_policy = default_retry_policy
+        # Where breaker states are shared, and settings by breaker name
+        self.breaker_store = breaker_store
+        self.breaker_policies = breaker_policies or {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._breaker_metrics: Optional[BreakerMetrics] = None
+        # Calibrated limits by task name (see monitoring.calibration), and
+        # the ones applied at registration
+        self.time_limits = time_limits or {}
+        self.time_limit_changes: Dict[str, TimeLimits] = {}
         self._celery_tasks: Dict[str, Any] = {}
+        self._profilers: Dict[str, TaskProfiler] = {}
 
     def register_all(self) -> None:
         """Register all enabled tasks with Celery."""
@@ -23,15 +118,66 @@ class CeleryTaskAdapter:
             self.register_task(task_def)
 
         logger.info(f"✓ Registered {len(self._celery_tasks)} Celery tasks")
+        if self.time_limit_changes:
+            logger.info(
+                f"✓ Calibrated time limits of {len(self.time_limit_changes)} tasks"
+            )
 
     def register_task(self, task_def: TaskDefinition) -> bool:
         """Register a single task with Celery."""
         try:
             func = task_def.load_function()
+            policy = retry_policy(
+                task_def, self.retry_policies, self.default_retry_policy
+            )
+            options = self.compile_options(task_def.options, policy)
+            limits = self.time_limits.get(task_def.name)
+            if limits is not None and calibrated(task_def):
+                options["soft_time_limit"] = limits.soft
+                options["time_limit"] = limits.hard
+                self.time_limit_changes[task_def.name] = limits
+                logger.info(f"  Calibrated time limits of {task_def.name}: {limits}")
 
-            celery_task = self.celery_app.task(
-                name=task_def.name, **task_def.options
-            )(func)
+            if inspect.isgeneratorfunction(func):
+                if self.stream_backend is None:
+                    raise ValueError("generator task needs a stream backend")
+                func = stream_generator(
+                    func, self.stream_backend, stream_options(task_def)
+                )
+                logger.info(f"  Streaming chunks of {task_def.name}")
+
+            profile = profile_config(task_def)
+            if profile is not None:
+                profiler = TaskProfiler(task_def.name, self.profile_dir, profile)
+                func = profiler.wrap(func)
+                self._profilers[task_def.name] = profiler
+                logger.info(
+                    f"  Profiling {profile.rate:.1%} of {task_def.name} calls"
+                )
+
+            if self.tracer is not None and self.tracer.enabled:
+                # Separates the task body from the result write in traces
+                func = trace_body(func)
+
+            # Not shared: other apps in the process (tests, the task client)
+            # would otherwise pick this function up when they finalize
+            options.setdefault("shared", False)
+            celery_task = self.celery_app.task(name=task_def.name, **options)(func)
+            # Read by clients before submitting (see admission.task_route)
+            celery_task.admission = admission_policy(task_def)
+            breaker = breaker_config(task_def)
+            if breaker is not None:
+                # Before the retry policy, which then retries the
+                # dependency's errors but not refused calls
+                self._install_breaker(celery_task, *breaker)
+                if policy is not None and not issubclass(CircuitOpen, policy.exclude):
+                    policy = replace(policy, exclude=policy.exclude + (CircuitOpen,))
+            if policy is not None:
+                install_retry(celery_task, policy)
+                logger.info(
+                    f"  Retrying {task_def.name} up to {policy.max_retries} times "
+                    f"(backoff {policy.backoff:g}s, max {policy.max_delay:g}s)"
+                )
 
             self._celery_tasks[task_def.name] = celery_task
             logger.info(f"  ✓ {task_def.name}")
@@ -41,6 +187,60 @@ class CeleryTaskAdapter:
             logger.error(f"  ✗ Failed to register {task_def.name}: {e}")
             return False
 
+    @staticmethod
+    def compile_options(options: Mapping[str, Any], policy=None) -> Dict[str, Any]:
+        """
+        Celery task options of a task definition.
+
+        Drops this framework's settings, resolves exception names
+        (``"ConnectionError"``, ``"requests.exceptions.Timeout"``) to
+        classes and, with a retry policy, leaves retrying to the policy.
+
+        Args:
+            options: TaskDefinition options
+            policy: RetryPolicy of the task, if any
+
+        Returns:
+            Keyword arguments for ``Celery.task``
+
+        Raises:
+            ValueError: If an exception name does not resolve
+        """
+        compiled = {k: v for k, v in options.items() if k not in FRAMEWORK_OPTIONS}
+        for key in EXCEPTION_OPTIONS:
+            if key in compiled:
+                compiled[key] = resolve_exceptions(compiled[key])
+        if policy is not None:
+            for key in AUTORETRY_OPTIONS:
+                compiled.pop(key, None)
+            compiled["max_retries"] = policy.max_retries
+        return compiled
+
+    def _install_breaker(self, celery_task, name: str, overrides: Mapping) -> None:
+        unknown = set(overrides) - {"action", "on"}
+        if unknown:
+            # Thresholds belong to the breaker, shared by all its tasks
+            raise ValueError(f"Per-task breaker settings: {sorted(unknown)}")
+        breaker = self.get_breaker(name)
+        task_policy = BreakerPolicy.from_value(overrides, breaker.policy)
+        install_breaker(celery_task, breaker, task_policy.action, task_policy.on)
+        logger.info(f"  Guarding {celery_task.name} with breaker {name}")
+
+    def get_breaker(self, name: str) -> CircuitBreaker:
+        """Get (or create) the circuit breaker of a dependency."""
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            if self.breaker_store is None:
+                raise ValueError("breaker task needs a breaker store")
+            if self._breaker_metrics is None:
+                self._breaker_metrics = BreakerMetrics()
+            policy = BreakerPolicy.from_value(self.breaker_policies.get(name, {}))
+            breaker = CircuitBreaker(
+                name, self.breaker_store, policy, metrics=self._breaker_metrics
+            )
+            self._breakers[name] = breaker
+        return breaker
+
     def execute(self, task_name: str, *args, **kwargs) -> Any:
         """Execute task synchronously."""
         celery_task = self._celery_tasks.get(task_name)
@@ -55,7 +255,30 @@ class CeleryTaskAdapter:
         if not celery_task:
             raise ValueError(f"Task {task_name} not registered")
 
-        return celery_task.delay(*args, **kwargs)
+        tracer = self.tracer or get_tracer()
+        with tracer.publish(task_name) as headers:
+            return celery_task.apply_async(args, kwargs, headers=headers)
+
+    def map_reduce(
+        self,
+        map_task: str,
+        reduce_task: str,
+        iterable: Iterable[Any],
+        chunk_size: int = 1000,
+        **kwargs: Any,
+    ) -> Any:
+        """Map ``iterable`` in chunks and tree-reduce the partial results."""
+        for task_name in (map_task, reduce_task):
+            if task_name not in self._celery_tasks:
+                raise ValueError(f"Task {task_name} not registered")
+
+        return map_reduce(
+            self.celery_app, map_task, reduce_task, iterable, chunk_size, **kwargs
+        )
+
+    def get_profiler(self, task_name: str) -> Optional[TaskProfiler]:
+        """Get the sampling profiler of a task, if it has one."""
+        return self._profilers.get(task_name)
 
     def get_registered_tasks(self) -> list[str]:
         """Get list of registered task names."""
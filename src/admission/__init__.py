@@ -0,0 +1,22 @@
+"""Client-side admission control: backpressure on queue depth."""
+
+from .controller import (
+    AdmissionController,
+    AdmissionRejected,
+    QueueDepthCache,
+    build_admission,
+    task_route,
+)
+from .policy import ACTIONS, ADMISSION_KEY, AdmissionPolicy, admission_policy
+
+__all__ = [
+    "AdmissionController",
+    "AdmissionRejected",
+    "QueueDepthCache",
+    "build_admission",
+    "task_route",
+    "ACTIONS",
+    "ADMISSION_KEY",
+    "AdmissionPolicy",
+    "admission_policy",
+]
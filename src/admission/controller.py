@@ -0,0 +1,257 @@
+"""Admission control of task submissions on cached queue depth."""
+
+import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+from .policy import BLOCK, DELAY, AdmissionPolicy
+
+try:
+    from ..worker.autoscaler import BrokerQueueProbe, QueueProbe
+except ImportError:
+    from worker.autoscaler import BrokerQueueProbe, QueueProbe
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    """A submission was refused because its queue is too deep."""
+
+    def __init__(self, task_name: str, queue: str, depth: int, high_water: int):
+        super().__init__(
+            f"Task {task_name} rejected: queue {queue} holds {depth} messages "
+            f"(high-water mark {high_water})"
+        )
+        self.task_name = task_name
+        self.queue = queue
+        self.depth = depth
+        self.high_water = high_water
+
+
+@dataclass
+class _Depth:
+    # Depth at the last sample, when it was taken and what this process
+    # has submitted to the queue since
+    sampled: int = 0
+    at: float = float("-inf")
+    sent: int = 0
+
+
+class QueueDepthCache:
+    """
+    Queue depths sampled at most once per ``ttl`` seconds per queue.
+
+    Between samples, submissions made through ``sent`` are added to the
+    last sample, so a burst from this process is seen without another
+    round trip. When a refresh fails the last value is kept.
+    """
+
+    def __init__(
+        self,
+        probe: QueueProbe,
+        ttl: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if ttl <= 0:
+            # Blocked submissions pause one ttl between samples
+            raise ValueError("ttl must be positive")
+        self.probe = probe
+        self.ttl = ttl
+        self.clock = clock
+        self.samples = 0
+        self._depths: Dict[str, _Depth] = {}
+        self._lock = threading.Lock()
+
+    def depth(self, queue: str) -> int:
+        """Estimated messages waiting in ``queue``."""
+        with self._lock:
+            entry = self._depths.setdefault(queue, _Depth())
+            now = self.clock()
+            if now - entry.at >= self.ttl:
+                # Only one caller refreshes; the others keep the old value
+                entry.at = now
+                refresh = True
+            else:
+                refresh = False
+            if not refresh:
+                return entry.sampled + entry.sent
+
+        try:
+            (stats,) = self.probe.sample([queue])
+        except Exception as e:
+            logger.warning(f"Could not sample queue {queue}: {e}")
+            with self._lock:
+                return entry.sampled + entry.sent
+        with self._lock:
+            self.samples += 1
+            entry.sampled = stats.messages
+            entry.sent = 0
+            return entry.sampled
+
+    def sent(self, queue: str, count: int = 1) -> None:
+        """Record messages this process submitted to ``queue``."""
+        with self._lock:
+            self._depths.setdefault(queue, _Depth()).sent += count
+
+    def invalidate(self, queue: str) -> None:
+        """Sample ``queue`` again on the next ``depth`` call."""
+        with self._lock:
+            entry = self._depths.get(queue)
+            if entry is not None:
+                entry.at = float("-inf")
+
+
+class AdmissionController:
+    """
+    Hold back submissions to queues above their high-water mark.
+
+    Marks come from a task's ``admission`` metadata and from per-queue
+    marks; when both apply the lower one wins. The action is the task's,
+    or ``default``'s for queue marks alone:
+
+    - ``block``: wait (re-sampling once per ``ttl``) until the queue is
+      below ``low_water``, or reject after ``timeout`` seconds
+    - ``delay``: pause for ``delay`` seconds, then submit anyway, which
+      slows a producer down without failing it
+    - ``reject``: raise ``AdmissionRejected`` straight away
+
+    Example:
+        controller = AdmissionController(BrokerQueueProbe(app), {"celery": 10000})
+        controller.admit("tasks.add", "celery", policy)
+        app.send_task("tasks.add", ...)
+    """
+
+    def __init__(
+        self,
+        probe: QueueProbe,
+        queue_marks: Optional[Mapping[str, int]] = None,
+        default: AdmissionPolicy = AdmissionPolicy(),
+        ttl: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize controller.
+
+        Args:
+            probe: Source of queue depths
+            queue_marks: High-water mark per queue name
+            default: Action and timings for queue marks
+            ttl: Seconds a sampled depth is reused (> 0)
+            clock: Time source (for tests)
+            sleep: Pause function (for tests)
+        """
+        self.depths = QueueDepthCache(probe, ttl, clock)
+        self.queue_marks = dict(queue_marks or {})
+        self.default = default
+        self.clock = clock
+        self.sleep = sleep
+        # admitted / delayed / blocked / rejected submissions
+        self.stats: Counter = Counter()
+
+    def policy_for(
+        self, queue: str, task_policy: Optional[AdmissionPolicy] = None
+    ) -> Optional[AdmissionPolicy]:
+        """Effective policy of a submission, or None when nothing applies."""
+        marks = [
+            mark
+            for mark in (
+                task_policy.high_water if task_policy else 0,
+                self.queue_marks.get(queue, 0),
+            )
+            if mark > 0
+        ]
+        if not marks:
+            return None
+        base = task_policy or self.default
+        high_water = min(marks)
+        low_water = min(base.low_water, high_water)
+        return AdmissionPolicy(
+            high_water, base.action, low_water, base.timeout, base.delay
+        )
+
+    def admit(
+        self,
+        task_name: str,
+        queue: str,
+        task_policy: Optional[AdmissionPolicy] = None,
+    ) -> None:
+        """
+        Wait for room in ``queue`` or refuse, then count the submission.
+
+        Raises:
+            AdmissionRejected: If the policy rejects, or blocking timed out
+        """
+        policy = self.policy_for(queue, task_policy)
+        if policy is not None:
+            depth = self.depths.depth(queue)
+            if depth >= policy.high_water:
+                self._hold(task_name, queue, depth, policy)
+        self.stats["admitted"] += 1
+        self.depths.sent(queue)
+
+    def _hold(
+        self, task_name: str, queue: str, depth: int, policy: AdmissionPolicy
+    ) -> None:
+        if policy.action == DELAY:
+            self.stats["delayed"] += 1
+            self.sleep(policy.delay)
+            return
+        if policy.action == BLOCK:
+            self.stats["blocked"] += 1
+            deadline = self.clock() + policy.timeout
+            while depth >= policy.resume_below:
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    break
+                self.sleep(min(self.depths.ttl, remaining))
+                depth = self.depths.depth(queue)
+            else:
+                return
+        self.stats["rejected"] += 1
+        logger.warning(
+            f"✗ Rejected {task_name}: {queue} holds {depth} messages "
+            f"(high-water mark {policy.high_water})"
+        )
+        raise AdmissionRejected(task_name, queue, depth, policy.high_water)
+
+
+def task_route(
+    app, task_name: str, options: Optional[Mapping] = None
+) -> Tuple[str, Optional[AdmissionPolicy]]:
+    """
+    Queue ``send_task`` routes a task to, and the task's admission policy.
+
+    Args:
+        app: Celery app
+        task_name: Registered task name
+        options: Explicit send options (``queue``, ...)
+
+    Returns:
+        ``(queue name, policy)``; the policy is the ``admission`` attribute
+        the task adapter sets from the task's metadata, or None
+    """
+    route = app.amqp.router.route(dict(options or {}), task_name, (), {})
+    queue = route["queue"]
+    task = app.tasks.get(task_name)
+    return getattr(queue, "name", queue), getattr(task, "admission", None)
+
+
+def build_admission(app, cfg) -> AdmissionController:
+    """
+    Admission controller of an app from its ``admission`` config section.
+
+    Args:
+        app: Celery app whose broker is sampled
+        cfg: AdmissionConfig
+
+    Returns:
+        AdmissionController
+    """
+    default = AdmissionPolicy(action=cfg.action, timeout=cfg.timeout, delay=cfg.delay)
+    return AdmissionController(
+        BrokerQueueProbe(app), dict(cfg.queues), default=default, ttl=cfg.ttl
+    )
@@ -0,0 +1,82 @@
+"""Per-task backpressure settings."""
+
+from dataclasses import dataclass, replace
+from typing import Any, Mapping, Optional
+
+# Key in TaskDefinition.metadata (or options) with admission settings
+ADMISSION_KEY = "admission"
+
+BLOCK = "block"
+DELAY = "delay"
+REJECT = "reject"
+ACTIONS = (BLOCK, DELAY, REJECT)
+
+
+@dataclass(frozen=True)
+class AdmissionPolicy:
+    """What a submission does once its queue is above the high-water mark."""
+
+    # Queue depth at which submissions are held back (0: none of its own)
+    high_water: int = 0
+    # "block": wait for the queue to drain; "delay": pause the producer,
+    # then submit anyway; "reject": fail straight away
+    action: str = BLOCK
+    # block: submissions resume below this depth (0: below high_water)
+    low_water: int = 0
+    # block: seconds to wait before rejecting
+    timeout: float = 30.0
+    # delay: seconds each submission is held while above the mark
+    delay: float = 1.0
+
+    def __post_init__(self):
+        if self.action not in ACTIONS:
+            raise ValueError(f"Unknown admission action: {self.action!r}")
+        if self.low_water > self.high_water:
+            raise ValueError("low_water must not exceed high_water")
+
+    @property
+    def resume_below(self) -> int:
+        """Depth a blocked submission waits for."""
+        return self.low_water or self.high_water
+
+    @classmethod
+    def from_value(
+        cls, value: Any, default: Optional["AdmissionPolicy"] = None
+    ) -> "AdmissionPolicy":
+        """
+        Parse the ``admission`` metadata value.
+
+        Args:
+            value: A mapping of settings, or a bare high-water mark
+            default: Settings the mapping overrides
+
+        Returns:
+            AdmissionPolicy
+        """
+        default = default or cls()
+        if isinstance(value, int) and not isinstance(value, bool):
+            return replace(default, high_water=value)
+        if not isinstance(value, Mapping):
+            raise ValueError(f"Invalid admission setting: {value!r}")
+        fields = {"high_water", "action", "low_water", "timeout", "delay"}
+        unknown = set(value) - fields
+        if unknown:
+            raise ValueError(f"Unknown admission settings: {sorted(unknown)}")
+        return replace(
+            default,
+            high_water=int(value.get("high_water", default.high_water)),
+            action=str(value.get("action", default.action)),
+            low_water=int(value.get("low_water", default.low_water)),
+            timeout=float(value.get("timeout", default.timeout)),
+            delay=float(value.get("delay", default.delay)),
+        )
+
+
+def admission_policy(task_def) -> Optional[AdmissionPolicy]:
+    """Admission settings of a task definition, from metadata or options."""
+    value = task_def.metadata.get(ADMISSION_KEY)
+    if value is None:
+        value = task_def.options.get(ADMISSION_KEY)
+    if value is None:
+        return None
+    return AdmissionPolicy.from_value(value)
@@ -1,9 +1,12 @@
 import logging
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Union
 
 from celery import Celery
-from omegaconf import DictConfig
+
+if TYPE_CHECKING:
+    from omegaconf import DictConfig
 
 # Add src directory to path for task_management imports
 src_dir = Path(__file__).parent
@@ -11,13 +14,24 @@ if str(src_dir) not in sys.path:
     sys.path.insert(0, str(src_dir))
 
 from task_management import TaskRegistry, TaskManager
-from task_management.sources import DatabaseTaskSource, ConfigTaskSource
+from task_management.sources import (
+    ConfigTaskSource,
+    DatabaseTaskSource,
+    CompositeTaskSource,
+    DirectoryTaskSource,
+)
 
 # Handle both relative and absolute imports
 try:
     from .adapters.celery_task_adapter import CeleryTaskAdapter
+    from .breakers import build_breaker_store
+    from .config import Config, build_config, set_runtime_config, thaw
+    from .streaming import build_stream_backend
 except ImportError:
     from adapters.celery_task_adapter import CeleryTaskAdapter
+    from breakers import build_breaker_store
+    from config import Config, build_config, set_runtime_config, thaw
+    from streaming import build_stream_backend
 
 logger = logging.getLogger(__name__)
 
@@ -25,25 +39,42 @@ logger = logging.getLogger(__name__)
 class CeleryAppWrapper:
     """Wrapper for Celery app with task management."""
 
-    def __init__(self, celery_app: Celery, adapter: CeleryTaskAdapter):
+    def __init__(
+        self,
+        celery_app: Celery,
+        adapter: CeleryTaskAdapter,
+        config: Optional[Config] = None,
+        memory=None,
+    ):
         self.app = celery_app
         self.adapter = adapter
+        self.config = config
+        # TaskMemoryTracker with per-task memory growth statistics
+        self.memory = memory
+
+    @property
+    def registry(self) -> TaskRegistry:
+        """Task registry the app was built from."""
+        return self.adapter.registry
 
     def list_tasks(self) -> list[str]:
         """List registered tasks."""
         return self.adapter.get_registered_tasks()
 
 
-def create_app(cfg: DictConfig) -> CeleryAppWrapper:
+def create_app(cfg: Union[Config, "DictConfig"]) -> CeleryAppWrapper:
     """
     Create Celery application with task management.
 
     Args:
-        cfg: Hydra configuration
+        cfg: Runtime config, or a merged Hydra configuration to validate
 
     Returns:
         CeleryAppWrapper instance
     """
+    cfg = build_config(cfg)
+    set_runtime_config(cfg)
+
     logger.info(f"Creating Celery app: {cfg.app.name}")
 
     # Create Celery app
@@ -59,7 +90,7 @@ def create_app(cfg: DictConfig) -> CeleryAppWrapper:
         timezone=cfg.celery.timezone,
         enable_utc=cfg.celery.enable_utc,
         worker_prefetch_multiplier=cfg.worker.prefetch_multiplier,
-        worker_max_tasks_per_child=cfg.worker.max_tasks_per_child,
+        worker_max_tasks_per_child=cfg.worker.max_tasks_per_child or None,
         task_track_started=cfg.task.track_started,
         task_time_limit=cfg.task.time_limit,
         task_soft_time_limit=cfg.task.soft_time_limit,
@@ -68,32 +99,145 @@ def create_app(cfg: DictConfig) -> CeleryAppWrapper:
 
     logger.info("✓ Celery app configured")
 
+    # Per-task metrics endpoint
+    if cfg.metrics.enabled:
+        try:
+            from .monitoring import install_metrics
+        except ImportError:
+            from monitoring import install_metrics
+
+        install_metrics(
+            celery_app,
+            host=cfg.metrics.host,
+            port=cfg.metrics.port,
+        )
+
+    # Durable per-execution records for capacity planning
+    if cfg.history.enabled:
+        try:
+            from .monitoring import install_history
+        except ImportError:
+            from monitoring import install_history
+
+        install_history(
+            celery_app,
+            path=cfg.history.path,
+            batch_size=cfg.history.batch_size,
+            flush_interval=cfg.history.flush_interval,
+            max_pending=cfg.history.max_pending,
+            compact_interval=cfg.history.compact_interval,
+            raw_retention=cfg.history.raw_retention,
+            rollup_retention=cfg.history.rollup_retention,
+        )
+
+    # Trace context from publishers through queue wait to execution
+    tracer = None
+    if cfg.tracing.enabled:
+        try:
+            from .monitoring.tracing import build_exporter, install_tracing
+        except ImportError:
+            from monitoring.tracing import build_exporter, install_tracing
+
+        exporter = build_exporter(cfg.tracing.exporter, cfg.tracing.path)
+        tracer = install_tracing(
+            celery_app, exporter, sample_rate=cfg.tracing.sample_rate
+        ).tracer
+
+    # Per-task memory growth and memory-based child recycling
+    memory = None
+    if cfg.worker.track_memory or cfg.worker.max_memory_per_child:
+        try:
+            from .monitoring import install_memory_tracking
+        except ImportError:
+            from monitoring import install_memory_tracking
+
+        memory = install_memory_tracking(
+            celery_app,
+            max_memory_per_child=cfg.worker.max_memory_per_child * 1024 * 1024,
+        )
+
     # Setup task management
     registry = TaskRegistry()
     manager = TaskManager(registry)
 
-    # Load tasks based on source
-    source_type = cfg.tasks.get("source", "config")
+    # Load tasks from one source, or several merged by precedence
+    if cfg.tasks.sources:
+        logger.info(f"Loading tasks from {', '.join(cfg.tasks.sources)}...")
+        sources = []
+        for source_type in cfg.tasks.sources:
+            source = _build_source(source_type, cfg)
+            if source is not None:
+                sources.append((source_type, source))
+        manager.load_from_source(CompositeTaskSource(sources))
+    else:
+        source = _build_source(cfg.tasks.source, cfg)
+        if source is not None:
+            manager.load_from_source(source)
+
+    # Per-task limits calibrated from the history, within the global ones
+    time_limits = {}
+    if cfg.calibration.apply:
+        try:
+            from .monitoring.calibration import TimeLimits, load_limits
+        except ImportError:
+            from monitoring.calibration import TimeLimits, load_limits
+
+        ceiling = TimeLimits(cfg.task.soft_time_limit, cfg.task.time_limit)
+        time_limits = load_limits(
+            cfg.calibration.path, ceiling, floor=cfg.calibration.floor
+        )
 
+    # Register tasks with Celery
+    adapter = CeleryTaskAdapter(
+        celery_app,
+        registry,
+        profile_dir=cfg.profiling.directory,
+        tracer=tracer,
+        stream_backend=build_stream_backend(cfg.streaming),
+        retry_policies=cfg.retries.policies,
+        default_retry_policy=cfg.retries.default,
+        breaker_store=build_breaker_store(cfg.breakers),
+        breaker_policies=cfg.breakers.policies,
+        time_limits=time_limits,
+    )
+    adapter.register_all()
+
+    # Share task modules with prefork children copy-on-write
+    if cfg.worker.preload:
+        try:
+            from .worker import install_preload
+        except ImportError:
+            from worker import install_preload
+
+        install_preload(celery_app, registry, modules=cfg.tasks.modules)
+
+    return CeleryAppWrapper(celery_app, adapter, cfg, memory)
+
+
+def _build_source(source_type: str, cfg: Config):
+    """Create the task source named by ``source_type``."""
     if source_type == "database":
         logger.info("Loading tasks from database...")
-        source = DatabaseTaskSource(
+        return DatabaseTaskSource(
             db_uri=cfg.tasks.database.uri,
-            table=cfg.tasks.database.get("table", "tasks"),
+            table=cfg.tasks.database.table,
+            enabled=cfg.tasks.database.enabled,
+            tags=list(cfg.tasks.database.tags) or None,
+            module_path=cfg.tasks.database.module_path,
         )
-        manager.load_from_source(source)
 
-    elif source_type == "config":
+    if source_type == "config":
         logger.info("Loading tasks from configuration...")
-        config_dict = {"tasks": cfg.tasks.get("task_list", [])}
-        source = ConfigTaskSource(config_dict)
-        manager.load_from_source(source)
-
-    else:
-        logger.warning(f"Unknown task source: {source_type}")
-
-    # Register tasks with Celery
-    adapter = CeleryTaskAdapter(celery_app, registry)
-    adapter.register_all()
+        config_dict = {"tasks": thaw(cfg.tasks.task_list)}
+        return ConfigTaskSource(config_dict)
+
+    if source_type == "directory":
+        logger.info("Discovering tasks in directories...")
+        return DirectoryTaskSource(
+            directories=cfg.tasks.directories,
+            modules=cfg.tasks.modules,
+            index_path=cfg.tasks.discovery_index or None,
+        )
 
-    return CeleryAppWrapper(celery_app, adapter)
+    logger.warning(f"Unknown task source: {source_type}")
+    return None
@@ -0,0 +1,43 @@
+"""Circuit breakers shedding work for unavailable dependencies."""
+
+from .breaker import (
+    ACTIONS,
+    BREAKER_KEY,
+    BreakerMetrics,
+    BreakerPolicy,
+    CircuitBreaker,
+    CircuitOpen,
+    breaker_config,
+)
+from .store import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    BreakerState,
+    BreakerStore,
+    FileBreakerStore,
+    MemoryBreakerStore,
+    RedisBreakerStore,
+    build_breaker_store,
+)
+from .task import install_breaker
+
+__all__ = [
+    "ACTIONS",
+    "BREAKER_KEY",
+    "BreakerMetrics",
+    "BreakerPolicy",
+    "CircuitBreaker",
+    "CircuitOpen",
+    "breaker_config",
+    "CLOSED",
+    "HALF_OPEN",
+    "OPEN",
+    "BreakerState",
+    "BreakerStore",
+    "FileBreakerStore",
+    "MemoryBreakerStore",
+    "RedisBreakerStore",
+    "build_breaker_store",
+    "install_breaker",
+]
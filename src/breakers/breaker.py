@@ -0,0 +1,273 @@
+"""Circuit breakers guarding calls to a downstream dependency."""
+
+import logging
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Mapping, Optional, Tuple
+
+from .store import CLOSED, HALF_OPEN, OPEN, STATES, BreakerState, BreakerStore
+
+try:
+    from ..monitoring.metrics import REGISTRY, MetricsRegistry
+    from ..retries import resolve_exceptions
+except ImportError:
+    from monitoring.metrics import REGISTRY, MetricsRegistry
+    from retries import resolve_exceptions
+
+logger = logging.getLogger(__name__)
+
+# Key in TaskDefinition.metadata (or options) naming the task's breaker
+BREAKER_KEY = "breaker"
+
+FAIL = "fail"
+DEFER = "defer"
+ACTIONS = (FAIL, DEFER)
+
+_FIELDS = {"failure_threshold", "reset_timeout", "half_open_max", "on", "action"}
+
+
+class CircuitOpen(Exception):
+    """A call was refused because its dependency's breaker is open."""
+
+    def __init__(self, breaker: str, retry_after: float):
+        super().__init__(
+            f"Circuit breaker {breaker} is open; retry in {retry_after:.1f}s"
+        )
+        self.breaker = breaker
+        self.retry_after = retry_after
+
+    def __reduce__(self):
+        # Task results carry the exception; keep it picklable
+        return type(self), (self.breaker, self.retry_after)
+
+
+@dataclass(frozen=True)
+class BreakerPolicy:
+    """When a breaker opens and how it recovers."""
+
+    # Consecutive failures that open the breaker
+    failure_threshold: int = 5
+    # Seconds the breaker stays open before trial calls are let through
+    reset_timeout: float = 30.0
+    # Trial calls at a time while half-open
+    half_open_max: int = 1
+    # Exceptions that count as failures of the dependency
+    on: Tuple[type, ...] = (Exception,)
+    # What refused calls do: "fail" raises CircuitOpen, "defer" retries
+    # the task once the breaker may have closed
+    action: str = FAIL
+
+    def __post_init__(self):
+        if self.failure_threshold < 1 or self.half_open_max < 1:
+            raise ValueError("failure_threshold and half_open_max must be >= 1")
+        if self.reset_timeout <= 0:
+            raise ValueError("reset_timeout must be positive")
+        if self.action not in ACTIONS:
+            raise ValueError(f"Unknown breaker action: {self.action!r}")
+
+    @classmethod
+    def from_value(
+        cls, value: Mapping, default: Optional["BreakerPolicy"] = None
+    ) -> "BreakerPolicy":
+        """Parse breaker settings; ``on`` holds exception names."""
+        default = default or cls()
+        unknown = set(value) - _FIELDS
+        if unknown:
+            raise ValueError(f"Unknown breaker settings: {sorted(unknown)}")
+        on = resolve_exceptions(value["on"]) if "on" in value else default.on
+        return replace(
+            default,
+            failure_threshold=int(
+                value.get("failure_threshold", default.failure_threshold)
+            ),
+            reset_timeout=float(value.get("reset_timeout", default.reset_timeout)),
+            half_open_max=int(value.get("half_open_max", default.half_open_max)),
+            on=on,
+            action=str(value.get("action", default.action)),
+        )
+
+
+class BreakerMetrics:
+    """Breaker states and transitions, for the metrics endpoint."""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY):
+        self.state = registry.gauge(
+            "celery_breaker_state",
+            "Breaker state seen by this process (0 closed, 1 half-open, 2 open).",
+            ["breaker"],
+        )
+        self.transitions = registry.counter(
+            "celery_breaker_transitions_total",
+            "Breaker state changes made by this process.",
+            ["breaker", "from_state", "to_state"],
+        )
+        self.rejected = registry.counter(
+            "celery_breaker_rejected_total",
+            "Task calls refused by an open breaker.",
+            ["breaker", "task", "action"],
+        )
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker over a shared state store.
+
+    Closed, calls run and consecutive failures are counted; at
+    ``failure_threshold`` the breaker opens and calls are refused for
+    ``reset_timeout`` seconds. Then it turns half-open and lets
+    ``half_open_max`` trial calls through: a success closes it, a failure
+    opens it again. Every process using the same store and name sees the
+    same state.
+
+    Example:
+        breaker = CircuitBreaker("payments_api", FileBreakerStore())
+        if not breaker.allow():
+            raise CircuitOpen(breaker.name, breaker.retry_after())
+        try:
+            charge()
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+    """
+
+    def __init__(
+        self,
+        name: str,
+        store: BreakerStore,
+        policy: BreakerPolicy = BreakerPolicy(),
+        metrics: Optional[BreakerMetrics] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initialize breaker.
+
+        Args:
+            name: Dependency name; tasks using it share the breaker
+            store: Where the state is kept
+            policy: Thresholds and timings
+            metrics: Where transitions are counted (None: not recorded)
+            clock: Wall-clock time source, shared between hosts
+        """
+        self.name = name
+        self.store = store
+        self.policy = policy
+        self.metrics = metrics
+        self.clock = clock
+
+    @property
+    def state(self) -> BreakerState:
+        """Current shared state."""
+        return self.store.get(self.name)
+
+    def allow(self) -> bool:
+        """Whether a call may run now; takes a trial slot when half-open."""
+        state = self.store.get(self.name)
+        self._observe(state)
+        if state.state == CLOSED:
+            return True
+        now = self.clock()
+        reset = self.policy.reset_timeout
+        if state.state == OPEN and now < state.changed_at + reset:
+            return False
+
+        def probe(s: BreakerState) -> BreakerState:
+            if s.state == CLOSED:
+                return s
+            expired = now >= s.changed_at + reset
+            if s.state == OPEN:
+                return BreakerState(HALF_OPEN, s.failures, now, 1) if expired else s
+            if s.probes < self.policy.half_open_max:
+                return replace(s, probes=s.probes + 1)
+            if expired:
+                # Trial calls never reported back (their worker died)
+                return BreakerState(HALF_OPEN, s.failures, now, 1)
+            return s
+
+        old, new = self.store.update(self.name, probe)
+        self._transitioned(old, new)
+        return new.state == CLOSED or new != old
+
+    def record_success(self) -> None:
+        """Report a call that succeeded; closes a half-open breaker."""
+        state = self.store.get(self.name)
+        if state.state == CLOSED and state.failures == 0:
+            # The common case stays read-only
+            return
+
+        def succeed(s: BreakerState) -> BreakerState:
+            if s.state == HALF_OPEN:
+                return BreakerState(CLOSED, 0, self.clock(), 0)
+            if s.state == CLOSED and s.failures:
+                return replace(s, failures=0)
+            return s
+
+        self._transitioned(*self.store.update(self.name, succeed))
+
+    def record_failure(self) -> None:
+        """Report a failed call; may open the breaker."""
+
+        def fail(s: BreakerState) -> BreakerState:
+            now = self.clock()
+            failures = s.failures + 1
+            if s.state == HALF_OPEN:
+                return BreakerState(OPEN, failures, now, 0)
+            if s.state == OPEN:
+                # A call admitted before the breaker opened
+                return s
+            if failures >= self.policy.failure_threshold:
+                return BreakerState(OPEN, failures, now, 0)
+            return replace(s, failures=failures)
+
+        self._transitioned(*self.store.update(self.name, fail))
+
+    def retry_after(self) -> float:
+        """Seconds until trial calls may be let through again."""
+        state = self.store.get(self.name)
+        if state.state == CLOSED:
+            return 0.0
+        remaining = state.changed_at + self.policy.reset_timeout - self.clock()
+        return max(remaining, 0.0)
+
+    def reset(self) -> None:
+        """Close the breaker and forget its failures."""
+        self.store.reset(self.name)
+        self._observe(BreakerState())
+
+    def _observe(self, state: BreakerState) -> None:
+        if self.metrics is not None:
+            self.metrics.state.labels(self.name).set(STATES.index(state.state))
+
+    def _transitioned(self, old: BreakerState, new: BreakerState) -> None:
+        if old.state == new.state:
+            return
+        self._observe(new)
+        if self.metrics is not None:
+            self.metrics.transitions.labels(self.name, old.state, new.state).inc()
+        message = f"Circuit breaker {self.name}: {old.state} -> {new.state}"
+        if new.state == OPEN:
+            logger.warning(f"✗ {message} after {new.failures} failures")
+        else:
+            logger.info(f"✓ {message}")
+
+
+def breaker_config(task_def) -> Optional[Tuple[str, Mapping[str, Any]]]:
+    """
+    Breaker of a task definition, from metadata or options.
+
+    The value is a breaker name, or a mapping with a ``name`` and settings
+    that override the breaker's for this task (``action`` in particular).
+
+    Returns:
+        ``(name, overrides)``, or None when the task has no breaker
+    """
+    value = task_def.metadata.get(BREAKER_KEY)
+    if value is None:
+        value = task_def.options.get(BREAKER_KEY)
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value, {}
+    if isinstance(value, Mapping) and isinstance(value.get("name"), str):
+        return value["name"], {k: v for k, v in value.items() if k != "name"}
+    raise ValueError(f"Invalid breaker setting: {value!r}")
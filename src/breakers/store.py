@@ -0,0 +1,196 @@
+"""Circuit breaker state shared by a process, a node or the fleet."""
+
+import fcntl
+import json
+import os
+import re
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+STATES = (CLOSED, HALF_OPEN, OPEN)
+
+
+@dataclass(frozen=True)
+class BreakerState:
+    """State of one breaker."""
+
+    state: str = CLOSED
+    # Consecutive failures
+    failures: int = 0
+    # Wall-clock time of the last state change (shared between hosts)
+    changed_at: float = 0.0
+    # Trial calls admitted since the breaker turned half-open
+    probes: int = 0
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, raw) -> "BreakerState":
+        return cls(**json.loads(raw)) if raw else cls()
+
+
+Update = Callable[[BreakerState], BreakerState]
+
+
+class BreakerStore:
+    """
+    Storage of breaker states by name.
+
+    ``update`` is an atomic read-modify-write, so processes sharing a
+    store agree on transitions (only one of them opens or probes).
+    """
+
+    def get(self, name: str) -> BreakerState:
+        """Current state of a breaker (closed when unknown)."""
+        raise NotImplementedError
+
+    def update(self, name: str, fn: Update) -> Tuple[BreakerState, BreakerState]:
+        """
+        Apply ``fn`` to a breaker's state atomically.
+
+        Returns:
+            ``(old, new)`` states
+        """
+        raise NotImplementedError
+
+    def reset(self, name: str) -> None:
+        """Forget a breaker's state."""
+        raise NotImplementedError
+
+
+class MemoryBreakerStore(BreakerStore):
+    """Breaker states of this process only (tests, single-process workers)."""
+
+    def __init__(self):
+        self._states: Dict[str, BreakerState] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> BreakerState:
+        return self._states.get(name, BreakerState())
+
+    def update(self, name: str, fn: Update) -> Tuple[BreakerState, BreakerState]:
+        with self._lock:
+            old = self._states.get(name, BreakerState())
+            new = fn(old)
+            self._states[name] = new
+            return old, new
+
+    def reset(self, name: str) -> None:
+        with self._lock:
+            self._states.pop(name, None)
+
+
+class FileBreakerStore(BreakerStore):
+    """
+    Breaker states as JSON files in a local directory.
+
+    Shared by every process on the host. Updates hold an exclusive
+    ``flock`` on the breaker's lock file; states are written to a
+    temporary file and renamed, so reads need no lock.
+    """
+
+    def __init__(self, directory: str = ".cache/breakers"):
+        self.directory = Path(directory)
+
+    def _path(self, name: str, suffix: str = ".json") -> Path:
+        return self.directory / (re.sub(r"[^A-Za-z0-9_.-]", "_", name) + suffix)
+
+    def get(self, name: str) -> BreakerState:
+        try:
+            return BreakerState.from_json(self._path(name).read_text())
+        except FileNotFoundError:
+            return BreakerState()
+
+    def update(self, name: str, fn: Update) -> Tuple[BreakerState, BreakerState]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self._path(name, ".lock"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            old = self.get(name)
+            new = fn(old)
+            if new != old:
+                path = self._path(name)
+                tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+                tmp.write_text(new.to_json())
+                os.replace(tmp, path)
+            return old, new
+        finally:
+            os.close(fd)
+
+    def reset(self, name: str) -> None:
+        try:
+            self._path(name).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class RedisBreakerStore(BreakerStore):
+    """
+    Breaker states in Redis, shared by the fleet.
+
+    Updates are optimistic ``WATCH``/``MULTI`` transactions, retried when
+    another process changed the breaker in between.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/1",
+        prefix: str = "breaker:",
+    ):
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._watch_error = redis.WatchError
+
+    def _key(self, name: str) -> str:
+        return f"{self.prefix}{name}"
+
+    def get(self, name: str) -> BreakerState:
+        return BreakerState.from_json(self.client.get(self._key(name)))
+
+    def update(self, name: str, fn: Update) -> Tuple[BreakerState, BreakerState]:
+        key = self._key(name)
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    old = BreakerState.from_json(pipe.get(key))
+                    new = fn(old)
+                    if new == old:
+                        pipe.unwatch()
+                        return old, new
+                    pipe.multi()
+                    pipe.set(key, new.to_json())
+                    pipe.execute()
+                    return old, new
+                except self._watch_error:
+                    continue
+
+    def reset(self, name: str) -> None:
+        self.client.delete(self._key(name))
+
+
+def build_breaker_store(cfg) -> BreakerStore:
+    """
+    Create the breaker store named in configuration.
+
+    Args:
+        cfg: ``BreakersConfig``
+
+    Returns:
+        BreakerStore instance
+    """
+    if cfg.backend == "file":
+        return FileBreakerStore(cfg.directory)
+    if cfg.backend == "redis":
+        return RedisBreakerStore(cfg.url)
+    if cfg.backend == "memory":
+        return MemoryBreakerStore()
+    raise ValueError(f"Unknown breaker backend: {cfg.backend}")
@@ -0,0 +1,58 @@
+"""Run a Celery task behind its dependency's circuit breaker."""
+
+import functools
+from typing import Optional, Tuple
+
+from celery.exceptions import Retry
+
+from .breaker import DEFER, CircuitBreaker, CircuitOpen
+
+
+def install_breaker(
+    task,
+    breaker: CircuitBreaker,
+    action: Optional[str] = None,
+    on: Optional[Tuple[type, ...]] = None,
+) -> None:
+    """
+    Guard ``task`` with ``breaker``.
+
+    Replaces ``task.run``. While the breaker is open the function is not
+    called: with the ``fail`` action the task raises ``CircuitOpen``
+    straight away, with ``defer`` it is retried once the breaker may let
+    calls through again (counting against ``max_retries``). Install
+    before a retry policy so retries see the dependency's own errors, and
+    exclude ``CircuitOpen`` from that policy so refusals still fail fast.
+
+    Args:
+        task: Registered Celery task
+        breaker: Breaker of the task's dependency
+        action: "fail" or "defer" (default: the breaker policy's)
+        on: Exceptions counted as failures (default: the policy's)
+    """
+    action = action or breaker.policy.action
+    on = on or breaker.policy.on
+    run = task.run
+
+    @functools.wraps(run)
+    def guarded(*args, **kwargs):
+        if not breaker.allow():
+            retry_after = breaker.retry_after()
+            if breaker.metrics is not None:
+                breaker.metrics.rejected.labels(breaker.name, task.name, action).inc()
+            error = CircuitOpen(breaker.name, retry_after)
+            if action == DEFER and not task.request.called_directly:
+                raise task.retry(exc=error, countdown=max(retry_after, 1.0))
+            raise error
+        try:
+            result = run(*args, **kwargs)
+        except Retry:
+            raise
+        except on:
+            breaker.record_failure()
+            raise
+        breaker.record_success()
+        return result
+
+    task._breaker_run, task.run = run, guarded
+    task.breaker = breaker
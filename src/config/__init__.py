@@ -4,19 +4,55 @@ from .schemas import (
     AppConfig,
     CeleryConfig,
     WorkerConfig,
+    SupervisorConfig,
+    AutoscalerConfig,
     TaskConfig,
     TasksConfig,
+    TaskDatabaseConfig,
     TaskDirectoryConfig,
+    MetricsConfig,
+    HistoryConfig,
+    CalibrationConfig,
+    ProfilingConfig,
+    TracingConfig,
+    StreamingConfig,
+    AdmissionConfig,
+    RetriesConfig,
+    BreakersConfig,
     register_configs
 )
+from .runtime import (
+    build_config,
+    freeze,
+    thaw,
+    get_runtime_config,
+    set_runtime_config,
+)
 
 __all__ = [
     "Config",
     "AppConfig",
     "CeleryConfig",
     "WorkerConfig",
+    "SupervisorConfig",
+    "AutoscalerConfig",
     "TaskConfig",
     "TasksConfig",
+    "TaskDatabaseConfig",
     "TaskDirectoryConfig",
-    "register_configs"
-]
\ No newline at end of file
+    "MetricsConfig",
+    "HistoryConfig",
+    "CalibrationConfig",
+    "ProfilingConfig",
+    "TracingConfig",
+    "StreamingConfig",
+    "AdmissionConfig",
+    "RetriesConfig",
+    "BreakersConfig",
+    "register_configs",
+    "build_config",
+    "freeze",
+    "thaw",
+    "get_runtime_config",
+    "set_runtime_config",
+]
@@ -0,0 +1,160 @@
+"""Validate merged configuration into the frozen runtime ``Config``."""
+
+import types
+from collections.abc import Mapping
+from dataclasses import MISSING, fields, is_dataclass
+from typing import Any, Optional, Union, get_args, get_origin, get_type_hints
+
+from .schemas import Config
+
+_TRUE = {"true", "yes", "on", "1"}
+_FALSE = {"false", "no", "off", "0"}
+
+_current: Optional[Config] = None
+
+
+def build_config(source: Any) -> Config:
+    """
+    Validate configuration against the schemas and freeze it.
+
+    Args:
+        source: Merged OmegaConf config, plain dict or an existing Config
+
+    Returns:
+        Immutable Config
+
+    Raises:
+        ValueError: If a value has the wrong type or a section has unknown keys
+    """
+    if isinstance(source, Config):
+        return source
+    if not isinstance(source, dict):
+        from omegaconf import OmegaConf
+
+        # Resolve interpolations once, here, instead of on every access
+        source = OmegaConf.to_container(source, resolve=True)
+    return _build(Config, source, "")
+
+
+def freeze(value: Any) -> Any:
+    """Recursively convert dicts/lists to read-only mappings/tuples."""
+    if isinstance(value, Mapping):
+        return types.MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Recursively convert read-only mappings/tuples back to dicts/lists."""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [thaw(v) for v in value]
+    return value
+
+
+def set_runtime_config(cfg: Config) -> None:
+    """Publish the process-wide runtime config (done by ``create_app``)."""
+    global _current
+    _current = cfg
+
+
+def get_runtime_config() -> Config:
+    """Get the process-wide runtime config for use in task code."""
+    if _current is None:
+        raise RuntimeError("Runtime config not set; create the app first")
+    return _current
+
+
+def _build(cls, data: Any, path: str):
+    if not isinstance(data, Mapping):
+        raise ValueError(f"{path or 'config'}: expected a mapping, got {_type(data)}")
+
+    hints = get_type_hints(cls)
+    names = [f.name for f in fields(cls)]
+    unknown = [key for key in data if key not in names]
+    kwargs = {}
+
+    if cls is Config:
+        kwargs["extra"] = freeze({key: data[key] for key in unknown})
+        unknown = []
+    if unknown:
+        raise ValueError(f"{path or 'config'}: unknown keys {sorted(unknown)}")
+
+    for f in fields(cls):
+        key = _join(path, f.name)
+        if f.name in kwargs:
+            continue
+        if f.name in data:
+            kwargs[f.name] = _convert(hints[f.name], data[f.name], key)
+        elif f.default is MISSING and f.default_factory is MISSING:
+            raise ValueError(f"{key}: missing required value")
+
+    return cls(**kwargs)
+
+
+def _convert(tp: Any, value: Any, path: str) -> Any:
+    origin = get_origin(tp)
+
+    if tp is Any:
+        return freeze(value)
+
+    if origin is Union or origin is types.UnionType:
+        args = [a for a in get_args(tp) if a is not type(None)]
+        if value is None and len(args) < len(get_args(tp)):
+            return None
+        return _convert(args[0], value, path)
+
+    if is_dataclass(tp):
+        return _build(tp, value, path)
+
+    if origin is tuple:
+        if not isinstance(value, (list, tuple)):
+            raise ValueError(f"{path}: expected a list, got {_type(value)}")
+        item_type = get_args(tp)[0]
+        return tuple(
+            _convert(item_type, item, f"{path}[{i}]") for i, item in enumerate(value)
+        )
+
+    if origin is dict:
+        if not isinstance(value, Mapping):
+            raise ValueError(f"{path}: expected a mapping, got {_type(value)}")
+        return freeze(value)
+
+    if tp is bool:
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, str) and value.lower() in _TRUE | _FALSE:
+            return value.lower() in _TRUE
+    elif tp is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        if isinstance(value, str):
+            try:
+                return int(value)
+            except ValueError:
+                pass
+    elif tp is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        if isinstance(value, str):
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    elif tp is str:
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            return str(value)
+    else:
+        return value
+
+    raise ValueError(f"{path}: expected {tp.__name__}, got {_type(value)} {value!r}")
+
+
+def _join(path: str, key: str) -> str:
+    return f"{path}.{key}" if path else key
+
+
+def _type(value: Any) -> str:
+    return type(value).__name__
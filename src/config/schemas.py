@@ -1,10 +1,15 @@
-"""Configuration schemas using Hydra dataclasses."""
+"""Configuration schemas using Hydra dataclasses.
+
+The schemas double as the runtime configuration: they are frozen and
+slotted, so a validated ``Config`` is immutable and attribute access is a
+plain slot lookup. Free-form values (``Dict``/``Any`` fields) are stored as
+read-only mappings and tuples.
+"""
 from dataclasses import dataclass, field
-from typing import List
-from hydra.core.config_store import ConfigStore
+from typing import Any, Dict, Optional, Tuple
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AppConfig:
     """Application metadata configuration."""
     name: str = "celery_framework"
@@ -12,26 +17,86 @@ class AppConfig:
     environment: str = "local"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CeleryConfig:
     """Celery broker and serialization configuration."""
     broker_url: str = "redis://localhost:6379/0"
     result_backend: str = "redis://localhost:6379/1"
     task_serializer: str = "json"
     result_serializer: str = "json"
-    accept_content: List[str] = field(default_factory=lambda: ["json"])
+    accept_content: Tuple[str, ...] = ("json",)
     timezone: str = "Asia/Kolkata"
     enable_utc: bool = True
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class WorkerConfig:
     """Worker process configuration."""
     prefetch_multiplier: int = 1
+    # Recycle a pool child after this many tasks (0: never)
     max_tasks_per_child: int = 50
+    # Recycle a pool child once its peak RSS exceeds this many MiB (0: never)
+    max_memory_per_child: int = 0
+    # Attribute RSS growth to task names (one /proc read before and after)
+    track_memory: bool = True
+    pool: str = "solo"
+    # Pool processes for the prefork pool (0: one per CPU)
+    concurrency: int = 0
+    # Import task modules and gc.freeze() in the parent before forking
+    preload: bool = True
+    # Preload and freeze the template the supervisor forks services from
+    fork_server: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class SupervisorConfig:
+    """Process supervisor of ``python src/main.py``."""
+    # Worker processes per node (0: one per CPU, or one for prefork)
+    workers: int = 0
+    beat: bool = True
+    flower: bool = True
+    flower_port: int = 5555
+    # Seconds a service may take to report ready before it is restarted
+    ready_timeout: float = 60.0
+    # Seconds a service may take to drain after SIGTERM before SIGKILL
+    stop_timeout: float = 60.0
+    # Restart delay, doubling per consecutive crash up to backoff_max
+    backoff: float = 1.0
+    backoff_max: float = 60.0
+    # Seconds of uptime after which a crash counts as the first again
+    stable_after: float = 60.0
+    # "name pid state" lines for run.sh ("": none)
+    status_file: str = "logs/services.status"
+
 
+@dataclass(frozen=True, slots=True)
+class AutoscalerConfig:
+    """Queue-backlog autoscaling of worker capacity."""
+    enabled: bool = False
+    # "processes" (supervisor worker processes) or "pool" (prefork pool
+    # processes of running workers, through remote control)
+    mode: str = "processes"
+    queues: Tuple[str, ...] = ("celery",)
+    # Seconds between backlog samples
+    interval: float = 5.0
+    min_workers: int = 1
+    # 0: two per CPU
+    max_workers: int = 0
+    # Waiting messages one worker is expected to keep up with
+    target_backlog: int = 10
+    # Scale down once fewer workers would each have at most this share of
+    # target_backlog
+    scale_down_ratio: float = 0.5
+    cooldown_up: float = 15.0
+    cooldown_down: float = 120.0
+    # Workers added / removed per decision (0: no limit)
+    max_step_up: int = 0
+    max_step_down: int = 1
+    # Seconds an undone scale-down keeps the count from dropping below it
+    floor_hold: float = 600.0
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class TaskConfig:
     """Task execution configuration."""
     track_started: bool = True
@@ -40,35 +105,181 @@ class TaskConfig:
     result_expires: int = 3600
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class MetricsConfig:
+    """Worker metrics endpoint configuration."""
+    enabled: bool = False
+    host: str = "0.0.0.0"
+    # Supervised worker N listens on port + N - 1
+    port: int = 9808
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryConfig:
+    """Per-execution task history in a local SQLite database."""
+    enabled: bool = False
+    path: str = ".cache/history.sqlite3"
+    # Records written per batch; a full batch is flushed early
+    batch_size: int = 500
+    # Longest seconds a record waits in memory
+    flush_interval: float = 1.0
+    # Records buffered before the oldest are dropped
+    max_pending: int = 100000
+    # Seconds between compactions (0: never)
+    compact_interval: float = 3600.0
+    # Seconds raw records are kept before folding into hourly rollups
+    raw_retention: float = 604800.0
+    # Seconds rollups are kept (0: forever)
+    rollup_retention: float = 7776000.0
+
+
+@dataclass(frozen=True, slots=True)
+class CalibrationConfig:
+    """Per-task time limits derived from the execution history."""
+    # Apply the limits saved by ``main.py calibrate`` at registration
+    apply: bool = False
+    path: str = ".cache/time_limits.json"
+    # Soft limit = runtime quantile of successful runs x margin
+    quantile: float = 0.999
+    margin: float = 3.0
+    # Hard limit = soft limit x hard_margin
+    hard_margin: float = 1.25
+    # Successful runs within the window needed to calibrate a task
+    min_samples: int = 1000
+    window: float = 604800.0
+    # Lowest soft limit, seconds
+    floor: int = 5
+    # Relative change of the soft limit worth applying
+    min_change: float = 0.2
+
+
+@dataclass(frozen=True, slots=True)
+class ProfilingConfig:
+    """Task sampling profiler configuration."""
+    # Output of tasks with a ``profile`` metadata setting
+    directory: str = ".cache/profiles"
+
+
+@dataclass(frozen=True, slots=True)
+class TracingConfig:
+    """Trace propagation configuration."""
+    enabled: bool = False
+    # Fraction of new traces recorded; downstream tasks follow the decision
+    sample_rate: float = 0.01
+    # "jsonl", "none" or a dotted path to a SpanExporter class
+    exporter: str = "jsonl"
+    path: str = ".cache/traces/spans.jsonl"
+
+
+@dataclass(frozen=True, slots=True)
+class StreamingConfig:
+    """Chunk streams of generator tasks."""
+    # "redis" (Redis Streams) or "file" (local stand-in)
+    backend: str = "redis"
+    url: str = "redis://localhost:6379/1"
+    directory: str = ".cache/streams"
+    # Seconds a Redis stream is kept after its last write
+    ttl: int = 86400
+
+
+@dataclass(frozen=True, slots=True)
+class AdmissionConfig:
+    """Client-side backpressure on queue depth."""
+    enabled: bool = False
+    # Seconds a sampled queue depth is reused (> 0)
+    ttl: float = 1.0
+    # High-water mark per queue; tasks add their own with metadata
+    queues: Dict[str, int] = field(default_factory=dict)
+    # For queue marks: "block", "delay" or "reject"
+    action: str = "block"
+    # Seconds a blocked submission waits before it is rejected
+    timeout: float = 30.0
+    # Seconds a delayed submission is held
+    delay: float = 1.0
+
+
+@dataclass(frozen=True, slots=True)
+class RetriesConfig:
+    """Named retry policies of tasks."""
+    # Policy settings by name; tasks use one with ``retry: <name>``
+    policies: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    # Policy of tasks with ``autoretry_for`` and no ``retry`` ("": Celery's)
+    default: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class BreakersConfig:
+    """Circuit breakers of downstream dependencies."""
+    # "file" (shared by the processes of a node), "redis" (shared by the
+    # fleet) or "memory" (one process)
+    backend: str = "file"
+    directory: str = ".cache/breakers"
+    url: str = "redis://localhost:6379/1"
+    # Settings by breaker name; others use the defaults
+    policies: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+
+
+@dataclass(frozen=True, slots=True)
 class TaskDirectoryConfig:
     """Task directory loading configuration."""
     path: str
     pattern: str = "tasks.py"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
+class TaskDatabaseConfig:
+    """Database task source configuration."""
+    uri: str = "sqlite:///tasks.db"
+    table: str = "tasks"
+    # Load only matching rows (filters are applied in SQL)
+    enabled: Optional[bool] = None
+    tags: Tuple[str, ...] = ()
+    module_path: Optional[str] = None
+
+
+@dataclass(frozen=True, slots=True)
 class TasksConfig:
     """Tasks loading configuration."""
-    modules: List[str] = field(default_factory=list)
-    directories: List[TaskDirectoryConfig] = field(default_factory=list)
+    source: str = "config"
+    # Several sources loaded in parallel, highest precedence first;
+    # overrides ``source`` when set
+    sources: Tuple[str, ...] = ()
+    database: TaskDatabaseConfig = field(default_factory=TaskDatabaseConfig)
+    task_list: Tuple[Dict[str, Any], ...] = ()
+    modules: Tuple[str, ...] = ()
+    directories: Tuple[TaskDirectoryConfig, ...] = ()
+    # Discovery index for the directory source ("" disables it)
+    discovery_index: str = ".cache/task_index.json"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Config:
     """Root configuration."""
     app: AppConfig = field(default_factory=AppConfig)
     celery: CeleryConfig = field(default_factory=CeleryConfig)
     worker: WorkerConfig = field(default_factory=WorkerConfig)
+    supervisor: SupervisorConfig = field(default_factory=SupervisorConfig)
+    autoscaler: AutoscalerConfig = field(default_factory=AutoscalerConfig)
     task: TaskConfig = field(default_factory=TaskConfig)
     tasks: TasksConfig = field(default_factory=TasksConfig)
+    metrics: MetricsConfig = field(default_factory=MetricsConfig)
+    history: HistoryConfig = field(default_factory=HistoryConfig)
+    calibration: CalibrationConfig = field(default_factory=CalibrationConfig)
+    profiling: ProfilingConfig = field(default_factory=ProfilingConfig)
+    tracing: TracingConfig = field(default_factory=TracingConfig)
+    streaming: StreamingConfig = field(default_factory=StreamingConfig)
+    admission: AdmissionConfig = field(default_factory=AdmissionConfig)
+    retries: RetriesConfig = field(default_factory=RetriesConfig)
+    breakers: BreakersConfig = field(default_factory=BreakersConfig)
+    connections: Tuple[Dict[str, Any], ...] = ()
+    # Top-level sections without a schema (e.g. from connection fragments)
+    extra: Dict[str, Any] = field(default_factory=dict)
 
 
 # Register with Hydra
 def register_configs():
     """Register all config schemas with Hydra."""
+    from hydra.core.config_store import ConfigStore
+
     cs = ConfigStore.instance()
     cs.store(name="config", node=Config)
-
-
-register_configs()
\ No newline at end of file
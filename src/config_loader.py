@@ -1,28 +1,104 @@
+import hashlib
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 from omegaconf import OmegaConf, DictConfig
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 import logging
 
+try:
+    from .config import Config, build_config
+except ImportError:
+    from config import Config, build_config
+
 logger = logging.getLogger(__name__)
 
+# Environment variables that override config keys
+ENV_OVERRIDES = {
+    "APP_ENV": "app.environment",
+    "CELERY_BROKER_URL": "celery.broker_url",
+    "CELERY_RESULT_BACKEND": "celery.result_backend",
+}
+
+CACHE_VERSION = 2
+
 
 class ConfigLoader:
     """Loads all configuration files."""
 
-    def __init__(self, config_dir: Path):
+    def __init__(
+        self,
+        config_dir: Path,
+        overrides: Optional[Dict[str, str]] = None,
+        cache_dir: Optional[Path] = None,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Initialize config loader.
+
+        Args:
+            config_dir: Directory containing config.yaml and connection files
+            overrides: Dotted config keys to override after merging
+            cache_dir: Directory for the merged-config cache (None disables it)
+            max_workers: Threads used to read connection files
+        """
         self.config_dir = Path(config_dir)
         if not self.config_dir.exists() or not self.config_dir.is_dir():
             raise ValueError(f"Config directory does not exist: {self.config_dir}")
+        self.overrides = dict(overrides or {})
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_workers = max_workers
 
     def load_all(self) -> DictConfig:
         """Load all configuration files, including enabled connections."""
+        cache = self._load_cache()
+        if cache is not None and self._is_fresh(cache):
+            logger.info(f"Loaded merged config from cache: {self._cache_file()}")
+            return OmegaConf.create(cache["config"])
+
         app_file = self.config_dir / "config.yaml"
         if not app_file.exists():
             raise FileNotFoundError(f"Missing config file: {app_file}")
 
-        app_config = OmegaConf.load(app_file)
+        app_data = self._read(app_file)
+        app_config = OmegaConf.create(app_data.decode("utf-8"))
+        inputs = [self._manifest_entry(app_file, app_data)]
+
+        paths = []
+        for path in self._connection_paths(app_config):
+            if path.exists():
+                paths.append(path)
+            else:
+                logger.warning(f"Connection config {path} does not exist, skipping")
+                # Recorded so that creating the file later invalidates the cache
+                inputs.append({"path": str(path), "exists": False})
+
+        fragments = self._read_many(paths)
+        inputs.extend(self._manifest_entry(path, data) for path, data in fragments)
 
+        # Files were touched but their contents are unchanged: reuse the result
+        key = self._cache_key(inputs)
+        if cache is not None and cache.get("key") == key:
+            self._write_cache(key, inputs, cache["config"])
+            return OmegaConf.create(cache["config"])
+
+        # Merge everything in one pass instead of re-copying per fragment
+        configs = self._parse_many([data for _, data in fragments])
+        app_config = OmegaConf.merge(app_config, *configs) if configs else app_config
+        for path, _ in fragments:
+            logger.info(f"Merged connection config: {path}")
+
+        for key_path, value in self.overrides.items():
+            OmegaConf.update(app_config, key_path, value, merge=False)
+
+        self._write_cache(key, inputs, OmegaConf.to_container(app_config))
+        return app_config
+
+    def _connection_paths(self, app_config: DictConfig) -> List[Path]:
+        """Paths of enabled connection config files, in declaration order."""
+        paths = []
         connections = getattr(app_config, "connections", [])
         for idx, conn in enumerate(connections):
             enabled = conn.get("enabled", True)
@@ -34,16 +110,127 @@ class ConfigLoader:
                 logger.warning(f"Connection at index {idx} has no config_file, skipping")
                 continue
 
-            conn_path = self.config_dir / config_file
-            if not conn_path.exists():
-                logger.warning(f"Connection config {conn_path} does not exist, skipping")
+            paths.append(self.config_dir / config_file)
+        return paths
+
+    def _map(self, func, items: list) -> list:
+        """Apply ``func`` to items on a thread pool, preserving order."""
+        if len(items) < 2:
+            return [func(item) for item in items]
+        workers = self.max_workers or min(32, len(items))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(func, items))
+
+    def _read_many(self, paths: List[Path]) -> List[Tuple[Path, bytes]]:
+        """Read connection files concurrently."""
+        return self._map(lambda path: (path, self._read(path)), paths)
+
+    @staticmethod
+    def _parse_many(blobs: List[bytes]) -> List[DictConfig]:
+        """
+        Parse connection files one after the other.
+
+        YAML parsing is pure Python and holds the GIL, so a thread pool
+        only adds overhead here (unlike for the reads above).
+        """
+        return [OmegaConf.create(data.decode("utf-8")) for data in blobs]
+
+    @staticmethod
+    def _read(path: Path) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _manifest_entry(path: Path, data: bytes) -> dict:
+        stat = path.stat()
+        return {
+            "path": str(path),
+            "exists": True,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+
+    def _cache_file(self) -> Path:
+        digest = hashlib.sha1(str(self.config_dir.resolve()).encode()).hexdigest()
+        return self.cache_dir / f"config-{digest[:16]}.json"
+
+    def _cache_key(self, inputs: List[dict]) -> str:
+        key = hashlib.sha256()
+        for entry in inputs:
+            key.update(f"{entry['path']}:{entry.get('sha256', '-')}\n".encode())
+        key.update(self._overrides_digest().encode())
+        return key.hexdigest()
+
+    def _overrides_digest(self) -> str:
+        """Hash of the overrides, which may hold broker credentials."""
+        data = json.dumps(self.overrides, sort_keys=True).encode()
+        return hashlib.sha256(data).hexdigest()
+
+    def _load_cache(self) -> Optional[dict]:
+        """Read the cache file, if any, for the current overrides."""
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._cache_file(), "rb") as f:
+                cache = json.loads(f.read())
+        except (OSError, ValueError):
+            return None
+        if cache.get("version") != CACHE_VERSION:
+            return None
+        if cache.get("overrides") != self._overrides_digest():
+            return None
+        return cache
+
+    @staticmethod
+    def _is_fresh(cache: dict) -> bool:
+        """
+        Check recorded inputs with ``stat`` only.
+
+        A warm load therefore reads nothing but the cache file.
+        """
+        for entry in cache.get("inputs", []):
+            try:
+                stat = os.stat(entry["path"])
+            except OSError:
+                if entry["exists"]:
+                    return False
                 continue
+            if not entry["exists"]:
+                return False
+            if stat.st_mtime_ns != entry["mtime_ns"] or stat.st_size != entry["size"]:
+                return False
+        return True
 
-            conn_config = OmegaConf.load(conn_path)
-            app_config = OmegaConf.merge(app_config, conn_config)
-            logger.info(f"Merged connection config: {conn_path}")
+    def _write_cache(self, key: str, inputs: List[dict], config: dict) -> None:
+        if self.cache_dir is None:
+            return
+        cache = {
+            "version": CACHE_VERSION,
+            "key": key,
+            "overrides": self._overrides_digest(),
+            "inputs": inputs,
+            "config": config,
+        }
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            cache_file = self._cache_file()
+            tmp = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            # Owner only: the merged config holds the broker URLs, with
+            # their credentials
+            flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+            with os.fdopen(os.open(tmp, flags, 0o600), "w") as f:
+                json.dump(cache, f)
+            os.replace(tmp, cache_file)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not write config cache: {e}")
 
-        return app_config
+
+def _env_overrides() -> Dict[str, str]:
+    """Config overrides taken from environment variables."""
+    return {
+        key: os.environ[var] for var, key in ENV_OVERRIDES.items() if var in os.environ
+    }
 
 
 def _load_config():
@@ -55,16 +242,17 @@ def _load_config():
     if not config_dir.exists():
         raise FileNotFoundError(f"Configuration directory not found: {config_dir}")
 
-    # Use ConfigLoader to load all configs
-    config_loader = ConfigLoader(config_dir)
-    cfg = config_loader.load_all()
+    # Use ConfigLoader to load all configs; environment variables override
+    # file values and are part of the cache key
+    cache_dir = os.environ.get("CONFIG_CACHE_DIR", str(project_root / ".cache"))
+    config_loader = ConfigLoader(
+        config_dir,
+        overrides=_env_overrides(),
+        cache_dir=Path(cache_dir) if cache_dir else None,
+    )
+    return config_loader.load_all()
 
-    # Override with environment variables if present
-    if "APP_ENV" in os.environ:
-        cfg.app.environment = os.environ["APP_ENV"]
-    if "CELERY_BROKER_URL" in os.environ:
-        cfg.celery.broker_url = os.environ["CELERY_BROKER_URL"]
-    if "CELERY_RESULT_BACKEND" in os.environ:
-        cfg.celery.result_backend = os.environ["CELERY_RESULT_BACKEND"]
 
-    return cfg
+def load_runtime_config() -> Config:
+    """Load configuration and validate it into the immutable runtime Config."""
+    return build_config(_load_config())
@@ -6,15 +6,19 @@ Run:
     python src/main.py
     or
     ./run.sh start
+
+Calibrate per-task time limits from the execution history:
+    python src/main.py calibrate [--dry-run]
 """
 
 import logging
-import signal
+import os
 import sys
-import threading
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
-from celery import Celery
+if TYPE_CHECKING:
+    from celery import Celery
 
 # Add src directory to path
 src_dir = Path(__file__).parent
@@ -22,12 +26,14 @@ sys.path.insert(0, str(src_dir))
 
 logger = logging.getLogger(__name__)
 
+_app: Optional["Celery"] = None
+
 
-def create_celery_app() -> Celery:
+def create_celery_app() -> "Celery":
     from app import create_app
-    from config_loader import _load_config
+    from config_loader import load_runtime_config
 
-    cfg = _load_config()
+    cfg = load_runtime_config()
     wrapper = create_app(cfg)
 
     logger.info("Celery app initialized")
@@ -36,36 +42,220 @@ def create_celery_app() -> Celery:
     return wrapper.app
 
 
-# Create module-level app instance for CLI compatibility
-app = create_celery_app()
+def get_app() -> "Celery":
+    """Get the application, creating it on first use."""
+    global _app
+    if _app is None:
+        _app = create_celery_app()
+    return _app
+
 
+def __getattr__(name: str):
+    # Module-level ``app`` for CLI compatibility (``celery -A src.main``),
+    # built on first access instead of at import time
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def start_worker(celery_app: Celery) -> None:
+
+def worker_argv(cfg=None) -> list:
+    """Worker command line from ``cfg`` (default: the runtime config)."""
+    if cfg is None:
+        from config import get_runtime_config
+
+        cfg = get_runtime_config()
     argv = [
         "worker",
         "--loglevel=info",
-        "--pool=solo",  # Windows compatibility
+        f"--pool={cfg.worker.pool}",  # "solo" for Windows compatibility
     ]
-    celery_app.worker_main(argv)
+    if cfg.worker.pool == "prefork" and cfg.worker.concurrency:
+        argv.append(f"--concurrency={cfg.worker.concurrency}")
+    return argv
 
 
-def start_beat(celery_app: Celery) -> None:
-    argv = [
-        "beat",
-        "--loglevel=info",
-    ]
-    celery_app.start(argv)
+def run_worker(argv: list) -> None:
+    """Worker process entry point; reports ready once it consumes."""
+    from worker import install_ready_notification
+
+    install_ready_notification()
+    get_app().worker_main(argv)
+
+
+def run_beat(argv: list) -> None:
+    """Beat process entry point; reports ready once the scheduler starts."""
+    from worker import install_ready_notification
+
+    install_ready_notification()
+    get_app().start(argv)
+
+
+def run_flower(argv: list) -> None:
+    """Flower process entry point (``celery flower``)."""
+    get_app().start(argv)
+
+
+def worker_service(cfg, number: int):
+    """Supervised worker process ``number`` (1-based)."""
+    from monitoring.instrumentation import PORT_ENV
+    from worker import Service
+
+    sup = cfg.supervisor
+    env = {}
+    if cfg.metrics.enabled:
+        # Workers share a host; each serves metrics on a port of its own
+        env[PORT_ENV] = str(cfg.metrics.port + number - 1)
+    return Service(
+        f"worker-{number}",
+        run_worker,
+        (worker_argv(cfg) + [f"--hostname=worker{number}@%h"],),
+        ready_timeout=sup.ready_timeout,
+        stop_timeout=sup.stop_timeout,
+        env=env,
+    )
+
+
+def autoscale_limit(cfg) -> int:
+    """Most workers (or pool processes) the autoscaler may run."""
+    return cfg.autoscaler.max_workers or 2 * (os.cpu_count() or 1)
+
 
+def build_autoscaler(app: "Celery", cfg, supervisor):
+    """
+    Autoscaler of the supervisor's workers, or of their pools.
 
-def start_flower() -> None:
-    import subprocess
+    Args:
+        app: Celery app whose broker is sampled
+        cfg: Runtime config
+        supervisor: Supervisor running the workers
 
-    subprocess.run([
-        sys.executable, "-m", "flower",
-        "--port=5555",
-        "--address=0.0.0.0",
-        f"--broker={app.conf.broker_url}"
-    ])
+    Returns:
+        ``Autoscaler`` to call periodically
+    """
+    from worker import (
+        Autoscaler,
+        BrokerQueueProbe,
+        PoolScaler,
+        ScalingPolicy,
+        SupervisorScaler,
+    )
+
+    scaling = cfg.autoscaler
+    if scaling.mode == "processes":
+        scaler = SupervisorScaler(supervisor, lambda n: worker_service(cfg, n))
+    elif scaling.mode == "pool":
+        scaler = PoolScaler(app)
+    else:
+        raise ValueError(f"Unknown autoscaler mode: {scaling.mode}")
+    policy = ScalingPolicy(
+        min_workers=scaling.min_workers,
+        max_workers=autoscale_limit(cfg),
+        target_backlog=scaling.target_backlog,
+        scale_down_ratio=scaling.scale_down_ratio,
+        cooldown_up=scaling.cooldown_up,
+        cooldown_down=scaling.cooldown_down,
+        max_step_up=scaling.max_step_up,
+        max_step_down=scaling.max_step_down,
+        floor_hold=scaling.floor_hold,
+    )
+    return Autoscaler(BrokerQueueProbe(app), scaler, scaling.queues, policy)
+
+
+def build_services(cfg) -> list:
+    """
+    Supervised services from the runtime config.
+
+    Args:
+        cfg: Runtime config
+
+    Returns:
+        One ``Service`` per worker process, then beat and flower
+    """
+    from worker import Service, worker_processes
+
+    sup = cfg.supervisor
+    count = worker_processes(sup.workers, cfg.worker.pool)
+    scaling = cfg.autoscaler
+    if scaling.enabled and scaling.mode == "processes":
+        count = min(max(count, scaling.min_workers), autoscale_limit(cfg))
+    services = [worker_service(cfg, i) for i in range(1, count + 1)]
+    if sup.beat:
+        services.append(
+            Service(
+                "beat",
+                run_beat,
+                (["beat", "--loglevel=info"],),
+                ready_timeout=sup.ready_timeout,
+                stop_timeout=sup.stop_timeout,
+            )
+        )
+    if sup.flower:
+        services.append(
+            Service(
+                "flower",
+                run_flower,
+                (["flower", f"--port={sup.flower_port}", "--address=0.0.0.0"],),
+                probe=f"tcp://127.0.0.1:{sup.flower_port}",
+                ready_timeout=sup.ready_timeout,
+                stop_timeout=sup.stop_timeout,
+            )
+        )
+    return services
+
+
+def calibrate(argv: list) -> int:
+    """
+    Report and save per-task time limits calibrated from the history.
+
+    Args:
+        argv: Command line after ``calibrate`` (``--dry-run`` only reports)
+
+    Returns:
+        Exit status
+    """
+    import argparse
+
+    from app import create_app
+    from config_loader import load_runtime_config
+    from monitoring import HistoryStore
+    from monitoring.calibration import (
+        CalibrationPolicy,
+        TimeLimits,
+        calibrate_tasks,
+        format_report,
+        load_limits,
+        save_limits,
+    )
+
+    parser = argparse.ArgumentParser(prog="main.py calibrate")
+    parser.add_argument("--dry-run", action="store_true", help="do not save")
+    args = parser.parse_args(argv)
+
+    cfg = load_runtime_config()
+    history = Path(cfg.history.path)
+    if not history.exists():
+        print(f"No execution history at {history}; enable history first")
+        return 1
+    calibration = cfg.calibration
+    policy = CalibrationPolicy.from_config(calibration)
+    defaults = TimeLimits(cfg.task.soft_time_limit, cfg.task.time_limit)
+    previous = load_limits(calibration.path, defaults, floor=calibration.floor)
+    registry = create_app(cfg).registry
+    results = calibrate_tasks(
+        HistoryStore(str(history)),
+        registry.filter(enabled=True),
+        defaults,
+        policy,
+        # Limits in effect; saved ones are only used when applied
+        applied=previous if calibration.apply else None,
+    )
+    print(format_report(results))
+    changed = [c.task for c in results if c.changed]
+    print(f"{len(changed)} of {len(results)} tasks changed")
+    if not args.dry_run:
+        save_limits(calibration.path, results, previous, policy)
+        print(f"Saved to {calibration.path}")
+    return 0
 
 
 def main() -> None:
@@ -74,23 +264,30 @@ def main() -> None:
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     )
 
-    shutdown_event = threading.Event()
-
-    def handle_shutdown(signum, frame):
-        logger.info("Shutting down...")
-        shutdown_event.set()
+    from config import get_runtime_config
+    from worker import Backoff, ForkServer, Supervisor, preload
 
-    signal.signal(signal.SIGTERM, handle_shutdown)
-    signal.signal(signal.SIGINT, handle_shutdown)
+    app = get_app()
+    cfg = get_runtime_config()
+    if cfg.worker.fork_server:
+        preload(app, modules=cfg.tasks.modules)
 
-    threading.Thread(target=start_worker, args=(app,), daemon=True).start()
-    threading.Thread(target=start_beat, args=(app,), daemon=True).start()
-    threading.Thread(target=start_flower, daemon=True).start()
-
-    logger.info("Celery services started")
-    logger.info("Flower UI: http://localhost:5555")
-    shutdown_event.wait()
+    sup = cfg.supervisor
+    supervisor = Supervisor(
+        build_services(cfg),
+        # Fork the template before any thread or connection exists
+        ForkServer("service-fork-server"),
+        backoff=Backoff(sup.backoff, sup.backoff_max, sup.stable_after),
+        status_file=sup.status_file or None,
+    )
+    if cfg.autoscaler.enabled:
+        autoscaler = build_autoscaler(app, cfg, supervisor)
+        supervisor.every(cfg.autoscaler.interval, autoscaler.step)
+    supervisor.install_signal_handlers()
+    sys.exit(supervisor.run())
 
 
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["calibrate"]:
+        sys.exit(calibrate(sys.argv[2:]))
     main()
@@ -0,0 +1,82 @@
+"""Worker-side monitoring: metrics, instrumentation and exporters."""
+
+from .metrics import Counter, Gauge, Histogram, MetricsRegistry, REGISTRY
+from .instrumentation import TaskInstrumentation, install_metrics
+from .http_server import MetricsServer
+from .multiprocess import SharedRegistry, share_registry
+from .task_memory import TaskMemoryStats, TaskMemoryTracker, install_memory_tracking
+from .memory import MemoryInfo, read_memory, read_peak_rss, read_rss
+from .history import (
+    ExecutionRecord,
+    HistoryRecorder,
+    HistoryStore,
+    HistoryWriter,
+    Rollup,
+    TaskPercentiles,
+    install_history,
+)
+from .calibration import (
+    Calibration,
+    CalibrationPolicy,
+    TimeLimits,
+    calibrate,
+    calibrate_tasks,
+    format_report,
+    load_limits,
+    save_limits,
+)
+from .tracing import (
+    InMemorySpanExporter,
+    JsonlSpanExporter,
+    Span,
+    SpanContext,
+    SpanExporter,
+    TaskTracing,
+    Tracer,
+    get_tracer,
+    install_tracing,
+)
+
+__all__ = [
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsRegistry",
+    "REGISTRY",
+    "TaskInstrumentation",
+    "install_metrics",
+    "MetricsServer",
+    "SharedRegistry",
+    "share_registry",
+    "TaskMemoryStats",
+    "TaskMemoryTracker",
+    "install_memory_tracking",
+    "MemoryInfo",
+    "read_memory",
+    "read_peak_rss",
+    "read_rss",
+    "ExecutionRecord",
+    "HistoryRecorder",
+    "HistoryStore",
+    "HistoryWriter",
+    "Rollup",
+    "TaskPercentiles",
+    "install_history",
+    "Calibration",
+    "CalibrationPolicy",
+    "TimeLimits",
+    "calibrate",
+    "calibrate_tasks",
+    "format_report",
+    "load_limits",
+    "save_limits",
+    "InMemorySpanExporter",
+    "JsonlSpanExporter",
+    "Span",
+    "SpanContext",
+    "SpanExporter",
+    "TaskTracing",
+    "Tracer",
+    "get_tracer",
+    "install_tracing",
+]
@@ -0,0 +1,321 @@
+"""Per-task time limits calibrated from recorded runtime percentiles."""
+
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from .history import HistoryStore
+
+logger = logging.getLogger(__name__)
+
+# Key in TaskDefinition.metadata (or options); ``false`` keeps a task's
+# limits off calibration
+CALIBRATE_KEY = "calibrate"
+
+# Task options that set limits by hand (never overridden)
+LIMIT_OPTIONS = ("soft_time_limit", "time_limit")
+
+
+@dataclass(frozen=True)
+class TimeLimits:
+    """Soft and hard time limit of a task, seconds."""
+
+    soft: int
+    hard: int
+
+    def __str__(self) -> str:
+        return f"{self.soft}s/{self.hard}s"
+
+
+@dataclass(frozen=True)
+class CalibrationPolicy:
+    """How limits are derived from a runtime distribution, and guard rails."""
+
+    # Runtime quantile of successful executions the limits are based on
+    quantile: float = 0.999
+    # Soft limit = quantile runtime x margin
+    margin: float = 3.0
+    # Hard limit = soft limit x hard_margin (at least one second more)
+    hard_margin: float = 1.25
+    # Successful executions needed within the window
+    min_samples: int = 1000
+    # Seconds of history considered
+    window: float = 7 * 86400
+    # Lowest soft limit ever set, seconds
+    floor: int = 5
+    # Relative change of the soft limit below which the current one stays
+    min_change: float = 0.2
+
+    def __post_init__(self):
+        if not 0 < self.quantile < 1:
+            raise ValueError("quantile must be between 0 and 1")
+        if self.margin < 1 or self.hard_margin < 1:
+            raise ValueError("margin and hard_margin must be at least 1")
+        if self.floor < 1:
+            raise ValueError("floor must be at least 1 second")
+
+    @classmethod
+    def from_config(cls, cfg) -> "CalibrationPolicy":
+        """Policy from a CalibrationConfig."""
+        return cls(
+            quantile=cfg.quantile,
+            margin=cfg.margin,
+            hard_margin=cfg.hard_margin,
+            min_samples=cfg.min_samples,
+            window=cfg.window,
+            floor=cfg.floor,
+            min_change=cfg.min_change,
+        )
+
+
+@dataclass(frozen=True)
+class Calibration:
+    """Outcome of calibrating one task."""
+
+    task: str
+    current: TimeLimits
+    # Limits to use; None when the task was skipped
+    recommended: Optional[TimeLimits]
+    samples: int
+    # Runtime at the policy quantile (None without enough samples)
+    observed: Optional[float]
+    reason: str
+
+    @property
+    def changed(self) -> bool:
+        """Whether the recommended limits differ from the current ones."""
+        return self.recommended is not None and self.recommended != self.current
+
+
+def calibrated(task_def) -> bool:
+    """Whether a task definition's time limits may be calibrated."""
+    if any(key in task_def.options for key in LIMIT_OPTIONS):
+        return False
+    value = task_def.metadata.get(CALIBRATE_KEY)
+    if value is None:
+        value = task_def.options.get(CALIBRATE_KEY)
+    return value is not False
+
+
+def recommend(
+    observed: float, policy: CalibrationPolicy, ceiling: TimeLimits
+) -> TimeLimits:
+    """
+    Limits for a quantile runtime, within ``policy.floor`` and ``ceiling``.
+
+    Args:
+        observed: Runtime at the policy quantile, seconds
+        policy: Margins and floor
+        ceiling: Global limits, never exceeded
+
+    Returns:
+        TimeLimits with ``soft < hard``
+    """
+    soft = max(math.ceil(observed * policy.margin), policy.floor)
+    soft = min(soft, ceiling.soft)
+    hard = max(math.ceil(soft * policy.hard_margin), soft + 1)
+    hard = min(hard, ceiling.hard)
+    if hard <= soft:
+        soft = max(hard - 1, 1)
+    return TimeLimits(soft, hard)
+
+
+def calibrate(
+    store: HistoryStore,
+    current: Mapping[str, TimeLimits],
+    ceiling: TimeLimits,
+    policy: CalibrationPolicy = CalibrationPolicy(),
+    fixed: Iterable[str] = (),
+    now: Optional[float] = None,
+) -> List[Calibration]:
+    """
+    Recommend time limits for tasks from their recorded runtimes.
+
+    Guard rails: tasks with fewer than ``min_samples`` successful runs,
+    and tasks in ``fixed`` (limits set by hand, or opted out), keep their
+    limits. Limits stay between ``policy.floor`` and ``ceiling``. Limits
+    are not lowered while failed runs reach the current soft limit (they
+    may be timeouts the successful runs do not show), and changes under
+    ``min_change`` are ignored.
+
+    Args:
+        store: Execution history
+        current: Effective limits by task name
+        ceiling: Global limits (``task.soft_time_limit``/``time_limit``)
+        policy: Quantile, margins and guard rails
+        fixed: Task names not to calibrate
+        now: End of the history window
+
+    Returns:
+        One Calibration per task in ``current``, sorted by name
+    """
+    fixed = set(fixed)
+    quantiles = (policy.quantile,)
+    succeeded = store.percentiles(
+        window=policy.window, quantiles=quantiles, outcome="SUCCESS", now=now
+    )
+    failed = store.percentiles(
+        window=policy.window, quantiles=quantiles, outcome="FAILURE", now=now
+    )
+
+    results = []
+    for task in sorted(current):
+        limits = current[task]
+        stats = succeeded.get(task)
+        samples = stats.count if stats else 0
+        observed = stats[policy.quantile] if stats else None
+
+        def skip(reason: str) -> Calibration:
+            return Calibration(task, limits, None, samples, observed, reason)
+
+        if task in fixed:
+            results.append(skip("limits set by the task"))
+            continue
+        if samples < policy.min_samples:
+            results.append(skip(f"{samples} of {policy.min_samples} samples"))
+            continue
+
+        proposed = recommend(observed, policy, ceiling)
+        label = f"p{policy.quantile * 100:g}"
+        reason = f"{label} {observed:.3f}s x {policy.margin:g}"
+        timeouts = failed.get(task)
+        if proposed.soft < limits.soft and timeouts and (
+            timeouts.max >= 0.95 * limits.soft
+        ):
+            results.append(skip("failed runs reach the current soft limit"))
+            continue
+        if abs(proposed.soft - limits.soft) < policy.min_change * limits.soft:
+            proposed = limits
+            reason += f"; within {policy.min_change:.0%} of current"
+        results.append(
+            Calibration(task, limits, proposed, samples, observed, reason)
+        )
+    return results
+
+
+def load_limits(
+    path: str, ceiling: TimeLimits, floor: int = 1
+) -> Dict[str, TimeLimits]:
+    """
+    Calibrated limits saved by ``save_limits``.
+
+    Entries outside ``floor``..``ceiling`` or with ``soft >= hard`` are
+    ignored (the global limits may have been lowered since).
+
+    Returns:
+        TimeLimits by task name; empty when the file does not exist
+    """
+    try:
+        data = json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return {}
+    limits = {}
+    for task, entry in data.get("tasks", {}).items():
+        value = TimeLimits(int(entry["soft_time_limit"]), int(entry["time_limit"]))
+        if floor <= value.soft < value.hard <= ceiling.hard and (
+            value.soft <= ceiling.soft
+        ):
+            limits[task] = value
+        else:
+            logger.warning(f"Ignoring calibrated limits {value} of {task}")
+    return limits
+
+
+def save_limits(
+    path: str,
+    calibrations: Iterable[Calibration],
+    previous: Optional[Mapping[str, TimeLimits]] = None,
+    policy: CalibrationPolicy = CalibrationPolicy(),
+) -> Dict[str, TimeLimits]:
+    """
+    Write calibrated limits, keeping earlier ones of skipped tasks.
+
+    Args:
+        path: JSON file read by ``load_limits``
+        calibrations: Results of ``calibrate``
+        previous: Limits loaded from ``path`` before calibrating
+        policy: Recorded alongside the limits
+
+    Returns:
+        The limits written, by task name
+    """
+    limits = dict(previous or {})
+    details = {}
+    for c in calibrations:
+        if c.recommended is not None:
+            limits[c.task] = c.recommended
+            details[c.task] = {"samples": c.samples, "observed": c.observed}
+    data = {
+        "generated_at": time.time(),
+        "quantile": policy.quantile,
+        "margin": policy.margin,
+        "tasks": {
+            task: {
+                "soft_time_limit": value.soft,
+                "time_limit": value.hard,
+                **details.get(task, {}),
+            }
+            for task, value in sorted(limits.items())
+        },
+    }
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    Path(tmp).write_text(json.dumps(data, indent=2) + "\n")
+    os.replace(tmp, path)
+    return limits
+
+
+def calibrate_tasks(
+    store: HistoryStore,
+    task_defs: Iterable,
+    defaults: TimeLimits,
+    policy: CalibrationPolicy = CalibrationPolicy(),
+    applied: Optional[Mapping[str, TimeLimits]] = None,
+    now: Optional[float] = None,
+) -> List[Calibration]:
+    """
+    Calibrate task definitions against the global and applied limits.
+
+    Args:
+        store: Execution history
+        task_defs: TaskDefinitions (e.g. ``registry.filter(enabled=True)``)
+        defaults: Global limits
+        policy: Quantile, margins and guard rails
+        applied: Calibrated limits currently in effect
+        now: End of the history window
+    """
+    applied = applied or {}
+    current, fixed = {}, []
+    for task_def in task_defs:
+        options = task_def.options
+        if any(key in options for key in LIMIT_OPTIONS):
+            fixed.append(task_def.name)
+            current[task_def.name] = TimeLimits(
+                int(options.get("soft_time_limit", defaults.soft)),
+                int(options.get("time_limit", defaults.hard)),
+            )
+            continue
+        if not calibrated(task_def):
+            fixed.append(task_def.name)
+        current[task_def.name] = applied.get(task_def.name, defaults)
+    return calibrate(store, current, defaults, policy, fixed, now)
+
+
+def format_report(calibrations: Iterable[Calibration]) -> str:
+    """Human-readable table of calibrated tasks, changes marked with *."""
+    lines = [
+        f"  {'task':<40} {'samples':>8} {'current':>12} {'new':>12}  reason"
+    ]
+    for c in calibrations:
+        new = str(c.recommended) if c.recommended is not None else "-"
+        mark = "*" if c.changed else " "
+        lines.append(
+            f"{mark} {c.task:<40} {c.samples:>8} {str(c.current):>12} "
+            f"{new:>12}  {c.reason}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,651 @@
+"""Durable per-execution task history in SQLite, written behind the hot path."""
+
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import astuple, dataclass, fields
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from celery import Celery
+from celery import signals
+
+from .instrumentation import PUBLISHED_AT_HEADER
+from .memory import read_rss
+from .metrics import DEFAULT_TIME_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# Set on the request by the consumer, which has the message body
+PAYLOAD_SIZE_KEY = "x_payload_size"
+
+# Quantiles reported unless others are asked for
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+# Columns percentiles can be computed over
+METRICS = ("runtime", "queue_wait", "rss_delta", "payload_size")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS executions (
+    task TEXT NOT NULL,
+    finished_at REAL NOT NULL,
+    runtime REAL NOT NULL,
+    outcome TEXT NOT NULL,
+    queue_wait REAL,
+    rss_delta INTEGER,
+    payload_size INTEGER
+);
+CREATE INDEX IF NOT EXISTS executions_task_time ON executions (task, finished_at);
+CREATE INDEX IF NOT EXISTS executions_time ON executions (finished_at);
+CREATE TABLE IF NOT EXISTS rollups (
+    task TEXT NOT NULL,
+    hour REAL NOT NULL,
+    count INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    runtime_sum REAL NOT NULL,
+    runtime_max REAL NOT NULL,
+    -- Runtime counts per DEFAULT_TIME_BUCKETS bucket, plus +Inf (JSON)
+    runtime_buckets TEXT NOT NULL,
+    PRIMARY KEY (task, hour)
+);
+"""
+
+
+@dataclass(frozen=True)
+class ExecutionRecord:
+    """One finished task execution."""
+
+    task: str
+    # Wall-clock time the execution finished
+    finished_at: float
+    # Seconds executing
+    runtime: float
+    # Final state: SUCCESS, FAILURE, RETRY, ...
+    outcome: str
+    # Seconds between publish and start (None when not stamped)
+    queue_wait: Optional[float] = None
+    # RSS after minus before, bytes (None without /proc)
+    rss_delta: Optional[int] = None
+    # Serialized message body, bytes
+    payload_size: Optional[int] = None
+
+
+_COLUMNS = tuple(f.name for f in fields(ExecutionRecord))
+
+
+@dataclass(frozen=True)
+class TaskPercentiles:
+    """Distribution of one metric of one task over a window."""
+
+    task: str
+    metric: str
+    count: int
+    mean: float
+    max: float
+    # Quantile (0.99) -> value
+    quantiles: Dict[float, float]
+
+    def __getitem__(self, quantile: float) -> float:
+        return self.quantiles[quantile]
+
+
+@dataclass(frozen=True)
+class Rollup:
+    """Compacted executions of one task in one hour."""
+
+    task: str
+    hour: float
+    count: int
+    failures: int
+    runtime_mean: float
+    runtime_max: float
+    # Upper bounds of the buckets holding each quantile of runtime
+    runtime_quantiles: Dict[float, float]
+
+
+def percentile(ordered: Sequence[float], quantile: float) -> float:
+    """Linearly interpolated ``quantile`` (0..1) of sorted values."""
+    if not ordered:
+        raise ValueError("percentile of no values")
+    position = (len(ordered) - 1) * quantile
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _bucket_quantile(counts: Sequence[int], quantile: float) -> float:
+    total = sum(counts)
+    rank = quantile * total
+    seen = 0
+    for bound, count in zip(DEFAULT_TIME_BUCKETS + (math.inf,), counts):
+        seen += count
+        if count and seen >= rank:
+            return bound
+    return math.inf
+
+
+class HistoryStore:
+    """
+    Execution records in a SQLite database.
+
+    Raw records are kept for ``compact``'s ``raw_retention``; older ones
+    are folded into hourly per-task rollups (count, failures, runtime sum,
+    maximum and bucket counts) kept for ``rollup_retention``. The
+    database uses WAL, so the worker processes of a node can share one
+    file while queries run.
+    """
+
+    def __init__(self, path: str = ".cache/history.sqlite3", timeout: float = 30.0):
+        """
+        Open (or create) a history database.
+
+        Args:
+            path: Database file (":memory:" for a private in-memory one)
+            timeout: Seconds to wait for another process's write lock
+        """
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(
+            path, timeout=timeout, isolation_level=None, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        with self._lock:
+            # Must precede table creation to take effect on a new file
+            self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(_SCHEMA)
+
+    def write(self, records: Iterable[ExecutionRecord]) -> int:
+        """Append records in one transaction; returns how many."""
+        rows = [astuple(r) for r in records]
+        if not rows:
+            return 0
+        placeholders = ", ".join("?" * len(_COLUMNS))
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    f"INSERT INTO executions ({', '.join(_COLUMNS)}) "
+                    f"VALUES ({placeholders})",
+                    rows,
+                )
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+        return len(rows)
+
+    def tasks(self) -> List[str]:
+        """Task names with raw records."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT task FROM executions ORDER BY task"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, task: Optional[str] = None) -> int:
+        """Raw records, of one task or all."""
+        sql, params = "SELECT COUNT(*) FROM executions", ()
+        if task is not None:
+            sql, params = sql + " WHERE task = ?", (task,)
+        with self._lock:
+            return self.conn.execute(sql, params).fetchone()[0]
+
+    def percentiles(
+        self,
+        task: Optional[str] = None,
+        window: float = 3600.0,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+        metric: str = "runtime",
+        outcome: Optional[str] = None,
+        now: Optional[float] = None,
+    ) -> Dict[str, TaskPercentiles]:
+        """
+        Percentiles of a metric per task over the last ``window`` seconds.
+
+        Exact, from raw records. Records without the metric (no queue wait
+        stamp, no ``/proc``) are left out.
+
+        Args:
+            task: One task name, or every task
+            window: Seconds back from ``now``
+            quantiles: Quantiles between 0 and 1 (0.999 for p99.9)
+            metric: One of ``METRICS``
+            outcome: Only executions with this final state ("SUCCESS")
+            now: End of the window (default: the current time)
+
+        Returns:
+            TaskPercentiles by task name, for tasks with records
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric!r}")
+        now = time.time() if now is None else now
+        sql = (
+            f"SELECT task, {metric} FROM executions "
+            f"WHERE finished_at > ? AND finished_at <= ? AND {metric} IS NOT NULL"
+        )
+        params: list = [now - window, now]
+        if task is not None:
+            sql += " AND task = ?"
+            params.append(task)
+        if outcome is not None:
+            sql += " AND outcome = ?"
+            params.append(outcome)
+        sql += f" ORDER BY task, {metric}"
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        by_task: Dict[str, List[float]] = {}
+        for name, value in rows:
+            by_task.setdefault(name, []).append(value)
+        return {
+            name: TaskPercentiles(
+                task=name,
+                metric=metric,
+                count=len(values),
+                mean=sum(values) / len(values),
+                max=values[-1],
+                quantiles={q: percentile(values, q) for q in quantiles},
+            )
+            for name, values in by_task.items()
+        }
+
+    def rollups(
+        self,
+        task: Optional[str] = None,
+        since: float = 0.0,
+        quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    ) -> List[Rollup]:
+        """
+        Hourly rollups of compacted records, oldest first.
+
+        Quantiles are bucket upper bounds, so they overestimate by at most
+        one bucket of ``DEFAULT_TIME_BUCKETS``.
+        """
+        sql = (
+            "SELECT task, hour, count, failures, runtime_sum, runtime_max, "
+            "runtime_buckets FROM rollups WHERE hour >= ?"
+        )
+        params: list = [since]
+        if task is not None:
+            sql += " AND task = ?"
+            params.append(task)
+        with self._lock:
+            rows = self.conn.execute(sql + " ORDER BY hour, task", params).fetchall()
+        result = []
+        for name, hour, count, failures, total, longest, buckets in rows:
+            counts = json.loads(buckets)
+            result.append(
+                Rollup(
+                    task=name,
+                    hour=hour,
+                    count=count,
+                    failures=failures,
+                    runtime_mean=total / count if count else 0.0,
+                    runtime_max=longest,
+                    runtime_quantiles={
+                        q: min(_bucket_quantile(counts, q), longest) for q in quantiles
+                    },
+                )
+            )
+        return result
+
+    def compact(
+        self,
+        raw_retention: float = 7 * 86400,
+        rollup_retention: float = 90 * 86400,
+        now: Optional[float] = None,
+    ) -> Dict[str, int]:
+        """
+        Fold old raw records into hourly rollups and drop expired data.
+
+        Args:
+            raw_retention: Seconds raw records are kept
+            rollup_retention: Seconds rollups are kept (0: forever)
+            now: Current time (for tests)
+
+        Returns:
+            ``{"compacted": raw records folded, "expired": rollups dropped}``
+        """
+        now = time.time() if now is None else now
+        cutoff = now - raw_retention
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rollups: Dict[tuple, list] = {}
+                cursor = self.conn.execute(
+                    "SELECT task, finished_at, runtime, outcome FROM executions "
+                    "WHERE finished_at <= ?",
+                    (cutoff,),
+                )
+                compacted = 0
+                for name, finished_at, runtime, outcome in cursor:
+                    key = (name, finished_at - finished_at % 3600)
+                    entry = rollups.get(key)
+                    if entry is None:
+                        entry = rollups[key] = self._load_rollup(*key)
+                    entry[0] += 1
+                    entry[1] += outcome == "FAILURE"
+                    entry[2] += runtime
+                    entry[3] = max(entry[3], runtime)
+                    entry[4][_bucket_index(runtime)] += 1
+                    compacted += 1
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (name, hour, n, failed, total, longest, json.dumps(counts))
+                        for (name, hour), (n, failed, total, longest, counts) in (
+                            rollups.items()
+                        )
+                    ],
+                )
+                self.conn.execute(
+                    "DELETE FROM executions WHERE finished_at <= ?", (cutoff,)
+                )
+                expired = 0
+                if rollup_retention:
+                    expired = self.conn.execute(
+                        "DELETE FROM rollups WHERE hour < ?",
+                        (now - rollup_retention - 3600,),
+                    ).rowcount
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            # Return the freed pages to the filesystem
+            self.conn.execute("PRAGMA incremental_vacuum")
+        return {"compacted": compacted, "expired": expired}
+
+    def _load_rollup(self, task: str, hour: float) -> list:
+        row = self.conn.execute(
+            "SELECT count, failures, runtime_sum, runtime_max, runtime_buckets "
+            "FROM rollups WHERE task = ? AND hour = ?",
+            (task, hour),
+        ).fetchone()
+        if row is None:
+            return [0, 0, 0.0, 0.0, [0] * (len(DEFAULT_TIME_BUCKETS) + 1)]
+        return [row[0], row[1], row[2], row[3], json.loads(row[4])]
+
+    def report(self, window: float = 3600.0, now: Optional[float] = None) -> str:
+        """Human-readable runtime percentiles per task."""
+        lines = [
+            f"  {'task':<40} {'runs':>7} {'p50 s':>9} {'p95 s':>9} {'p99 s':>9}"
+        ]
+        for s in self.percentiles(window=window, now=now).values():
+            lines.append(
+                f"  {s.task:<40} {s.count:>7} "
+                f"{s[0.5]:>9.3f} {s[0.95]:>9.3f} {s[0.99]:>9.3f}"
+            )
+        return "\n".join(lines)
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self.conn.close()
+
+
+def _bucket_index(value: float) -> int:
+    for i, bound in enumerate(DEFAULT_TIME_BUCKETS):
+        if value <= bound:
+            return i
+    return len(DEFAULT_TIME_BUCKETS)
+
+
+class HistoryWriter:
+    """
+    Write-behind buffer in front of a HistoryStore.
+
+    ``record`` only appends to an in-memory queue; a background thread
+    writes the queue in batches every ``flush_interval`` seconds, or as
+    soon as ``batch_size`` records are waiting. The database is opened in
+    the process that records (after a fork, the child opens its own).
+    When the queue is full the oldest records are dropped rather than
+    blocking tasks.
+    """
+
+    def __init__(
+        self,
+        path: str = ".cache/history.sqlite3",
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 100_000,
+        compact_interval: float = 0.0,
+        raw_retention: float = 7 * 86400,
+        rollup_retention: float = 90 * 86400,
+    ):
+        """
+        Initialize writer.
+
+        Args:
+            path: Database file
+            batch_size: Records that trigger an early flush
+            flush_interval: Longest seconds a record waits in memory
+            max_pending: Records buffered before the oldest are dropped
+            compact_interval: Seconds between compactions (0: never)
+            raw_retention: See ``HistoryStore.compact``
+            rollup_retention: See ``HistoryStore.compact``
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.compact_interval = compact_interval
+        self.raw_retention = raw_retention
+        self.rollup_retention = rollup_retention
+        self.written = 0
+        self.dropped = 0
+        self._pid = None
+        self._store: Optional[HistoryStore] = None
+        self._pending: deque = deque(maxlen=max_pending)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._flush_lock = threading.Lock()
+        self._last_compact = 0.0
+
+    def record(self, record: ExecutionRecord) -> None:
+        """Queue a record; never waits on the database."""
+        if self._pid != os.getpid():
+            self._start()
+        # A full deque drops its oldest record on append; checking first
+        # only counts it (the writer thread may drain the deque meanwhile)
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    def _start(self) -> None:
+        # First record in this process: state inherited over fork belongs
+        # to the parent, whose thread did not survive the fork
+        self._pid = os.getpid()
+        self._store = None
+        self._pending = deque(maxlen=self.max_pending)
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._last_compact = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._run, name="history-writer", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+            if (
+                self.compact_interval
+                and time.monotonic() - self._last_compact >= self.compact_interval
+            ):
+                self._last_compact = time.monotonic()
+                self.compact()
+
+    @property
+    def store(self) -> HistoryStore:
+        """Database of this process, opened on first use."""
+        if self._store is None:
+            self._store = HistoryStore(self.path)
+        return self._store
+
+    def flush(self) -> int:
+        """Write every queued record now; returns how many were written."""
+        with self._flush_lock:
+            batch = []
+            while True:
+                try:
+                    batch.append(self._pending.popleft())
+                except IndexError:
+                    break
+            if not batch:
+                return 0
+            try:
+                written = self.store.write(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                logger.error(f"✗ Could not write {len(batch)} history records: {e}")
+                return 0
+            self.written += written
+            return written
+
+    def compact(self) -> None:
+        """Compact the store, logging instead of raising."""
+        try:
+            result = self.store.compact(self.raw_retention, self.rollup_retention)
+        except Exception as e:
+            logger.warning(f"History compaction failed: {e}")
+            return
+        if any(result.values()):
+            logger.info(
+                f"History: compacted {result['compacted']} records, "
+                f"expired {result['expired']} rollups"
+            )
+
+    def close(self) -> None:
+        """Stop the background thread and write what is left."""
+        if self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(5)
+        self.flush()
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+        self._pid = None
+
+
+class HistoryRecorder:
+    """Turn Celery task signals into execution records."""
+
+    def __init__(self, writer: HistoryWriter):
+        self.writer = writer
+        # task id -> (perf_counter at start, RSS at start)
+        self._started: Dict[str, tuple] = {}
+
+    def connect(self) -> None:
+        """Connect handlers to Celery signals, replacing an earlier recorder."""
+        self.disconnect()
+        signals.before_task_publish.connect(
+            self.on_before_publish, weak=False, dispatch_uid="history.publish"
+        )
+        signals.task_received.connect(
+            self.on_received, weak=False, dispatch_uid="history.received"
+        )
+        signals.task_prerun.connect(
+            self.on_prerun, weak=False, dispatch_uid="history.prerun"
+        )
+        signals.task_postrun.connect(
+            self.on_postrun, weak=False, dispatch_uid="history.postrun"
+        )
+        signals.worker_process_shutdown.connect(
+            self.on_shutdown, weak=False, dispatch_uid="history.process_shutdown"
+        )
+        signals.worker_shutdown.connect(
+            self.on_shutdown, weak=False, dispatch_uid="history.shutdown"
+        )
+
+    def disconnect(self) -> None:
+        """Disconnect handlers from Celery signals."""
+        signals.before_task_publish.disconnect(dispatch_uid="history.publish")
+        signals.task_received.disconnect(dispatch_uid="history.received")
+        signals.task_prerun.disconnect(dispatch_uid="history.prerun")
+        signals.task_postrun.disconnect(dispatch_uid="history.postrun")
+        signals.worker_process_shutdown.disconnect(
+            dispatch_uid="history.process_shutdown"
+        )
+        signals.worker_shutdown.disconnect(dispatch_uid="history.shutdown")
+
+    def on_before_publish(self, sender=None, headers=None, **kwargs) -> None:
+        if headers is not None:
+            headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+    def on_received(self, sender=None, request=None, **kwargs) -> None:
+        # The request dict travels to the pool process that runs the task
+        body = getattr(request, "body", None)
+        if body is not None:
+            request.request_dict[PAYLOAD_SIZE_KEY] = len(body)
+
+    def on_prerun(self, sender=None, task_id=None, **kwargs) -> None:
+        self._started[task_id] = (time.perf_counter(), read_rss())
+
+    def on_postrun(
+        self, sender=None, task_id=None, task=None, state=None, **kwargs
+    ) -> None:
+        started = self._started.pop(task_id, None)
+        if started is None:
+            return
+        runtime = time.perf_counter() - started[0]
+        now = time.time()
+        rss = read_rss() if started[1] is not None else None
+        request = task.request
+        published_at = request.get(PUBLISHED_AT_HEADER)
+        self.writer.record(
+            ExecutionRecord(
+                task=task.name,
+                finished_at=now,
+                runtime=runtime,
+                outcome=state or "UNKNOWN",
+                queue_wait=(
+                    max(now - runtime - published_at, 0.0)
+                    if published_at is not None
+                    else None
+                ),
+                rss_delta=rss - started[1] if rss is not None else None,
+                payload_size=request.get(PAYLOAD_SIZE_KEY),
+            )
+        )
+
+    def on_shutdown(self, sender=None, **kwargs) -> None:
+        self.writer.close()
+
+
+def install_history(
+    celery_app: Celery,
+    path: str = ".cache/history.sqlite3",
+    **writer_options,
+) -> HistoryRecorder:
+    """
+    Record every task execution of the worker to a history database.
+
+    Args:
+        celery_app: Celery application
+        path: SQLite database file, shared by the node's worker processes
+        **writer_options: ``HistoryWriter`` batching and retention
+
+    Returns:
+        Connected HistoryRecorder instance
+    """
+    recorder = HistoryRecorder(HistoryWriter(path, **writer_options))
+    recorder.connect()
+    logger.info(f"✓ Execution history for {celery_app.main} in {path}")
+    return recorder
@@ -0,0 +1,187 @@
+"""Celery signal handlers that feed per-task metrics."""
+
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+from celery import Celery
+from celery import signals
+
+from .metrics import DEFAULT_SIZE_BUCKETS, MetricsRegistry, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Message header stamped at publish time, read back by the worker
+PUBLISHED_AT_HEADER = "x_published_at"
+
+# Environment variable overriding the endpoint's port, so that several
+# workers on one host (e.g. supervised ones) each bind their own
+PORT_ENV = "CELERY_METRICS_PORT"
+
+
+class TaskInstrumentation:
+    """Record queue wait, runtime, payload size and outcome per task name."""
+
+    def __init__(self, registry: MetricsRegistry = REGISTRY):
+        self.registry = registry
+        self.published = registry.counter(
+            "celery_tasks_published_total",
+            "Tasks published by this process.",
+            ["task"],
+        )
+        self.queue_wait = registry.histogram(
+            "celery_task_queue_wait_seconds",
+            "Time between publish and start of execution.",
+            ["task"],
+        )
+        self.runtime = registry.histogram(
+            "celery_task_runtime_seconds",
+            "Task execution time.",
+            ["task"],
+        )
+        self.payload = registry.histogram(
+            "celery_task_payload_bytes",
+            "Serialized message body size.",
+            ["task"],
+            buckets=DEFAULT_SIZE_BUCKETS,
+        )
+        self.outcomes = registry.counter(
+            "celery_task_outcomes_total",
+            "Finished tasks by final state.",
+            ["task", "outcome"],
+        )
+        self.failures = registry.counter(
+            "celery_task_failures_total",
+            "Task failures by exception type.",
+            ["task", "exception"],
+        )
+        self.retries = registry.counter(
+            "celery_task_retries_total",
+            "Task retries.",
+            ["task"],
+        )
+        self._started: Dict[str, float] = {}
+
+    def connect(self) -> None:
+        """Connect handlers to Celery signals."""
+        signals.before_task_publish.connect(
+            self.on_before_publish, weak=False, dispatch_uid="metrics.publish"
+        )
+        signals.task_received.connect(
+            self.on_received, weak=False, dispatch_uid="metrics.received"
+        )
+        signals.task_prerun.connect(
+            self.on_prerun, weak=False, dispatch_uid="metrics.prerun"
+        )
+        signals.task_postrun.connect(
+            self.on_postrun, weak=False, dispatch_uid="metrics.postrun"
+        )
+        signals.task_failure.connect(
+            self.on_failure, weak=False, dispatch_uid="metrics.failure"
+        )
+        signals.task_retry.connect(
+            self.on_retry, weak=False, dispatch_uid="metrics.retry"
+        )
+
+    def disconnect(self) -> None:
+        """Disconnect handlers from Celery signals."""
+        signals.before_task_publish.disconnect(dispatch_uid="metrics.publish")
+        signals.task_received.disconnect(dispatch_uid="metrics.received")
+        signals.task_prerun.disconnect(dispatch_uid="metrics.prerun")
+        signals.task_postrun.disconnect(dispatch_uid="metrics.postrun")
+        signals.task_failure.disconnect(dispatch_uid="metrics.failure")
+        signals.task_retry.disconnect(dispatch_uid="metrics.retry")
+
+    def on_before_publish(self, sender=None, headers=None, **kwargs) -> None:
+        if headers is not None:
+            headers[PUBLISHED_AT_HEADER] = time.time()
+        self.published.labels(sender).inc()
+
+    def on_received(self, sender=None, request=None, **kwargs) -> None:
+        body = getattr(request, "body", None)
+        if body is not None:
+            self.payload.labels(request.name).observe(len(body))
+
+    def on_prerun(self, sender=None, task_id=None, task=None, **kwargs) -> None:
+        self._started[task_id] = time.perf_counter()
+        published_at = _published_at(task)
+        if published_at is not None:
+            self.queue_wait.labels(task.name).observe(
+                max(time.time() - published_at, 0.0)
+            )
+
+    def on_postrun(
+        self, sender=None, task_id=None, task=None, state=None, **kwargs
+    ) -> None:
+        started = self._started.pop(task_id, None)
+        if started is not None:
+            self.runtime.labels(task.name).observe(time.perf_counter() - started)
+        self.outcomes.labels(task.name, state or "UNKNOWN").inc()
+
+    def on_failure(self, sender=None, exception=None, **kwargs) -> None:
+        self.failures.labels(sender.name, type(exception).__name__).inc()
+
+    def on_retry(self, sender=None, **kwargs) -> None:
+        self.retries.labels(sender.name).inc()
+
+
+def _published_at(task) -> Optional[float]:
+    request = getattr(task, "request", None)
+    if request is None:
+        return None
+    return request.get(PUBLISHED_AT_HEADER)
+
+
+def install_metrics(
+    celery_app: Celery,
+    host: str = "0.0.0.0",
+    port: int = 9808,
+    registry: MetricsRegistry = REGISTRY,
+) -> TaskInstrumentation:
+    """
+    Instrument task execution and serve metrics from the worker.
+
+    The HTTP exporter is started on ``worker_ready`` so that producers
+    which build the same app (e.g. the task client) do not bind the port.
+    Values recorded by prefork pool children are merged into it (see
+    ``monitoring.multiprocess``). ``PORT_ENV``, read when the worker is
+    ready, overrides ``port``.
+
+    Args:
+        celery_app: Celery application
+        host: Interface the metrics endpoint listens on
+        port: Port the metrics endpoint listens on
+        registry: Registry to record into
+
+    Returns:
+        Connected TaskInstrumentation instance
+    """
+    from .http_server import MetricsServer
+    from .multiprocess import share_registry
+
+    share_registry(registry)
+    instrumentation = TaskInstrumentation(registry)
+    instrumentation.connect()
+
+    server = MetricsServer(registry, host=host, port=port)
+
+    def start_server(sender=None, **kwargs):
+        server.port = int(os.environ.get(PORT_ENV, port))
+        try:
+            server.start()
+        except OSError as e:
+            logger.error(f"✗ Metrics endpoint on {host}:{server.port} failed: {e}")
+
+    def stop_server(sender=None, **kwargs):
+        server.stop()
+
+    signals.worker_ready.connect(
+        start_server, weak=False, dispatch_uid="metrics.server.start"
+    )
+    signals.worker_shutdown.connect(
+        stop_server, weak=False, dispatch_uid="metrics.server.stop"
+    )
+
+    logger.info(f"✓ Task metrics enabled for {celery_app.main} on {host}:{port}")
+    return instrumentation
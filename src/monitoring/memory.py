@@ -0,0 +1,86 @@
+"""Process memory readings from ``/proc`` (Linux)."""
+
+import os
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class MemoryInfo:
+    """Memory of one process, in bytes."""
+
+    rss: int
+    # Proportional set size: shared pages divided among their users
+    pss: int
+    # Unique set size: pages only this process maps (freed if it exits)
+    uss: int
+
+
+def read_memory(pid: Optional[int] = None) -> Optional[MemoryInfo]:
+    """
+    Read RSS, PSS and USS of a process.
+
+    Uses ``smaps_rollup`` (one pre-summed record) and falls back to summing
+    ``smaps`` on older kernels.
+
+    Args:
+        pid: Process id; defaults to the current process
+
+    Returns:
+        MemoryInfo, or None where ``/proc`` is unavailable
+    """
+    pid = os.getpid() if pid is None else pid
+    fields = {"Rss": 0, "Pss": 0, "Private_Clean": 0, "Private_Dirty": 0}
+    for name in ("smaps_rollup", "smaps"):
+        try:
+            with open(f"/proc/{pid}/{name}", "rb") as f:
+                for line in f:
+                    key, _, rest = line.partition(b":")
+                    key = key.decode()
+                    if key in fields:
+                        fields[key] += int(rest.split()[0]) * 1024
+            break
+        except FileNotFoundError:
+            continue
+        except OSError:
+            return None
+    else:
+        return None
+    return MemoryInfo(
+        rss=fields["Rss"],
+        pss=fields["Pss"],
+        uss=fields["Private_Clean"] + fields["Private_Dirty"],
+    )
+
+
+def read_rss(pid: Optional[int] = None) -> Optional[int]:
+    """
+    Read the resident set size of a process, in bytes.
+
+    Cheaper than ``read_memory``: a single line of ``/proc/<pid>/statm``.
+    """
+    pid = os.getpid() if pid is None else pid
+    try:
+        with open(f"/proc/{pid}/statm", "rb") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def read_peak_rss() -> Optional[int]:
+    """
+    Peak resident set size of the current process, in bytes.
+
+    This is the figure Celery's ``worker_max_memory_per_child`` compares
+    against; a forked child starts from its parent's RSS at fork time.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS and the BSDs
+    if sys.platform == "darwin" or "bsd" in sys.platform:
+        return peak
+    return peak * 1024
@@ -0,0 +1,331 @@
+"""Low-overhead in-process metrics with Prometheus text rendering."""
+
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Seconds: covers sub-millisecond tasks up to the default 30 minute time limit
+DEFAULT_TIME_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 1800.0,
+)
+
+# Bytes: 64 B .. 16 MiB in powers of four
+DEFAULT_SIZE_BUCKETS = tuple(float(64 * 4 ** i) for i in range(10))
+
+# How a gauge recorded by several worker processes is combined (see
+# monitoring.multiprocess): the largest or the sum of the values of live
+# processes, or the largest value ever recorded by any process
+GAUGE_MODES = ("max", "sum", "peak")
+
+
+class Counter:
+    """Monotonically increasing counter."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the counter."""
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Value that can go up and down."""
+
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        """Set the gauge."""
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Increment the gauge."""
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Decrement the gauge."""
+        with self._lock:
+            self.value -= amount
+
+
+class Histogram:
+    """Fixed-bucket histogram; ``observe`` is a bisect plus two additions."""
+
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        # One slot per bucket plus the implicit +Inf bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        """Record a single observation."""
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+    def cumulative(self) -> List[int]:
+        """Get cumulative bucket counts (Prometheus ``le`` semantics)."""
+        with self._lock:
+            counts = list(self.counts)
+        total = 0
+        result = []
+        for c in counts:
+            total += c
+            result.append(total)
+        return result
+
+    def add(self, counts: Sequence[int], total: float, count: int) -> None:
+        """Add the observations of another histogram with the same buckets."""
+        with self._lock:
+            for idx, c in enumerate(counts):
+                self.counts[idx] += c
+            self.sum += total
+            self.count += count
+
+
+class MetricFamily:
+    """A named metric with one child per label-value combination."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        kind: str,
+        labelnames: Sequence[str],
+        buckets: Optional[Sequence[float]] = None,
+        multiprocess: str = "max",
+    ):
+        if multiprocess not in GAUGE_MODES:
+            raise ValueError(f"Unknown gauge mode: {multiprocess!r}")
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) if buckets else None
+        # Gauges only: how values of several processes are combined
+        self.multiprocess = multiprocess
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        """Get (or create) the child metric for the given label values."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    if self.kind == "histogram":
+                        child = Histogram(self.buckets)
+                    elif self.kind == "gauge":
+                        child = Gauge()
+                    else:
+                        child = Counter()
+                    self._children[values] = child
+        return child
+
+    def children(self) -> Dict[Tuple[str, ...], object]:
+        """Snapshot of children keyed by label values."""
+        with self._lock:
+            return dict(self._children)
+
+    def clear(self) -> None:
+        """Drop all children (e.g. values inherited by a forked process)."""
+        with self._lock:
+            self._children.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-serializable definition and values of the family."""
+        samples = []
+        for values, child in sorted(self.children().items()):
+            if self.kind == "histogram":
+                with child._lock:
+                    data = [list(child.counts), child.sum, child.count]
+            else:
+                data = child.value
+            samples.append([list(values), data])
+        return {
+            "help": self.help,
+            "kind": self.kind,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets) if self.buckets else None,
+            "multiprocess": self.multiprocess,
+            "samples": samples,
+        }
+
+    def merge(self, samples: Sequence, live: bool = True) -> None:
+        """
+        Add values from another process's ``snapshot()`` samples.
+
+        Counters and histograms are summed. Gauges follow ``multiprocess``;
+        those of processes that are no longer ``live`` only count as
+        ``peak``.
+        """
+        if self.kind == "gauge" and not live and self.multiprocess != "peak":
+            return
+        for values, data in samples:
+            values = tuple(values)
+            new = values not in self._children
+            child = self.labels(*values)
+            if self.kind == "histogram":
+                child.add(*data)
+            elif self.kind == "counter" or self.multiprocess == "sum":
+                child.inc(data)
+            elif new or data > child.value:
+                child.set(data)
+
+    def render(self) -> List[str]:
+        """Render the family in Prometheus text exposition format."""
+        lines = [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for values, child in sorted(self.children().items()):
+            labels = _format_labels(self.labelnames, values)
+            if self.kind == "histogram":
+                bounds = [_format_value(b) for b in child.buckets] + ["+Inf"]
+                for bound, total in zip(bounds, child.cumulative()):
+                    le = _format_labels(
+                        self.labelnames + ("le",), values + (bound,)
+                    )
+                    lines.append(f"{self.name}_bucket{le} {total}")
+                lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+                lines.append(f"{self.name}_count{labels} {child.count}")
+            else:
+                lines.append(f"{self.name}{labels} {_format_value(child.value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+        # Values of other worker processes (see monitoring.multiprocess)
+        self.shared = None
+
+    def _family(
+        self, name, help_text, kind, labelnames, buckets=None, multiprocess="max"
+    ) -> MetricFamily:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = MetricFamily(
+                    name, help_text, kind, labelnames, buckets, multiprocess
+                )
+                self._families[name] = family
+            elif family.kind != kind:
+                raise ValueError(f"Metric {name} already registered as {family.kind}")
+            return family
+
+    def counter(
+        self, name: str, help_text: str, labelnames: Sequence[str] = ()
+    ) -> MetricFamily:
+        """Get or create a counter family."""
+        return self._family(name, help_text, "counter", labelnames)
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        multiprocess: str = "max",
+    ) -> MetricFamily:
+        """Get or create a gauge family; ``multiprocess`` is a GAUGE_MODES entry."""
+        return self._family(
+            name, help_text, "gauge", labelnames, multiprocess=multiprocess
+        )
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_TIME_BUCKETS,
+    ) -> MetricFamily:
+        """Get or create a histogram family."""
+        return self._family(name, help_text, "histogram", labelnames, buckets)
+
+    def get(self, name: str) -> Optional[MetricFamily]:
+        """Get a metric family by name."""
+        return self._families.get(name)
+
+    def clear(self) -> None:
+        """Drop the values of all families, keeping the families."""
+        with self._lock:
+            families = list(self._families.values())
+        for family in families:
+            family.clear()
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """JSON-serializable families and values, for ``merge``."""
+        with self._lock:
+            families = list(self._families.values())
+        return {family.name: family.snapshot() for family in families}
+
+    def merge(self, snapshot: Dict[str, Dict[str, Any]], live: bool = True) -> None:
+        """Add the values of another registry's ``snapshot()``."""
+        for name, data in snapshot.items():
+            family = self._family(
+                name,
+                data["help"],
+                data["kind"],
+                data["labelnames"],
+                data["buckets"],
+                data.get("multiprocess", "max"),
+            )
+            family.merge(data["samples"], live=live)
+
+    def collect(self) -> "MetricsRegistry":
+        """This registry combined with the values of other worker processes."""
+        if self.shared is None:
+            return self
+        return self.shared.collect()
+
+    def render(self) -> str:
+        """Render all families in Prometheus text exposition format."""
+        with self._lock:
+            families = list(self._families.values())
+        lines: List[str] = []
+        for family in families:
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value)) if abs(value) < 1e15 else repr(float(value))
+    return repr(value)
+
+
+# Process-wide default registry
+REGISTRY = MetricsRegistry()
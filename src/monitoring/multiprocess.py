@@ -0,0 +1,225 @@
+"""Metrics of prefork pool children, merged by the worker that serves them."""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Optional
+
+from celery import signals
+
+from .metrics import MetricsRegistry, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE = "archive.json"
+
+
+class SharedRegistry:
+    """
+    Combine a registry's values across the processes of one worker.
+
+    Under ``pool=prefork`` tasks run in pool children, so the values the
+    task signals record never reach the registry of the worker process
+    serving ``/metrics``. Each child writes a snapshot of its registry to
+    ``<directory>/<pid>.json`` every ``interval`` seconds and when it
+    exits; ``collect()`` in the worker process merges them with its own
+    values. Snapshots of exited children (recycled by
+    ``max_tasks_per_child`` or the memory ceiling) are folded into an
+    archive so their counters and histograms are kept.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry = REGISTRY,
+        directory: Optional[str] = None,
+        interval: float = 1.0,
+    ):
+        """
+        Initialize shared registry.
+
+        Args:
+            registry: Registry whose values are shared
+            directory: Where snapshots are written (default: a temporary
+                directory per worker process)
+            interval: Seconds between snapshots of a child
+        """
+        self.registry = registry
+        self.directory = Path(directory) if directory else None
+        self.interval = interval
+        # Worker process that forks the pool and serves the metrics
+        self.owner: Optional[int] = None
+        self._fixed = directory is not None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._last = ""
+
+    def connect(self) -> None:
+        """Connect handlers to worker signals."""
+        uid = f"metrics.shared.{id(self.registry)}"
+        signals.worker_init.connect(
+            self.on_worker_init, weak=False, dispatch_uid=f"{uid}.init"
+        )
+        signals.worker_process_init.connect(
+            self.on_process_init, weak=False, dispatch_uid=f"{uid}.process_init"
+        )
+        signals.worker_process_shutdown.connect(
+            self.on_process_shutdown,
+            weak=False,
+            dispatch_uid=f"{uid}.process_shutdown",
+        )
+        signals.worker_shutdown.connect(
+            self.on_worker_shutdown, weak=False, dispatch_uid=f"{uid}.shutdown"
+        )
+
+    def disconnect(self) -> None:
+        """Disconnect handlers from worker signals."""
+        uid = f"metrics.shared.{id(self.registry)}"
+        signals.worker_init.disconnect(dispatch_uid=f"{uid}.init")
+        signals.worker_process_init.disconnect(dispatch_uid=f"{uid}.process_init")
+        signals.worker_process_shutdown.disconnect(
+            dispatch_uid=f"{uid}.process_shutdown"
+        )
+        signals.worker_shutdown.disconnect(dispatch_uid=f"{uid}.shutdown")
+
+    def on_worker_init(self, sender=None, **kwargs) -> None:
+        self.owner = os.getpid()
+        if not self._fixed:
+            self.directory = (
+                Path(tempfile.gettempdir()) / f"celery-metrics-{self.owner}"
+            )
+        # Leftovers of an earlier worker with the same directory
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def on_process_init(self, sender=None, **kwargs) -> None:
+        if not self.is_child():
+            # The solo pool runs tasks in the worker process itself
+            return
+        # Values inherited from the worker process are the worker's
+        self.registry.clear()
+        self._last = ""
+        self._stop.clear()
+        threading.Thread(
+            target=self._run, name="metrics-snapshot", daemon=True
+        ).start()
+
+    def on_process_shutdown(self, sender=None, **kwargs) -> None:
+        if self.is_child():
+            self._stop.set()
+            self.write()
+
+    def on_worker_shutdown(self, sender=None, **kwargs) -> None:
+        if self.owner == os.getpid() and self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def is_child(self) -> bool:
+        """Whether this is a pool child of the worker process."""
+        return self.owner is not None and os.getpid() != self.owner
+
+    def write(self) -> None:
+        """Write this process's snapshot if its values changed."""
+        data = json.dumps(self.registry.snapshot())
+        if data == self._last:
+            return
+        path = self.directory / f"{os.getpid()}.json"
+        tmp = path.with_suffix(".tmp")
+        try:
+            tmp.write_text(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"✗ Failed to write metrics snapshot {path}: {e}")
+            return
+        self._last = data
+
+    def collect(self) -> MetricsRegistry:
+        """
+        The registry's values merged with those of its pool children.
+
+        Returns:
+            A new registry; the registry itself outside a worker
+        """
+        if self.owner is None or self.is_child() or self.directory is None:
+            return self.registry
+        merged = MetricsRegistry()
+        merged.merge(self.registry.snapshot())
+        with self._lock:
+            archive = self._fold_exited()
+            merged.merge(archive.snapshot(), live=False)
+            for path in self.directory.glob("[0-9]*.json"):
+                snapshot = _read(path)
+                if snapshot is not None:
+                    merged.merge(snapshot)
+        return merged
+
+    def _fold_exited(self) -> MetricsRegistry:
+        archive = MetricsRegistry()
+        archive_path = self.directory / ARCHIVE
+        archive.merge(_read(archive_path) or {}, live=False)
+        exited = [
+            path
+            for path in self.directory.glob("[0-9]*.json")
+            if not _alive(int(path.stem))
+        ]
+        if not exited:
+            return archive
+        for path in exited:
+            archive.merge(_read(path) or {}, live=False)
+        tmp = archive_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(archive.snapshot()))
+        os.replace(tmp, archive_path)
+        for path in exited:
+            path.unlink(missing_ok=True)
+        return archive
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except Exception as e:
+                logger.warning(f"✗ Metrics snapshot failed: {e}")
+
+
+def share_registry(
+    registry: MetricsRegistry = REGISTRY,
+    directory: Optional[str] = None,
+    interval: float = 1.0,
+) -> SharedRegistry:
+    """
+    Merge the registry's values from pool children on ``collect()``.
+
+    Idempotent: installers of different metrics share one instance.
+
+    Args:
+        registry: Registry to share
+        directory: Where children write snapshots (default: temporary)
+        interval: Seconds between snapshots of a child
+
+    Returns:
+        Connected SharedRegistry, also set as ``registry.shared``
+    """
+    if registry.shared is None:
+        shared = SharedRegistry(registry, directory, interval)
+        shared.connect()
+        registry.shared = shared
+    return registry.shared
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read(path: Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
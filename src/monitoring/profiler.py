@@ -0,0 +1,297 @@
+"""Opt-in sampling profiler for task functions."""
+
+import cProfile
+import functools
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import tracemalloc
+from collections import defaultdict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Key in TaskDefinition.metadata (or options) enabling the profiler
+PROFILE_KEY = "profile"
+
+# Frames kept per tracemalloc allocation traceback
+MEMORY_FRAMES = 25
+
+_FuncKey = Tuple[str, int, str]
+
+
+@dataclass(frozen=True)
+class ProfileConfig:
+    """Sampling settings for one task."""
+
+    # Fraction of executions profiled
+    rate: float = 0.01
+    # Also record allocations still alive when the call returns
+    memory: bool = False
+
+    @classmethod
+    def from_value(cls, value: Any) -> Optional["ProfileConfig"]:
+        """
+        Parse the ``profile`` metadata value.
+
+        Accepts a rate (``0.01``), ``true`` (the default rate) or a mapping
+        with ``rate`` and ``memory`` keys. Returns None when disabled.
+        """
+        if value is None or value is False:
+            return None
+        if value is True:
+            return cls()
+        if isinstance(value, (int, float)):
+            config = cls(rate=float(value))
+        elif isinstance(value, Mapping):
+            unknown = set(value) - {"rate", "memory"}
+            if unknown:
+                raise ValueError(f"Unknown profile settings: {sorted(unknown)}")
+            config = cls(
+                rate=float(value.get("rate", cls.rate)),
+                memory=bool(value.get("memory", False)),
+            )
+        else:
+            raise ValueError(f"Invalid profile setting: {value!r}")
+        if not 0.0 <= config.rate <= 1.0:
+            raise ValueError(f"Profile rate must be between 0 and 1: {config.rate}")
+        return config if config.rate > 0 else None
+
+
+class TaskProfiler:
+    """
+    Profile a sample of one task's executions.
+
+    Sampled calls run under cProfile (and optionally tracemalloc); results
+    are aggregated per process and written to ``directory`` as:
+
+    - ``<task>.<pid>.pstats``: cumulative pstats (snakeviz, ``pstats``)
+    - ``<task>.<pid>.folded``: collapsed stacks in microseconds, the input
+      format of ``flamegraph.pl``, speedscope and inferno; concatenate the
+      files of several processes to merge them
+    - ``<task>.<pid>.mem.folded``: bytes allocated by the call and still
+      alive when it returned, by allocation stack (``memory`` only)
+
+    An unsampled call costs one ``random()`` and a comparison.
+    """
+
+    def __init__(
+        self,
+        task_name: str,
+        directory: str,
+        config: ProfileConfig = ProfileConfig(),
+        rng: Callable[[], float] = random.random,
+    ):
+        """
+        Initialize profiler.
+
+        Args:
+            task_name: Task name, used in output file names
+            directory: Directory the profiles are written to
+            config: Sampling rate and memory option
+            rng: Uniform [0, 1) source deciding which calls are sampled
+        """
+        self.task_name = task_name
+        self.directory = Path(directory)
+        self.config = config
+        self.samples = 0
+        self._rng = rng
+        self._stats: Optional[pstats.Stats] = None
+        self._stacks: Dict[str, float] = defaultdict(float)
+        self._memory: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def wrap(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Wrap a task function so a sample of its calls is profiled."""
+        rate = self.config.rate
+        rng = self._rng
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if rng() >= rate:
+                return func(*args, **kwargs)
+            return self.profile(func, args, kwargs)
+
+        wrapper.__profiler__ = self
+        return wrapper
+
+    def profile(self, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        """Run one call under the profiler and record it."""
+        # cProfile cannot nest with another profiler (or itself, on threads)
+        if sys.getprofile() is not None or not self._lock.acquire(blocking=False):
+            return func(*args, **kwargs)
+        try:
+            tracing = self.config.memory and not tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.start(MEMORY_FRAMES)
+            before = tracemalloc.take_snapshot() if self.config.memory else None
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(func, *args, **kwargs)
+            finally:
+                after = tracemalloc.take_snapshot() if self.config.memory else None
+                if tracing:
+                    tracemalloc.stop()
+                self._record(profiler, before, after)
+        finally:
+            self._lock.release()
+
+    def _record(
+        self,
+        profiler: cProfile.Profile,
+        before: Optional[tracemalloc.Snapshot],
+        after: Optional[tracemalloc.Snapshot],
+    ) -> None:
+        try:
+            if os.getpid() != self._pid:
+                # Forked: samples so far belong to the parent's files
+                self._pid = os.getpid()
+                self._stats = None
+                self._stacks.clear()
+                self._memory.clear()
+                self.samples = 0
+            profiler.create_stats()
+            stats = pstats.Stats(profiler)
+            for stack, seconds in collapse_stats(stats.stats).items():
+                self._stacks[stack] += seconds
+            if self._stats is None:
+                self._stats = stats
+            else:
+                self._stats.add(stats)
+            if after is not None:
+                for stack, size in collapse_allocations(before, after).items():
+                    self._memory[stack] += size
+            self.samples += 1
+            self.flush()
+        except Exception as e:
+            logger.error(f"✗ Failed to record profile of {self.task_name}: {e}")
+
+    def flush(self) -> None:
+        """Write the aggregated profiles of this process."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        base = self.directory / f"{_safe_name(self.task_name)}.{self._pid}"
+        if self._stats is not None:
+            self._stats.dump_stats(f"{base}.pstats")
+        _write_folded(
+            Path(f"{base}.folded"),
+            {stack: int(seconds * 1e6) for stack, seconds in self._stacks.items()},
+        )
+        if self._memory:
+            _write_folded(Path(f"{base}.mem.folded"), self._memory)
+
+
+def profile_config(task_def) -> Optional[ProfileConfig]:
+    """Profile settings of a task definition, from metadata or options."""
+    value = task_def.metadata.get(PROFILE_KEY)
+    if value is None:
+        value = task_def.options.get(PROFILE_KEY)
+    return ProfileConfig.from_value(value)
+
+
+def collapse_stats(stats: Dict[_FuncKey, tuple]) -> Dict[str, float]:
+    """
+    Turn a cProfile call graph into collapsed stacks.
+
+    cProfile records caller/callee pairs, not whole stacks, so each
+    function's own time is split across the paths that reach it in
+    proportion to the cumulative time each caller spent in it.
+
+    Args:
+        stats: ``pstats.Stats.stats`` mapping
+
+    Returns:
+        ``"outer;inner;leaf"`` to seconds of own time
+    """
+    callees: Dict[_FuncKey, Dict[_FuncKey, float]] = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+
+    stacks: Dict[str, float] = defaultdict(float)
+
+    def walk(func: _FuncKey, path: Tuple[str, ...], seen, inflow: float) -> None:
+        _, _, own, cumulative, _ = stats[func]
+        share = inflow / cumulative if cumulative > 0 else 0.0
+        frames = path + (_frame_name(func),)
+        stacks[";".join(frames)] += own * share
+        for callee, edge in callees.get(func, {}).items():
+            if callee in seen or callee not in stats:
+                continue
+            walk(callee, frames, seen | {callee}, edge * share)
+
+    roots = [
+        func
+        for func, (_, _, _, _, callers) in stats.items()
+        if not callers and not _is_profiler_frame(func)
+    ]
+    for root in roots:
+        walk(root, (), frozenset([root]), stats[root][3])
+    return {stack: seconds for stack, seconds in stacks.items() if seconds > 0}
+
+
+def collapse_allocations(
+    before: tracemalloc.Snapshot, after: tracemalloc.Snapshot
+) -> Dict[str, int]:
+    """Bytes allocated between two snapshots and still alive, by stack."""
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    diffs = after.filter_traces(filters).compare_to(
+        before.filter_traces(filters), "traceback"
+    )
+
+    stacks: Dict[str, int] = defaultdict(int)
+    for diff in diffs:
+        traceback, size = diff.traceback, diff.size_diff
+        if size <= 0:
+            continue
+        # Oldest frame first, like a collapsed stack. Keep allocations made
+        # below cProfile's runcall, i.e. by the task, without profiler frames
+        frames = list(traceback)
+        for index in range(len(frames) - 1, -1, -1):
+            if frames[index].filename == cProfile.__file__:
+                stack = [
+                    f"{_short_path(f.filename)}:{f.lineno}"
+                    for f in frames[index + 1:]
+                ]
+                if stack:
+                    stacks[";".join(stack)] += size
+                break
+    return dict(stacks)
+
+
+def _frame_name(func: _FuncKey) -> str:
+    filename, lineno, name = func
+    if filename == "~":
+        # Built-ins: name is e.g. "<built-in method time.sleep>"
+        return name.replace(";", ":")
+    return f"{name} ({_short_path(filename)}:{lineno})".replace(";", ":")
+
+
+def _is_profiler_frame(func: _FuncKey) -> bool:
+    return func[2] == "<method 'disable' of '_lsprof.Profiler' objects>"
+
+
+def _short_path(filename: str) -> str:
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1:]
+    return filename
+
+
+def _safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", name)
+
+
+def _write_folded(path: Path, stacks: Dict[str, int]) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w") as f:
+        for stack, value in sorted(stacks.items()):
+            if value > 0:
+                f.write(f"{stack} {value}\n")
+    os.replace(tmp, path)
@@ -0,0 +1,260 @@
+"""Per-task memory growth attribution and memory-ceiling recycling."""
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from celery import Celery
+from celery import signals
+
+from .memory import read_peak_rss, read_rss
+from .metrics import DEFAULT_SIZE_BUCKETS, MetricsRegistry, REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+@dataclass
+class TaskMemoryStats:
+    """RSS growth observed while one task name was executing."""
+
+    name: str
+    runs: int = 0
+    # Runs after which RSS was higher than before
+    grew: int = 0
+    # Sum of positive growth, bytes
+    growth: int = 0
+    max_growth: int = 0
+
+    @property
+    def mean_growth(self) -> float:
+        """Average growth per run, bytes."""
+        return self.growth / self.runs if self.runs else 0.0
+
+
+class TaskMemoryTracker:
+    """
+    Sample RSS before and after each task and attribute growth to task names.
+
+    Tasks that keep growing the resident set of the process running them
+    (leaks, unbounded caches) show up with a high ``growth`` and ``grew``
+    ratio. A sample is one ``/proc/self/statm`` read, roughly 15µs.
+
+    With a memory ceiling, the tracker also reports which task pushed a
+    pool child over it; Celery's ``worker_max_memory_per_child`` (set from
+    the same ceiling by ``install_memory_tracking``) then recycles the
+    child after that task instead of after a fixed task count.
+
+    Statistics are kept in the registry, so under ``pool=prefork`` the
+    worker process sees those of its children once the registry is shared
+    (see ``monitoring.multiprocess``).
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry = REGISTRY,
+        max_memory_per_child: int = 0,
+    ):
+        """
+        Initialize tracker.
+
+        Args:
+            registry: Registry to record into
+            max_memory_per_child: Ceiling on a child's peak RSS, bytes
+                (0 disables)
+        """
+        self.max_memory_per_child = max_memory_per_child
+        self.registry = registry
+        self.growth_hist = registry.histogram(
+            "celery_task_memory_growth_bytes",
+            "RSS growth during task execution.",
+            ["task"],
+            buckets=DEFAULT_SIZE_BUCKETS,
+        )
+        self.growth_total = registry.counter(
+            "celery_task_memory_growth_bytes_total",
+            "RSS growth attributed to the task, summed over runs.",
+            ["task"],
+        )
+        self.grew = registry.counter(
+            "celery_task_memory_grew_total",
+            "Runs after which RSS was higher than before.",
+            ["task"],
+        )
+        self.max_growth = registry.gauge(
+            "celery_task_memory_growth_max_bytes",
+            "Largest RSS growth during one run.",
+            ["task"],
+            multiprocess="peak",
+        )
+        self.rss = registry.gauge(
+            "celery_worker_rss_bytes",
+            "Largest resident memory of the processes executing tasks.",
+        )
+        self.recycles = registry.counter(
+            "celery_worker_memory_recycles_total",
+            "Pool children recycled at the memory ceiling, by last task.",
+            ["task"],
+        )
+        self._before: Dict[str, int] = {}
+        self._over_ceiling = False
+
+    def connect(self) -> None:
+        """Connect handlers to Celery signals, replacing an earlier tracker."""
+        self.disconnect()
+        signals.task_prerun.connect(
+            self.on_prerun, weak=False, dispatch_uid="memory.prerun"
+        )
+        signals.task_postrun.connect(
+            self.on_postrun, weak=False, dispatch_uid="memory.postrun"
+        )
+        signals.worker_process_init.connect(
+            self.on_process_init, weak=False, dispatch_uid="memory.process_init"
+        )
+        signals.worker_process_shutdown.connect(
+            self.on_process_shutdown,
+            weak=False,
+            dispatch_uid="memory.process_shutdown",
+        )
+
+    def disconnect(self) -> None:
+        """Disconnect handlers from Celery signals."""
+        signals.task_prerun.disconnect(dispatch_uid="memory.prerun")
+        signals.task_postrun.disconnect(dispatch_uid="memory.postrun")
+        signals.worker_process_init.disconnect(dispatch_uid="memory.process_init")
+        signals.worker_process_shutdown.disconnect(
+            dispatch_uid="memory.process_shutdown"
+        )
+
+    def on_prerun(self, sender=None, task_id=None, **kwargs) -> None:
+        rss = read_rss()
+        if rss is not None:
+            self._before[task_id] = rss
+
+    def on_postrun(self, sender=None, task_id=None, task=None, **kwargs) -> None:
+        before = self._before.pop(task_id, None)
+        after = read_rss()
+        if before is None or after is None:
+            return
+        self.record(task.name, after - before, after)
+
+    def on_process_init(self, sender=None, **kwargs) -> None:
+        # Statistics inherited from the parent belong to the parent
+        for family in (
+            self.growth_hist,
+            self.growth_total,
+            self.grew,
+            self.max_growth,
+            self.rss,
+            self.recycles,
+        ):
+            family.clear()
+        self._before.clear()
+        self._over_ceiling = False
+
+    def on_process_shutdown(self, sender=None, **kwargs) -> None:
+        if self.growth_hist.children():
+            logger.info(
+                f"Task memory growth in child {os.getpid()}:\n{self.report()}"
+            )
+
+    def record(self, name: str, growth: int, rss: int) -> None:
+        """Record one task run that changed RSS by ``growth`` bytes."""
+        positive = max(growth, 0)
+        self.growth_hist.labels(name).observe(positive)
+        if positive:
+            self.growth_total.labels(name).inc(positive)
+            self.grew.labels(name).inc()
+            largest = self.max_growth.labels(name)
+            if positive > largest.value:
+                largest.set(positive)
+        self.rss.labels().set(rss)
+
+        if self.max_memory_per_child and not self._over_ceiling:
+            peak = read_peak_rss() or rss
+            if peak > self.max_memory_per_child:
+                self._over_ceiling = True
+                self.recycles.labels(name).inc()
+                logger.warning(
+                    f"Child {os.getpid()} reached {peak / MB:.0f}MB "
+                    f"(ceiling {self.max_memory_per_child / MB:.0f}MB) after "
+                    f"{name}; recycling. Top growth:\n{self.report(5)}"
+                )
+
+    def stats(self) -> List[TaskMemoryStats]:
+        """Per-task statistics of this process and its pool children."""
+        registry = self.registry.collect()
+
+        def value(name: str, task: str) -> int:
+            family = registry.get(name)
+            child = family.children().get((task,)) if family else None
+            return int(child.value) if child else 0
+
+        stats = []
+        runs = registry.get(self.growth_hist.name)
+        for (task,), hist in (runs.children() if runs else {}).items():
+            stats.append(
+                TaskMemoryStats(
+                    task,
+                    runs=hist.count,
+                    grew=value(self.grew.name, task),
+                    growth=value(self.growth_total.name, task),
+                    max_growth=value(self.max_growth.name, task),
+                )
+            )
+        return sorted(stats, key=lambda s: s.growth, reverse=True)
+
+    def get(self, name: str) -> Optional[TaskMemoryStats]:
+        """Statistics for one task name."""
+        return next((s for s in self.stats() if s.name == name), None)
+
+    def report(self, limit: int = 10) -> str:
+        """Human-readable table of the tasks with the most growth."""
+        lines = [
+            f"  {'task':<40} {'runs':>7} {'grew':>7} {'total MB':>9} {'max MB':>8}"
+        ]
+        for s in self.stats()[:limit]:
+            lines.append(
+                f"  {s.name:<40} {s.runs:>7} {s.grew:>7} "
+                f"{s.growth / MB:>9.1f} {s.max_growth / MB:>8.1f}"
+            )
+        return "\n".join(lines)
+
+
+def install_memory_tracking(
+    celery_app: Celery,
+    max_memory_per_child: int = 0,
+    registry: MetricsRegistry = REGISTRY,
+) -> TaskMemoryTracker:
+    """
+    Track per-task memory growth and recycle children at a memory ceiling.
+
+    Args:
+        celery_app: Celery application
+        max_memory_per_child: Ceiling on a pool child's peak RSS in bytes;
+            sets ``worker_max_memory_per_child`` (0 disables)
+        registry: Registry to record into
+
+    Returns:
+        Connected TaskMemoryTracker instance
+    """
+    if max_memory_per_child:
+        # Checked by the pool after every task; the child exits gracefully
+        celery_app.conf.worker_max_memory_per_child = max(
+            max_memory_per_child // 1024, 1
+        )
+
+    from .multiprocess import share_registry
+
+    # The statistics of pool children reach the worker process
+    share_registry(registry)
+    tracker = TaskMemoryTracker(registry, max_memory_per_child)
+    tracker.connect()
+
+    ceiling = ""
+    if max_memory_per_child:
+        ceiling = f", ceiling {max_memory_per_child / MB:.0f}MB"
+    logger.info(f"✓ Task memory tracking enabled for {celery_app.main}{ceiling}")
+    return tracker
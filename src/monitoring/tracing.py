@@ -0,0 +1,578 @@
+"""Trace propagation from publishers to task execution."""
+
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from celery import Celery
+from celery import signals
+
+from .instrumentation import PUBLISHED_AT_HEADER
+
+logger = logging.getLogger(__name__)
+
+# W3C trace context header: 00-<trace id>-<parent span id>-<flags>
+TRACEPARENT_HEADER = "traceparent"
+
+# Stamped by the worker's consumer when it takes the message off the broker
+RECEIVED_AT_HEADER = "x_received_at"
+
+_SAMPLED = "01"
+_NOT_SAMPLED = "00"
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    """The part of a span that crosses process boundaries."""
+
+    trace_id: str
+    span_id: str
+    sampled: bool = True
+
+    @property
+    def traceparent(self) -> str:
+        """Value of the ``traceparent`` header."""
+        flags = _SAMPLED if self.sampled else _NOT_SAMPLED
+        return f"00-{self.trace_id}-{self.span_id}-{flags}"
+
+    @classmethod
+    def from_traceparent(cls, value: Any) -> Optional["SpanContext"]:
+        """Parse a ``traceparent`` header; None if missing or malformed."""
+        if not isinstance(value, str) or len(value) != 55:
+            return None
+        version, trace_id, span_id, flags = value.split("-", 3)
+        if version != "00" or len(trace_id) != 32 or len(span_id) != 16:
+            return None
+        return cls(trace_id, span_id, flags == _SAMPLED)
+
+
+@dataclass
+class Span:
+    """A timed operation within a trace; times are epoch seconds."""
+
+    name: str
+    context: SpanContext
+    parent_id: Optional[str] = None
+    start: float = 0.0
+    end: Optional[float] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    # "ok" or "error"
+    status: str = "ok"
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Seconds between start and end, once ended."""
+        return None if self.end is None else self.end - self.start
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable form used by the exporters."""
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "end": self.end,
+            "duration": self.duration,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class SpanExporter:
+    """Destination of finished spans; subclass to ship them elsewhere."""
+
+    def export(self, spans: List[Span]) -> None:
+        """Export a batch of finished, sampled spans."""
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        """Flush and release resources."""
+
+
+class InMemorySpanExporter(SpanExporter):
+    """Keep spans in a list (tests, debugging)."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        with self._lock:
+            self.spans.extend(spans)
+
+    def clear(self) -> None:
+        """Drop collected spans."""
+        with self._lock:
+            self.spans.clear()
+
+
+class JsonlSpanExporter(SpanExporter):
+    """
+    Append spans to a JSON Lines file, one span per line.
+
+    Each batch is a single ``O_APPEND`` write, so the producer, the worker
+    and its pool children can share one file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize exporter.
+
+        Args:
+            path: File the spans are appended to
+        """
+        self.path = path
+        self._fd: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        data = "".join(
+            json.dumps(span.to_dict(), default=str) + "\n" for span in spans
+        ).encode()
+        with self._lock:
+            if self._fd is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._fd = os.open(
+                    self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+                )
+            os.write(self._fd, data)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+_CURRENT: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Create spans, propagate their context and hand them to an exporter.
+
+    Sampling is decided once per trace, where it starts, and travels in the
+    ``traceparent`` flags; everything downstream follows that decision. An
+    unsampled trace only costs generating and formatting its ids.
+    """
+
+    def __init__(
+        self,
+        exporter: Optional[SpanExporter] = None,
+        sample_rate: float = 1.0,
+        rng: Callable[[], float] = random.random,
+    ):
+        """
+        Initialize tracer.
+
+        Args:
+            exporter: Destination of finished spans; None disables tracing
+            sample_rate: Fraction of new traces that are recorded
+            rng: Uniform [0, 1) source for sampling decisions
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"Sample rate must be between 0 and 1: {sample_rate}")
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._rng = rng
+
+    @property
+    def enabled(self) -> bool:
+        """Whether spans are recorded at all."""
+        return self.exporter is not None
+
+    def current(self) -> Optional[Span]:
+        """Span active in this thread or task, if any."""
+        return _CURRENT.get()
+
+    def start_span(
+        self,
+        name: str,
+        parent: Optional[SpanContext] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+        start: Optional[float] = None,
+    ) -> Span:
+        """
+        Start a span.
+
+        Args:
+            name: Span name
+            parent: Parent context; defaults to the current span, and a new
+                trace (with a fresh sampling decision) when there is none
+            attributes: Initial attributes
+            start: Start time; defaults to now
+
+        Returns:
+            Span, to be passed to ``finish``
+        """
+        if parent is None:
+            current = _CURRENT.get()
+            if current is not None:
+                parent = current.context
+        if parent is None:
+            sampled = self.enabled and self._rng() < self.sample_rate
+            context = SpanContext(_new_trace_id(), _new_span_id(), sampled)
+            parent_id = None
+        else:
+            context = SpanContext(parent.trace_id, _new_span_id(), parent.sampled)
+            parent_id = parent.span_id
+        return Span(
+            name,
+            context,
+            parent_id,
+            time.time() if start is None else start,
+            attributes=dict(attributes or {}),
+        )
+
+    def finish(self, *spans: Span, end: Optional[float] = None) -> None:
+        """End spans (those without an end time) and export the sampled ones."""
+        now = time.time() if end is None else end
+        sampled = []
+        for span in spans:
+            if span.end is None:
+                span.end = now
+            if span.context.sampled:
+                sampled.append(span)
+        if sampled and self.exporter is not None:
+            try:
+                self.exporter.export(sampled)
+            except Exception as e:
+                logger.error(f"✗ Failed to export {len(sampled)} spans: {e}")
+
+    @contextmanager
+    def span(
+        self, name: str, attributes: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Span]:
+        """Run a block inside a new span, made current for its duration."""
+        span = self.start_span(name, attributes=attributes)
+        token = _CURRENT.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attributes["exception"] = type(e).__name__
+            raise
+        finally:
+            _CURRENT.reset(token)
+            self.finish(span)
+
+    @contextmanager
+    def publish(self, task_name: str) -> Iterator[Dict[str, Any]]:
+        """
+        Trace publishing one task message.
+
+        Yields the headers to send with the message: the ``traceparent`` of
+        a ``publish`` span that ends when the block exits. Yields no headers
+        when tracing is disabled.
+        """
+        if not self.enabled:
+            yield {}
+            return
+        with self.span("publish", {"task": task_name}) as span:
+            yield {
+                TRACEPARENT_HEADER: span.context.traceparent,
+                PUBLISHED_AT_HEADER: span.start,
+            }
+
+    def inject(self, headers: Dict[str, Any]) -> Dict[str, Any]:
+        """Add the current span's context to message headers."""
+        current = _CURRENT.get()
+        if current is not None:
+            headers[TRACEPARENT_HEADER] = current.context.traceparent
+        return headers
+
+    @staticmethod
+    def extract(headers: Any) -> Optional[SpanContext]:
+        """Read the trace context from message headers or a task request."""
+        if headers is None:
+            return None
+        return SpanContext.from_traceparent(headers.get(TRACEPARENT_HEADER))
+
+    def shutdown(self) -> None:
+        """Shut the exporter down."""
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer; disabled until ``install_tracing`` runs."""
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> None:
+    """Replace the process-wide tracer."""
+    global _tracer
+    _tracer = tracer
+
+
+@dataclass
+class _Execution:
+    """Worker-side state of one traced task execution."""
+
+    task: Span
+    execute: Span
+    received_at: Optional[float]
+    body_end: Optional[float] = None
+    token: Any = None
+
+
+_EXECUTION: ContextVar[Optional[_Execution]] = ContextVar(
+    "task_execution", default=None
+)
+
+
+def trace_body(func: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    Mark when a task function returns.
+
+    Lets the worker tell the task body apart from the result write that
+    Celery does before ``task_postrun``. Without it, the ``execute`` span
+    includes the result write.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            execution = _EXECUTION.get()
+            if execution is not None:
+                execution.body_end = time.time()
+
+    return wrapper
+
+
+class TaskTracing:
+    """
+    Celery signal handlers that trace task publishing and execution.
+
+    Each traced task produces, under the span that published it::
+
+        task <name>          published .. task_postrun
+          queue              published .. received by the worker
+          prefetch           received  .. task_prerun
+          execute            task_prerun .. function returned
+          result             function returned .. task_postrun
+
+    Tasks published while another task executes (children, retries) are
+    parented to that task's ``execute`` span.
+    """
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self._publishing: Dict[str, Span] = {}
+        self._executing: Dict[str, _Execution] = {}
+
+    def connect(self) -> None:
+        """Connect handlers to Celery signals, replacing earlier tracing."""
+        self.disconnect()
+        signals.before_task_publish.connect(
+            self.on_before_publish, weak=False, dispatch_uid="tracing.publish"
+        )
+        signals.after_task_publish.connect(
+            self.on_after_publish, weak=False, dispatch_uid="tracing.published"
+        )
+        signals.task_received.connect(
+            self.on_received, weak=False, dispatch_uid="tracing.received"
+        )
+        signals.task_prerun.connect(
+            self.on_prerun, weak=False, dispatch_uid="tracing.prerun"
+        )
+        signals.task_postrun.connect(
+            self.on_postrun, weak=False, dispatch_uid="tracing.postrun"
+        )
+        signals.worker_process_shutdown.connect(
+            self.on_process_shutdown, weak=False, dispatch_uid="tracing.shutdown"
+        )
+
+    def disconnect(self) -> None:
+        """Disconnect handlers from Celery signals."""
+        signals.before_task_publish.disconnect(dispatch_uid="tracing.publish")
+        signals.after_task_publish.disconnect(dispatch_uid="tracing.published")
+        signals.task_received.disconnect(dispatch_uid="tracing.received")
+        signals.task_prerun.disconnect(dispatch_uid="tracing.prerun")
+        signals.task_postrun.disconnect(dispatch_uid="tracing.postrun")
+        signals.worker_process_shutdown.disconnect(dispatch_uid="tracing.shutdown")
+
+    def on_before_publish(self, sender=None, headers=None, **kwargs) -> None:
+        if headers is None:
+            return
+        current = _CURRENT.get()
+        if current is not None and current.name == "publish":
+            # Injected by Tracer.publish() around this send
+            if headers.get(TRACEPARENT_HEADER) == current.context.traceparent:
+                current.attributes["task_id"] = headers.get("id")
+                return
+        elif current is None and TRACEPARENT_HEADER in headers:
+            # Context supplied by the caller
+            return
+        span = self.tracer.start_span(
+            "publish", attributes={"task": sender, "task_id": headers.get("id")}
+        )
+        headers[TRACEPARENT_HEADER] = span.context.traceparent
+        headers.setdefault(PUBLISHED_AT_HEADER, span.start)
+        if span.context.sampled:
+            self._publishing[headers.get("id")] = span
+
+    def on_after_publish(self, sender=None, headers=None, **kwargs) -> None:
+        span = self._publishing.pop((headers or {}).get("id"), None)
+        if span is not None:
+            self.tracer.finish(span)
+
+    def on_received(self, sender=None, request=None, **kwargs) -> None:
+        # Travels with the request to the pool child
+        request_dict = getattr(request, "request_dict", None)
+        if request_dict is not None:
+            request_dict[RECEIVED_AT_HEADER] = time.time()
+
+    def on_prerun(self, sender=None, task_id=None, task=None, **kwargs) -> None:
+        request = getattr(task, "request", None)
+        parent = self.tracer.extract(request)
+        if parent is not None and not parent.sampled:
+            return
+        if parent is None and not self.tracer.enabled:
+            return
+
+        now = time.time()
+        published_at = request.get(PUBLISHED_AT_HEADER) if request else None
+        received_at = request.get(RECEIVED_AT_HEADER) if request else None
+        attributes = {"task": task.name, "task_id": task_id}
+        if request is not None:
+            attributes["retries"] = request.retries
+            attributes["hostname"] = request.hostname
+        task_span = self.tracer.start_span(
+            f"task {task.name}",
+            parent=parent,
+            attributes=attributes,
+            start=published_at or received_at or now,
+        )
+        if not task_span.context.sampled:
+            return
+        execute = self.tracer.start_span(
+            "execute",
+            parent=task_span.context,
+            attributes={"pid": os.getpid()},
+            start=now,
+        )
+        execution = _Execution(task_span, execute, received_at)
+        execution.token = (_CURRENT.set(execute), _EXECUTION.set(execution))
+        self._executing[task_id] = execution
+
+    def on_postrun(
+        self, sender=None, task_id=None, task=None, state=None, **kwargs
+    ) -> None:
+        execution = self._executing.pop(task_id, None)
+        if execution is None:
+            return
+        current_token, execution_token = execution.token
+        try:
+            _CURRENT.reset(current_token)
+            _EXECUTION.reset(execution_token)
+        except ValueError:
+            # Reset from another context; the values die with it
+            pass
+
+        now = time.time()
+        task_span, execute = execution.task, execution.execute
+        task_span.attributes["state"] = state
+        if state not in (None, "SUCCESS"):
+            task_span.status = execute.status = "error"
+        child = functools.partial(self._child, task_span)
+        spans = [task_span]
+        received_at = execution.received_at
+        if received_at is not None and task_span.start <= received_at:
+            spans.append(child("queue", task_span.start, received_at))
+            spans.append(child("prefetch", received_at, execute.start))
+        else:
+            spans.append(child("queue", task_span.start, execute.start))
+        if execution.body_end is not None:
+            execute.end = execution.body_end
+            spans.append(child("result", execution.body_end, now))
+        spans.append(execute)
+        self.tracer.finish(*spans, end=now)
+
+    def on_process_shutdown(self, sender=None, **kwargs) -> None:
+        self.tracer.shutdown()
+
+    def _child(self, parent: Span, name: str, start: float, end: float) -> Span:
+        span = self.tracer.start_span(name, parent=parent.context, start=start)
+        span.end = max(end, start)
+        return span
+
+
+def build_exporter(name: str, path: str) -> Optional[SpanExporter]:
+    """
+    Create the exporter named in configuration.
+
+    Args:
+        name: ``jsonl``, ``memory``, ``none`` or a dotted path to a
+            SpanExporter subclass constructed without arguments
+        path: Output file of the ``jsonl`` exporter
+
+    Returns:
+        SpanExporter instance, or None for ``none``
+    """
+    if name == "jsonl":
+        return JsonlSpanExporter(path)
+    if name == "memory":
+        return InMemorySpanExporter()
+    if name == "none":
+        return None
+    module_name, _, class_name = name.rpartition(".")
+    if not module_name:
+        raise ValueError(f"Unknown span exporter: {name}")
+    import importlib
+
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def install_tracing(
+    celery_app: Celery,
+    exporter: Optional[SpanExporter],
+    sample_rate: float = 1.0,
+) -> TaskTracing:
+    """
+    Trace task publishing and execution.
+
+    Installs a process-wide tracer (used by ``TaskClient`` and the task
+    adapter) and the worker-side signal handlers.
+
+    Args:
+        celery_app: Celery application
+        exporter: Destination of finished spans
+        sample_rate: Fraction of new traces that are recorded
+
+    Returns:
+        Connected TaskTracing instance
+    """
+    tracer = Tracer(exporter, sample_rate)
+    set_tracer(tracer)
+    tracing = TaskTracing(tracer)
+    tracing.connect()
+    logger.info(
+        f"✓ Task tracing enabled for {celery_app.main}, "
+        f"sampling {sample_rate:.1%} of traces"
+    )
+    return tracing
@@ -0,0 +1,21 @@
+"""Retry policies: resolved exception names, jittered backoff and budgets."""
+
+from .policy import (
+    RETRY_KEY,
+    RetryBudget,
+    RetryPolicy,
+    resolve_exception,
+    resolve_exceptions,
+    retry_policy,
+)
+from .task import install_retry
+
+__all__ = [
+    "RETRY_KEY",
+    "RetryBudget",
+    "RetryPolicy",
+    "resolve_exception",
+    "resolve_exceptions",
+    "retry_policy",
+    "install_retry",
+]
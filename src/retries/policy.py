@@ -0,0 +1,228 @@
+"""Declarative retry policies: jittered backoff and retry budgets."""
+
+import builtins
+import importlib
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Iterable, Mapping, Optional, Tuple
+
+# Key in TaskDefinition.metadata (or options) with the retry policy
+RETRY_KEY = "retry"
+
+_FIELDS = {
+    "on",
+    "exclude",
+    "max_retries",
+    "backoff",
+    "max_delay",
+    "jitter",
+    "budget",
+    "window",
+}
+
+
+def resolve_exception(name: Any) -> type:
+    """
+    Exception class from a builtin or dotted name.
+
+    Args:
+        name: ``"TimeoutError"``, ``"requests.exceptions.ConnectionError"``
+            or an exception class (returned as is)
+
+    Returns:
+        Exception class
+
+    Raises:
+        ValueError: If the name does not resolve to an exception class
+    """
+    if isinstance(name, type):
+        cls = name
+    elif not isinstance(name, str) or not name:
+        raise ValueError(f"Invalid exception name: {name!r}")
+    elif "." in name:
+        module_name, _, attr = name.rpartition(".")
+        try:
+            cls = getattr(importlib.import_module(module_name), attr)
+        except (ImportError, AttributeError) as e:
+            raise ValueError(f"Cannot resolve exception {name!r}: {e}") from e
+    else:
+        cls = getattr(builtins, name, None)
+        if cls is None:
+            raise ValueError(
+                f"Unknown builtin exception {name!r}; use a dotted name"
+            )
+    if not (isinstance(cls, type) and issubclass(cls, BaseException)):
+        raise ValueError(f"{name!r} is not an exception class")
+    return cls
+
+
+def resolve_exceptions(names: Any) -> Tuple[type, ...]:
+    """Exception classes of a name or a list of names."""
+    if names is None:
+        return ()
+    if isinstance(names, (str, type)):
+        names = [names]
+    return tuple(resolve_exception(name) for name in names)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """When and how fast a task retries."""
+
+    # Exceptions that trigger a retry
+    on: Tuple[type, ...] = ()
+    # Subclasses of ``on`` that fail straight away
+    exclude: Tuple[type, ...] = ()
+    max_retries: int = 3
+    # Delay cap of the first retry, doubling per retry (seconds)
+    backoff: float = 1.0
+    # Upper bound of the delay cap (seconds)
+    max_delay: float = 300.0
+    # Full jitter: the delay is uniform in [0, cap], so retries of tasks
+    # that failed together spread out instead of arriving together
+    jitter: bool = True
+    # Retries allowed per ``window`` seconds, per task and process (0: no
+    # limit); past it failures are final instead of adding load
+    budget: int = 0
+    window: float = 60.0
+
+    def __post_init__(self):
+        if self.max_retries < 0:
+            raise ValueError("max_retries must not be negative")
+        if self.backoff < 0 or self.max_delay < 0:
+            raise ValueError("backoff and max_delay must not be negative")
+        if self.budget < 0 or self.window <= 0:
+            raise ValueError("Need budget >= 0 and window > 0")
+
+    def cap(self, retries: int) -> float:
+        """Longest delay of retry number ``retries`` (0-based)."""
+        # Bounded exponent: 2 ** 1024 overflows a float
+        return min(self.max_delay, self.backoff * 2 ** min(retries, 64))
+
+    def delay(self, retries: int, rng: Callable[[], float] = random.random) -> float:
+        """
+        Countdown of retry number ``retries`` (0-based).
+
+        Args:
+            retries: Retries already made
+            rng: Uniform [0, 1) source (for tests)
+        """
+        cap = self.cap(retries)
+        return cap * rng() if self.jitter else cap
+
+    @classmethod
+    def from_value(
+        cls, value: Mapping, default_on: Iterable = ()
+    ) -> "RetryPolicy":
+        """
+        Parse a ``retry`` mapping.
+
+        Args:
+            value: Policy settings; exception names are resolved
+            default_on: Exceptions retried when ``on`` is not set (the
+                task's ``autoretry_for``)
+
+        Returns:
+            RetryPolicy
+        """
+        if not isinstance(value, Mapping):
+            raise ValueError(f"Invalid retry setting: {value!r}")
+        unknown = set(value) - _FIELDS
+        if unknown:
+            raise ValueError(f"Unknown retry settings: {sorted(unknown)}")
+        on = resolve_exceptions(value.get("on", default_on))
+        if not on:
+            raise ValueError("Retry policy needs exceptions to retry on")
+        return cls(
+            on=on,
+            exclude=resolve_exceptions(value.get("exclude")),
+            max_retries=int(value.get("max_retries", cls.max_retries)),
+            backoff=float(value.get("backoff", cls.backoff)),
+            max_delay=float(value.get("max_delay", cls.max_delay)),
+            jitter=bool(value.get("jitter", cls.jitter)),
+            budget=int(value.get("budget", cls.budget)),
+            window=float(value.get("window", cls.window)),
+        )
+
+
+class RetryBudget:
+    """
+    At most ``limit`` retries in any ``window`` seconds (sliding window).
+
+    Thread-safe; not shared between processes, so a node allows
+    ``limit`` per worker process.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        window: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limit = limit
+        self.window = window
+        self.clock = clock
+        # Retries refused since creation
+        self.denied = 0
+        self._spent: deque = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> bool:
+        """Spend one retry; False when the window's budget is used up."""
+        with self._lock:
+            now = self.clock()
+            while self._spent and self._spent[0] <= now - self.window:
+                self._spent.popleft()
+            if len(self._spent) >= self.limit:
+                self.denied += 1
+                return False
+            self._spent.append(now)
+            return True
+
+    @property
+    def remaining(self) -> int:
+        """Retries left in the current window."""
+        with self._lock:
+            cutoff = self.clock() - self.window
+            return self.limit - sum(1 for t in self._spent if t > cutoff)
+
+
+def retry_policy(
+    task_def, policies: Optional[Mapping[str, Mapping]] = None, default: str = ""
+) -> Optional[RetryPolicy]:
+    """
+    Retry policy of a task definition.
+
+    The ``retry`` metadata (or option) is a mapping of settings or the name
+    of a policy in ``policies``. Tasks with ``autoretry_for`` and no
+    ``retry`` setting get the ``default`` named policy, if any. A
+    ``max_retries`` task option wins over the policy's.
+
+    Args:
+        task_def: TaskDefinition
+        policies: Named policy settings (``retries.policies``)
+        default: Name of the policy for plain ``autoretry_for`` tasks
+
+    Returns:
+        RetryPolicy, or None when the task does not use one
+    """
+    policies = policies or {}
+    value = task_def.metadata.get(RETRY_KEY)
+    if value is None:
+        value = task_def.options.get(RETRY_KEY)
+    autoretry_for = task_def.options.get("autoretry_for", ())
+    if value is None and autoretry_for and default:
+        value = default
+    if value is None or value is False:
+        return None
+    if isinstance(value, str):
+        if value not in policies:
+            raise ValueError(f"Unknown retry policy: {value!r}")
+        value = policies[value]
+    policy = RetryPolicy.from_value(value, autoretry_for)
+    if "max_retries" in task_def.options:
+        policy = replace(policy, max_retries=int(task_def.options["max_retries"]))
+    return policy
@@ -0,0 +1,59 @@
+"""Run a Celery task under a retry policy."""
+
+import functools
+import logging
+from typing import Optional
+
+from celery.exceptions import Retry
+
+from .policy import RetryBudget, RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+
+def install_retry(task, policy: RetryPolicy) -> Optional[RetryBudget]:
+    """
+    Retry ``task`` on the policy's exceptions, like Celery's ``autoretry_for``.
+
+    Replaces ``task.run`` with a wrapper that turns a matching exception
+    into ``task.retry`` with a jittered countdown. Failures past
+    ``max_retries`` or the retry budget, and direct calls, raise the
+    original exception.
+
+    Args:
+        task: Registered Celery task
+        policy: Retry policy
+
+    Returns:
+        The task's RetryBudget, or None without a budget
+    """
+    budget = RetryBudget(policy.budget, policy.window) if policy.budget else None
+    run = task.run
+
+    @functools.wraps(run)
+    def retrying(*args, **kwargs):
+        try:
+            return run(*args, **kwargs)
+        except Retry:
+            raise
+        except policy.exclude:
+            raise
+        except policy.on as exc:
+            request = task.request
+            if request.called_directly or request.retries >= policy.max_retries:
+                raise
+            if budget is not None and not budget.acquire():
+                logger.warning(
+                    f"✗ Retry budget of {task.name} spent "
+                    f"({policy.budget}/{policy.window:.0f}s); failing: {exc!r}"
+                )
+                raise
+            countdown = policy.delay(request.retries)
+            raise task.retry(
+                exc=exc, countdown=countdown, max_retries=policy.max_retries
+            )
+
+    task._orig_run, task.run = run, retrying
+    task.retry_policy = policy
+    task.retry_budget = budget
+    return budget
@@ -0,0 +1,41 @@
+"""Streaming partial results of generator tasks."""
+
+from .backends import (
+    FileStreamBackend,
+    RedisStreamBackend,
+    StreamBackend,
+    StreamEntry,
+    StreamError,
+    StreamRestarted,
+    StreamStalled,
+    StreamTimeout,
+    build_stream_backend,
+)
+from .generator import (
+    STREAM_KEY,
+    Chunk,
+    StreamOptions,
+    StreamProducer,
+    StreamReader,
+    stream_generator,
+    stream_options,
+)
+
+__all__ = [
+    "FileStreamBackend",
+    "RedisStreamBackend",
+    "StreamBackend",
+    "StreamEntry",
+    "StreamError",
+    "StreamRestarted",
+    "StreamStalled",
+    "StreamTimeout",
+    "build_stream_backend",
+    "STREAM_KEY",
+    "Chunk",
+    "StreamOptions",
+    "StreamProducer",
+    "StreamReader",
+    "stream_generator",
+    "stream_options",
+]
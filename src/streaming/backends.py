@@ -0,0 +1,325 @@
+"""Per-task chunk streams: Redis Streams and a local file stand-in."""
+
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class StreamError(Exception):
+    """The producing task failed, or the stream is unusable."""
+
+
+class StreamStalled(StreamError):
+    """The consumer did not acknowledge chunks within the timeout."""
+
+
+class StreamTimeout(StreamError):
+    """No chunk arrived within the consumer's timeout."""
+
+
+class StreamRestarted(StreamError):
+    """The producing task was retried; its chunks start over after ``offset``."""
+
+    def __init__(self, message: str, offset: int):
+        super().__init__(message)
+        # First offset of the new attempt
+        self.offset = offset
+
+
+@dataclass(frozen=True)
+class StreamEntry:
+    """One record of a stream."""
+
+    offset: int
+    data: Any
+    # Last record: ``data`` is the summary (or error) of the producer
+    end: bool = False
+    # The producer started over (a retry); later chunks are a new attempt
+    restart: bool = False
+
+
+class StreamBackend:
+    """
+    Storage for chunk streams, one stream per task id.
+
+    Offsets are dense integers starting at 0 and never reused: a retried
+    producer continues after the records of earlier attempts, starting
+    with a restart record. The producer is the only writer of a stream
+    and passes the offset of every record; consumers record how far they
+    have read with ``ack`` so the producer can apply backpressure.
+    """
+
+    def append(self, stream: str, offset: int, data: Any) -> None:
+        """Append a chunk at ``offset``."""
+        raise NotImplementedError
+
+    def close(self, stream: str, offset: int, summary: Dict[str, Any]) -> None:
+        """Append the end record after the last chunk."""
+        raise NotImplementedError
+
+    def restart(self, stream: str, offset: int, info: Dict[str, Any]) -> None:
+        """Append a record telling readers the producer started over."""
+        raise NotImplementedError
+
+    def next_offset(self, stream: str) -> int:
+        """Offset after the last record (0 for a new stream)."""
+        raise NotImplementedError
+
+    def read(
+        self, stream: str, offset: int, count: int = 100, block: float = 0.0
+    ) -> List[StreamEntry]:
+        """
+        Read records from ``offset`` on.
+
+        Args:
+            stream: Stream name
+            offset: First offset to return
+            count: Maximum number of records
+            block: Seconds to wait when nothing is available yet
+
+        Returns:
+            Up to ``count`` records, empty if none arrived in time
+        """
+        raise NotImplementedError
+
+    def ack(self, stream: str, offset: int) -> None:
+        """Record that the consumer has processed every chunk below ``offset``."""
+        raise NotImplementedError
+
+    def acked(self, stream: str) -> int:
+        """Offset acknowledged by the consumer (0 when none)."""
+        raise NotImplementedError
+
+    def delete(self, stream: str) -> None:
+        """Remove a stream and its acknowledgement."""
+        raise NotImplementedError
+
+
+class RedisStreamBackend(StreamBackend):
+    """
+    Streams stored as Redis Streams.
+
+    Record ``n`` gets the entry id ``0-(n+1)``, so reading from an offset is
+    a single ``XREAD`` from the previous id, blocking server-side.
+    """
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/1",
+        prefix: str = "stream:",
+        ttl: int = 86400,
+    ):
+        """
+        Initialize backend.
+
+        Args:
+            url: Redis connection URL
+            prefix: Key prefix of the streams
+            ttl: Seconds a stream is kept after its last write
+        """
+        import redis
+
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def _key(self, stream: str) -> str:
+        return f"{self.prefix}{stream}"
+
+    def _add(self, stream: str, offset: int, fields: Dict[str, str]) -> None:
+        key = self._key(stream)
+        pipe = self.client.pipeline(transaction=False)
+        pipe.xadd(key, fields, id=f"0-{offset + 1}")
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def append(self, stream: str, offset: int, data: Any) -> None:
+        self._add(stream, offset, {"d": json.dumps(data)})
+
+    def close(self, stream: str, offset: int, summary: Dict[str, Any]) -> None:
+        self._add(stream, offset, {"end": json.dumps(summary)})
+
+    def restart(self, stream: str, offset: int, info: Dict[str, Any]) -> None:
+        self._add(stream, offset, {"restart": json.dumps(info)})
+
+    def next_offset(self, stream: str) -> int:
+        last = self.client.xrevrange(self._key(stream), count=1)
+        return int(last[0][0].split("-", 1)[1]) if last else 0
+
+    def read(
+        self, stream: str, offset: int, count: int = 100, block: float = 0.0
+    ) -> List[StreamEntry]:
+        response = self.client.xread(
+            {self._key(stream): f"0-{offset}"},
+            count=count,
+            block=max(int(block * 1000), 1) if block > 0 else None,
+        )
+        entries = []
+        for _, records in response or ():
+            for entry_id, fields in records:
+                position = int(entry_id.split("-", 1)[1]) - 1
+                if "end" in fields:
+                    entries.append(
+                        StreamEntry(position, json.loads(fields["end"]), end=True)
+                    )
+                elif "restart" in fields:
+                    entries.append(
+                        StreamEntry(
+                            position, json.loads(fields["restart"]), restart=True
+                        )
+                    )
+                else:
+                    entries.append(StreamEntry(position, json.loads(fields["d"])))
+        return entries
+
+    def ack(self, stream: str, offset: int) -> None:
+        self.client.set(f"{self._key(stream)}:ack", offset, ex=self.ttl)
+
+    def acked(self, stream: str) -> int:
+        value = self.client.get(f"{self._key(stream)}:ack")
+        return int(value) if value is not None else 0
+
+    def delete(self, stream: str) -> None:
+        self.client.delete(self._key(stream), f"{self._key(stream)}:ack")
+
+
+class FileStreamBackend(StreamBackend):
+    """
+    Streams stored as JSON Lines files in a local directory.
+
+    A stand-in for Redis when producer and consumers share a host (tests,
+    development). Each record is one ``O_APPEND`` write; readers poll.
+    """
+
+    def __init__(self, directory: str = ".cache/streams", poll: float = 0.01):
+        """
+        Initialize backend.
+
+        Args:
+            directory: Directory holding the stream files
+            poll: Longest pause between polls while blocking in ``read``
+        """
+        self.directory = Path(directory)
+        self.poll = poll
+        # stream -> (next offset, byte position), so sequential reads do
+        # not rescan the file
+        self._positions: Dict[str, Tuple[int, int]] = {}
+
+    def _path(self, stream: str, suffix: str = ".jsonl") -> Path:
+        return self.directory / (re.sub(r"[^A-Za-z0-9_.-]", "_", stream) + suffix)
+
+    def _write(self, stream: str, record: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        line = (json.dumps(record) + "\n").encode()
+        fd = os.open(
+            self._path(stream), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644
+        )
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def append(self, stream: str, offset: int, data: Any) -> None:
+        self._write(stream, {"o": offset, "d": data})
+
+    def close(self, stream: str, offset: int, summary: Dict[str, Any]) -> None:
+        self._write(stream, {"o": offset, "end": summary})
+
+    def restart(self, stream: str, offset: int, info: Dict[str, Any]) -> None:
+        self._write(stream, {"o": offset, "restart": info})
+
+    def next_offset(self, stream: str) -> int:
+        offset = 0
+        while True:
+            entries = self._read(stream, offset, 1000)
+            if not entries:
+                return offset
+            offset = entries[-1].offset + 1
+
+    def read(
+        self, stream: str, offset: int, count: int = 100, block: float = 0.0
+    ) -> List[StreamEntry]:
+        deadline = time.monotonic() + block
+        pause = self.poll / 8
+        while True:
+            entries = self._read(stream, offset, count)
+            remaining = deadline - time.monotonic()
+            if entries or remaining <= 0:
+                return entries
+            time.sleep(min(pause, remaining))
+            pause = min(pause * 2, self.poll)
+
+    def _read(self, stream: str, offset: int, count: int) -> List[StreamEntry]:
+        cached_offset, position = self._positions.get(stream, (0, 0))
+        if cached_offset > offset:
+            cached_offset, position = 0, 0
+        try:
+            f = open(self._path(stream), "rb")
+        except FileNotFoundError:
+            return []
+        entries = []
+        with f:
+            f.seek(position)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Partially written record
+                    break
+                position += len(line)
+                record = json.loads(line)
+                cached_offset = record["o"] + 1
+                if record["o"] < offset:
+                    continue
+                if "end" in record:
+                    entries.append(StreamEntry(record["o"], record["end"], end=True))
+                elif "restart" in record:
+                    entries.append(
+                        StreamEntry(record["o"], record["restart"], restart=True)
+                    )
+                else:
+                    entries.append(StreamEntry(record["o"], record["d"]))
+                if len(entries) >= count:
+                    break
+        self._positions[stream] = (cached_offset, position)
+        return entries
+
+    def ack(self, stream: str, offset: int) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(stream, ".ack")
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(str(offset))
+        os.replace(tmp, path)
+
+    def acked(self, stream: str) -> int:
+        try:
+            return int(self._path(stream, ".ack").read_text())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def delete(self, stream: str) -> None:
+        self._positions.pop(stream, None)
+        for suffix in (".jsonl", ".ack"):
+            try:
+                self._path(stream, suffix).unlink()
+            except FileNotFoundError:
+                pass
+
+
+def build_stream_backend(cfg) -> StreamBackend:
+    """
+    Create the stream backend named in configuration.
+
+    Args:
+        cfg: ``StreamingConfig``
+
+    Returns:
+        StreamBackend instance
+    """
+    if cfg.backend == "redis":
+        return RedisStreamBackend(cfg.url, ttl=cfg.ttl)
+    if cfg.backend == "file":
+        return FileStreamBackend(cfg.directory)
+    raise ValueError(f"Unknown stream backend: {cfg.backend}")
@@ -0,0 +1,278 @@
+"""Run generator tasks as chunk streams and read them back."""
+
+import functools
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, Mapping, Optional
+
+from .backends import (
+    StreamBackend,
+    StreamError,
+    StreamRestarted,
+    StreamStalled,
+    StreamTimeout,
+)
+
+logger = logging.getLogger(__name__)
+
+# Key in TaskDefinition.metadata (or options) with stream settings
+STREAM_KEY = "stream"
+
+
+@dataclass(frozen=True)
+class StreamOptions:
+    """Producer settings of one streaming task."""
+
+    # Chunks the producer may run ahead of the consumer (0: unbounded)
+    window: int = 100
+    # Seconds the producer waits for the consumer before failing
+    timeout: float = 300.0
+
+    @classmethod
+    def from_value(cls, value: Any) -> "StreamOptions":
+        """Parse the ``stream`` metadata value (a mapping, or None)."""
+        if value is None or value is True:
+            return cls()
+        if not isinstance(value, Mapping):
+            raise ValueError(f"Invalid stream setting: {value!r}")
+        unknown = set(value) - {"window", "timeout"}
+        if unknown:
+            raise ValueError(f"Unknown stream settings: {sorted(unknown)}")
+        return cls(
+            window=int(value.get("window", cls.window)),
+            timeout=float(value.get("timeout", cls.timeout)),
+        )
+
+
+def stream_options(task_def) -> StreamOptions:
+    """Stream settings of a task definition, from metadata or options."""
+    value = task_def.metadata.get(STREAM_KEY)
+    if value is None:
+        value = task_def.options.get(STREAM_KEY)
+    return StreamOptions.from_value(value)
+
+
+class StreamProducer:
+    """Write one task's chunks, waiting while the consumer is behind."""
+
+    def __init__(
+        self,
+        backend: StreamBackend,
+        stream: str,
+        options: StreamOptions = StreamOptions(),
+        offset: int = 0,
+    ):
+        self.backend = backend
+        self.stream = stream
+        self.options = options
+        # Next offset, and the first of this attempt's chunks
+        self.offset = offset
+        self.first = offset
+        self.bytes = 0
+        self._acked = backend.acked(stream) if offset else 0
+
+    @property
+    def chunks(self) -> int:
+        """Chunks sent by this attempt."""
+        return self.offset - self.first
+
+    def send(self, data: Any) -> None:
+        """Append a chunk, first waiting for room in the window."""
+        window = self.options.window
+        if window and self.offset - self._acked >= window:
+            self._wait_for_consumer()
+        self.backend.append(self.stream, self.offset, data)
+        self.offset += 1
+        self.bytes += len(json.dumps(data))
+
+    def close(self, summary: Dict[str, Any]) -> None:
+        """Append the end record."""
+        self.backend.close(self.stream, self.offset, summary)
+
+    def restart(self, info: Dict[str, Any]) -> None:
+        """Start a new attempt after the records of earlier ones."""
+        self.backend.restart(self.stream, self.offset, info)
+        self.offset += 1
+        self.first = self.offset
+        self.bytes = 0
+
+    def _wait_for_consumer(self) -> None:
+        deadline = time.monotonic() + self.options.timeout
+        pause = 0.005
+        while True:
+            self._acked = self.backend.acked(self.stream)
+            if self.offset - self._acked < self.options.window:
+                return
+            if time.monotonic() >= deadline:
+                raise StreamStalled(
+                    f"Consumer of {self.stream} stalled at offset {self._acked} "
+                    f"for {self.options.timeout:.0f}s"
+                )
+            time.sleep(pause)
+            pause = min(pause * 2, 0.5)
+
+
+def stream_generator(
+    func: Callable[..., Iterator[Any]],
+    backend: StreamBackend,
+    options: StreamOptions = StreamOptions(),
+) -> Callable[..., Dict[str, Any]]:
+    """
+    Turn a generator function into a task that streams what it yields.
+
+    Every yielded value (JSON-serializable) is appended to a stream named
+    after the task id. The task result is only a summary::
+
+        {"stream": <task id>, "chunks": 3, "bytes": 120, "result": <return>}
+
+    where ``result`` is the generator's ``return`` value. A failure ends
+    the attempt with the error, which readers raise as ``StreamError``. A
+    retried task never rewrites offsets readers may have passed: it
+    appends a restart record, which readers raise as ``StreamRestarted``,
+    and streams the new attempt after it.
+
+    Args:
+        func: Generator function
+        backend: Stream storage
+        options: Backpressure settings
+
+    Returns:
+        Task function
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        from celery import current_task
+
+        request = getattr(current_task, "request", None)
+        stream = getattr(request, "id", None) or uuid.uuid4().hex
+        offset = backend.next_offset(stream)
+        producer = StreamProducer(backend, stream, options, offset)
+        if offset:
+            producer.restart({"attempt": getattr(request, "retries", 0) or 0})
+        generator = func(*args, **kwargs)
+        try:
+            while True:
+                try:
+                    chunk = next(generator)
+                except StopIteration as stop:
+                    result = stop.value
+                    break
+                producer.send(chunk)
+        except BaseException as e:
+            generator.close()
+            try:
+                producer.close({"error": f"{type(e).__name__}: {e}"})
+            except Exception as close_error:
+                logger.error(f"✗ Failed to end stream {stream}: {close_error}")
+            raise
+
+        summary = {
+            "stream": stream,
+            "chunks": producer.chunks,
+            "bytes": producer.bytes,
+            "result": result,
+        }
+        producer.close(summary)
+        return summary
+
+    wrapper.__stream__ = options
+    return wrapper
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A chunk read from a stream."""
+
+    offset: int
+    data: Any
+
+
+class StreamReader:
+    """
+    Iterate over a task's chunks as they arrive.
+
+    Acknowledges each batch once the caller has consumed it, which is what
+    lets the producer run at most ``window`` chunks ahead. ``offset`` is
+    the next chunk to read; pass it to a new reader to resume. After the
+    last chunk ``summary`` holds the task's summary.
+
+    When the task is retried the reader raises ``StreamRestarted`` at the
+    start of the new attempt; chunks already read belong to the failed
+    one. Iterating further yields the new attempt's chunks. After a
+    failed attempt's ``StreamError``, a new reader from ``offset`` follows
+    a retry.
+    """
+
+    def __init__(
+        self,
+        backend: StreamBackend,
+        stream: str,
+        offset: int = 0,
+        timeout: Optional[float] = 60.0,
+        batch: int = 100,
+    ):
+        """
+        Initialize reader.
+
+        Args:
+            backend: Stream storage
+            stream: Stream name (the task id)
+            offset: First chunk to read
+            timeout: Seconds to wait for the next chunk (None: forever)
+            batch: Chunks fetched per read
+        """
+        self.backend = backend
+        self.stream = stream
+        self.offset = offset
+        self.timeout = timeout
+        self.batch = batch
+        self.summary: Optional[Dict[str, Any]] = None
+        self._buffer: list = []
+        self._position = 0
+
+    def __iter__(self) -> "StreamReader":
+        return self
+
+    def __next__(self) -> Chunk:
+        if self._position >= len(self._buffer):
+            if self.summary is not None:
+                raise StopIteration
+            self._fill()
+        entry = self._buffer[self._position]
+        self._position += 1
+        if entry.restart:
+            self.offset = entry.offset + 1
+            raise StreamRestarted(
+                f"Task {self.stream} was retried; chunks restart at {self.offset}",
+                self.offset,
+            )
+        if entry.end:
+            self.summary = entry.data
+            if "error" in entry.data:
+                self.offset = entry.offset + 1
+                raise StreamError(f"Task {self.stream} failed: {entry.data['error']}")
+            raise StopIteration
+        self.offset = entry.offset + 1
+        return Chunk(entry.offset, entry.data)
+
+    def _fill(self) -> None:
+        # Everything handed out so far has been consumed
+        self.backend.ack(self.stream, self.offset)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while True:
+            block = 1.0
+            if deadline is not None:
+                block = min(block, deadline - time.monotonic())
+                if block <= 0:
+                    raise StreamTimeout(
+                        f"No chunk from {self.stream} at offset {self.offset} "
+                        f"within {self.timeout}s"
+                    )
+            entries = self.backend.read(self.stream, self.offset, self.batch, block)
+            if entries:
+                self._buffer, self._position = entries, 0
+                return
@@ -1,7 +1,8 @@
 """Task manager for loading tasks from various sources."""
 
 import logging
-from typing import Protocol
+from itertools import islice
+from typing import Iterable, Iterator, List, Protocol
 
 from .registry import TaskRegistry, TaskDefinition
 
@@ -19,23 +20,42 @@ class TaskSource(Protocol):
 class TaskManager:
     """Manages task loading and registration."""
 
-    def __init__(self, registry: TaskRegistry):
+    def __init__(self, registry: TaskRegistry, chunk_size: int = 1000):
         self.registry = registry
+        self.chunk_size = chunk_size
 
     def load_from_source(self, source: TaskSource) -> None:
-        """Load tasks from a source and register them."""
-        try:
-            tasks = source.load_tasks()
-            logger.info(f"Loaded {len(tasks)} tasks from source")
+        """
+        Load tasks from a source and register them.
 
-            for task_def in tasks:
-                try:
-                    self.registry.register(task_def)
-                    logger.debug(f"Registered task: {task_def.name}")
-                except ValueError as e:
-                    logger.warning(f"Failed to register task {task_def.name}: {e}")
+        Sources with ``iter_tasks`` are consumed as a stream and registered
+        one chunk at a time, so peak memory is bounded by the chunk size.
+        """
+        try:
+            if hasattr(source, "iter_tasks"):
+                count = 0
+                for chunk in _chunks(source.iter_tasks(), self.chunk_size):
+                    count += len(chunk)
+                    self._register(chunk)
+            else:
+                tasks = source.load_tasks()
+                count = len(tasks)
+                self._register(tasks)
+            logger.info(f"Loaded {count} tasks from source")
 
         except Exception as e:
             logger.error(f"Failed to load tasks from source: {e}")
             raise
 
+    def _register(self, tasks: List[TaskDefinition]) -> None:
+        for name in self.registry.register_many(tasks):
+            logger.warning(f"Failed to register task {name}: already registered")
+
+
+def _chunks(
+    items: Iterable[TaskDefinition], size: int
+) -> Iterator[List[TaskDefinition]]:
+    """Split an iterable into lists of at most ``size`` items."""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
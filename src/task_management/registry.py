@@ -50,6 +50,23 @@ class TaskRegistry:
             raise ValueError(f"Task {task_def.name} already registered")
         self._tasks[task_def.name] = task_def
 
+    def register_many(self, task_defs: List[TaskDefinition]) -> List[str]:
+        """
+        Register task definitions in one step.
+
+        Returns:
+            Names skipped because they are already registered or repeated
+        """
+        new = {}
+        skipped = []
+        for task_def in task_defs:
+            if task_def.name in self._tasks or task_def.name in new:
+                skipped.append(task_def.name)
+            else:
+                new[task_def.name] = task_def
+        self._tasks.update(new)
+        return skipped
+
     def get(self, name: str) -> Optional[TaskDefinition]:
         """Get a task definition by name."""
         return self._tasks.get(name)
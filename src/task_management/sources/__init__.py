@@ -2,6 +2,15 @@
 
 from .database_source import DatabaseTaskSource
 from .config_source import ConfigTaskSource
+from .directory_source import DirectoryTaskSource
+from .composite_source import CompositeTaskSource, SourceReport, TaskConflict
 
-__all__ = ["DatabaseTaskSource", "ConfigTaskSource"]
+__all__ = [
+    "DatabaseTaskSource",
+    "ConfigTaskSource",
+    "DirectoryTaskSource",
+    "CompositeTaskSource",
+    "SourceReport",
+    "TaskConflict",
+]
 
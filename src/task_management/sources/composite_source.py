@@ -0,0 +1,124 @@
+"""Composite task source loading several sources concurrently."""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..registry import TaskDefinition
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SourceReport:
+    """Outcome of loading one source."""
+
+    name: str
+    tasks: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+@dataclass
+class TaskConflict:
+    """A task name defined by more than one source."""
+
+    name: str
+    winner: str
+    overridden: List[str] = field(default_factory=list)
+
+
+class CompositeTaskSource:
+    """
+    Load several task sources in parallel and merge them.
+
+    Sources are given in precedence order: when two sources define the same
+    task name, the definition from the earlier source wins and the conflict
+    is recorded in ``conflicts``. A source that fails is logged and reported
+    in ``reports`` without preventing the others from loading.
+    """
+
+    def __init__(
+        self,
+        sources: Sequence[Tuple[str, Any]],
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Initialize composite source.
+
+        Args:
+            sources: ``(name, source)`` pairs, highest precedence first
+            max_workers: Threads used to load sources (default: one per source)
+        """
+        self.sources = list(sources)
+        self.max_workers = max_workers
+        self.reports: List[SourceReport] = []
+        self.conflicts: List[TaskConflict] = []
+
+    def load_tasks(self) -> List[TaskDefinition]:
+        """Load all sources concurrently and merge by precedence."""
+        if not self.sources:
+            self.reports, self.conflicts = [], []
+            return []
+
+        workers = self.max_workers or len(self.sources)
+        with ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="task-source"
+        ) as pool:
+            results = list(pool.map(self._load_one, self.sources))
+
+        self.reports = [report for report, _ in results]
+        for report in self.reports:
+            if report.error:
+                logger.error(f"  ✗ {report.name}: {report.error}")
+            else:
+                logger.info(
+                    f"  ✓ {report.name}: {report.tasks} tasks "
+                    f"in {report.seconds * 1000:.1f}ms"
+                )
+
+        return self._merge(
+            [(report.name, tasks) for report, tasks in results]
+        )
+
+    def _load_one(
+        self, named_source: Tuple[str, Any]
+    ) -> Tuple[SourceReport, List[TaskDefinition]]:
+        name, source = named_source
+        start = time.perf_counter()
+        try:
+            tasks = source.load_tasks()
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            return SourceReport(name, seconds=elapsed, error=str(e)), []
+        elapsed = time.perf_counter() - start
+        return SourceReport(name, tasks=len(tasks), seconds=elapsed), tasks
+
+    def _merge(
+        self, results: List[Tuple[str, List[TaskDefinition]]]
+    ) -> List[TaskDefinition]:
+        merged: Dict[str, TaskDefinition] = {}
+        owners: Dict[str, str] = {}
+        conflicts: Dict[str, TaskConflict] = {}
+
+        for source_name, tasks in results:
+            for task_def in tasks:
+                owner = owners.get(task_def.name)
+                if owner is None:
+                    merged[task_def.name] = task_def
+                    owners[task_def.name] = source_name
+                    continue
+                conflict = conflicts.setdefault(
+                    task_def.name, TaskConflict(task_def.name, owner)
+                )
+                conflict.overridden.append(source_name)
+
+        self.conflicts = list(conflicts.values())
+        for conflict in self.conflicts:
+            logger.warning(
+                f"Task {conflict.name} defined by several sources; using "
+                f"{conflict.winner}, ignoring {', '.join(conflict.overridden)}"
+            )
+        return list(merged.values())
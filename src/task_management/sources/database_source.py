@@ -3,27 +3,55 @@
 import json
 import logging
 import sqlite3
-from typing import List
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
 from pathlib import Path
 
 from ..registry import TaskDefinition
+from ..storage.schema import ensure_filter_schema, has_filter_schema, tags_table
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per round trip when streaming
+DEFAULT_CHUNK_SIZE = 1000
+
 
 class DatabaseTaskSource:
     """Load tasks from database."""
 
-    def __init__(self, db_uri: str, table: str = "tasks"):
+    COLUMNS = (
+        "name",
+        "module_path",
+        "function_name",
+        "description",
+        "enabled",
+        "tags",
+        "options",
+        "metadata",
+    )
+
+    def __init__(
+        self,
+        db_uri: str,
+        table: str = "tasks",
+        enabled: Optional[bool] = None,
+        tags: Optional[Sequence[str]] = None,
+        module_path: Optional[str] = None,
+    ):
         """
         Initialize database source.
 
         Args:
             db_uri: Database URI (e.g., 'sqlite:///tasks.db' or 'sqlite:///path/to/tasks.db')
             table: Table name containing tasks
+            enabled: Default filter on the enabled flag
+            tags: Default filter; tasks with any of these tags
+            module_path: Default filter on the task module
         """
         self.db_uri = db_uri
         self.table = table
+        self.enabled = enabled
+        self.tags = tags
+        self.module_path = module_path
 
     def _get_sqlite_path(self) -> Path:
         """Extract SQLite database path from URI."""
@@ -38,59 +66,154 @@ class DatabaseTaskSource:
         else:
             raise ValueError(f"Unsupported database URI format: {self.db_uri}. Only SQLite is supported.")
 
-    def load_tasks(self) -> List[TaskDefinition]:
-        """Load tasks from database."""
+    def load_tasks(
+        self,
+        enabled: Optional[bool] = None,
+        tags: Optional[Sequence[str]] = None,
+        module_path: Optional[str] = None,
+    ) -> List[TaskDefinition]:
+        """
+        Load tasks from database.
+
+        Filters are evaluated in SQL, so only matching rows are read and
+        parsed. Arguments left as None fall back to the source defaults.
+
+        Args:
+            enabled: Only tasks with this enabled flag
+            tags: Only tasks having any of these tags
+            module_path: Only tasks from this module
+        """
+        return list(self.iter_tasks(enabled, tags, module_path))
+
+    def iter_tasks(
+        self,
+        enabled: Optional[bool] = None,
+        tags: Optional[Sequence[str]] = None,
+        module_path: Optional[str] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> Iterator[TaskDefinition]:
+        """
+        Stream tasks from database.
+
+        Rows are fetched ``chunk_size`` at a time from an open cursor, so
+        memory is bounded by the chunk rather than the table. Filters work
+        as in ``load_tasks``.
+        """
+        enabled = self.enabled if enabled is None else enabled
+        tags = self.tags if tags is None else tags
+        module_path = self.module_path if module_path is None else module_path
+
         db_path = self._get_sqlite_path()
         
         if not db_path.exists():
             logger.warning(f"Database file not found: {db_path}")
-            return []
+            return
 
         conn = sqlite3.connect(db_path)
         conn.row_factory = sqlite3.Row  # Enable column access by name
         cursor = conn.cursor()
 
         try:
-            cursor.execute(f"SELECT * FROM {self.table}")
-            rows = cursor.fetchall()
-            
-            task_definitions = []
-            
-            for row in rows:
-                try:
-                    # Convert row to dictionary
-                    row_dict = dict(row)
-                    
-                    # Parse options and metadata if they're strings (JSON)
-                    options = row_dict.get("options", {})
-                    if isinstance(options, str):
-                        options = json.loads(options) if options else {}
-                    
-                    metadata = row_dict.get("metadata", {})
-                    if isinstance(metadata, str):
-                        metadata = json.loads(metadata) if metadata else {}
-                    
-                    # Parse tags if it's a string
-                    tags = row_dict.get("tags", [])
-                    if isinstance(tags, str):
-                        tags = json.loads(tags) if tags else []
-                    
-                    task_def = TaskDefinition(
-                        name=row_dict["name"],
-                        module_path=row_dict["module_path"],
-                        function_name=row_dict["function_name"],
-                        description=row_dict.get("description", ""),
-                        enabled=bool(row_dict.get("enabled", True)),
-                        tags=tags,
-                        options=options,
-                        metadata=metadata,
-                    )
-                    task_definitions.append(task_def)
-                except (KeyError, ValueError, json.JSONDecodeError) as e:
-                    logger.warning(f"Skipping invalid task row: {e}")
-                    continue
-
-            return task_definitions
+            filtered = enabled is not None or tags or module_path is not None
+            # The tag table is only worth its triggers for tag filters
+            indexed = has_filter_schema(conn, self.table, tags=bool(tags))
+            if filtered and not indexed:
+                indexed = self._create_filter_schema(conn, tags=bool(tags))
+
+            query, params = self._build_query(enabled, tags, module_path, indexed)
+            cursor.execute(query, params)
+
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    task_def = self._row_to_definition(row)
+                    if task_def is not None:
+                        yield task_def
         finally:
             conn.close()
 
+    @staticmethod
+    def _row_to_definition(row: sqlite3.Row) -> Optional[TaskDefinition]:
+        """Build a task definition from a row, or None if it is invalid."""
+        try:
+            # Convert row to dictionary
+            row_dict = dict(row)
+            
+            # Parse options and metadata if they're strings (JSON)
+            options = row_dict.get("options", {})
+            if isinstance(options, str):
+                options = json.loads(options) if options else {}
+            
+            metadata = row_dict.get("metadata", {})
+            if isinstance(metadata, str):
+                metadata = json.loads(metadata) if metadata else {}
+            
+            # Parse tags if it's a string
+            tags = row_dict.get("tags", [])
+            if isinstance(tags, str):
+                tags = json.loads(tags) if tags else []
+            
+            return TaskDefinition(
+                name=row_dict["name"],
+                module_path=row_dict["module_path"],
+                function_name=row_dict["function_name"],
+                description=row_dict.get("description", ""),
+                enabled=bool(row_dict.get("enabled", True)),
+                tags=tags,
+                options=options,
+                metadata=metadata,
+            )
+        except (KeyError, ValueError, json.JSONDecodeError) as e:
+            logger.warning(f"Skipping invalid task row: {e}")
+            return None
+
+    def _create_filter_schema(self, conn: sqlite3.Connection, tags: bool) -> bool:
+        """Add indexes (and the tag table) to a database created without them."""
+        try:
+            # Rolls back on failure, leaving the database as it was
+            ensure_filter_schema(conn, self.table, tags=tags)
+            return True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Could not create task filter indexes: {e}")
+            return False
+
+    def _build_query(
+        self,
+        enabled: Optional[bool],
+        tags: Optional[Sequence[str]],
+        module_path: Optional[str],
+        tag_index: bool = True,
+    ) -> Tuple[str, List[Any]]:
+        """SELECT statement and parameters for the given filters."""
+        clauses = []
+        params: List[Any] = []
+
+        if enabled is not None:
+            clauses.append("enabled = ?")
+            params.append(1 if enabled else 0)
+
+        if module_path is not None:
+            clauses.append("module_path = ?")
+            params.append(module_path)
+
+        if tags:
+            placeholders = ", ".join("?" for _ in tags)
+            if tag_index:
+                clauses.append(
+                    f"name IN (SELECT task_name FROM {tags_table(self.table)} "
+                    f"WHERE tag IN ({placeholders}))"
+                )
+            else:
+                # Read-only database without the tag table: match in JSON1
+                clauses.append(
+                    f"EXISTS (SELECT 1 FROM json_each(CASE WHEN json_valid(tags) "
+                    f"THEN tags ELSE '[]' END) WHERE value IN ({placeholders}))"
+                )
+            params.extend(tags)
+
+        query = f"SELECT {', '.join(self.COLUMNS)} FROM {self.table}"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        return query, params
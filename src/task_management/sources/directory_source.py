@@ -0,0 +1,266 @@
+"""Directory-based task source."""
+
+import ast
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..registry import TaskDefinition
+
+logger = logging.getLogger(__name__)
+
+# Decorators that mark a task, as written in the source
+DECORATORS = ("task", "decorators.task", "tasks.decorators.task")
+
+# Undecorated functions with this prefix are tasks too
+FUNCTION_PREFIX = "task_"
+
+INDEX_VERSION = 1
+
+
+class DirectoryTaskSource:
+    """
+    Discover tasks in Python files without importing them.
+
+    Files are parsed with ``ast``; top-level functions decorated with
+    ``@task`` (see ``tasks.decorators``) or named ``task_*`` become task
+    definitions. Results are kept in a discovery index keyed by file mtime
+    and size, so a rescan only parses files that changed.
+    """
+
+    def __init__(
+        self,
+        directories: Iterable[Any] = (),
+        modules: Iterable[str] = (),
+        index_path: Optional[str] = None,
+        decorators: Iterable[str] = DECORATORS,
+        prefix: str = FUNCTION_PREFIX,
+    ):
+        """
+        Initialize directory source.
+
+        Args:
+            directories: Directory configs with ``path`` and ``pattern``
+                (mappings, ``TaskDirectoryConfig`` or plain paths)
+            modules: Dotted module names to scan, resolved against sys.path
+            index_path: JSON file for the discovery index (None disables it)
+            decorators: Decorator names that mark a function as a task
+            prefix: Function name prefix that marks a function as a task
+        """
+        self.directories = [_directory_spec(d) for d in directories]
+        self.modules = list(modules)
+        self.index_path = Path(index_path) if index_path else None
+        self.decorators = set(decorators)
+        self.prefix = prefix
+        self.stats = {"files": 0, "parsed": 0, "reused": 0}
+
+    def load_tasks(self) -> List[TaskDefinition]:
+        """Load tasks from all matching files."""
+        old_index = self._load_index()
+        index = {}
+        stats = {"files": 0, "parsed": 0, "reused": 0}
+
+        for path, module in self._collect_files():
+            key = str(path)
+            try:
+                stat = path.stat()
+            except OSError as e:
+                logger.warning(f"Skipping {path}: {e}")
+                continue
+
+            stats["files"] += 1
+            entry = old_index.get(key)
+            if (
+                entry is None
+                or entry["mtime_ns"] != stat.st_mtime_ns
+                or entry["size"] != stat.st_size
+                or entry["module"] != module
+            ):
+                entry = {
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "module": module,
+                    "tasks": self._scan_file(path, module),
+                }
+                stats["parsed"] += 1
+            else:
+                stats["reused"] += 1
+            index[key] = entry
+
+        self.stats = stats
+        logger.info(
+            f"Scanned {stats['files']} task files "
+            f"({stats['parsed']} parsed, {stats['reused']} from index)"
+        )
+        if stats["parsed"] or index.keys() != old_index.keys():
+            self._save_index(index)
+
+        task_definitions = []
+        seen = {}
+        for key, entry in index.items():
+            for task_data in entry["tasks"]:
+                name = task_data["name"]
+                if name in seen:
+                    logger.warning(
+                        f"Skipping duplicate task {name} in {key} "
+                        f"(already defined in {seen[name]})"
+                    )
+                    continue
+                seen[name] = key
+                task_definitions.append(TaskDefinition(**task_data))
+
+        return task_definitions
+
+    def _collect_files(self) -> List[Tuple[Path, str]]:
+        """Files to scan with their dotted module names, in a stable order."""
+        files = {}
+
+        for root, pattern in self.directories:
+            if not root.is_dir():
+                logger.warning(f"Task directory not found: {root}")
+                continue
+            for path in sorted(root.rglob(pattern)):
+                if path.suffix != ".py" or not path.is_file():
+                    continue
+                parts = path.relative_to(root).parts
+                if any(part.startswith((".", "__pycache__")) for part in parts):
+                    continue
+                files.setdefault(path, _module_name(path.relative_to(root.parent)))
+
+        for module in self.modules:
+            path = _find_module(module)
+            if path is None:
+                logger.warning(f"Task module not found: {module}")
+                continue
+            files.setdefault(path, module)
+
+        return list(files.items())
+
+    def _scan_file(self, path: Path, module: str) -> List[Dict[str, Any]]:
+        """Find task functions in one file."""
+        try:
+            tree = ast.parse(path.read_bytes(), filename=str(path))
+        except (OSError, SyntaxError, ValueError) as e:
+            logger.warning(f"Skipping unparsable task file {path}: {e}")
+            return []
+
+        tasks = []
+        for node in tree.body:
+            if not isinstance(node, ast.FunctionDef):
+                continue
+            options = self._decorator_options(node, path)
+            if options is None:
+                if not node.name.startswith(self.prefix):
+                    continue
+                options = {}
+            tasks.append(_task_data(node, module, options))
+        return tasks
+
+    def _decorator_options(
+        self, node: ast.FunctionDef, path: Path
+    ) -> Optional[Dict[str, Any]]:
+        """Literal decorator arguments, or None if the function is not marked."""
+        for decorator in node.decorator_list:
+            call = decorator if isinstance(decorator, ast.Call) else None
+            target = call.func if call else decorator
+            if _dotted_name(target) not in self.decorators:
+                continue
+
+            options = {}
+            for keyword in call.keywords if call else []:
+                if keyword.arg is None:
+                    continue
+                try:
+                    options[keyword.arg] = ast.literal_eval(keyword.value)
+                except (TypeError, ValueError):
+                    logger.warning(
+                        f"{path}:{node.lineno}: ignoring non-literal "
+                        f"argument {keyword.arg!r} of task {node.name}"
+                    )
+            return options
+        return None
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if self.index_path is None:
+            return {}
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if index.get("version") != INDEX_VERSION:
+            return {}
+        return index.get("files", {})
+
+    def _save_index(self, files: Dict[str, Dict[str, Any]]) -> None:
+        if self.index_path is None:
+            return
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "w") as f:
+                json.dump({"version": INDEX_VERSION, "files": files}, f)
+            os.replace(tmp, self.index_path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not write task discovery index: {e}")
+
+
+def _directory_spec(directory: Any) -> Tuple[Path, str]:
+    """Normalize a directory config into an absolute path and glob pattern."""
+    if isinstance(directory, (str, os.PathLike)):
+        path, pattern = directory, "tasks.py"
+    elif hasattr(directory, "get"):
+        path, pattern = directory["path"], directory.get("pattern", "tasks.py")
+    else:
+        path, pattern = directory.path, directory.pattern
+    return Path(path).resolve(), pattern
+
+
+def _module_name(relative: Path) -> str:
+    """Dotted module name for a path relative to the directory's parent."""
+    parts = list(relative.with_suffix("").parts)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+def _find_module(module: str) -> Optional[Path]:
+    """Locate a module's source on sys.path without importing it."""
+    relative = Path(*module.split("."))
+    for entry in sys.path:
+        base = Path(entry or ".")
+        for candidate in (relative.with_suffix(".py"), relative / "__init__.py"):
+            path = base / candidate
+            if path.is_file():
+                return path.resolve()
+    return None
+
+
+def _dotted_name(node: ast.AST) -> Optional[str]:
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        parent = _dotted_name(node.value)
+        return f"{parent}.{node.attr}" if parent else None
+    return None
+
+
+def _task_data(
+    node: ast.FunctionDef, module: str, options: Dict[str, Any]
+) -> Dict[str, Any]:
+    """TaskDefinition fields for a discovered function."""
+    options = dict(options)
+    docstring = ast.get_docstring(node) or ""
+    return {
+        "name": options.pop("name", f"{module}.{node.name}"),
+        "module_path": module,
+        "function_name": node.name,
+        "description": options.pop("description", docstring.split("\n")[0]),
+        "enabled": bool(options.pop("enabled", True)),
+        "tags": list(options.pop("tags", [])),
+        "metadata": dict(options.pop("metadata", {})),
+        "options": options,
+    }
@@ -0,0 +1,131 @@
+"""Indexes and tag table backing filtered task queries."""
+
+import sqlite3
+
+
+def tags_table(table: str) -> str:
+    """Name of the normalised tag table for a tasks table."""
+    return f"{table}_tags"
+
+
+def has_filter_schema(
+    conn: sqlite3.Connection, table: str, tags: bool = True
+) -> bool:
+    """
+    Check whether the filter indexes for ``table`` exist.
+
+    With ``tags`` the tag table must exist as well.
+    """
+    names = [f"idx_{table}_enabled", f"idx_{table}_module_path"]
+    if tags:
+        names.append(tags_table(table))
+    placeholders = ", ".join("?" for _ in names)
+    (count,) = conn.execute(
+        f"SELECT count(*) FROM sqlite_master WHERE name IN ({placeholders})",
+        names,
+    ).fetchone()
+    return count == len(names)
+
+
+def ensure_filter_schema(
+    conn: sqlite3.Connection, table: str = "tasks", tags: bool = True
+) -> None:
+    """
+    Create filter indexes, and with ``tags`` the tag table, for a tasks table.
+
+    Tags stay in the ``tags`` JSON column; triggers mirror them into
+    ``<table>_tags`` (one row per task and tag) so tag filters use an index
+    instead of parsing every row. Rows written by any client, including
+    ``INSERT OR REPLACE``, keep the mirror in sync. Existing rows are
+    backfilled the first time.
+
+    The statements run in one transaction: committed here unless the
+    caller already has one open, and rolled back if any of them fails.
+    """
+    statements = [
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_enabled ON {table} (enabled)",
+        f"CREATE INDEX IF NOT EXISTS idx_{table}_module_path "
+        f"ON {table} (module_path)",
+    ]
+    if tags:
+        statements += _tag_schema(table)
+    # Checked before the table is created
+    backfill = tags and not _exists(conn, tags_table(table))
+
+    # sqlite3 opens transactions only for DML; without an explicit BEGIN
+    # every DDL statement would commit on its own
+    owner = not conn.in_transaction
+    if owner:
+        conn.execute("BEGIN")
+    try:
+        for statement in statements:
+            conn.execute(statement)
+        if backfill:
+            conn.execute(_backfill(table))
+    except sqlite3.Error:
+        if owner:
+            conn.rollback()
+        raise
+    if owner:
+        conn.commit()
+
+
+def _exists(conn: sqlite3.Connection, name: str) -> bool:
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = ?", (name,)
+    ).fetchone()
+    return row is not None
+
+
+def _tag_schema(table: str) -> list:
+    tags = tags_table(table)
+    # Malformed tags are treated as no tags rather than failing the write
+    tag_values = (
+        "json_each(CASE WHEN json_valid(NEW.tags) AND json_type(NEW.tags) = 'array' "
+        "THEN NEW.tags ELSE '[]' END)"
+    )
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS {tags} (
+            tag TEXT NOT NULL,
+            task_name TEXT NOT NULL,
+            PRIMARY KEY (tag, task_name)
+        ) WITHOUT ROWID
+        """,
+        f"CREATE INDEX IF NOT EXISTS idx_{tags}_task_name ON {tags} (task_name)",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{tags}_insert AFTER INSERT ON {table}
+        BEGIN
+            DELETE FROM {tags} WHERE task_name = NEW.name;
+            INSERT OR IGNORE INTO {tags} (tag, task_name)
+                SELECT value, NEW.name FROM {tag_values};
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{tags}_update
+        AFTER UPDATE OF name, tags ON {table}
+        BEGIN
+            DELETE FROM {tags} WHERE task_name IN (OLD.name, NEW.name);
+            INSERT OR IGNORE INTO {tags} (tag, task_name)
+                SELECT value, NEW.name FROM {tag_values};
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{tags}_delete AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM {tags} WHERE task_name = OLD.name;
+        END
+        """,
+    ]
+
+
+def _backfill(table: str) -> str:
+    return f"""
+        INSERT OR IGNORE INTO {tags_table(table)} (tag, task_name)
+        SELECT j.value, t.name
+        FROM {table} AS t,
+             json_each(
+                 CASE WHEN json_valid(t.tags) AND json_type(t.tags) = 'array'
+                 THEN t.tags ELSE '[]' END
+             ) AS j
+        """
@@ -5,6 +5,8 @@ import sqlite3
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
+from .schema import ensure_filter_schema
+
 
 class SQLiteStorage:
     """SQLite storage for task definitions."""
@@ -39,6 +41,7 @@ class SQLiteStorage:
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        ensure_filter_schema(conn, "tasks")
 
         conn.commit()
         conn.close()
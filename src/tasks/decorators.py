@@ -0,0 +1,32 @@
+"""Decorator marking functions for directory task discovery."""
+
+from typing import Any, Callable, Optional
+
+# Attribute holding the decorator arguments on the marked function
+TASK_ATTRIBUTE = "__task_options__"
+
+
+def task(func: Optional[Callable] = None, **options: Any):
+    """
+    Mark a function as a task.
+
+    ``DirectoryTaskSource`` finds marked functions by reading the source, so
+    the arguments must be literals. ``name``, ``description``, ``enabled``,
+    ``tags`` and ``metadata`` fill the task definition; everything else is
+    passed to Celery as task options.
+
+    Example:
+        @task
+        def add(x, y): ...
+
+        @task(name="reports.daily", tags=["reports"], max_retries=3)
+        def daily_report(): ...
+    """
+
+    def mark(f: Callable) -> Callable:
+        setattr(f, TASK_ATTRIBUTE, options)
+        return f
+
+    if func is not None:
+        return mark(func)
+    return mark
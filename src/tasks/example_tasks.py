@@ -14,4 +14,30 @@ def multiply(x: int, y: int) -> int:
 
 def process_data(data: dict) -> dict:
     """Process data."""
-    return {"processed": True, "input": data}
\ No newline at end of file
+    return {"processed": True, "input": data}
+
+
+def word_count(lines: list) -> dict:
+    """Count words in a chunk of lines (map step)."""
+    counts = {}
+    for line in lines:
+        for word in line.split():
+            counts[word] = counts.get(word, 0) + 1
+    return counts
+
+
+def merge_counts(partials: list) -> dict:
+    """Merge word counts (reduce step)."""
+    merged = {}
+    for counts in partials:
+        for word, count in counts.items():
+            merged[word] = merged.get(word, 0) + count
+    return merged
+
+
+def process_data_stream(data: dict, batch_size: int = 1000):
+    """Process ``data["records"]`` in batches, streaming each batch."""
+    records = data.get("records", [])
+    for start in range(0, len(records), batch_size):
+        yield {"processed": True, "records": records[start:start + batch_size]}
+    return {"records": len(records)}
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""Worker process management: preloading, the fork server, the supervisor
+and the autoscaler."""
+
+from .autoscaler import (
+    Autoscaler,
+    BrokerQueueProbe,
+    PoolScaler,
+    QueueProbe,
+    QueueStats,
+    Scaler,
+    ScalingDecision,
+    ScalingPolicy,
+    SupervisorScaler,
+)
+from .fork_server import ForkServer
+from .preload import PreloadReport, install_preload, preload, uninstall_preload
+from .supervisor import (
+    Backoff,
+    Service,
+    ServiceState,
+    Supervisor,
+    install_ready_notification,
+    notify,
+    worker_processes,
+)
+
+__all__ = [
+    "Autoscaler",
+    "BrokerQueueProbe",
+    "PoolScaler",
+    "QueueProbe",
+    "QueueStats",
+    "Scaler",
+    "ScalingDecision",
+    "ScalingPolicy",
+    "SupervisorScaler",
+    "ForkServer",
+    "PreloadReport",
+    "install_preload",
+    "preload",
+    "uninstall_preload",
+    "Backoff",
+    "Service",
+    "ServiceState",
+    "Supervisor",
+    "install_ready_notification",
+    "notify",
+    "worker_processes",
+]
@@ -0,0 +1,420 @@
+"""Scale worker capacity to queue backlog, within bounds and with damping."""
+
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class QueueStats:
+    """Backlog of one queue."""
+
+    queue: str
+    # Messages waiting (not yet delivered to a consumer)
+    messages: int
+    # Consumers attached; None when the broker does not track them (Redis)
+    consumers: Optional[int] = None
+
+
+class QueueProbe(ABC):
+    """Reads queue backlog from the broker."""
+
+    @abstractmethod
+    def sample(self, queues: Sequence[str]) -> List[QueueStats]:
+        """Current backlog of ``queues``."""
+
+
+class BrokerQueueProbe(QueueProbe):
+    """
+    Queue backlog through a passive ``queue_declare`` on the app's broker.
+
+    AMQP brokers report messages and consumers; kombu's virtual transports
+    (Redis, SQS, memory, ...) report the message count only. Samples from
+    several threads (e.g. clients submitting concurrently) are serialized,
+    as they share one connection and channel.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._connection = None
+        self._lock = threading.RLock()
+
+    def sample(self, queues: Sequence[str]) -> List[QueueStats]:
+        with self._lock:
+            try:
+                return self._sample(queues)
+            except Exception:
+                # Reconnect on the next sample
+                self.close()
+                raise
+
+    def _sample(self, queues: Sequence[str]) -> List[QueueStats]:
+        from kombu.transport import virtual
+
+        if self._connection is None:
+            self._connection = self.app.connection_for_read()
+        channel = self._connection.default_channel
+        tracks_consumers = not isinstance(channel, virtual.Channel)
+        stats = []
+        for queue in queues:
+            try:
+                _, messages, consumers = channel.queue_declare(queue, passive=True)
+            except self._connection.channel_errors:
+                # Not declared yet (or empty, on Redis); the error closed
+                # the channel
+                self.close()
+                self._connection = self.app.connection_for_read()
+                channel = self._connection.default_channel
+                messages, consumers = 0, 0
+            stats.append(
+                QueueStats(queue, messages, consumers if tracks_consumers else None)
+            )
+        return stats
+
+    def close(self) -> None:
+        """Release the broker connection."""
+        with self._lock:
+            if self._connection is not None:
+                try:
+                    self._connection.release()
+                except Exception:
+                    pass
+                self._connection = None
+
+
+class Scaler(ABC):
+    """Changes the worker capacity the autoscaler controls."""
+
+    @abstractmethod
+    def current(self) -> int:
+        """Current capacity (worker processes or pool slots)."""
+
+    @abstractmethod
+    def scale_to(self, count: int) -> None:
+        """Grow or shrink capacity to ``count``."""
+
+    def expected_consumers(self) -> int:
+        """Broker consumers expected at the current capacity."""
+        return self.current()
+
+
+class SupervisorScaler(Scaler):
+    """Add and remove worker services of a ``Supervisor``."""
+
+    def __init__(self, supervisor, make_service: Callable[[int], object]):
+        """
+        Initialize scaler.
+
+        Args:
+            supervisor: Supervisor running the workers
+            make_service: Builds the ``Service`` of worker number ``n``
+                (1-based); its name identifies the worker
+        """
+        self.supervisor = supervisor
+        self.make_service = make_service
+        self._names: Dict[int, str] = {}
+        for n in range(1, len(supervisor.states) + 1):
+            name = make_service(n).name
+            if name in supervisor.states:
+                self._names[n] = name
+
+    def current(self) -> int:
+        states = self.supervisor.states
+        return sum(
+            1
+            for name in self._names.values()
+            if name in states and not states[name].retired
+        )
+
+    def scale_to(self, count: int) -> None:
+        states = self.supervisor.states
+        active = sorted(
+            n
+            for n, name in self._names.items()
+            if name in states and not states[name].retired
+        )
+        # Remove the newest workers first, add the lowest free numbers
+        for n in reversed(active[count:]):
+            self.supervisor.remove_service(self._names[n])
+        n = 1
+        while len(active) < count:
+            name = self._names.get(n)
+            if name is None or name not in states:
+                service = self.make_service(n)
+                self.supervisor.add_service(service)
+                self._names[n] = service.name
+                active.append(n)
+            n += 1
+
+
+class PoolScaler(Scaler):
+    """
+    Grow and shrink the pools of running workers through remote control.
+
+    Needs a pool that supports ``pool_grow``/``pool_shrink`` (prefork).
+    Capacity is the sum of the workers' pool processes; changes are spread
+    over the workers. The broker sees one consumer per worker, however
+    many processes its pool has.
+    """
+
+    def __init__(self, app, destination: Optional[List[str]] = None, timeout=1.0):
+        self.app = app
+        self.destination = destination
+        self.timeout = timeout
+        # Pool sizes by worker from the last current()
+        self._seen: Optional[Dict[str, int]] = None
+
+    def _pools(self) -> Dict[str, int]:
+        inspect = self.app.control.inspect(self.destination, timeout=self.timeout)
+        stats = inspect.stats() or {}
+        return {
+            worker: len(info.get("pool", {}).get("processes", ()))
+            for worker, info in stats.items()
+        }
+
+    def current(self) -> int:
+        self._seen = self._pools()
+        return sum(self._seen.values())
+
+    def expected_consumers(self) -> int:
+        pools = self._seen if self._seen is not None else self._pools()
+        return len(pools)
+
+    def scale_to(self, count: int) -> None:
+        pools = self._pools()
+        if not pools:
+            return
+        delta = count - sum(pools.values())
+        workers = sorted(pools, key=pools.get, reverse=delta < 0)
+        for i, worker in enumerate(workers):
+            # Spread the change, larger shares first
+            share = abs(delta) // len(workers) + (i < abs(delta) % len(workers))
+            if share == 0:
+                continue
+            if delta > 0:
+                self.app.control.pool_grow(share, destination=[worker])
+            else:
+                share = min(share, pools[worker] - 1)
+                if share > 0:
+                    self.app.control.pool_shrink(share, destination=[worker])
+
+
+@dataclass(frozen=True)
+class ScalingPolicy:
+    """Bounds and damping of the autoscaler."""
+
+    min_workers: int = 1
+    max_workers: int = 8
+    # Waiting messages one worker is expected to keep up with
+    target_backlog: int = 10
+    # Scale down only once the remaining workers would each have at most
+    # this fraction of target_backlog: the gap between the scale-up and
+    # scale-down points (hysteresis)
+    scale_down_ratio: float = 0.5
+    # Seconds after a scale-up before the next scale-up
+    cooldown_up: float = 15.0
+    # Seconds after any change before a scale-down
+    cooldown_down: float = 120.0
+    # Most workers added / removed per decision (0: no limit)
+    max_step_up: int = 0
+    max_step_down: int = 1
+    # Seconds a scale-down that had to be undone (a scale-up followed
+    # within cooldown_down) keeps the count from dropping below it again
+    floor_hold: float = 600.0
+
+    def __post_init__(self):
+        if not 0 <= self.min_workers <= self.max_workers:
+            raise ValueError("Need 0 <= min_workers <= max_workers")
+        if self.target_backlog < 1:
+            raise ValueError("target_backlog must be at least 1")
+        if not 0 < self.scale_down_ratio <= 1:
+            raise ValueError("scale_down_ratio must be in (0, 1]")
+
+
+@dataclass(frozen=True)
+class ScalingDecision:
+    """One autoscaler evaluation."""
+
+    at: float
+    backlog: int
+    consumers: Optional[int]
+    current: int
+    desired: int
+    # "up", "down" or "hold"
+    action: str
+    reason: str
+
+
+class Autoscaler:
+    """
+    Size worker capacity to the backlog of a set of queues.
+
+    Every ``step`` samples the queues and compares the backlog with what
+    the current workers are expected to handle:
+
+    - Up as soon as the backlog needs more workers than are running, to
+      ``ceil(backlog / target_backlog)``, at most ``max_step_up`` at a
+      time and ``cooldown_up`` apart. While the broker reports fewer
+      consumers than the scaler expects (``expected_consumers``), the
+      last scale-up is still starting and nothing is added.
+    - Down only when fewer workers would each have at most
+      ``scale_down_ratio * target_backlog`` messages, ``max_step_down`` at
+      a time and ``cooldown_down`` after the last change. Between the two
+      thresholds the count holds, so a backlog hovering around one
+      threshold does not flap.
+    - Stabilization: a backlog that rose at any sample within the last
+      ``cooldown_down`` seconds means the workers are only just keeping
+      up, so none are removed. Depth alone cannot tell "just enough" from
+      "too many" (both drain to zero); this keeps the count from
+      oscillating around the point where capacity matches arrivals.
+      When a scale-down still proves too much (a scale-up follows within
+      ``cooldown_down``), the count before it becomes a floor for
+      ``floor_hold`` seconds.
+
+    Example:
+        autoscaler = Autoscaler(BrokerQueueProbe(app), scaler, ["celery"])
+        supervisor.every(5, autoscaler.step)
+    """
+
+    def __init__(
+        self,
+        probe: QueueProbe,
+        scaler: Scaler,
+        queues: Sequence[str] = ("celery",),
+        policy: ScalingPolicy = ScalingPolicy(),
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize autoscaler.
+
+        Args:
+            probe: Source of queue backlog
+            scaler: Capacity to control
+            queues: Queues the workers consume from
+            policy: Bounds and damping
+            clock: Time source (for simulations)
+        """
+        self.probe = probe
+        self.scaler = scaler
+        self.queues = list(queues)
+        self.policy = policy
+        self.clock = clock
+        self.last: Optional[ScalingDecision] = None
+        self._last_up = float("-inf")
+        self._last_change = float("-inf")
+        # (time, backlog) samples within the last cooldown_down seconds
+        self._samples: deque = deque()
+        # (time, count before) of the last scale-down
+        self._last_down: Optional[tuple] = None
+        # (count, until) learned from an undone scale-down
+        self._floor: Optional[tuple] = None
+
+    def step(self, now: Optional[float] = None) -> ScalingDecision:
+        """Sample the queues and scale if needed; returns the decision."""
+        now = self.clock() if now is None else now
+        stats = self.probe.sample(self.queues)
+        backlog = sum(s.messages for s in stats)
+        reported = [s.consumers for s in stats if s.consumers is not None]
+        consumers = max(reported) if reported else None
+        current = self.scaler.current()
+        expected = None
+        if consumers is not None:
+            expected = self.scaler.expected_consumers()
+        self._samples.append((now, backlog))
+        while self._samples[0][0] < now - self.policy.cooldown_down:
+            self._samples.popleft()
+
+        desired, action, reason = self.decide(
+            now, backlog, consumers, current, expected
+        )
+        if desired != current:
+            self.scaler.scale_to(desired)
+            self._last_change = now
+            if desired > current:
+                self._last_up = now
+                down = self._last_down
+                if down is not None and now - down[0] <= self.policy.cooldown_down:
+                    self._floor = (down[1], now + self.policy.floor_hold)
+                    logger.info(
+                        f"Autoscaler: scale-down from {down[1]} undone; keeping "
+                        f"at least {down[1]} workers for {self.policy.floor_hold:.0f}s"
+                    )
+            else:
+                self._last_down = (now, current)
+            logger.info(
+                f"Autoscaler: {current} -> {desired} workers "
+                f"(backlog {backlog}; {reason})"
+            )
+        self.last = ScalingDecision(
+            now, backlog, consumers, current, desired, action, reason
+        )
+        return self.last
+
+    def decide(
+        self,
+        now: float,
+        backlog: int,
+        consumers: Optional[int],
+        current: int,
+        expected: Optional[int] = None,
+    ) -> tuple:
+        """
+        Worker count for a backlog, without side effects.
+
+        Args:
+            now: Time of the sample
+            backlog: Messages waiting
+            consumers: Consumers reported by the broker (None: unknown)
+            current: Current capacity
+            expected: Consumers expected at that capacity (default: current)
+
+        Returns:
+            ``(desired, action, reason)``
+        """
+        policy = self.policy
+        if current < policy.min_workers:
+            return policy.min_workers, "up", "below minimum"
+        if current > policy.max_workers:
+            return policy.max_workers, "down", "above maximum"
+
+        needed = math.ceil(backlog / policy.target_backlog)
+        if needed > current:
+            if current == policy.max_workers:
+                return current, "hold", "at maximum"
+            expected = current if expected is None else expected
+            if consumers is not None and consumers < expected:
+                return current, "hold", f"{consumers}/{expected} workers consuming"
+            if now - self._last_up < policy.cooldown_up:
+                return current, "hold", "scale-up cooldown"
+            step = needed - current
+            if policy.max_step_up:
+                step = min(step, policy.max_step_up)
+            return min(current + step, policy.max_workers), "up", "backlog"
+
+        keep = math.ceil(backlog / (policy.target_backlog * policy.scale_down_ratio))
+        keep = max(keep, policy.min_workers)
+        if keep < current and self._floor is not None and now < self._floor[1]:
+            if self._floor[0] >= current:
+                return current, "hold", "undone scale-down"
+            keep = max(keep, self._floor[0])
+        if keep < current:
+            if now - self._last_change < policy.cooldown_down:
+                return current, "hold", "scale-down cooldown"
+            if self._rising():
+                return current, "hold", "backlog rising"
+            step = current - keep
+            if policy.max_step_down:
+                step = min(step, policy.max_step_down)
+            return current - step, "down", "idle capacity"
+        return current, "hold", "within band"
+
+    def _rising(self) -> bool:
+        samples = list(self._samples)
+        return any(b[1] > a[1] for a, b in zip(samples, samples[1:]))
@@ -0,0 +1,278 @@
+"""Warm fork server: a quiescent template process that forks children."""
+
+import gc
+import logging
+import os
+import selectors
+import signal
+import socket
+import sys
+import threading
+import time
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ForkServer:
+    """
+    Fork children from a preloaded process that never does any work itself.
+
+    Start it after task modules are imported and the app is built (see
+    ``preload``) but before threads, broker connections or other per-process
+    state exist. Every child, including replacements for recycled or
+    crashed ones, is then a fork of that clean, frozen heap: it starts in
+    about a millisecond without importing anything, and shares all of the
+    template's pages copy-on-write.
+
+    The server owns its children; exits are reported back and read by
+    ``wait``.
+
+    Example:
+        preload(app, registry)
+        server = ForkServer()
+        server.start()
+        pid = server.spawn(run_worker, argv)
+        exitcode = server.wait(pid)
+    """
+
+    def __init__(self, name: str = "fork-server"):
+        self.name = name
+        self.pid: Optional[int] = None
+        self._conn: Optional[Connection] = None
+        self._exits: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def start(self) -> int:
+        """Fork the server process; returns its pid."""
+        if self.pid is not None:
+            raise RuntimeError(f"{self.name} already started")
+        parent_sock, child_sock = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            parent_sock.close()
+            # Collections in the server (and its children) skip the template
+            gc.freeze()
+            code = 0
+            try:
+                _serve(Connection(child_sock.detach()))
+            except BaseException:
+                logger.exception(f"✗ {self.name} crashed")
+                code = 1
+            finally:
+                os._exit(code)
+
+        child_sock.close()
+        self.pid = pid
+        self._conn = Connection(parent_sock.detach())
+        logger.info(f"✓ Started {self.name} (pid {pid})")
+        return pid
+
+    def spawn(self, target: Callable[..., Any], *args: Any) -> int:
+        """
+        Fork a child running ``target(*args)``; returns its pid.
+
+        ``target`` is sent by reference, so it must be importable (a
+        module-level function). The child exits with the integer ``target``
+        returns, or 1 if it raises.
+        """
+        self._send(("spawn", target, args))
+        while True:
+            wait([self._conn])
+            message = self._recv()
+            if message[0] == "spawned":
+                return message[1]
+            if message[0] == "error":
+                raise RuntimeError(f"{self.name} could not spawn: {message[1]}")
+
+    def wait(self, pid: Optional[int] = None, timeout: Optional[float] = None):
+        """
+        Wait for a child to exit.
+
+        Args:
+            pid: Child to wait for; any child if omitted
+            timeout: Seconds to wait; None waits indefinitely, 0 only
+                reads reports that already arrived
+
+        Returns:
+            Exit code (negative signal number if killed) for ``pid``, or a
+            ``(pid, exitcode)`` tuple when ``pid`` is omitted; None on
+            timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if pid is None and self._exits:
+                return self._exits.popitem()
+            if pid is not None and pid in self._exits:
+                return self._exits.pop(pid)
+            remaining = None
+            if deadline is not None:
+                remaining = max(deadline - time.monotonic(), 0)
+            if not wait([self._conn], remaining):
+                return None
+            try:
+                message = self._recv()
+            except (EOFError, OSError):
+                # Server stopped
+                return None
+            if message[0] == "idle" and remaining == 0:
+                return None
+
+    @property
+    def alive(self) -> bool:
+        """Whether the server process is still running."""
+        if self.pid is None:
+            return False
+        try:
+            pid, _ = os.waitpid(self.pid, os.WNOHANG)
+        except ChildProcessError:
+            return False
+        return pid == 0
+
+    def fileno(self) -> int:
+        """Descriptor that becomes readable when the server reports an exit."""
+        return self._conn.fileno()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the server; it sends SIGTERM to its children and reaps them."""
+        if self.pid is None:
+            return
+        try:
+            self._send(("stop",))
+            # Drain exit reports until the server closes its end
+            deadline = time.monotonic() + timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not wait([self._conn], remaining):
+                    logger.warning(f"{self.name} did not stop in time; killing")
+                    os.kill(self.pid, signal.SIGKILL)
+                    break
+                self._recv()
+        except (EOFError, OSError):
+            pass
+        try:
+            os.waitpid(self.pid, 0)
+        except ChildProcessError:
+            # Already reaped by ``alive``
+            pass
+        self._conn.close()
+        self._conn = None
+        self.pid = None
+        logger.info(f"✓ Stopped {self.name}")
+
+    def _send(self, message: tuple) -> None:
+        if self._conn is None:
+            raise RuntimeError(f"{self.name} is not running")
+        with self._lock:
+            self._conn.send(message)
+
+    def _recv(self) -> tuple:
+        # Another thread may have consumed the message we were woken for
+        with self._lock:
+            if not self._conn.poll():
+                return ("idle",)
+            message = self._conn.recv()
+        if message[0] == "exited":
+            self._exits[message[1]] = message[2]
+        return message
+
+
+def _serve(conn: Connection) -> None:
+    """Server loop: fork on request, report child exits."""
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    # A handler (not SIG_IGN) so exits are not auto-reaped and wake us up
+    signal.signal(signal.SIGCHLD, lambda *args: None)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    children = set()
+    selector = selectors.DefaultSelector()
+    selector.register(conn, selectors.EVENT_READ)
+    selector.register(wake_r, selectors.EVENT_READ)
+
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj == wake_r:
+                try:
+                    os.read(wake_r, 512)
+                except BlockingIOError:
+                    pass
+                _reap(conn, children)
+                continue
+
+            try:
+                message = conn.recv()
+            except EOFError:
+                message = ("stop",)
+
+            if message[0] == "stop":
+                for pid in children:
+                    _signal(pid, signal.SIGTERM)
+                while children:
+                    pid, status = os.waitpid(-1, 0)
+                    children.discard(pid)
+                    _report(conn, pid, status)
+                return
+
+            _, target, args = message
+            try:
+                pid = os.fork()
+            except OSError as e:
+                conn.send(("error", str(e)))
+                continue
+            if pid == 0:
+                selector.close()
+                conn.close()
+                os.close(wake_r)
+                os.close(wake_w)
+                signal.set_wakeup_fd(-1)
+                signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                code = _run(target, args)
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+            children.add(pid)
+            conn.send(("spawned", pid))
+
+
+def _run(target: Callable[..., Any], args: tuple) -> int:
+    try:
+        result = target(*args)
+        return result if isinstance(result, int) else 0
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        logger.exception(f"✗ Child {os.getpid()} failed")
+        return 1
+
+
+def _reap(conn: Connection, children: set) -> None:
+    while children:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        children.discard(pid)
+        _report(conn, pid, status)
+
+
+def _report(conn: Connection, pid: int, status: int) -> None:
+    try:
+        conn.send(("exited", pid, os.waitstatus_to_exitcode(status)))
+    except OSError:
+        pass
+
+
+def _signal(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
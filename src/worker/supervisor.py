@@ -0,0 +1,681 @@
+"""Process supervisor: every service in its own process, restarted on exit."""
+
+import logging
+import os
+import selectors
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .fork_server import ForkServer
+
+logger = logging.getLogger(__name__)
+
+# Environment variable with the socket services report readiness to; the
+# protocol is systemd's sd_notify, so the supervisor itself can run as a
+# ``Type=notify`` unit
+NOTIFY_SOCKET = "NOTIFY_SOCKET"
+# Environment variable with the name of the supervised service
+SERVICE_NAME = "SUPERVISOR_SERVICE"
+
+# Probe kinds of Service.probe
+PROBE_NOTIFY = "notify"
+PROBE_TCP = "tcp://"
+
+
+def notify(state: str) -> bool:
+    """
+    Send a state such as ``READY=1`` to the supervisor, if there is one.
+
+    Args:
+        state: Newline-separated ``KEY=value`` assignments
+
+    Returns:
+        Whether the state was sent
+    """
+    path = os.environ.get(NOTIFY_SOCKET)
+    if not path:
+        return False
+    if path.startswith("@"):
+        path = "\0" + path[1:]
+    message = f"{state}\nMAINPID={os.getpid()}".encode()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(message, path)
+    except OSError as e:
+        logger.warning(f"Could not notify supervisor: {e}")
+        return False
+    return True
+
+
+def install_ready_notification() -> None:
+    """
+    Report ``READY=1`` once this process is ready to serve.
+
+    A worker is ready when its consumer has connected to the broker with
+    every task registered (``worker_ready``), beat once its scheduler
+    starts (``beat_init``).
+    """
+    from celery import signals
+
+    signals.worker_ready.connect(
+        _worker_ready, weak=False, dispatch_uid="supervisor.worker_ready"
+    )
+    signals.beat_init.connect(
+        _beat_ready, weak=False, dispatch_uid="supervisor.beat_ready"
+    )
+
+
+def _worker_ready(sender=None, **kwargs) -> None:
+    tasks = [name for name in sender.app.tasks if not name.startswith("celery.")]
+    notify(f"READY=1\nSTATUS={len(tasks)} tasks registered")
+
+
+def _beat_ready(sender=None, **kwargs) -> None:
+    notify("READY=1\nSTATUS=scheduler started")
+
+
+@dataclass(frozen=True)
+class Service:
+    """A supervised process."""
+
+    name: str
+    # Module-level function run in the child (see ForkServer.spawn)
+    target: Callable[..., Any]
+    args: Tuple[Any, ...] = ()
+    # "notify": ready once the child sends READY=1; "tcp://host:port": once
+    # the port accepts connections; None: as soon as it is started
+    probe: Optional[str] = PROBE_NOTIFY
+    # Seconds to become ready before the process is restarted
+    ready_timeout: float = 60.0
+    # Seconds between SIGTERM and SIGKILL when stopping
+    stop_timeout: float = 30.0
+    # Environment variables set in the process (e.g. a port of its own)
+    env: Dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Backoff:
+    """Restart delays: doubling per consecutive crash, up to ``maximum``."""
+
+    base: float = 1.0
+    maximum: float = 60.0
+    # A process that ran this long before exiting starts a new series
+    reset_after: float = 60.0
+
+    def delay(self, failures: int) -> float:
+        """Seconds before restarting after ``failures`` consecutive exits."""
+        if failures <= 0:
+            return 0.0
+        return min(self.base * 2 ** (failures - 1), self.maximum)
+
+
+@dataclass
+class ServiceState:
+    """Runtime state of one service."""
+
+    service: Service
+    pid: Optional[int] = None
+    ready: bool = False
+    started_at: float = 0.0
+    ready_at: Optional[float] = None
+    # When to (re)start the process; None while it runs or when stopping
+    start_at: Optional[float] = 0.0
+    # When to SIGKILL a process that was asked to stop
+    kill_at: Optional[float] = None
+    next_probe: float = 0.0
+    probe_interval: float = 0.0
+    restarts: int = 0
+    # Consecutive exits without a stable run in between
+    failures: int = 0
+    exitcode: Optional[int] = None
+    status: str = ""
+    # Removed: stopped instead of restarted, then forgotten
+    retired: bool = False
+
+    @property
+    def state(self) -> str:
+        """``ready``, ``starting``, ``stopping`` or ``stopped``."""
+        if self.pid is None:
+            return "stopped"
+        if self.kill_at is not None:
+            return "stopping"
+        return "ready" if self.ready else "starting"
+
+
+class Supervisor:
+    """
+    Run services in separate processes and keep them running.
+
+    Children are forked from a ``ForkServer``, so every process (and every
+    restart) starts from the same warm template without importing
+    anything. The supervisor never sleeps on a timer: it waits on the fork
+    server's exit reports, the readiness socket and a wake-up pipe, and
+    computes its timeout from the next restart, probe or kill deadline.
+
+    - Readiness: ``notify`` services report ``READY=1`` over a Unix
+      datagram socket (``install_ready_notification``); ``tcp://`` services
+      are probed until the port accepts connections. A service that is not
+      ready within ``ready_timeout`` is restarted.
+    - Restarts: a process that exits is started again after a delay that
+      doubles with every consecutive exit (``Backoff``).
+    - Draining: ``stop`` sends SIGTERM (a warm shutdown for Celery workers,
+      which finish the tasks they are running), waits up to each service's
+      ``stop_timeout`` and then sends SIGKILL. A second stop request sends
+      SIGQUIT (cold shutdown) straight away.
+
+    Example:
+        supervisor = Supervisor([Service("worker-1", run_worker, (argv,))])
+        supervisor.install_signal_handlers()
+        sys.exit(supervisor.run())
+    """
+
+    def __init__(
+        self,
+        services: Sequence[Service],
+        server: Optional[ForkServer] = None,
+        backoff: Backoff = Backoff(),
+        status_file: Optional[str] = None,
+    ):
+        """
+        Initialize supervisor.
+
+        Args:
+            services: Processes to run; names must be unique
+            server: Fork server to spawn from; started by ``start`` if it
+                is not running yet
+            backoff: Restart delays
+            status_file: File rewritten with ``name pid state`` lines on
+                every change (e.g. for ``run.sh status``)
+        """
+        names = [service.name for service in services]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Duplicate service names: {names}")
+        self.server = server or ForkServer("supervisor-fork-server")
+        self.backoff = backoff
+        self.status_file = status_file
+        self.states: Dict[str, ServiceState] = {
+            service.name: ServiceState(service) for service in services
+        }
+        self.started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self._stopping = False
+        self._stop_requests = 0
+        self._failed = False
+        self._own_server = False
+        self._selector: Optional[selectors.BaseSelector] = None
+        self._notify_dir: Optional[str] = None
+        self._notify_path: Optional[str] = None
+        self._notify_sock: Optional[socket.socket] = None
+        self._wake_r = self._wake_w = -1
+        # [next run, interval, callback] of periodic callbacks
+        self._timers: List[list] = []
+
+    @property
+    def ready(self) -> bool:
+        """Whether every service is up and ready."""
+        return all(
+            state.ready or state.retired for state in self.states.values()
+        )
+
+    def add_service(self, service: Service) -> ServiceState:
+        """
+        Supervise another service; it starts on the next loop iteration.
+
+        Call from the supervisor's own loop (e.g. an ``every`` callback).
+
+        Raises:
+            ValueError: If a service with that name exists
+        """
+        if service.name in self.states:
+            raise ValueError(f"Service {service.name} already exists")
+        state = self.states[service.name] = ServiceState(service)
+        logger.info(f"Added {service.name}")
+        return state
+
+    def remove_service(self, name: str) -> None:
+        """
+        Drain a service (SIGTERM, then SIGKILL after its stop_timeout) and
+        forget it once it has exited.
+
+        Call from the supervisor's own loop (e.g. an ``every`` callback).
+        """
+        state = self.states[name]
+        state.retired = True
+        state.start_at = None
+        if state.pid is None:
+            del self.states[name]
+        elif state.kill_at is None:
+            self._terminate(state, time.monotonic(), signal.SIGTERM)
+        logger.info(f"Removing {name}")
+        self._write_status()
+
+    def every(self, interval: float, callback: Callable[[float], Any]) -> None:
+        """
+        Call ``callback(now)`` from the loop every ``interval`` seconds.
+
+        The first call is after one interval. Exceptions are logged and the
+        callback stays scheduled.
+        """
+        self._timers.append([time.monotonic() + interval, interval, callback])
+
+    def start(self, timeout: Optional[float] = None) -> bool:
+        """
+        Start every service and wait until all are ready.
+
+        Args:
+            timeout: Seconds to wait for readiness; None waits until all
+                are ready or a stop is requested
+
+        Returns:
+            Whether every service became ready in time
+        """
+        if self.started_at is not None:
+            raise RuntimeError("Supervisor already started")
+        if self.server.pid is None:
+            # Fork the template before the supervisor opens anything
+            self.server.start()
+            self._own_server = True
+        self._open()
+        self.started_at = time.monotonic()
+        self._tick(self.started_at)
+        deadline = None if timeout is None else self.started_at + timeout
+        while not self.ready and not self._stopping:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+            self._poll(remaining)
+        return self.ready
+
+    def run(self) -> int:
+        """
+        Supervise until a stop is requested, then drain.
+
+        Returns:
+            Exit code: 0, or 1 if the fork server was lost
+        """
+        if self.started_at is None:
+            self.start(timeout=0)
+        while not self._stopping:
+            self._poll(None)
+        self.stop()
+        return 1 if self._failed else 0
+
+    def request_stop(self) -> None:
+        """Ask ``run`` to drain and return; safe in signal handlers and threads."""
+        self._stop_requests += 1
+        self._stopping = True
+        if self._wake_w >= 0:
+            try:
+                os.write(self._wake_w, b"\0")
+            except OSError:
+                pass
+
+    def install_signal_handlers(self) -> None:
+        """Drain on SIGTERM or SIGINT; a second signal stops immediately."""
+
+        def handle(signum, frame):
+            if self._stop_requests == 0:
+                logger.info(f"Received {signal.Signals(signum).name}; draining")
+            else:
+                logger.warning("Stop requested again; cold shutdown")
+            self.request_stop()
+
+        signal.signal(signal.SIGTERM, handle)
+        signal.signal(signal.SIGINT, handle)
+
+    def stop(self) -> None:
+        """Stop every service gracefully, then the fork server."""
+        self._stopping = True
+        if self.started_at is None:
+            return
+        now = time.monotonic()
+        for state in self.states.values():
+            state.start_at = None
+            if state.pid is not None and state.kill_at is None:
+                self._terminate(state, now, signal.SIGTERM)
+        self._write_status()
+
+        cold = self._stop_requests > 1
+        while any(state.pid is not None for state in self.states.values()):
+            if not cold and self._stop_requests > 1:
+                cold = True
+                for state in self.states.values():
+                    if state.pid is not None:
+                        _signal(state.pid, signal.SIGQUIT)
+            if not self._poll(None):
+                break
+
+        if self._own_server:
+            self.server.stop()
+        self._close()
+        self.started_at = None
+        logger.info("✓ All services stopped")
+
+    # Event loop
+
+    def _poll(self, timeout: Optional[float]) -> bool:
+        """Wait for one round of events; returns False if the server is lost."""
+        now = time.monotonic()
+        self._tick(now)
+        wake = self._next_deadline()
+        if wake is not None:
+            wake = max(wake - time.monotonic(), 0)
+            timeout = wake if timeout is None else min(timeout, wake)
+        for key, _ in self._selector.select(timeout):
+            if key.data == "exit":
+                if not self._reap() and not self.server.alive:
+                    self._server_lost()
+                    return False
+            elif key.data == "notify":
+                self._read_notifications()
+            else:
+                try:
+                    os.read(self._wake_r, 512)
+                except BlockingIOError:
+                    pass
+        self._tick(time.monotonic())
+        return True
+
+    def _tick(self, now: float) -> None:
+        for state in list(self.states.values()):
+            if state.pid is None:
+                if (
+                    not self._stopping
+                    and state.start_at is not None
+                    and now >= state.start_at
+                ):
+                    self._spawn(state, now)
+                continue
+            if state.kill_at is not None:
+                if now >= state.kill_at:
+                    logger.warning(
+                        f"✗ {state.service.name} (pid {state.pid}) did not stop "
+                        f"in {state.service.stop_timeout:.0f}s; killing"
+                    )
+                    _signal(state.pid, signal.SIGKILL)
+                    state.kill_at = float("inf")
+                continue
+            if state.ready:
+                continue
+            if now - state.started_at >= state.service.ready_timeout:
+                logger.error(
+                    f"✗ {state.service.name} (pid {state.pid}) not ready after "
+                    f"{state.service.ready_timeout:.0f}s; restarting"
+                )
+                self._terminate(state, now, signal.SIGTERM)
+            elif _is_tcp(state.service.probe) and now >= state.next_probe:
+                if _tcp_ready(state.service.probe):
+                    self._mark_ready(state, now)
+                else:
+                    state.probe_interval = min(state.probe_interval * 2, 1.0)
+                    state.next_probe = now + state.probe_interval
+
+        if self._stopping:
+            return
+        for timer in self._timers:
+            if now < timer[0]:
+                continue
+            timer[0] = now + timer[1]
+            try:
+                timer[2](now)
+            except Exception:
+                logger.exception(f"✗ Supervisor callback {timer[2]!r} failed")
+
+    def _next_deadline(self) -> Optional[float]:
+        deadlines = []
+        for state in self.states.values():
+            if state.pid is None:
+                if not self._stopping and state.start_at is not None:
+                    deadlines.append(state.start_at)
+            elif state.kill_at is not None:
+                deadlines.append(state.kill_at)
+            elif not state.ready:
+                deadlines.append(state.started_at + state.service.ready_timeout)
+                if _is_tcp(state.service.probe):
+                    deadlines.append(state.next_probe)
+        if not self._stopping:
+            deadlines.extend(timer[0] for timer in self._timers)
+        deadlines = [d for d in deadlines if d != float("inf")]
+        return min(deadlines) if deadlines else None
+
+    # Process lifecycle
+
+    def _spawn(self, state: ServiceState, now: float) -> None:
+        service = state.service
+        try:
+            pid = self.server.spawn(
+                _run_service,
+                service.name,
+                self._notify_path,
+                service.target,
+                service.args,
+                service.env,
+            )
+        except (RuntimeError, OSError) as e:
+            logger.error(f"✗ Could not start {service.name}: {e}")
+            self._schedule_restart(state, now)
+            return
+        state.pid = pid
+        state.ready = False
+        state.started_at = now
+        state.start_at = None
+        state.kill_at = None
+        state.exitcode = None
+        state.probe_interval = 0.05
+        state.next_probe = now
+        logger.info(f"Started {service.name} (pid {pid})")
+        if service.probe is None:
+            self._mark_ready(state, now)
+        else:
+            self._write_status()
+
+    def _mark_ready(self, state: ServiceState, now: float) -> None:
+        state.ready = True
+        state.ready_at = now
+        status = f" ({state.status})" if state.status else ""
+        logger.info(
+            f"✓ {state.service.name} ready in {now - state.started_at:.2f}s "
+            f"(pid {state.pid}){status}"
+        )
+        if self.ready_at is None and self.ready:
+            self.ready_at = now
+            logger.info(
+                f"✓ All {len(self.states)} services ready in "
+                f"{now - self.started_at:.2f}s"
+            )
+            notify("READY=1")
+        self._write_status()
+
+    def _terminate(self, state: ServiceState, now: float, signum: int) -> None:
+        _signal(state.pid, signum)
+        state.kill_at = now + state.service.stop_timeout
+
+    def _reap(self) -> bool:
+        reaped = False
+        while True:
+            report = self.server.wait(timeout=0)
+            if report is None:
+                return reaped
+            reaped = True
+            self._exited(*report)
+
+    def _exited(self, pid: int, exitcode: int) -> None:
+        state = next((s for s in self.states.values() if s.pid == pid), None)
+        if state is None:
+            return
+        now = time.monotonic()
+        expected = self._stopping or state.kill_at is not None
+        state.pid = None
+        state.ready = False
+        state.kill_at = None
+        state.exitcode = exitcode
+        name = state.service.name
+        if state.retired:
+            del self.states[name]
+            logger.info(f"✓ {name} (pid {pid}) removed ({exitcode})")
+        elif self._stopping:
+            logger.info(f"✓ {name} (pid {pid}) stopped ({exitcode})")
+        else:
+            if now - state.started_at >= self.backoff.reset_after:
+                state.failures = 0
+            if not expected:
+                logger.warning(f"✗ {name} (pid {pid}) exited ({exitcode})")
+            self._schedule_restart(state, now)
+        self._write_status()
+
+    def _schedule_restart(self, state: ServiceState, now: float) -> None:
+        state.failures += 1
+        state.restarts += 1
+        delay = self.backoff.delay(state.failures)
+        state.start_at = now + delay
+        logger.info(f"Restarting {state.service.name} in {delay:.1f}s")
+
+    def _server_lost(self) -> None:
+        logger.error("✗ Fork server exited; stopping")
+        self._failed = True
+        self._stopping = True
+        for state in self.states.values():
+            if state.pid is not None:
+                # Orphaned children still get the drain signal
+                _signal(state.pid, signal.SIGTERM)
+                state.pid = None
+        self._write_status()
+
+    # Readiness socket and status file
+
+    def _read_notifications(self) -> None:
+        while True:
+            try:
+                data = self._notify_sock.recv(4096)
+            except BlockingIOError:
+                return
+            fields = dict(
+                line.split("=", 1)
+                for line in data.decode(errors="replace").splitlines()
+                if "=" in line
+            )
+            try:
+                pid = int(fields.get("MAINPID", ""))
+            except ValueError:
+                continue
+            state = next((s for s in self.states.values() if s.pid == pid), None)
+            if state is None:
+                continue
+            state.status = fields.get("STATUS", state.status)
+            if (
+                fields.get("READY") == "1"
+                and not state.ready
+                and state.kill_at is None
+                and state.service.probe == PROBE_NOTIFY
+            ):
+                self._mark_ready(state, time.monotonic())
+
+    def _open(self) -> None:
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self.server.fileno(), selectors.EVENT_READ, "exit")
+
+        self._notify_dir = tempfile.mkdtemp(prefix="supervisor-")
+        self._notify_sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._notify_path = os.path.join(self._notify_dir, "notify")
+        self._notify_sock.bind(self._notify_path)
+        self._notify_sock.setblocking(False)
+        self._selector.register(self._notify_sock, selectors.EVENT_READ, "notify")
+
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._selector.register(self._wake_r, selectors.EVENT_READ, "wake")
+
+    def _close(self) -> None:
+        self._selector.close()
+        self._notify_sock.close()
+        shutil.rmtree(self._notify_dir, ignore_errors=True)
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+        self._wake_r = self._wake_w = -1
+        if self.status_file:
+            try:
+                os.unlink(self.status_file)
+            except FileNotFoundError:
+                pass
+
+    def _write_status(self) -> None:
+        if not self.status_file:
+            return
+        overall = "ready" if self.ready else "starting"
+        if self._stopping:
+            overall = "stopping"
+        lines = [f"supervisor {os.getpid()} {overall}"]
+        lines += [
+            f"{name} {state.pid or '-'} {state.state}"
+            for name, state in self.states.items()
+        ]
+        tmp = f"{self.status_file}.tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(tmp)), exist_ok=True)
+        with open(tmp, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, self.status_file)
+
+
+def _run_service(
+    name: str,
+    notify_path: Optional[str],
+    target: Callable[..., Any],
+    args: tuple,
+    env: Optional[Dict[str, str]] = None,
+) -> Any:
+    """Child entry point: service environment and default signals, then run."""
+    os.environ.update(env or {})
+    os.environ[SERVICE_NAME] = name
+    if notify_path:
+        os.environ[NOTIFY_SOCKET] = notify_path
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    return target(*args)
+
+
+def _is_tcp(probe: Optional[str]) -> bool:
+    return bool(probe) and probe.startswith(PROBE_TCP)
+
+
+def _tcp_ready(probe: str) -> bool:
+    host, _, port = probe[len(PROBE_TCP):].rpartition(":")
+    try:
+        with socket.create_connection((host or "127.0.0.1", int(port)), timeout=0.2):
+            return True
+    except OSError:
+        return False
+
+
+def _signal(pid: int, signum: int) -> None:
+    try:
+        os.kill(pid, signum)
+    except ProcessLookupError:
+        pass
+
+
+def worker_processes(configured: int, pool: str) -> int:
+    """
+    Worker processes to run on this node.
+
+    Args:
+        configured: Configured count (0: size to the machine)
+        pool: Celery pool of each worker
+
+    Returns:
+        ``configured`` if set; otherwise one per CPU for single-threaded
+        pools, or one for prefork, which already forks a child per CPU
+    """
+    if configured > 0:
+        return configured
+    if pool == "prefork":
+        return 1
+    return os.cpu_count() or 1
+
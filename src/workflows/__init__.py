@@ -0,0 +1,10 @@
+"""Multi-task workflows built on the task client and adapter."""
+
+from .map_reduce import MapReduce, MapReduceError, MapReduceProgress, map_reduce
+
+__all__ = [
+    "MapReduce",
+    "MapReduceError",
+    "MapReduceProgress",
+    "map_reduce",
+]
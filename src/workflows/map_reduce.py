@@ -0,0 +1,259 @@
+"""Chunked map-reduce over Celery tasks with bounded memory.
+
+The input is read lazily, ``chunk_size`` items at a time, and only while
+fewer than ``max_in_flight`` tasks are outstanding. Partial results are
+combined as they arrive, ``fan_in`` at a time, by reduce tasks whose
+results are reduced again: a reduction tree instead of one chord callback
+holding every partial. However large the input, the client holds at most
+``max_in_flight`` pending results, about ``max_in_flight + fan_in``
+partials waiting to be reduced and the chunk being built.
+
+Because partials are combined in completion order, the reduce task must
+be associative and commutative, and accept a list of partials.
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from celery import Celery
+
+logger = logging.getLogger(__name__)
+
+_MAP = "map"
+_REDUCE = "reduce"
+
+
+@dataclass
+class MapReduceProgress:
+    """Counters of a running map-reduce."""
+
+    items: int = 0
+    maps: int = 0
+    maps_done: int = 0
+    reduces: int = 0
+    reduces_done: int = 0
+    in_flight: int = 0
+    # Partials waiting to be reduced
+    waiting: int = 0
+    # Whether the whole input has been read
+    exhausted: bool = False
+    elapsed: float = 0.0
+
+    @property
+    def fraction(self) -> Optional[float]:
+        """Share of map tasks done, once the total is known."""
+        if not self.exhausted:
+            return None
+        return self.maps_done / self.maps if self.maps else 1.0
+
+
+class MapReduceError(Exception):
+    """A map or reduce task failed."""
+
+
+class MapReduce:
+    """
+    Run one map-reduce job through a Celery app.
+
+    Example:
+        job = MapReduce(app, "tasks.word_count", "tasks.merge_counts")
+        counts = job.run(lines, chunk_size=1000)
+    """
+
+    def __init__(
+        self,
+        app: Celery,
+        map_task: Union[str, Any],
+        reduce_task: Union[str, Any],
+        max_in_flight: int = 8,
+        fan_in: int = 8,
+        progress: Optional[Callable[[MapReduceProgress], None]] = None,
+        poll: float = 0.05,
+        timeout: Optional[float] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ):
+        """
+        Initialize job.
+
+        Args:
+            app: Celery app used to send the tasks
+            map_task: Task (or its name) called with a list of items
+            reduce_task: Task (or its name) called with a list of partials
+            max_in_flight: Most map and reduce tasks outstanding at once
+            fan_in: Partials combined by one reduce task
+            progress: Called with the counters after every finished task
+            poll: Longest pause between checks for finished tasks
+            timeout: Seconds the whole job may take (None: no limit)
+            options: Extra ``send_task`` options (queue, priority, ...)
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        if fan_in < 2:
+            raise ValueError("fan_in must be at least 2")
+        self.app = app
+        self.map_task = getattr(map_task, "name", map_task)
+        self.reduce_task = getattr(reduce_task, "name", reduce_task)
+        self.max_in_flight = max_in_flight
+        self.fan_in = fan_in
+        self.on_progress = progress
+        self.poll = poll
+        self.timeout = timeout
+        self.options = dict(options or {})
+        self.progress = MapReduceProgress()
+
+    def run(self, iterable: Iterable[Any], chunk_size: int = 1000) -> Any:
+        """
+        Map ``iterable`` in chunks and reduce the partial results.
+
+        Args:
+            iterable: Input items, consumed lazily
+            chunk_size: Items per map task
+
+        Returns:
+            The final reduced value; the single partial when there was only
+            one chunk, None for empty input
+
+        Raises:
+            MapReduceError: If a task fails
+            TimeoutError: If the job exceeds ``timeout``
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        progress = self.progress = MapReduceProgress()
+        started = time.monotonic()
+        chunks = _chunked(iterable, chunk_size)
+        pending: Dict[str, tuple] = {}
+        partials: List[Any] = []
+        pause = self.poll / 8
+
+        while True:
+            self._submit(chunks, pending, partials)
+            if not pending:
+                # Input read and everything reduced
+                return partials[0] if partials else None
+
+            finished = self._collect(pending, partials)
+            progress.in_flight = len(pending)
+            progress.waiting = len(partials)
+            progress.elapsed = time.monotonic() - started
+            if finished:
+                pause = self.poll / 8
+                if self.on_progress is not None:
+                    self.on_progress(progress)
+                continue
+
+            if self.timeout is not None and progress.elapsed > self.timeout:
+                message = (
+                    f"Map-reduce {self.map_task}/{self.reduce_task} exceeded "
+                    f"{self.timeout}s with {len(pending)} tasks outstanding"
+                )
+                self._abandon(pending)
+                raise TimeoutError(message)
+            time.sleep(pause)
+            pause = min(pause * 2, self.poll)
+
+    def _submit(
+        self, chunks: Iterator[list], pending: Dict[str, tuple], partials: List[Any]
+    ) -> None:
+        progress = self.progress
+        while len(pending) < self.max_in_flight:
+            # Reducing first frees client memory before reading more input
+            final = progress.exhausted and not any(
+                kind == _MAP for kind, _ in pending.values()
+            )
+            if len(partials) >= self.fan_in or (final and len(partials) > 1):
+                group = partials[: self.fan_in]
+                del partials[: self.fan_in]
+                self._send(self.reduce_task, _REDUCE, group, pending)
+                progress.reduces += 1
+                continue
+            if progress.exhausted:
+                return
+            chunk = next(chunks, None)
+            if chunk is None:
+                progress.exhausted = True
+                continue
+            self._send(self.map_task, _MAP, chunk, pending)
+            progress.maps += 1
+            progress.items += len(chunk)
+
+    def _send(
+        self, task: str, kind: str, values: list, pending: Dict[str, tuple]
+    ) -> None:
+        result = self.app.send_task(task, args=(values,), **self.options)
+        pending[result.id] = (kind, result)
+
+    def _collect(self, pending: Dict[str, tuple], partials: List[Any]) -> int:
+        finished = 0
+        for task_id, (kind, result) in list(pending.items()):
+            if not result.ready():
+                continue
+            del pending[task_id]
+            finished += 1
+            try:
+                partials.append(result.get(disable_sync_subtasks=False))
+            except Exception as e:
+                self._abandon(pending)
+                raise MapReduceError(f"{kind} task {task_id} failed: {e}") from e
+            finally:
+                result.forget()
+            if kind == _MAP:
+                self.progress.maps_done += 1
+            else:
+                self.progress.reduces_done += 1
+        return finished
+
+    def _abandon(self, pending: Dict[str, tuple]) -> None:
+        logger.error(
+            f"✗ Map-reduce {self.map_task}/{self.reduce_task} failed; "
+            f"abandoning {len(pending)} outstanding tasks"
+        )
+        if pending:
+            # Queued tasks would otherwise still run and store results
+            # nobody reads
+            try:
+                self.app.control.revoke(list(pending))
+            except Exception as e:
+                logger.warning(f"✗ Failed to revoke outstanding tasks: {e}")
+        for _, result in pending.values():
+            result.forget()
+        pending.clear()
+
+
+def map_reduce(
+    app: Celery,
+    map_task: Union[str, Any],
+    reduce_task: Union[str, Any],
+    iterable: Iterable[Any],
+    chunk_size: int = 1000,
+    **kwargs: Any,
+) -> Any:
+    """
+    Map ``iterable`` in chunks with ``map_task`` and combine with ``reduce_task``.
+
+    Args:
+        app: Celery app used to send the tasks
+        map_task: Task (or its name) called with a list of items
+        reduce_task: Task (or its name) called with a list of partials;
+            must be associative and commutative
+        iterable: Input items, consumed lazily
+        chunk_size: Items per map task
+        **kwargs: ``MapReduce`` settings (max_in_flight, fan_in, progress,
+            poll, timeout, options)
+
+    Returns:
+        The final reduced value
+    """
+    return MapReduce(app, map_task, reduce_task, **kwargs).run(iterable, chunk_size)
+
+
+def _chunked(iterable: Iterable[Any], size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
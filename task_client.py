@@ -5,14 +5,50 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from main import app
-
 
 class TaskClient:
     """Simple client to interact with Celery tasks."""
 
-    def __init__(self):
-        self.app = app
+    def __init__(self, app=None, streams=None, admission=None):
+        self._app = app
+        self._streams = streams
+        # AdmissionController, False when disabled, None until configured
+        self._admission = admission
+
+    @property
+    def app(self):
+        """Celery app, created on first use."""
+        if self._app is None:
+            from main import get_app
+
+            self._app = get_app()
+        return self._app
+
+    @property
+    def streams(self):
+        """Chunk stream backend of generator tasks, from the app's config."""
+        if self._streams is None:
+            from config import get_runtime_config
+            from streaming import build_stream_backend
+
+            self.app  # creating the app sets the runtime config
+            self._streams = build_stream_backend(get_runtime_config().streaming)
+        return self._streams
+
+    @property
+    def admission(self):
+        """Admission controller from the app's config, or None if disabled."""
+        if self._admission is None:
+            from config import get_runtime_config
+
+            self.app  # creating the app sets the runtime config
+            cfg = get_runtime_config().admission
+            self._admission = False
+            if cfg.enabled:
+                from admission import build_admission
+
+                self._admission = build_admission(self.app, cfg)
+        return self._admission or None
 
     def list(self):
         """List all registered tasks."""
@@ -28,14 +64,63 @@ class TaskClient:
         return tasks
 
     def submit(self, task_name: str, *args, **kwargs):
-        """Submit a task and return result."""
+        """
+        Submit a task and return result.
+
+        With admission control enabled, first waits for room in the task's
+        queue, or raises ``admission.AdmissionRejected``.
+        """
         if task_name not in self.app.tasks:
             raise ValueError(f"Task '{task_name}' not found")
 
-        result = self.app.send_task(task_name, args=args, kwargs=kwargs)
+        admission = self.admission
+        if admission is not None:
+            from admission import task_route
+
+            queue, policy = task_route(self.app, task_name)
+            admission.admit(task_name, queue, policy)
+
+        from monitoring.tracing import get_tracer
+
+        with get_tracer().publish(task_name) as headers:
+            result = self.app.send_task(
+                task_name, args=args, kwargs=kwargs, headers=headers
+            )
         print(f"Task submitted: {result.id}")
         return result
 
+    def stream(self, task, offset: int = 0, timeout: float = 60.0):
+        """
+        Iterate over the chunks of a generator task as they arrive.
+
+        Yields ``Chunk(offset, data)``; reading paces the task (it runs at
+        most its stream window ahead). To resume, pass the ``offset`` of
+        the returned reader, or one past the last chunk seen. When the
+        task is retried the reader raises ``StreamRestarted`` before the
+        new attempt's chunks; chunks read so far belong to the failed one.
+        """
+        from streaming import StreamReader
+
+        task_id = getattr(task, "id", task)
+        return StreamReader(self.streams, task_id, offset=offset, timeout=timeout)
+
+    def map_reduce(self, map_task, reduce_task, iterable, chunk_size=1000, **kwargs):
+        """
+        Map ``iterable`` in chunks and tree-reduce the partial results.
+
+        See ``workflows.MapReduce`` for ``max_in_flight``, ``fan_in``,
+        ``progress`` and the other settings.
+        """
+        from workflows import map_reduce
+
+        for task_name in (map_task, reduce_task):
+            if task_name not in self.app.tasks:
+                raise ValueError(f"Task '{task_name}' not found")
+
+        return map_reduce(
+            self.app, map_task, reduce_task, iterable, chunk_size, **kwargs
+        )
+
     def get_result(self, task_id: str, timeout: int = 10):
         """Get task result by ID."""
         from celery.result import AsyncResult
@@ -0,0 +1,245 @@
+"""Tests for client-side admission control."""
+
+from dataclasses import replace
+
+import pytest
+
+from admission import (
+    AdmissionController,
+    AdmissionPolicy,
+    AdmissionRejected,
+    QueueDepthCache,
+    admission_policy,
+    task_route,
+)
+from app import create_app
+from config import Config
+from task_client import TaskClient
+from task_management import TaskDefinition
+from worker import QueueProbe, QueueStats
+
+
+class FakeQueues(QueueProbe):
+    """Queue depths set by the test; counts samples."""
+
+    def __init__(self, **depths):
+        self.depths = depths
+        self.calls = 0
+        self.fail = False
+
+    def sample(self, queues):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("broker down")
+        return [QueueStats(q, self.depths.get(q, 0)) for q in queues]
+
+
+class FakeTime:
+    """Clock that only moves when something sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def controller(probe, marks=None, default=AdmissionPolicy(), ttl=1.0):
+    clock = FakeTime()
+    ctl = AdmissionController(
+        probe, marks, default=default, ttl=ttl, clock=clock, sleep=clock.sleep
+    )
+    return ctl, clock
+
+
+class TestPolicy:
+    """Test parsing admission settings."""
+
+    def test_from_value(self):
+        """Test a bare mark, a mapping and invalid values."""
+        assert AdmissionPolicy.from_value(500) == AdmissionPolicy(high_water=500)
+        policy = AdmissionPolicy.from_value(
+            {"high_water": 100, "action": "reject", "low_water": 80}
+        )
+        assert (policy.action, policy.resume_below) == ("reject", 80)
+        assert AdmissionPolicy(high_water=100).resume_below == 100
+        with pytest.raises(ValueError):
+            AdmissionPolicy.from_value({"action": "drop"})
+        with pytest.raises(ValueError):
+            AdmissionPolicy.from_value({"limit": 5})
+        with pytest.raises(ValueError):
+            AdmissionPolicy.from_value({"high_water": 5, "low_water": 10})
+
+    def test_task_definition(self):
+        """Test settings come from metadata, then options."""
+        task = TaskDefinition(
+            name="t", module_path="m", function_name="f",
+            metadata={"admission": {"high_water": 7, "action": "delay"}},
+        )
+        assert admission_policy(task) == AdmissionPolicy(7, "delay")
+        task = TaskDefinition(
+            name="t", module_path="m", function_name="f", options={"admission": 3}
+        )
+        assert admission_policy(task).high_water == 3
+        assert admission_policy(
+            TaskDefinition(name="t", module_path="m", function_name="f")
+        ) is None
+
+
+class TestDepthCache:
+    """Test queue depths are sampled at most once per ttl."""
+
+    def test_cached_with_local_sends(self):
+        """Test submissions count between samples and reset on refresh."""
+        probe = FakeQueues(q=10)
+        clock = FakeTime()
+        cache = QueueDepthCache(probe, ttl=1.0, clock=clock)
+        assert cache.depth("q") == 10
+        cache.sent("q", 3)
+        probe.depths["q"] = 50
+        assert cache.depth("q") == 13
+        assert probe.calls == 1
+
+        clock.now = 1.0
+        assert cache.depth("q") == 50
+        assert probe.calls == 2
+        cache.invalidate("q")
+        probe.depths["q"] = 4
+        assert cache.depth("q") == 4
+
+    def test_failed_sample(self):
+        """Test the last value is kept while the broker is unreachable."""
+        probe = FakeQueues(q=10)
+        clock = FakeTime()
+        cache = QueueDepthCache(probe, ttl=1.0, clock=clock)
+        cache.depth("q")
+        probe.fail = True
+        clock.now = 5
+        assert cache.depth("q") == 10
+
+    def test_ttl_must_be_positive(self):
+        """Test a zero ttl, which would make blocked submits spin, is refused."""
+        with pytest.raises(ValueError):
+            QueueDepthCache(FakeQueues(q=10), ttl=0)
+        with pytest.raises(ValueError):
+            AdmissionController(FakeQueues(q=10), ttl=0)
+
+
+class TestController:
+    """Test the block, delay and reject actions."""
+
+    def test_no_mark_no_sample(self):
+        """Test submissions without a mark never touch the broker."""
+        probe = FakeQueues(q=10**6)
+        ctl, _ = controller(probe)
+        for _ in range(3):
+            ctl.admit("t", "q")
+        assert probe.calls == 0
+        assert ctl.stats["admitted"] == 3
+
+    def test_reject(self):
+        """Test a reject policy fails once the mark is reached."""
+        ctl, _ = controller(FakeQueues(q=9))
+        policy = AdmissionPolicy(10, "reject")
+        ctl.admit("t", "q", policy)
+        with pytest.raises(AdmissionRejected) as error:
+            ctl.admit("t", "q", policy)
+        assert (error.value.queue, error.value.depth) == ("q", 10)
+        assert ctl.stats == {"admitted": 1, "rejected": 1}
+
+    def test_delay(self):
+        """Test a delay policy pauses, then submits."""
+        ctl, clock = controller(FakeQueues(q=100))
+        ctl.admit("t", "q", AdmissionPolicy(10, "delay", delay=2.5))
+        assert clock.slept == [2.5]
+        assert ctl.stats == {"delayed": 1, "admitted": 1}
+
+    def test_block_until_drained(self):
+        """Test a blocked submission resumes below the low-water mark."""
+        probe = FakeQueues(q=100)
+        ctl, clock = controller(probe, ttl=0.5)
+        drain = iter([90, 70, 50, 40])
+
+        def sleep(seconds):
+            clock.sleep(seconds)
+            probe.depths["q"] = next(drain)
+
+        ctl.sleep = sleep
+        ctl.admit("t", "q", AdmissionPolicy(80, "block", low_water=50, timeout=10))
+        # Resumed at 40, the first depth below 50
+        assert clock.now == 2.0
+        assert ctl.stats == {"blocked": 1, "admitted": 1}
+
+    def test_block_timeout(self):
+        """Test blocking gives up after the timeout."""
+        ctl, clock = controller(FakeQueues(q=100))
+        with pytest.raises(AdmissionRejected):
+            ctl.admit("t", "q", AdmissionPolicy(10, "block", timeout=3))
+        assert clock.now == 3.0
+        assert ctl.stats["rejected"] == 1
+
+    def test_queue_and_task_marks(self):
+        """Test the lower mark applies, with the task's action."""
+        ctl, _ = controller(
+            FakeQueues(), {"q": 100}, default=AdmissionPolicy(action="reject")
+        )
+        assert ctl.policy_for("other") is None
+        assert ctl.policy_for("q") == AdmissionPolicy(100, "reject")
+        task = AdmissionPolicy(500, "delay")
+        assert ctl.policy_for("q", task) == AdmissionPolicy(100, "delay")
+        assert ctl.policy_for("q", AdmissionPolicy(action="block")).high_water == 100
+        assert ctl.policy_for("other", task).high_water == 500
+
+
+class TestClientAdmission:
+    """Test TaskClient.submit through a real broker transport."""
+
+    def test_submit_rejected_above_mark(self):
+        """Test the client rejects past a task's mark, sampling once."""
+        cfg = Config()
+        task_list = (
+            {
+                "name": "tasks.add",
+                "module_path": "tasks.example_tasks",
+                "function_name": "add",
+                "metadata": {"admission": {"high_water": 3, "action": "reject"}},
+            },
+            {
+                "name": "tasks.multiply",
+                "module_path": "tasks.example_tasks",
+                "function_name": "multiply",
+            },
+        )
+        cfg = replace(
+            cfg,
+            celery=replace(
+                cfg.celery, broker_url="memory://", result_backend="cache+memory://"
+            ),
+            tasks=replace(cfg.tasks, source="config", task_list=task_list),
+            admission=replace(cfg.admission, enabled=True, ttl=60),
+        )
+        wrapper = create_app(cfg)
+        wrapper.app.conf.task_routes = {"tasks.add": {"queue": "admission_test"}}
+        client = TaskClient(wrapper.app)
+
+        queue, policy = task_route(wrapper.app, "tasks.add")
+        assert queue == "admission_test"
+        assert policy == AdmissionPolicy(3, "reject")
+        assert task_route(wrapper.app, "tasks.add", {"queue": "q2"})[0] == "q2"
+
+        for i in range(3):
+            client.submit("tasks.add", i, i)
+        with pytest.raises(AdmissionRejected):
+            client.submit("tasks.add", 9, 9)
+        # No mark on the default queue
+        client.submit("tasks.multiply", 2, 3)
+
+        assert client.admission.depths.samples == 1
+        # A fresh sample sees the three queued messages
+        client.admission.depths.invalidate("admission_test")
+        assert client.admission.depths.depth("admission_test") == 3
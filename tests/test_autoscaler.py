@@ -0,0 +1,352 @@
+"""Tests for the queue-depth autoscaler."""
+
+import signal
+import threading
+import time
+from dataclasses import replace
+from types import SimpleNamespace
+
+import pytest
+from celery import Celery
+
+from config import Config
+from main import build_autoscaler, build_services
+from worker import (
+    Autoscaler,
+    BrokerQueueProbe,
+    PoolScaler,
+    QueueProbe,
+    QueueStats,
+    Scaler,
+    ScalingPolicy,
+    Service,
+    Supervisor,
+    SupervisorScaler,
+    notify,
+)
+
+
+def ready_and_wait():
+    notify("READY=1")
+    signal.pause()
+
+
+class SimulatedBroker(QueueProbe, Scaler):
+    """One queue fed by an arrival curve and drained by simulated workers."""
+
+    def __init__(self, arrivals, rate=10, warmup=5, workers=1):
+        self.arrivals = arrivals
+        # Messages per second one worker handles
+        self.rate = rate
+        # Seconds before a new worker consumes
+        self.warmup = warmup
+        self.now = 0.0
+        self.backlog = 0.0
+        self.workers = [0.0] * workers
+        self.history = []
+
+    def consuming(self):
+        return sum(1 for t in self.workers if self.now - t >= self.warmup)
+
+    def advance(self, seconds=1.0):
+        self.backlog += self.arrivals(self.now) * seconds
+        self.backlog = max(self.backlog - self.consuming() * self.rate * seconds, 0)
+        self.now += seconds
+
+    def sample(self, queues):
+        return [QueueStats(queues[0], int(self.backlog), self.consuming())]
+
+    def current(self):
+        return len(self.workers)
+
+    def scale_to(self, count):
+        self.history.append((self.now, len(self.workers), count))
+        if count > len(self.workers):
+            self.workers += [self.now] * (count - len(self.workers))
+        else:
+            del self.workers[count:]
+
+
+def daily_curve(t):
+    """5 msg/s, ramping to 250 msg/s (50x) between 10 and 25 minutes."""
+    if 600 <= t < 900:
+        return 5 + 245 * (t - 600) / 300
+    if 900 <= t < 1500:
+        return 250
+    if 1500 <= t < 1800:
+        return 250 - 245 * (t - 1500) / 300
+    return 5
+
+
+def simulate(broker, policy, seconds, interval=5):
+    autoscaler = Autoscaler(
+        broker, broker, ["celery"], policy, clock=lambda: broker.now
+    )
+    samples = []
+    while broker.now < seconds:
+        for _ in range(interval):
+            broker.advance()
+        decision = autoscaler.step()
+        samples.append((broker.now, broker.backlog, len(broker.workers), decision))
+    return samples
+
+
+class TestDecisions:
+    """Test the scaling rules."""
+
+    def autoscaler(self, **policy):
+        policy = ScalingPolicy(
+            **{
+                "min_workers": 1,
+                "max_workers": 10,
+                "target_backlog": 10,
+                "cooldown_up": 10,
+                "cooldown_down": 60,
+                **policy,
+            }
+        )
+        return Autoscaler(None, None, policy=policy)
+
+    def test_scale_up_to_backlog(self):
+        """Test scaling up goes straight to the needed count, within bounds."""
+        autoscaler = self.autoscaler()
+        assert autoscaler.decide(0, 45, None, 2)[:2] == (5, "up")
+        assert autoscaler.decide(0, 500, None, 2)[:2] == (10, "up")
+        assert autoscaler.decide(0, 500, None, 10)[:2] == (10, "hold")
+        assert self.autoscaler(max_step_up=1).decide(0, 45, None, 2)[0] == 3
+
+    def test_hysteresis(self):
+        """Test the count holds between the scale-up and scale-down points."""
+        autoscaler = self.autoscaler()
+        # 4 workers handle up to 40; fewer only once 3 would have <= 5 each
+        for backlog in (40, 30, 16):
+            assert autoscaler.decide(100, backlog, None, 4)[:2] == (4, "hold")
+        assert autoscaler.decide(100, 15, None, 4)[:2] == (3, "down")
+        assert autoscaler.decide(100, 0, None, 4)[:2] == (3, "down")
+        assert self.autoscaler(max_step_down=0).decide(100, 0, None, 4)[0] == 1
+
+    def test_bounds(self):
+        """Test the minimum and maximum are enforced first."""
+        autoscaler = self.autoscaler(min_workers=2, max_workers=4)
+        assert autoscaler.decide(0, 0, None, 0)[:2] == (2, "up")
+        assert autoscaler.decide(0, 0, None, 6)[:2] == (4, "down")
+        assert autoscaler.decide(100, 0, None, 2)[:2] == (2, "hold")
+        with pytest.raises(ValueError):
+            ScalingPolicy(min_workers=5, max_workers=4)
+
+    def test_cooldowns_and_consumers(self):
+        """Test scale-ups wait for cooldowns and starting workers."""
+        broker = SimulatedBroker(lambda t: 0, workers=2)
+        broker.backlog = 100
+        policy = ScalingPolicy(max_workers=20, cooldown_up=10, cooldown_down=60)
+        autoscaler = Autoscaler(
+            broker, broker, policy=policy, clock=lambda: broker.now
+        )
+
+        broker.now = 100
+        assert autoscaler.step().desired == 10
+        broker.backlog = 300
+        assert autoscaler.step(105).reason == "2/10 workers consuming"
+        broker.now = 106
+        assert autoscaler.step().reason == "scale-up cooldown"
+        broker.now = 115
+        assert autoscaler.step().desired == 20
+
+        broker.backlog = 0
+        assert autoscaler.step(150).reason == "scale-down cooldown"
+        assert autoscaler.step(175).desired == 19
+
+
+class FakeControl:
+    """Remote control of two prefork workers with four processes each."""
+
+    def __init__(self):
+        self.pools = {"w1@host": 4, "w2@host": 4}
+
+    def inspect(self, destination=None, timeout=1.0):
+        stats = {
+            worker: {"pool": {"processes": list(range(size))}}
+            for worker, size in self.pools.items()
+        }
+        return SimpleNamespace(stats=lambda: stats)
+
+    def pool_grow(self, n, destination):
+        self.pools[destination[0]] += n
+
+
+class TestPoolScaler:
+    """Test scaling the pools of running workers."""
+
+    def test_consumers_are_workers(self):
+        """Test one consumer per worker does not count as still starting."""
+        control = FakeControl()
+        scaler = PoolScaler(SimpleNamespace(control=control))
+
+        class Probe(QueueProbe):
+            def sample(self, queues):
+                return [QueueStats(queues[0], 500, 2)]
+
+        policy = ScalingPolicy(max_workers=16, target_backlog=50)
+        decision = Autoscaler(Probe(), scaler, policy=policy).step(0)
+        assert (decision.current, decision.desired) == (8, 10)
+        assert control.pools == {"w1@host": 5, "w2@host": 5}
+        assert scaler.expected_consumers() == 2
+
+
+class TestSimulation:
+    """Test the autoscaler against a simulated day of traffic."""
+
+    def test_follows_arrival_curve(self):
+        """Test capacity follows a 50x swing without flapping."""
+        broker = SimulatedBroker(daily_curve, rate=10, warmup=5)
+        policy = ScalingPolicy(
+            min_workers=1,
+            max_workers=40,
+            target_backlog=20,
+            cooldown_up=10,
+            cooldown_down=60,
+        )
+        samples = simulate(broker, policy, 3600)
+        workers = {t: n for t, _, n, _ in samples}
+
+        # Quiet: a single worker keeps up
+        assert workers[595] == 1
+        # Peak: 250 msg/s needs 25 workers; never above the maximum
+        assert 25 <= max(workers.values()) <= 40
+        assert all(1 <= n <= 40 for n in workers.values())
+        # The backlog stays near what the running workers are expected to hold
+        assert all(backlog <= 20 * n + 200 for _, backlog, n, _ in samples)
+        # Back to the minimum once traffic is quiet again
+        assert workers[3600] == 1
+
+        downs = [t for t, before, after in broker.history if after < before]
+        assert all(b - a >= 60 for a, b in zip(downs, downs[1:]))
+        # Dropping below the 25 workers the peak needs is tried once, undone
+        # and not tried again while the peak lasts
+        peak = [after for t, _, after in broker.history if 900 <= t < 1500]
+        assert peak.count(24) == 1
+        assert min(peak[peak.index(24) + 1:]) == 25
+
+    def test_noisy_plateau(self):
+        """Test a backlog hovering near one threshold does not flap."""
+        noise = [1.3, 0.7, 1.1, 0.9, 1.2, 0.8]
+        broker = SimulatedBroker(
+            lambda t: 60 * noise[int(t / 7) % len(noise)], rate=10, warmup=5
+        )
+        policy = ScalingPolicy(max_workers=20, target_backlog=20, cooldown_down=60)
+        simulate(broker, policy, 1800)
+        # Settles a worker above the mean 60 msg/s and stays there
+        changes = [c for c in broker.history if c[0] >= 900]
+        assert changes == []
+        assert len(broker.workers) == 7
+
+
+class TestBrokerProbe:
+    """Test sampling a real kombu transport."""
+
+    def test_memory_transport(self):
+        """Test message counts through a passive declare."""
+        app = Celery("probe", broker="memory://", backend="cache+memory://")
+        for i in range(3):
+            app.send_task("tasks.noop", queue="probe_queue")
+        probe = BrokerQueueProbe(app)
+        try:
+            stats = probe.sample(["probe_queue", "missing_queue"])
+        finally:
+            probe.close()
+        assert stats == [
+            QueueStats("probe_queue", 3, None),
+            QueueStats("missing_queue", 0, None),
+        ]
+
+    def test_concurrent_samples_serialized(self):
+        """Test threads never use the shared channel at the same time."""
+        app = Celery("probe", broker="memory://", backend="cache+memory://")
+        probe = BrokerQueueProbe(app)
+        sample = probe._sample
+        active, overlaps = [], []
+
+        def tracked(queues):
+            active.append(1)
+            overlaps.append(len(active))
+            time.sleep(0.01)
+            try:
+                return sample(queues)
+            finally:
+                active.pop()
+
+        probe._sample = tracked
+        threads = [
+            threading.Thread(target=probe.sample, args=([f"queue_{i}"],))
+            for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        probe.close()
+        assert overlaps == [1, 1, 1, 1]
+
+
+class TestSupervisorScaler:
+    """Test scaling worker services of a running supervisor."""
+
+    def test_add_and_remove(self):
+        """Test workers are added, then the newest drained and removed."""
+
+        def make(n):
+            return Service(f"worker-{n}", ready_and_wait)
+
+        supervisor = Supervisor([make(1), Service("beat", ready_and_wait)])
+        scaler = SupervisorScaler(supervisor, make)
+        targets = [3, 3, 1]
+        seen = []
+
+        def scale(now):
+            if targets and supervisor.ready:
+                scaler.scale_to(targets.pop(0))
+                seen.append((scaler.current(), sorted(supervisor.states)))
+
+        supervisor.every(0.01, scale)
+        thread = threading.Thread(target=supervisor.run)
+        thread.start()
+        try:
+            deadline = time.monotonic() + 10
+            while targets or len(supervisor.states) != 2:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+        finally:
+            supervisor.request_stop()
+            thread.join(10)
+
+        assert seen[0] == (3, ["beat", "worker-1", "worker-2", "worker-3"])
+        assert seen[-1][0] == 1
+        assert sorted(supervisor.states) == ["beat", "worker-1"]
+        assert scaler.current() == 1
+
+
+class TestConfig:
+    """Test the autoscaler built from the config."""
+
+    def test_build(self):
+        """Test the starting count is clamped and the mode selects the scaler."""
+        cfg = Config()
+        cfg = replace(
+            cfg,
+            supervisor=replace(cfg.supervisor, workers=6, beat=False, flower=False),
+            autoscaler=replace(cfg.autoscaler, enabled=True, max_workers=4),
+        )
+        services = build_services(cfg)
+        assert len(services) == 4
+
+        app = Celery("scaled", broker="memory://")
+        supervisor = Supervisor(services)
+        autoscaler = build_autoscaler(app, cfg, supervisor)
+        assert autoscaler.policy.max_workers == 4
+        assert autoscaler.scaler.current() == 4
+
+        pool = replace(cfg, autoscaler=replace(cfg.autoscaler, mode="pool"))
+        assert isinstance(build_autoscaler(app, pool, supervisor).scaler, PoolScaler)
+        bad = replace(cfg, autoscaler=replace(cfg.autoscaler, mode="threads"))
+        with pytest.raises(ValueError):
+            build_autoscaler(app, bad, supervisor)
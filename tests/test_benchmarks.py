@@ -0,0 +1,111 @@
+"""Tests for the benchmark harness."""
+
+from bench_utils import BenchmarkHistory, find_regressions, percentiles
+from catalog_micro import check_regressions, run_benchmarks
+from e2e_throughput import parse_mix, run_benchmark
+from fork_memory import run_benchmark as run_fork_memory
+
+
+class TestBenchUtils:
+    """Test shared benchmark helpers."""
+
+    def test_percentiles(self):
+        """Test percentile computation."""
+        result = percentiles(list(range(1, 101)))
+        assert result["p50"] == 50.5
+        assert 95 <= result["p95"] <= 96
+        assert percentiles([]) == {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+
+    def test_find_regressions(self):
+        """Test regressions respect metric direction and threshold."""
+        directions = {"tasks_per_sec": "higher", "latency_p95_ms": "lower"}
+        baseline = {"tasks_per_sec": 100.0, "latency_p95_ms": 10.0}
+        assert not find_regressions(
+            {"tasks_per_sec": 95.0, "latency_p95_ms": 10.5}, baseline, directions, 10
+        )
+        regressions = find_regressions(
+            {"tasks_per_sec": 80.0, "latency_p95_ms": 12.0}, baseline, directions, 10
+        )
+        assert len(regressions) == 2
+
+    def test_history_previous(self, tmp_path):
+        """Test history returns the latest run with matching params."""
+        history = BenchmarkHistory(tmp_path / "history.json")
+        history.append({"name": "b", "params": {"n": 1}, "results": {"x": 1}})
+        history.append({"name": "b", "params": {"n": 2}, "results": {"x": 2}})
+        history.append({"name": "b", "params": {"n": 1}, "results": {"x": 3}})
+        assert history.previous("b", {"n": 1})["results"] == {"x": 3}
+        assert history.previous("b", {"n": 9}) is None
+        assert len(history.load()) == 3
+
+
+class TestE2EBenchmark:
+    """Test the end-to-end benchmark."""
+
+    def test_parse_mix(self):
+        """Test task mix parsing."""
+        assert parse_mix("add=3, tasks.multiply") == {
+            "tasks.add": 3.0,
+            "tasks.multiply": 1.0,
+        }
+
+    def test_small_run(self):
+        """Test a small run through create_app and an in-memory broker."""
+        record = run_benchmark(tasks=30, concurrency=2, backend="memory", warmup=5)
+        results = record["results"]
+        assert results["errors"] == 0
+        assert results["tasks_per_sec"] > 0
+        assert results["latency_p50_ms"] <= results["latency_p99_ms"]
+        assert record["params"]["worker_concurrency"] == 4
+
+
+class TestCatalogMicroBenchmarks:
+    """Test the catalog micro-benchmarks."""
+
+    def test_small_run_covers_both_implementations(self):
+        """Test every hot path runs for the library and the app copy."""
+        results = run_benchmarks(sizes=[100], repeat=1)
+        for impl in ("lib", "app"):
+            for name in (
+                "registry.register",
+                "registry.get",
+                "registry.filter",
+                "config_source.load_tasks",
+                "database_source.load_tasks",
+                "storage.add",
+                "storage.list",
+                "storage.delete",
+            ):
+                assert f"{impl}.{name}.100" in results
+        assert all(seconds > 0 for seconds in results.values())
+
+    def test_check_regressions(self):
+        """Test slowdowns beyond the threshold are reported."""
+        baseline = {"lib.registry.get.1000": 1.0, "lib.registry.filter.1000": 1.0}
+        current = {"lib.registry.get.1000": 1.1, "lib.registry.filter.1000": 1.5}
+        regressions = check_regressions(current, baseline, threshold_pct=25)
+        assert len(regressions) == 1
+        assert regressions[0].startswith("lib.registry.filter.1000")
+
+    def test_noise_aware_threshold(self):
+        """Test noisy and sub-millisecond benchmarks need a larger slowdown."""
+        baseline = {"lib.storage.add.1000": 1.0, "lib.registry.get.1000": 0.0002}
+        current = {"lib.storage.add.1000": 1.5, "lib.registry.get.1000": 0.0004}
+        # Twice as slow, but by less than a millisecond
+        (regression,) = check_regressions(current, baseline, threshold_pct=25)
+        assert regression.startswith("lib.storage.add.1000")
+        noise = {"lib.storage.add.1000": 20.0}
+        assert check_regressions(current, baseline, 25, noise) == []
+
+
+class TestForkMemoryBenchmark:
+    """Test the fork memory benchmark."""
+
+    def test_small_run(self):
+        """Test preloading and freezing shrink each child's unique memory."""
+        record = run_fork_memory(modules=3, entries=2000, children=2)
+        results = record["results"]
+        assert set(results) == {"cold", "preload", "freeze", "fork_server"}
+        assert all(r["uss_mb"] > 0 for r in results.values())
+        assert results["freeze"]["uss_mb"] < results["cold"]["uss_mb"]
+        assert results["fork_server"]["uss_mb"] < results["cold"]["uss_mb"]
@@ -0,0 +1,288 @@
+"""Tests for per-dependency circuit breakers."""
+
+import multiprocessing
+from dataclasses import replace
+
+import pytest
+from celery import Celery
+
+from adapters import CeleryTaskAdapter
+from app import create_app
+from breakers import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    BreakerMetrics,
+    BreakerPolicy,
+    CircuitBreaker,
+    CircuitOpen,
+    FileBreakerStore,
+    MemoryBreakerStore,
+    breaker_config,
+)
+from config import Config
+from monitoring.metrics import MetricsRegistry
+from task_management import TaskDefinition, TaskRegistry
+
+CALLS = {"count": 0, "fail": True}
+
+
+def payment(amount):
+    CALLS["count"] += 1
+    if CALLS["fail"]:
+        raise ConnectionError("payments api down")
+    return amount
+
+
+def definition(breaker, **kwargs):
+    return TaskDefinition(
+        name="tests.payment",
+        module_path="test_breakers",
+        function_name="payment",
+        metadata={"breaker": breaker},
+        **kwargs,
+    )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def breaker(store=None, **policy):
+    clock = FakeClock()
+    registry = MetricsRegistry()
+    cb = CircuitBreaker(
+        "payments_api",
+        store or MemoryBreakerStore(),
+        BreakerPolicy(**{"failure_threshold": 3, "reset_timeout": 30, **policy}),
+        metrics=BreakerMetrics(registry),
+        clock=clock,
+    )
+    return cb, clock, registry
+
+
+def fail_many(directory, count):
+    cb = CircuitBreaker(
+        "shared", FileBreakerStore(directory), BreakerPolicy(failure_threshold=1000)
+    )
+    for _ in range(count):
+        cb.record_failure()
+
+
+class TestStateMachine:
+    """Test closed, open and half-open transitions."""
+
+    def test_opens_after_consecutive_failures(self):
+        """Test failures open the breaker; a success resets the count."""
+        cb, clock, _ = breaker()
+        cb.record_failure()
+        cb.record_failure()
+        cb.record_success()
+        assert cb.state.failures == 0
+        for _ in range(3):
+            assert cb.allow()
+            cb.record_failure()
+        assert cb.state.state == OPEN
+        assert not cb.allow()
+        clock.now += 10
+        assert cb.retry_after() == 20
+
+    def test_half_open_trial(self):
+        """Test one trial call after the timeout decides the outcome."""
+        cb, clock, registry = breaker()
+        for _ in range(3):
+            cb.record_failure()
+        clock.now += 30
+        assert cb.allow()
+        assert cb.state.state == HALF_OPEN
+        # Only one trial at a time
+        assert not cb.allow()
+        cb.record_failure()
+        assert cb.state.state == OPEN
+
+        clock.now += 30
+        assert cb.allow()
+        cb.record_success()
+        assert cb.state.state == CLOSED and cb.allow()
+
+        transitions = {
+            values: child.value
+            for values, child in registry.get(
+                "celery_breaker_transitions_total"
+            ).children().items()
+        }
+        assert transitions == {
+            ("payments_api", CLOSED, OPEN): 1,
+            ("payments_api", OPEN, HALF_OPEN): 2,
+            ("payments_api", HALF_OPEN, OPEN): 1,
+            ("payments_api", HALF_OPEN, CLOSED): 1,
+        }
+        assert "celery_breaker_state" in registry.render()
+
+    def test_lost_trial(self):
+        """Test a trial that never reports back does not wedge the breaker."""
+        cb, clock, _ = breaker()
+        for _ in range(3):
+            cb.record_failure()
+        clock.now += 30
+        assert cb.allow()
+        clock.now += 29
+        assert not cb.allow()
+        clock.now += 1
+        assert cb.allow()
+
+    def test_settings(self):
+        """Test breaker names, mappings and invalid settings."""
+        task = definition({"name": "payments_api", "action": "defer"})
+        assert breaker_config(task) == ("payments_api", {"action": "defer"})
+        assert breaker_config(definition("payments_api"))[0] == "payments_api"
+        with pytest.raises(ValueError):
+            breaker_config(definition(["payments_api"]))
+        with pytest.raises(ValueError):
+            BreakerPolicy.from_value({"action": "queue"})
+        policy = BreakerPolicy.from_value({"on": ["OSError"], "reset_timeout": 5})
+        assert (policy.on, policy.reset_timeout) == ((OSError,), 5)
+
+
+class TestFileStore:
+    """Test breaker state shared by the processes of a node."""
+
+    def test_processes_share_state(self, tmp_path):
+        """Test concurrent updates from several processes are not lost."""
+        ctx = multiprocessing.get_context("fork")
+        workers = [
+            ctx.Process(target=fail_many, args=(str(tmp_path), 50)) for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+            assert worker.exitcode == 0
+        assert FileBreakerStore(str(tmp_path)).get("shared").failures == 200
+
+    def test_open_seen_by_other_breakers(self, tmp_path):
+        """Test a breaker opened by one process refuses calls in another."""
+        first, clock, _ = breaker(FileBreakerStore(str(tmp_path)))
+        second, other_clock, _ = breaker(FileBreakerStore(str(tmp_path)))
+        other_clock.now = clock.now
+        for _ in range(3):
+            first.record_failure()
+        assert not second.allow()
+        first.reset()
+        assert second.allow()
+
+
+class TestTaskBreaker:
+    """Test tasks guarded by a breaker."""
+
+    def adapter(self, tmp_path, **policies):
+        app = Celery("breakers", broker="memory://", backend="cache+memory://")
+        return CeleryTaskAdapter(
+            app,
+            TaskRegistry(),
+            breaker_store=FileBreakerStore(str(tmp_path)),
+            breaker_policies={"payments_api": {"failure_threshold": 2, **policies}},
+        )
+
+    def test_fail_fast(self, tmp_path):
+        """Test an open breaker fails calls without running the function."""
+        adapter = self.adapter(tmp_path)
+        assert adapter.register_task(definition("payments_api"))
+        task = adapter.celery_app.tasks["tests.payment"]
+        CALLS.update(count=0, fail=True)
+        for _ in range(2):
+            assert isinstance(task.apply(args=(5,)).result, ConnectionError)
+        result = task.apply(args=(5,))
+        assert isinstance(result.result, CircuitOpen)
+        assert CALLS["count"] == 2
+
+        adapter.get_breaker("payments_api").reset()
+        CALLS["fail"] = False
+        assert task.apply(args=(5,)).get() == 5
+
+    def test_defer(self, tmp_path):
+        """Test deferred calls are retried, not run, while open."""
+        adapter = self.adapter(tmp_path, action="defer")
+        task_def = definition("payments_api", options={"max_retries": 2})
+        assert adapter.register_task(task_def)
+        task = adapter.celery_app.tasks["tests.payment"]
+        retries = []
+        retry = task.retry
+
+        def record(*args, **kwargs):
+            retries.append(kwargs["countdown"])
+            return retry(*args, **kwargs)
+
+        task.retry = record
+        CALLS.update(count=0, fail=True)
+        for _ in range(2):
+            task.apply(args=(1,))
+        result = task.apply(args=(1,))
+        assert isinstance(result.result, CircuitOpen)
+        assert CALLS["count"] == 2
+        # Two deferrals, then the third gives up with max_retries=2
+        assert len(retries) == 3 and all(c >= 1 for c in retries)
+
+    def test_with_retry_policy(self, tmp_path):
+        """Test retries stop once the breaker opens."""
+        adapter = self.adapter(tmp_path)
+        task_def = definition("payments_api")
+        task_def.metadata["retry"] = {"on": "ConnectionError", "max_retries": 10}
+        assert adapter.register_task(task_def)
+        task = adapter.celery_app.tasks["tests.payment"]
+        CALLS.update(count=0, fail=True)
+        assert isinstance(task.apply(args=(1,)).result, CircuitOpen)
+        assert CALLS["count"] == 2
+
+    def test_refusals_not_retried(self, tmp_path):
+        """Test a policy covering CircuitOpen still fails refused calls fast."""
+        adapter = self.adapter(tmp_path)
+        task_def = definition("payments_api")
+        task_def.metadata["retry"] = {"on": "Exception", "max_retries": 10}
+        assert adapter.register_task(task_def)
+        task = adapter.celery_app.tasks["tests.payment"]
+        assert CircuitOpen in task.retry_policy.exclude
+        retries = []
+        retry = task.retry
+
+        def record(*args, **kwargs):
+            retries.append(kwargs["exc"])
+            return retry(*args, **kwargs)
+
+        task.retry = record
+        CALLS.update(count=0, fail=True)
+        assert isinstance(task.apply(args=(1,)).result, CircuitOpen)
+        assert CALLS["count"] == 2
+        # Both failures were retried; the refusal that followed was not
+        assert [type(exc) for exc in retries] == [ConnectionError] * 2
+        with pytest.raises(CircuitOpen):
+            task.run(1)
+
+    def test_per_task_thresholds_refused(self, tmp_path):
+        """Test a task cannot change its shared breaker's thresholds."""
+        adapter = self.adapter(tmp_path)
+        task_def = definition({"name": "payments_api", "failure_threshold": 1})
+        assert not adapter.register_task(task_def)
+
+    def test_config(self, tmp_path):
+        """Test the app builds the configured store."""
+        cfg = Config()
+        cfg = replace(
+            cfg,
+            celery=replace(
+                cfg.celery, broker_url="memory://", result_backend="cache+memory://"
+            ),
+            tasks=replace(cfg.tasks, source="config", task_list=()),
+            breakers=replace(
+                cfg.breakers,
+                directory=str(tmp_path),
+                policies={"payments_api": {"reset_timeout": 5}},
+            ),
+        )
+        adapter = create_app(cfg).adapter
+        assert isinstance(adapter.breaker_store, FileBreakerStore)
+        assert adapter.get_breaker("payments_api").policy.reset_timeout == 5
@@ -0,0 +1,215 @@
+"""Tests for time limits calibrated from the execution history."""
+
+import json
+from dataclasses import replace
+
+import pytest
+from celery import Celery
+
+from adapters import CeleryTaskAdapter
+from app import create_app
+from config import Config
+from monitoring import (
+    CalibrationPolicy,
+    ExecutionRecord,
+    HistoryStore,
+    TimeLimits,
+    calibrate,
+    calibrate_tasks,
+    format_report,
+    load_limits,
+    save_limits,
+)
+from monitoring.calibration import recommend
+from task_management import TaskDefinition, TaskRegistry
+
+NOW = 1_700_000_000.0
+CEILING = TimeLimits(1500, 1800)
+POLICY = CalibrationPolicy(min_samples=100)
+
+
+def multiply(x, y):
+    return x * y
+
+
+def definition(name="tests.multiply", options=None, metadata=None):
+    return TaskDefinition(
+        name=name,
+        module_path="test_calibration",
+        function_name="multiply",
+        options=options or {},
+        metadata=metadata or {},
+    )
+
+
+def store_with(tmp_path, task, runtimes, outcome="SUCCESS"):
+    store = HistoryStore(str(tmp_path / "history.sqlite3"))
+    store.write(
+        [
+            ExecutionRecord(task, NOW - i, runtime, outcome)
+            for i, runtime in enumerate(runtimes)
+        ]
+    )
+    return store
+
+
+class TestRecommend:
+    """Test limits derived from a quantile runtime."""
+
+    def test_margins_and_bounds(self):
+        """Test margins, the floor and the global ceiling."""
+        assert recommend(4.0, POLICY, CEILING) == TimeLimits(12, 15)
+        assert recommend(0.01, POLICY, CEILING) == TimeLimits(5, 7)
+        assert recommend(900.0, POLICY, CEILING) == TimeLimits(1500, 1800)
+        assert recommend(900.0, POLICY, TimeLimits(10, 10)) == TimeLimits(9, 10)
+
+    def test_invalid_policy(self):
+        """Test settings that would not bound runtimes are refused."""
+        with pytest.raises(ValueError):
+            CalibrationPolicy(quantile=1.0)
+        with pytest.raises(ValueError):
+            CalibrationPolicy(margin=0.5)
+
+
+class TestCalibrate:
+    """Test recommendations and guard rails."""
+
+    def test_tightens_limits(self, tmp_path):
+        """Test a fast task gets limits near its observed runtimes."""
+        store = store_with(tmp_path, "tests.multiply", [0.5] * 199 + [2.0])
+        current = {"tests.multiply": CEILING}
+        (result,) = calibrate(store, current, CEILING, POLICY, now=NOW)
+        assert result.samples == 200
+        assert result.recommended == TimeLimits(6, 8)
+        assert result.changed
+        assert "tests.multiply" in format_report([result])
+
+    def test_guard_rails(self, tmp_path):
+        """Test too little history, fixed limits and small changes."""
+        store = store_with(tmp_path, "tests.few", [1.0] * 10)
+        store.write(
+            [
+                ExecutionRecord(name, NOW - i, runtime, "SUCCESS")
+                for name, runtime in (("tests.fixed", 1.0), ("tests.same", 4.0))
+                for i in range(200)
+            ]
+        )
+        current = {
+            "tests.few": CEILING,
+            "tests.fixed": CEILING,
+            "tests.same": TimeLimits(11, 14),
+        }
+        few, fixed, same = calibrate(
+            store, current, CEILING, POLICY, fixed=["tests.fixed"], now=NOW
+        )
+        assert few.recommended is None and "10 of 100" in few.reason
+        assert fixed.recommended is None
+        assert same.recommended == TimeLimits(11, 14) and not same.changed
+
+    def test_timeouts_block_lowering(self, tmp_path):
+        """Test limits are kept while failed runs reach the soft limit."""
+        store = store_with(tmp_path, "tests.multiply", [1.0] * 200)
+        store.write([ExecutionRecord("tests.multiply", NOW, 1499.0, "FAILURE")])
+        current = {"tests.multiply": CEILING}
+        (result,) = calibrate(store, current, CEILING, POLICY, now=NOW)
+        assert result.recommended is None
+        assert "failed runs" in result.reason
+
+    def test_task_definitions(self, tmp_path):
+        """Test explicit options and opted-out tasks keep their limits."""
+        store = HistoryStore(str(tmp_path / "history.sqlite3"))
+        names = ["tests.auto", "tests.explicit", "tests.off"]
+        store.write(
+            [
+                ExecutionRecord(name, NOW - i, 1.0, "SUCCESS")
+                for name in names
+                for i in range(200)
+            ]
+        )
+        task_defs = [
+            definition("tests.auto"),
+            definition("tests.explicit", options={"time_limit": 60}),
+            definition("tests.off", metadata={"calibrate": False}),
+        ]
+        results = calibrate_tasks(store, task_defs, CEILING, POLICY, now=NOW)
+        auto, explicit, off = results
+        assert auto.recommended == TimeLimits(5, 7)
+        assert explicit.current == TimeLimits(1500, 60)
+        assert explicit.recommended is None and off.recommended is None
+
+
+class TestLimitsFile:
+    """Test saving and loading calibrated limits."""
+
+    def test_round_trip(self, tmp_path):
+        """Test skipped tasks keep earlier limits; invalid ones are dropped."""
+        path = str(tmp_path / "limits" / "time_limits.json")
+        store = store_with(tmp_path, "tests.multiply", [1.0] * 200)
+        results = calibrate(
+            store,
+            {"tests.multiply": CEILING, "tests.add": CEILING},
+            CEILING,
+            POLICY,
+            now=NOW,
+        )
+        previous = {"tests.add": TimeLimits(20, 25)}
+        save_limits(path, results, previous, POLICY)
+        assert load_limits(path, CEILING) == {
+            "tests.add": TimeLimits(20, 25),
+            "tests.multiply": TimeLimits(5, 7),
+        }
+        # Global limits lowered below a saved one
+        assert load_limits(path, TimeLimits(10, 12)) == {
+            "tests.multiply": TimeLimits(5, 7)
+        }
+        assert load_limits(str(tmp_path / "missing.json"), CEILING) == {}
+        data = json.loads((tmp_path / "limits" / "time_limits.json").read_text())
+        assert data["tasks"]["tests.multiply"]["samples"] == 200
+
+
+class TestApply:
+    """Test calibrated limits applied at registration."""
+
+    def test_adapter(self):
+        """Test limits apply unless the task sets or opts out of them."""
+        app = Celery("calibration", broker="memory://", backend="cache+memory://")
+        limits = {name: TimeLimits(6, 8) for name in ("tests.a", "tests.b", "tests.c")}
+        adapter = CeleryTaskAdapter(app, TaskRegistry(), time_limits=limits)
+        assert adapter.register_task(definition("tests.a"))
+        assert adapter.register_task(definition("tests.b", options={"time_limit": 60}))
+        assert adapter.register_task(
+            definition("tests.c", options={"calibrate": False})
+        )
+        task = app.tasks["tests.a"]
+        assert (task.soft_time_limit, task.time_limit) == (6, 8)
+        assert app.tasks["tests.b"].time_limit == 60
+        assert app.tasks["tests.c"].time_limit is None
+        assert adapter.time_limit_changes == {"tests.a": TimeLimits(6, 8)}
+
+    def test_config(self, tmp_path):
+        """Test the app loads saved limits only when applying them."""
+        path = tmp_path / "time_limits.json"
+        path.write_text(
+            json.dumps(
+                {"tasks": {"tests.multiply": {"soft_time_limit": 6, "time_limit": 8}}}
+            )
+        )
+        cfg = Config()
+        task = {
+            "name": "tests.multiply",
+            "module_path": "test_calibration",
+            "function_name": "multiply",
+        }
+        cfg = replace(
+            cfg,
+            celery=replace(
+                cfg.celery, broker_url="memory://", result_backend="cache+memory://"
+            ),
+            tasks=replace(cfg.tasks, source="config", task_list=(task,)),
+            calibration=replace(cfg.calibration, path=str(path)),
+        )
+        adapter = create_app(cfg).adapter
+        assert adapter.time_limit_changes == {}
+        cfg = replace(cfg, calibration=replace(cfg.calibration, apply=True))
+        adapter = create_app(cfg).adapter
+        assert adapter.time_limit_changes == {"tests.multiply": TimeLimits(6, 8)}
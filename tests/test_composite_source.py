@@ -0,0 +1,147 @@
+"""Tests for loading several task sources at once."""
+
+import time
+
+from app import create_app
+from config import build_config
+from task_management import TaskDefinition, TaskManager, TaskRegistry
+from task_management.sources import CompositeTaskSource
+
+
+def definition(name, module_path="tasks.example_tasks", function_name="add"):
+    return TaskDefinition(
+        name=name, module_path=module_path, function_name=function_name
+    )
+
+
+class StaticSource:
+    """Source returning fixed tasks after an optional delay."""
+
+    def __init__(self, tasks, delay=0.0, error=None):
+        self.tasks = tasks
+        self.delay = delay
+        self.error = error
+
+    def load_tasks(self):
+        time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return list(self.tasks)
+
+
+class TestCompositeTaskSource:
+    """Test parallel loading and precedence merging."""
+
+    def test_loads_in_parallel(self):
+        """Test slow sources overlap instead of adding up."""
+        sources = [
+            (f"s{i}", StaticSource([definition(f"t{i}")], delay=0.3))
+            for i in range(4)
+        ]
+        composite = CompositeTaskSource(sources)
+
+        start = time.perf_counter()
+        tasks = composite.load_tasks()
+        elapsed = time.perf_counter() - start
+
+        assert sorted(t.name for t in tasks) == ["t0", "t1", "t2", "t3"]
+        assert elapsed < 0.9
+        assert all(r.seconds >= 0.3 for r in composite.reports)
+
+    def test_precedence_and_conflicts(self):
+        """Test earlier sources win and conflicts are reported."""
+        high = StaticSource([definition("a", function_name="high")])
+        mid = StaticSource([definition("a", function_name="mid"), definition("b")])
+        low = StaticSource([definition("a", function_name="low")], delay=0.05)
+        composite = CompositeTaskSource([("db", high), ("config", mid), ("dir", low)])
+
+        tasks = {t.name: t for t in composite.load_tasks()}
+        assert tasks["a"].function_name == "high"
+        assert "b" in tasks
+        assert len(composite.conflicts) == 1
+        conflict = composite.conflicts[0]
+        assert (conflict.name, conflict.winner) == ("a", "db")
+        assert conflict.overridden == ["config", "dir"]
+
+    def test_failed_source_is_reported(self):
+        """Test a failing source doesn't block the others."""
+        composite = CompositeTaskSource(
+            [
+                ("broken", StaticSource([], error=RuntimeError("db down"))),
+                ("config", StaticSource([definition("a")])),
+            ]
+        )
+        assert [t.name for t in composite.load_tasks()] == ["a"]
+        reports = {r.name: r for r in composite.reports}
+        assert reports["broken"].error == "db down"
+        assert reports["config"].tasks == 1
+        assert reports["config"].error is None
+
+
+class TestBulkRegistration:
+    """Test the one-step registration path."""
+
+    def test_register_many(self):
+        """Test new tasks are added and duplicates skipped."""
+        registry = TaskRegistry()
+        registry.register(definition("a"))
+        skipped = registry.register_many(
+            [definition("a"), definition("b"), definition("b"), definition("c")]
+        )
+        assert skipped == ["a", "b"]
+        assert sorted(t.name for t in registry.list_all()) == ["a", "b", "c"]
+
+    def test_manager_loads_composite(self):
+        """Test TaskManager registers the merged result."""
+        manager = TaskManager(TaskRegistry())
+        manager.load_from_source(
+            CompositeTaskSource(
+                [
+                    ("one", StaticSource([definition("a")])),
+                    ("two", StaticSource([definition("a"), definition("b")])),
+                ]
+            )
+        )
+        assert sorted(t.name for t in manager.registry.list_all()) == ["a", "b"]
+
+
+class TestCreateApp:
+    """Test create_app with several sources."""
+
+    def test_config_and_directory(self, tmp_path, monkeypatch):
+        """Test tasks from config and directory sources are combined."""
+        jobs = tmp_path / "jobs"
+        jobs.mkdir()
+        (jobs / "tasks.py").write_text(
+            "def task_sub(x, y):\n    return x - y\n\n\n"
+            "def task_add(x, y):\n    return -1\n"
+        )
+        monkeypatch.syspath_prepend(str(tmp_path))
+        cfg = build_config(
+            {
+                "celery": {
+                    "broker_url": "memory://",
+                    "result_backend": "cache+memory://",
+                },
+                "tasks": {
+                    "sources": ["config", "directory", "unknown"],
+                    "task_list": [
+                        {
+                            "name": "jobs.tasks.task_add",
+                            "module_path": "tasks.example_tasks",
+                            "function_name": "add",
+                        }
+                    ],
+                    "directories": [{"path": str(jobs)}],
+                    "discovery_index": "",
+                },
+            }
+        )
+        wrapper = create_app(cfg)
+        assert sorted(wrapper.list_tasks()) == [
+            "jobs.tasks.task_add",
+            "jobs.tasks.task_sub",
+        ]
+        # The config source takes precedence over the directory source
+        assert wrapper.adapter.execute("jobs.tasks.task_add", 2, 3) == 5
+        assert wrapper.adapter.execute("jobs.tasks.task_sub", 5, 3) == 2
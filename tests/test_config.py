@@ -0,0 +1,87 @@
+"""Tests for the runtime configuration."""
+
+import dataclasses
+from types import MappingProxyType
+
+import pytest
+from omegaconf import OmegaConf
+
+from config import Config, build_config, thaw
+from config_access import measure_access
+from config_loader import load_runtime_config
+
+
+class TestBuildConfig:
+    """Test validation into the frozen Config."""
+
+    def test_project_config(self):
+        """Test the project config.yaml validates."""
+        cfg = load_runtime_config()
+        assert cfg.celery.accept_content == ("json",)
+        assert cfg.tasks.database.table == "tasks"
+        assert cfg.tasks.task_list[0]["name"] == "tasks.add"
+
+    def test_frozen_and_slotted(self):
+        """Test the config cannot be modified."""
+        cfg = build_config({"celery": {"broker_url": "memory://"}})
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            cfg.celery.broker_url = "redis://"
+        assert not hasattr(cfg.celery, "__dict__")
+
+    def test_free_form_values_are_read_only(self):
+        """Test task_list entries and extras are frozen."""
+        cfg = build_config(
+            {
+                "tasks": {"task_list": [{"name": "a", "tags": ["x"]}]},
+                "redis": {"host": "localhost"},
+            }
+        )
+        entry = cfg.tasks.task_list[0]
+        assert isinstance(entry, MappingProxyType)
+        assert entry["tags"] == ("x",)
+        assert cfg.extra["redis"]["host"] == "localhost"
+        assert thaw(cfg.tasks.task_list) == [{"name": "a", "tags": ["x"]}]
+
+    def test_resolves_interpolations_once(self):
+        """Test interpolations are resolved while building."""
+        dict_cfg = OmegaConf.create(
+            {"app": {"name": "svc"}, "celery": {"broker_url": "${app.name}://"}}
+        )
+        assert build_config(dict_cfg).celery.broker_url == "svc://"
+
+    def test_coerces_strings(self):
+        """Test string values from env overrides are coerced."""
+        cfg = build_config({"metrics": {"port": "9100", "enabled": "true"}})
+        assert cfg.metrics.port == 9100
+        assert cfg.metrics.enabled is True
+
+    def test_wrong_type(self):
+        """Test invalid values report their full key."""
+        with pytest.raises(ValueError, match="worker.prefetch_multiplier"):
+            build_config({"worker": {"prefetch_multiplier": "many"}})
+
+    def test_unknown_nested_key(self):
+        """Test typos inside known sections are rejected."""
+        with pytest.raises(ValueError, match="unknown keys"):
+            build_config({"celery": {"broker_ur1": "memory://"}})
+
+    def test_missing_required(self):
+        """Test required values must be present."""
+        with pytest.raises(ValueError, match=r"tasks.directories\[0\].path"):
+            build_config({"tasks": {"directories": [{"pattern": "*.py"}]}})
+
+    def test_passthrough(self):
+        """Test a built Config is returned unchanged."""
+        cfg = Config()
+        assert build_config(cfg) is cfg
+
+
+class TestAccessCost:
+    """Benchmark attribute access."""
+
+    def test_runtime_config_faster_than_dictconfig(self):
+        """Test frozen access is much cheaper than DictConfig access."""
+        results = measure_access(number=2000, repeat=3)
+        for name, timing in results.items():
+            assert timing["speedup"] > 10, f"{name}: {timing}"
+            assert timing["runtime_ns"] < 1000, f"{name}: {timing}"
@@ -0,0 +1,271 @@
+"""Tests for the database task source."""
+
+import json
+import sqlite3
+import tracemalloc
+from types import SimpleNamespace
+
+import pytest
+
+from task_management import TaskManager, TaskRegistry
+from task_management.sources import DatabaseTaskSource
+from task_management.storage import SQLiteStorage
+
+ROWS = [
+    ("tasks.add", "tasks.math", ["math", "celery"], True),
+    ("tasks.multiply", "tasks.math", ["math"], False),
+    ("tasks.send_email", "tasks.notify", ["email", "celery"], True),
+    ("tasks.send_sms", "tasks.notify", ["sms"], True),
+    ("tasks.report", "tasks.reports", [], True),
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "tasks.db"
+    storage = SQLiteStorage(str(path))
+    for name, module_path, tags, enabled in ROWS:
+        storage.add_task(
+            name=name,
+            module_path=module_path,
+            function_name=name.split(".")[-1],
+            tags=tags,
+            enabled=enabled,
+        )
+    return path
+
+
+def names(tasks):
+    return sorted(t.name for t in tasks)
+
+
+def old_database(tmp_path):
+    """A tasks database created without the filter schema."""
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE tasks (name TEXT, module_path TEXT, function_name TEXT, "
+        "description TEXT, enabled INTEGER, tags TEXT, options TEXT, "
+        "metadata TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO tasks VALUES ('a', 'm', 'f', '', 1, '[\"x\"]', '{}', '{}')"
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def schema_objects(path):
+    """Names of the schema objects besides the tasks table."""
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE name != 'tasks'")
+    objects = {name for (name,) in rows}
+    conn.close()
+    return objects
+
+
+class TestFilters:
+    """Test filters are applied in SQL."""
+
+    def test_no_filters(self, db_path):
+        """Test all rows load without filters."""
+        tasks = DatabaseTaskSource(f"sqlite:///{db_path}").load_tasks()
+        assert len(tasks) == len(ROWS)
+        add = next(t for t in tasks if t.name == "tasks.add")
+        assert add.tags == ["math", "celery"]
+
+    def test_enabled(self, db_path):
+        """Test filtering on the enabled flag."""
+        source = DatabaseTaskSource(f"sqlite:///{db_path}")
+        assert names(source.load_tasks(enabled=False)) == ["tasks.multiply"]
+        assert "tasks.multiply" not in names(source.load_tasks(enabled=True))
+
+    def test_tags_match_any(self, db_path):
+        """Test tasks having any of the tags are returned once."""
+        source = DatabaseTaskSource(f"sqlite:///{db_path}")
+        assert names(source.load_tasks(tags=["celery", "sms"])) == [
+            "tasks.add",
+            "tasks.send_email",
+            "tasks.send_sms",
+        ]
+
+    def test_combined(self, db_path):
+        """Test filters combine with AND."""
+        source = DatabaseTaskSource(f"sqlite:///{db_path}")
+        tasks = source.load_tasks(enabled=True, tags=["math"], module_path="tasks.math")
+        assert names(tasks) == ["tasks.add"]
+
+    def test_default_filters(self, db_path):
+        """Test constructor filters apply when load_tasks has no arguments."""
+        source = DatabaseTaskSource(
+            f"sqlite:///{db_path}", module_path="tasks.notify"
+        )
+        assert names(source.load_tasks()) == ["tasks.send_email", "tasks.send_sms"]
+        assert names(source.load_tasks(module_path="tasks.reports")) == [
+            "tasks.report"
+        ]
+
+    def test_uses_indexes(self, db_path):
+        """Test the filtered query is served by indexes."""
+        source = DatabaseTaskSource(f"sqlite:///{db_path}")
+        query, params = source._build_query(True, ["math"], "tasks.math")
+        conn = sqlite3.connect(db_path)
+        plan = " ".join(
+            row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {query}", params)
+        )
+        conn.close()
+        assert "SCAN tasks" not in plan
+        assert "tasks_tags" in plan
+
+
+class TestTagTable:
+    """Test the tag table follows writes to the tasks table."""
+
+    def test_replace_update_and_delete(self, db_path):
+        """Test INSERT OR REPLACE, UPDATE and DELETE keep tags in sync."""
+        storage = SQLiteStorage(str(db_path))
+        source = DatabaseTaskSource(f"sqlite:///{db_path}")
+
+        storage.add_task("tasks.add", "tasks.math", "add", tags=["arith"])
+        assert "tasks.add" not in names(source.load_tasks(tags=["math"]))
+        assert names(source.load_tasks(tags=["arith"])) == ["tasks.add"]
+
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "UPDATE tasks SET tags = ? WHERE name = 'tasks.report'",
+            (json.dumps(["weekly"]),),
+        )
+        conn.commit()
+        conn.close()
+        assert names(source.load_tasks(tags=["weekly"])) == ["tasks.report"]
+
+        storage.delete_task("tasks.send_sms")
+        assert source.load_tasks(tags=["sms"]) == []
+
+    def test_malformed_tags(self, db_path):
+        """Test rows with invalid tag JSON are still written."""
+        conn = sqlite3.connect(db_path)
+        conn.execute(
+            "INSERT INTO tasks (name, module_path, function_name, tags) "
+            "VALUES ('tasks.bad', 'm', 'f', 'not json')"
+        )
+        conn.commit()
+        conn.close()
+        source = DatabaseTaskSource(f"sqlite:///{db_path}")
+        assert source.load_tasks(tags=["not json"]) == []
+
+    def test_backfills_existing_database(self, tmp_path):
+        """Test a database without the tag table is upgraded on first filter."""
+        path = old_database(tmp_path)
+        source = DatabaseTaskSource(f"sqlite:///{path}")
+        assert names(source.load_tasks(tags=["x"])) == ["a"]
+        conn = sqlite3.connect(path)
+        assert conn.execute("SELECT tag, task_name FROM tasks_tags").fetchall() == [
+            ("x", "a")
+        ]
+        conn.close()
+
+    def test_tag_table_only_for_tag_filters(self, tmp_path):
+        """Test other filters add their indexes but no tag table or triggers."""
+        path = old_database(tmp_path)
+        source = DatabaseTaskSource(f"sqlite:///{path}")
+        assert names(source.load_tasks(enabled=True)) == ["a"]
+        assert schema_objects(path) == {"idx_tasks_enabled", "idx_tasks_module_path"}
+
+    def test_failed_upgrade_rolled_back(self, tmp_path):
+        """Test a failing upgrade leaves no partial schema behind."""
+        path = old_database(tmp_path)
+        conn = sqlite3.connect(path)
+        # Clashes with the tag table's index, created after the table
+        conn.execute("CREATE TABLE idx_tasks_tags_task_name (x)")
+        conn.commit()
+        conn.close()
+
+        source = DatabaseTaskSource(f"sqlite:///{path}")
+        assert names(source.load_tasks(tags=["x"])) == ["a"]
+        assert schema_objects(path) == {"idx_tasks_tags_task_name"}
+
+    def test_json_fallback(self, db_path, monkeypatch):
+        """Test tag filters still work when the tag table can't be created."""
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP TABLE tasks_tags")
+        conn.commit()
+        conn.close()
+        monkeypatch.setattr(
+            DatabaseTaskSource,
+            "_create_filter_schema",
+            lambda self, conn, tags: False,
+        )
+        source = DatabaseTaskSource(f"sqlite:///{db_path}")
+        assert names(source.load_tasks(tags=["celery"])) == [
+            "tasks.add",
+            "tasks.send_email",
+        ]
+
+
+class TestStreaming:
+    """Test chunked streaming of large catalogs."""
+
+    @pytest.fixture
+    def big_db(self, tmp_path):
+        path = tmp_path / "big.db"
+        SQLiteStorage(str(path))
+        conn = sqlite3.connect(path)
+        conn.executemany(
+            "INSERT INTO tasks (name, module_path, function_name, description, "
+            "enabled, tags, options, metadata) VALUES (?, ?, ?, ?, 1, ?, ?, ?)",
+            [
+                (
+                    f"tasks.t{i}",
+                    "tasks.bulk",
+                    f"f{i}",
+                    "x" * 200,
+                    json.dumps(["bulk", f"tag{i % 10}"]),
+                    json.dumps({"max_retries": 3}),
+                    json.dumps({"index": i, "padding": "y" * 200}),
+                )
+                for i in range(20000)
+            ],
+        )
+        conn.commit()
+        conn.close()
+        return path
+
+    def test_iter_matches_load(self, db_path):
+        """Test streaming yields the same definitions as load_tasks."""
+        source = DatabaseTaskSource(f"sqlite:///{db_path}")
+        streamed = list(source.iter_tasks(tags=["celery"], chunk_size=1))
+        assert streamed == source.load_tasks(tags=["celery"])
+
+    def test_peak_memory_bounded_by_chunk(self, big_db):
+        """Test streaming holds one chunk instead of the whole table."""
+        source = DatabaseTaskSource(f"sqlite:///{big_db}")
+
+        def peak(func):
+            tracemalloc.start()
+            func()
+            _, peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return peak_bytes
+
+        full = peak(source.load_tasks)
+        streamed = peak(lambda: sum(1 for _ in source.iter_tasks(chunk_size=100)))
+        assert streamed * 10 < full
+
+    def test_manager_registers_incrementally(self, db_path):
+        """Test TaskManager registers chunks while the source is streaming."""
+        registry = TaskRegistry()
+        manager = TaskManager(registry, chunk_size=2)
+        source = DatabaseTaskSource(f"sqlite:///{db_path}")
+        seen = []
+
+        def iter_tasks():
+            for task_def in source.iter_tasks():
+                seen.append(len(registry.list_all()))
+                yield task_def
+
+        manager.load_from_source(SimpleNamespace(iter_tasks=iter_tasks))
+
+        assert len(registry.list_all()) == len(ROWS)
+        assert seen == [0, 0, 2, 2, 4]
@@ -0,0 +1,204 @@
+"""Tests for directory-based task discovery."""
+
+import os
+import sys
+import textwrap
+
+import pytest
+
+from app import create_app
+from config import TaskDirectoryConfig, build_config
+from task_management.sources import DirectoryTaskSource
+
+TASKS = '''
+from tasks.decorators import task
+import tasks.decorators
+
+
+@task
+def add(x, y):
+    """Add two numbers.
+
+    More text.
+    """
+    return x + y
+
+
+@task(name="reports.daily", tags=["reports"], max_retries=3, metadata={"a": 1})
+def daily_report():
+    pass
+
+
+@tasks.decorators.task(enabled=False)
+def disabled():
+    pass
+
+
+def task_cleanup():
+    pass
+
+
+def helper():
+    pass
+
+
+class NotATask:
+    def task_method(self):
+        pass
+'''
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(textwrap.dedent(text))
+
+
+@pytest.fixture
+def task_dir(tmp_path):
+    root = tmp_path / "jobs"
+    write(root / "math_tasks.py", TASKS)
+    write(root / "sub" / "io_tasks.py", "def task_read():\n    pass\n")
+    write(root / "helpers.py", "def task_not_matched():\n    pass\n")
+    return root
+
+
+def names(tasks):
+    return sorted(t.name for t in tasks)
+
+
+class TestDiscovery:
+    """Test static discovery of task functions."""
+
+    def test_decorator_and_prefix(self, task_dir):
+        """Test decorated and task_* functions are found."""
+        source = DirectoryTaskSource([{"path": str(task_dir), "pattern": "*_tasks.py"}])
+        tasks = {t.function_name: t for t in source.load_tasks()}
+
+        assert sorted(tasks) == [
+            "add", "daily_report", "disabled", "task_cleanup", "task_read"
+        ]
+        assert tasks["add"].name == "jobs.math_tasks.add"
+        assert tasks["add"].module_path == "jobs.math_tasks"
+        assert tasks["add"].description == "Add two numbers."
+        assert tasks["daily_report"].name == "reports.daily"
+        assert tasks["daily_report"].tags == ["reports"]
+        assert tasks["daily_report"].options == {"max_retries": 3}
+        assert tasks["daily_report"].metadata == {"a": 1}
+        assert tasks["disabled"].enabled is False
+        assert tasks["task_read"].module_path == "jobs.sub.io_tasks"
+
+    def test_does_not_import(self, task_dir):
+        """Test discovery never imports the scanned modules."""
+        write(
+            task_dir / "boom_tasks.py",
+            "raise SystemExit('imported')\n@task\ndef x(): pass\n",
+        )
+        spec = TaskDirectoryConfig(str(task_dir), "*_tasks.py")
+        source = DirectoryTaskSource([spec])
+        assert "jobs.boom_tasks.x" in names(source.load_tasks())
+        assert "jobs.boom_tasks" not in sys.modules
+
+    def test_invalid_files_are_skipped(self, task_dir):
+        """Test syntax errors and non-literal arguments don't stop discovery."""
+        write(task_dir / "bad_tasks.py", "def task_x(:\n")
+        write(task_dir / "dyn_tasks.py", "@task(max_retries=LIMIT)\ndef run(): pass\n")
+        source = DirectoryTaskSource([{"path": str(task_dir), "pattern": "*_tasks.py"}])
+        tasks = {t.name: t for t in source.load_tasks()}
+        assert "jobs.dyn_tasks.run" in tasks
+        assert tasks["jobs.dyn_tasks.run"].options == {}
+
+    def test_modules(self, tmp_path, monkeypatch):
+        """Test dotted modules are resolved on sys.path."""
+        write(tmp_path / "pkg" / "__init__.py", "")
+        write(tmp_path / "pkg" / "jobs.py", "def task_sync():\n    pass\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        tasks = DirectoryTaskSource(modules=["pkg.jobs", "pkg.missing"]).load_tasks()
+        assert names(tasks) == ["pkg.jobs.task_sync"]
+        assert "pkg" not in sys.modules
+
+    def test_duplicate_names(self, tmp_path):
+        """Test the first definition of a task name wins."""
+        write(tmp_path / "a" / "tasks.py", "@task(name='dup')\ndef one(): pass\n")
+        write(tmp_path / "b" / "tasks.py", "@task(name='dup')\ndef two(): pass\n")
+        source = DirectoryTaskSource([str(tmp_path / "a"), str(tmp_path / "b")])
+        tasks = source.load_tasks()
+        assert [(t.name, t.function_name) for t in tasks] == [("dup", "one")]
+
+
+class TestDiscoveryIndex:
+    """Test the mtime/size-keyed discovery index."""
+
+    def test_rescan_parses_changed_files_only(self, task_dir, tmp_path):
+        """Test unchanged files come from the index."""
+        index = tmp_path / "index.json"
+        dirs = [{"path": str(task_dir), "pattern": "*_tasks.py"}]
+
+        first = DirectoryTaskSource(dirs, index_path=index)
+        expected = names(first.load_tasks())
+        assert first.stats == {"files": 2, "parsed": 2, "reused": 0}
+
+        second = DirectoryTaskSource(dirs, index_path=index)
+        assert names(second.load_tasks()) == expected
+        assert second.stats == {"files": 2, "parsed": 0, "reused": 2}
+
+        path = task_dir / "sub" / "io_tasks.py"
+        path.write_text("def task_read(): pass\n\n\ndef task_write(): pass\n")
+        third = DirectoryTaskSource(dirs, index_path=index)
+        assert "jobs.sub.io_tasks.task_write" in names(third.load_tasks())
+        assert third.stats == {"files": 2, "parsed": 1, "reused": 1}
+
+    def test_touched_file_is_rescanned(self, task_dir, tmp_path):
+        """Test an mtime change alone triggers a rescan of that file."""
+        index = tmp_path / "index.json"
+        source = DirectoryTaskSource([str(task_dir)], index_path=index)
+        write(task_dir / "tasks.py", "def task_a(): pass\n")
+        source.load_tasks()
+
+        path = task_dir / "tasks.py"
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        source.load_tasks()
+        assert source.stats["parsed"] == 1
+
+    def test_removed_file_drops_tasks(self, task_dir, tmp_path):
+        """Test tasks from deleted files disappear."""
+        index = tmp_path / "index.json"
+        dirs = [{"path": str(task_dir), "pattern": "*_tasks.py"}]
+        DirectoryTaskSource(dirs, index_path=index).load_tasks()
+
+        (task_dir / "sub" / "io_tasks.py").unlink()
+        tasks = DirectoryTaskSource(dirs, index_path=index).load_tasks()
+        assert "jobs.sub.io_tasks.task_read" not in names(tasks)
+
+    def test_corrupt_index_is_ignored(self, task_dir, tmp_path):
+        """Test an unreadable index falls back to a full scan."""
+        index = tmp_path / "index.json"
+        index.write_text("{not json")
+        source = DirectoryTaskSource([str(task_dir)], index_path=index)
+        source.load_tasks()
+        assert source.stats["reused"] == 0
+
+
+class TestCreateApp:
+    """Test the directory source in create_app."""
+
+    def test_registers_discovered_tasks(self, task_dir, monkeypatch):
+        """Test discovered tasks are registered and callable."""
+        monkeypatch.syspath_prepend(str(task_dir.parent))
+        cfg = build_config(
+            {
+                "celery": {
+                    "broker_url": "memory://",
+                    "result_backend": "cache+memory://",
+                },
+                "tasks": {
+                    "source": "directory",
+                    "directories": [{"path": str(task_dir), "pattern": "*_tasks.py"}],
+                    "discovery_index": "",
+                },
+            }
+        )
+        wrapper = create_app(cfg)
+        assert "jobs.math_tasks.add" in wrapper.list_tasks()
+        assert "jobs.math_tasks.disabled" not in wrapper.list_tasks()
+        assert wrapper.adapter.execute("jobs.math_tasks.add", 2, 3) == 5
@@ -0,0 +1,229 @@
+"""Tests for the execution history store."""
+
+import multiprocessing
+import time
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+from celery import Celery
+
+from monitoring import (
+    ExecutionRecord,
+    HistoryRecorder,
+    HistoryStore,
+    HistoryWriter,
+    install_history,
+)
+from monitoring.history import PAYLOAD_SIZE_KEY, percentile
+
+NOW = 1_700_000_000.0
+
+
+def records(task, runtimes, at=NOW, outcome="SUCCESS", **extra):
+    return [
+        ExecutionRecord(task, at - i, runtime, outcome, **extra)
+        for i, runtime in enumerate(runtimes)
+    ]
+
+
+def record_in_child(path, count):
+    writer = HistoryWriter(path, flush_interval=0.01)
+    for i in range(count):
+        writer.record(ExecutionRecord("tasks.child", time.time(), i / 1000, "SUCCESS"))
+    writer.close()
+
+
+class TestStore:
+    """Test writing and querying records."""
+
+    def test_percentiles(self, tmp_path):
+        """Test exact percentiles per task within the window."""
+        store = HistoryStore(str(tmp_path / "history.sqlite3"))
+        store.write(records("tasks.add", [i / 100 for i in range(1, 101)]))
+        store.write(records("tasks.slow", [5.0, 7.0], outcome="FAILURE"))
+        # Outside a one-hour window
+        store.write(records("tasks.add", [99.0], at=NOW - 7200))
+
+        stats = store.percentiles(window=3600, now=NOW)
+        assert sorted(stats) == ["tasks.add", "tasks.slow"]
+        add = stats["tasks.add"]
+        assert add.count == 100 and add.max == 1.0
+        assert add[0.5] == pytest.approx(0.505)
+        assert add[0.99] == pytest.approx(0.9901)
+        day = store.percentiles("tasks.add", window=86400, now=NOW)
+        assert day["tasks.add"].max == 99.0
+        assert store.percentiles(outcome="FAILURE", now=NOW).keys() == {"tasks.slow"}
+        assert store.tasks() == ["tasks.add", "tasks.slow"]
+        assert "tasks.slow" in store.report(now=NOW)
+        with pytest.raises(ValueError):
+            store.percentiles(metric="task")
+
+    def test_optional_metrics(self, tmp_path):
+        """Test records without a metric are left out of its percentiles."""
+        store = HistoryStore(str(tmp_path / "history.sqlite3"))
+        store.write(records("t", [1.0, 1.0], queue_wait=0.5, payload_size=100))
+        store.write(records("t", [1.0]))
+        stats = store.percentiles(metric="queue_wait", now=NOW)["t"]
+        assert (stats.count, stats[0.5]) == (2, 0.5)
+        assert store.percentiles(metric="rss_delta", now=NOW) == {}
+
+    def test_percentile(self):
+        """Test interpolation between ranks."""
+        assert percentile([1, 2, 3, 4], 0.5) == 2.5
+        assert percentile([7], 0.999) == 7
+        with pytest.raises(ValueError):
+            percentile([], 0.5)
+
+
+class TestCompaction:
+    """Test retention and hourly rollups."""
+
+    def test_compact(self, tmp_path):
+        """Test old records fold into rollups that later expire."""
+        store = HistoryStore(str(tmp_path / "history.sqlite3"))
+        hour = NOW - NOW % 3600
+        old = hour - 10 * 86400
+        store.write(records("t", [0.02] * 90 + [4.0] * 10, at=old + 200))
+        store.write(records("t", [0.02] * 5, at=old + 300, outcome="FAILURE"))
+        store.write(records("t", [0.02] * 3, at=hour))
+
+        month = 30 * 86400
+        result = store.compact(raw_retention=86400, rollup_retention=month, now=NOW)
+        assert result == {"compacted": 105, "expired": 0}
+        assert store.count("t") == 3
+        (rollup,) = store.rollups("t")
+        assert rollup.hour == old
+        assert (rollup.count, rollup.failures, rollup.runtime_max) == (105, 5, 4.0)
+        assert rollup.runtime_quantiles[0.5] == 0.025
+        assert rollup.runtime_quantiles[0.99] == 4.0
+
+        # Records arriving late for the same hour merge into it
+        store.write(records("t", [0.02], at=old + 100))
+        store.compact(raw_retention=86400, rollup_retention=month, now=NOW)
+        assert store.rollups("t")[0].count == 106
+
+        result = store.compact(raw_retention=86400, rollup_retention=86400, now=NOW)
+        assert result["expired"] == 1
+        assert store.rollups() == []
+
+
+class TestWriter:
+    """Test the write-behind buffer."""
+
+    def test_batches(self, tmp_path):
+        """Test records reach the database in batches, off the caller."""
+        path = str(tmp_path / "history.sqlite3")
+        writer = HistoryWriter(path, batch_size=50, flush_interval=60)
+        try:
+            for record in records("t", [0.1] * 49):
+                writer.record(record)
+            time.sleep(0.05)
+            assert HistoryStore(path).count() == 0
+            writer.record(records("t", [0.1])[0])
+            deadline = time.monotonic() + 5
+            while HistoryStore(path).count() < 50:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+        finally:
+            writer.close()
+        assert writer.written == 50
+
+    def test_full_buffer_drops_oldest(self, tmp_path):
+        """Test a stalled database never blocks recording."""
+        writer = HistoryWriter(
+            str(tmp_path / "history.sqlite3"), flush_interval=60, max_pending=10
+        )
+        try:
+            for record in records("t", range(25)):
+                writer.record(record)
+            assert writer.dropped == 15
+            assert writer.flush() == 10
+            assert writer.store.percentiles(now=NOW)["t"].max == 24
+        finally:
+            writer.close()
+
+    def test_record_while_flushing(self, tmp_path):
+        """Test a full buffer drained right after the check keeps the record."""
+
+        class DrainedAfterCheck(deque):
+            # The writer thread empties the buffer once its length was read
+            drained = False
+
+            def __len__(self):
+                length = super().__len__()
+                if not self.drained:
+                    self.drained = True
+                    self.clear()
+                return length
+
+        writer = HistoryWriter(
+            str(tmp_path / "history.sqlite3"), flush_interval=60, max_pending=1
+        )
+        try:
+            first, second = records("t", [0.1, 0.2])
+            writer.record(first)
+            writer._pending = DrainedAfterCheck(writer._pending, maxlen=1)
+            writer.record(second)
+            assert list(writer._pending) == [second]
+        finally:
+            writer.close()
+
+    def test_processes_share_database(self, tmp_path):
+        """Test forked children write to one file concurrently."""
+        path = str(tmp_path / "history.sqlite3")
+        HistoryStore(path).close()
+        ctx = multiprocessing.get_context("fork")
+        children = [
+            ctx.Process(target=record_in_child, args=(path, 500)) for _ in range(4)
+        ]
+        for child in children:
+            child.start()
+        for child in children:
+            child.join(30)
+            assert child.exitcode == 0
+        assert HistoryStore(path).count("tasks.child") == 2000
+
+
+class TestRecorder:
+    """Test records built from task signals."""
+
+    def test_task_execution(self, tmp_path):
+        """Test an executed task is recorded with its outcome."""
+        app = Celery("history", broker="memory://", backend="cache+memory://")
+
+        @app.task(name="tasks.square", shared=False)
+        def square(x):
+            return x * x
+
+        @app.task(name="tasks.broken", shared=False)
+        def broken():
+            raise RuntimeError("boom")
+
+        path = str(tmp_path / "history.sqlite3")
+        recorder = install_history(app, path, flush_interval=60)
+        try:
+            for i in range(3):
+                square.apply(args=(i,))
+            broken.apply()
+            recorder.writer.flush()
+        finally:
+            recorder.disconnect()
+            recorder.writer.close()
+
+        store = HistoryStore(path)
+        assert store.count("tasks.square") == 3
+        failed = store.percentiles(outcome="FAILURE")
+        assert failed["tasks.broken"].count == 1
+        (row,) = store.conn.execute(
+            "SELECT rss_delta, queue_wait FROM executions WHERE task = ?",
+            ("tasks.broken",),
+        ).fetchall()
+        assert isinstance(row[0], int)
+
+    def test_payload_size(self):
+        """Test the consumer stamps the body size for the pool process."""
+        recorder = HistoryRecorder(HistoryWriter())
+        request = SimpleNamespace(body=b"x" * 123, request_dict={})
+        recorder.on_received(request=request)
+        assert request.request_dict[PAYLOAD_SIZE_KEY] == 123
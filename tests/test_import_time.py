@@ -0,0 +1,49 @@
+"""Import-time budget for the app and task client."""
+
+from pathlib import Path
+
+from importtime import best_import_profile, import_profile
+
+ROOT = Path(__file__).parent.parent
+PYTHONPATH = (ROOT / "src", ROOT)
+
+# Generous enough for slow CI machines; each import needs well under 100ms
+IMPORT_BUDGET_MS = 150
+
+HEAVY_MODULES = ("sqlalchemy", "celery", "kombu", "hydra", "omegaconf")
+
+
+def best_of(statement: str):
+    return best_import_profile(statement, PYTHONPATH, cwd=ROOT)
+
+
+def profile(statement: str):
+    return import_profile(statement, PYTHONPATH, cwd=ROOT)
+
+
+class TestImportTime:
+    """Test startup import cost."""
+
+    def test_task_management_budget(self):
+        """Test ``import task_management`` stays light."""
+        elapsed_ms, modules = best_of("import task_management")
+        assert elapsed_ms < IMPORT_BUDGET_MS, f"import took {elapsed_ms:.1f}ms"
+        assert not {m.split(".")[0] for m in modules} & set(HEAVY_MODULES)
+
+    def test_client_startup_budget(self):
+        """Test creating a TaskClient does not build the app."""
+        elapsed_ms, modules = best_of(
+            "from task_client import TaskClient\nTaskClient()"
+        )
+        assert elapsed_ms < IMPORT_BUDGET_MS, f"startup took {elapsed_ms:.1f}ms"
+        assert not {m.split(".")[0] for m in modules} & set(HEAVY_MODULES)
+
+    def test_no_import_side_effects(self):
+        """Test importing main and config neither builds the app nor loads Hydra."""
+        _, modules = profile("import main\nimport config")
+        assert not {m.split(".")[0] for m in modules} & set(HEAVY_MODULES)
+
+    def test_main_app_is_lazy(self):
+        """Test ``main.app`` still resolves for ``celery -A src.main``."""
+        _, modules = profile("import main\nassert main.app is main.get_app()")
+        assert "celery" in modules
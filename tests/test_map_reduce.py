@@ -0,0 +1,179 @@
+"""Tests for the chunked map-reduce helper."""
+
+import time
+from collections import Counter
+from dataclasses import replace
+
+import pytest
+from celery.contrib.testing.worker import start_worker
+
+from app import create_app
+from config import Config
+from task_client import TaskClient
+from workflows import MapReduce, MapReduceError, map_reduce
+
+WORDS = ["alpha", "beta", "gamma", "delta", "epsilon"]
+
+
+@pytest.fixture(scope="module")
+def worker_app():
+    """App with the example map/reduce tasks and a running worker."""
+    cfg = Config()
+    task_list = tuple(
+        {
+            "name": f"tasks.{name}",
+            "module_path": "tasks.example_tasks",
+            "function_name": name,
+        }
+        for name in ("word_count", "merge_counts")
+    )
+    cfg = replace(
+        cfg,
+        celery=replace(
+            cfg.celery, broker_url="memory://", result_backend="cache+memory://"
+        ),
+        tasks=replace(cfg.tasks, source="config", task_list=task_list),
+        # Prefetch more than the jobs keep in flight: the test worker's loop
+        # only notices freed prefetch slots every two seconds
+        worker=replace(
+            cfg.worker, preload=False, track_memory=False, prefetch_multiplier=16
+        ),
+    )
+    wrapper = create_app(cfg)
+    app = wrapper.app
+    # The in-memory transport otherwise polls its queues once a second
+    app.conf.broker_transport_options = {"polling_interval": 0.01}
+
+    @app.task(name="tasks.fail_on", shared=False)
+    def fail_on(values):
+        if "boom" in values:
+            raise ValueError("boom")
+        return len(values)
+
+    @app.task(name="tasks.slow", shared=False)
+    def slow(values):
+        time.sleep(0.5)
+        return len(values)
+
+    with start_worker(
+        app, pool="threads", concurrency=4, perform_ping_check=False
+    ):
+        yield wrapper
+
+
+def lines(n):
+    for i in range(n):
+        yield " ".join(WORDS[(i + j) % len(WORDS)] for j in range(i % 4 + 1))
+
+
+class TestMapReduce:
+    """Test results, bounds and progress through a worker."""
+
+    def test_word_count(self, worker_app):
+        """Test the tree reduction matches a local count."""
+        updates = []
+        job = MapReduce(
+            worker_app.app,
+            "tasks.word_count",
+            "tasks.merge_counts",
+            max_in_flight=4,
+            fan_in=3,
+            progress=lambda p: updates.append(replace(p)),
+            poll=0.01,
+        )
+        result = job.run(lines(600), chunk_size=20)
+
+        expected = Counter(word for line in lines(600) for word in line.split())
+        assert result == dict(expected)
+        progress = job.progress
+        assert progress.items == 600
+        assert progress.maps == progress.maps_done == 30
+        # 30 partials combined three at a time, then the partial results
+        assert progress.reduces == progress.reduces_done >= 14
+        assert progress.fraction == 1.0
+        assert max(p.in_flight for p in updates) <= 4
+        assert updates[-1].in_flight == 0
+
+    def test_input_read_lazily(self, worker_app):
+        """Test input is only read as slots free up."""
+        pulled = []
+        ahead = []
+
+        def source():
+            for i, line in enumerate(lines(400)):
+                pulled.append(i)
+                yield line
+
+        def track(progress):
+            ahead.append(len(pulled) - progress.maps_done * 10)
+
+        map_reduce(
+            worker_app.app,
+            "tasks.word_count",
+            "tasks.merge_counts",
+            source(),
+            chunk_size=10,
+            max_in_flight=3,
+            progress=track,
+            poll=0.01,
+        )
+        assert len(pulled) == 400
+        # Never more than the in-flight chunks plus the one being built
+        assert max(ahead) <= 4 * 10
+
+    def test_small_inputs(self, worker_app):
+        """Test empty input and a single chunk."""
+        app = worker_app.app
+        assert map_reduce(app, "tasks.word_count", "tasks.merge_counts", []) is None
+        result = map_reduce(
+            app, "tasks.word_count", "tasks.merge_counts", ["a b a"], poll=0.01
+        )
+        assert result == {"a": 2, "b": 1}
+
+    def test_failure(self, worker_app):
+        """Test a failed task stops the job."""
+        values = ["x"] * 20 + ["boom"] + ["x"] * 20
+        with pytest.raises(MapReduceError, match="boom"):
+            map_reduce(
+                worker_app.app,
+                "tasks.fail_on",
+                "tasks.merge_counts",
+                values,
+                chunk_size=5,
+                poll=0.01,
+            )
+
+    def test_abandoned_tasks_revoked(self, worker_app, monkeypatch):
+        """Test outstanding tasks are revoked when the job gives up."""
+        app = worker_app.app
+        revoked = []
+        monkeypatch.setattr(app.control, "revoke", revoked.extend)
+        job = MapReduce(
+            app, "tasks.slow", "tasks.merge_counts", poll=0.01, timeout=0.05
+        )
+        with pytest.raises(TimeoutError):
+            job.run(["x"] * 6, chunk_size=1)
+        assert len(revoked) == 6
+
+        revoked.clear()
+        values = ["boom"] + ["x"] * 20
+        with pytest.raises(MapReduceError, match="boom"):
+            map_reduce(
+                app, "tasks.fail_on", "tasks.merge_counts", values, chunk_size=1
+            )
+        # Only tasks still outstanding when the failure was seen
+        assert 0 < len(revoked) <= 7
+
+    def test_client_and_adapter(self, worker_app):
+        """Test the client and adapter entry points."""
+        client = TaskClient(worker_app.app)
+        assert client.map_reduce(
+            "tasks.word_count", "tasks.merge_counts", ["a", "a b"], chunk_size=1
+        ) == {"a": 2, "b": 1}
+        with pytest.raises(ValueError):
+            client.map_reduce("tasks.missing", "tasks.merge_counts", [])
+        with pytest.raises(ValueError):
+            worker_app.adapter.map_reduce("tasks.word_count", "tasks.missing", [])
+        assert worker_app.adapter.map_reduce(
+            "tasks.word_count", "tasks.merge_counts", ["c"]
+        ) == {"c": 1}
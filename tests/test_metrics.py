@@ -0,0 +1,355 @@
+"""Tests for worker task metrics."""
+
+import json
+import socket
+import subprocess
+import sys
+import textwrap
+import time
+import urllib.request
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+
+from monitoring import (
+    MetricsRegistry,
+    MetricsServer,
+    SharedRegistry,
+    TaskInstrumentation,
+)
+from monitoring.instrumentation import PORT_ENV, PUBLISHED_AT_HEADER, install_metrics
+
+ROOT = Path(__file__).parent.parent
+
+
+class FakeRequest(dict):
+    """Stand-in for celery's task request context."""
+
+
+def make_task(name="tasks.add", published_at=None):
+    request = FakeRequest()
+    if published_at is not None:
+        request[PUBLISHED_AT_HEADER] = published_at
+    return SimpleNamespace(name=name, request=request)
+
+
+class TestHistogram:
+    """Test histogram metrics."""
+
+    def test_observe_buckets(self):
+        """Test observations land in cumulative buckets."""
+        registry = MetricsRegistry()
+        family = registry.histogram("h", "help", ["task"], buckets=(1, 5))
+        hist = family.labels("t")
+        for value in (0.5, 1, 3, 10):
+            hist.observe(value)
+        assert hist.cumulative() == [2, 3, 4]
+        assert hist.count == 4
+        assert hist.sum == 14.5
+
+    def test_render_prometheus(self):
+        """Test Prometheus text exposition output."""
+        registry = MetricsRegistry()
+        registry.histogram("h", "A histogram.", ["task"], buckets=(1,)).labels(
+            "t"
+        ).observe(0.5)
+        registry.counter("c_total", "A counter.", ["task"]).labels('a"b').inc()
+        text = registry.render()
+        assert "# TYPE h histogram" in text
+        assert 'h_bucket{task="t",le="1"} 1' in text
+        assert 'h_bucket{task="t",le="+Inf"} 1' in text
+        assert 'h_count{task="t"} 1' in text
+        assert 'c_total{task="a\\"b"} 1' in text
+
+    def test_gauge(self):
+        """Test gauges go up and down and render their value."""
+        registry = MetricsRegistry()
+        gauge = registry.gauge("g", "A gauge.", ["pool"]).labels("p")
+        gauge.set(10)
+        gauge.inc(5)
+        gauge.dec(2)
+        assert gauge.value == 13
+        text = registry.render()
+        assert "# TYPE g gauge" in text
+        assert 'g{pool="p"} 13' in text
+
+    def test_kind_conflict(self):
+        """Test re-registering a name with another kind fails."""
+        registry = MetricsRegistry()
+        registry.counter("m", "help")
+        with pytest.raises(ValueError):
+            registry.histogram("m", "help")
+
+
+class TestTaskInstrumentation:
+    """Test signal handlers."""
+
+    def test_task_lifecycle(self):
+        """Test queue wait, runtime and outcome are recorded."""
+        registry = MetricsRegistry()
+        inst = TaskInstrumentation(registry)
+        headers = {}
+        inst.on_before_publish(sender="tasks.add", headers=headers)
+        assert PUBLISHED_AT_HEADER in headers
+
+        task = make_task(published_at=headers[PUBLISHED_AT_HEADER] - 0.2)
+        inst.on_received(request=SimpleNamespace(name="tasks.add", body=b"x" * 100))
+        inst.on_prerun(task_id="1", task=task)
+        inst.on_postrun(task_id="1", task=task, state="SUCCESS")
+
+        assert inst.queue_wait.labels("tasks.add").sum >= 0.2
+        assert inst.runtime.labels("tasks.add").count == 1
+        assert inst.payload.labels("tasks.add").sum == 100
+        assert inst.outcomes.labels("tasks.add", "SUCCESS").value == 1
+
+    def test_failure_and_retry(self):
+        """Test failure and retry counters."""
+        registry = MetricsRegistry()
+        inst = TaskInstrumentation(registry)
+        task = make_task()
+        inst.on_failure(sender=task, exception=TimeoutError())
+        inst.on_retry(sender=task)
+        assert inst.failures.labels("tasks.add", "TimeoutError").value == 1
+        assert inst.retries.labels("tasks.add").value == 1
+
+    def test_overhead_per_task(self):
+        """Benchmark: full handler chain stays in the microsecond range."""
+        inst = TaskInstrumentation(MetricsRegistry())
+        task = make_task(published_at=time.time())
+        request = SimpleNamespace(name="tasks.add", body=b"x" * 256)
+        iterations = 20000
+
+        start = time.perf_counter()
+        for i in range(iterations):
+            headers = {}
+            inst.on_before_publish(sender="tasks.add", headers=headers)
+            inst.on_received(request=request)
+            inst.on_prerun(task_id=i, task=task)
+            inst.on_postrun(task_id=i, task=task, state="SUCCESS")
+        per_task = (time.perf_counter() - start) / iterations
+
+        assert per_task < 50e-6, f"instrumentation costs {per_task * 1e6:.1f}µs/task"
+
+    def test_in_memory_worker(self):
+        """Test signals fire end-to-end through an in-memory broker."""
+        app = Celery("metrics_test", broker="memory://", backend="cache+memory://")
+
+        @app.task(name="tasks.add", shared=False)
+        def add(x, y):
+            return x + y
+
+        inst = TaskInstrumentation(MetricsRegistry())
+        inst.connect()
+        try:
+            with start_worker(app, pool="solo", perform_ping_check=False):
+                result = app.send_task("tasks.add", args=(2, 3))
+                assert result.get(timeout=10, disable_sync_subtasks=False) == 5
+        finally:
+            inst.disconnect()
+        assert inst.queue_wait.labels("tasks.add").count == 1
+        assert inst.payload.labels("tasks.add").count == 1
+        assert inst.outcomes.labels("tasks.add", "SUCCESS").value == 1
+
+
+class TestMetricsServer:
+    """Test the HTTP exporter."""
+
+    def test_serves_metrics(self):
+        """Test GET /metrics returns the registry rendering."""
+        registry = MetricsRegistry()
+        registry.counter("up_total", "Up.").labels().inc()
+        server = MetricsServer(registry, host="127.0.0.1", port=0)
+        server.start()
+        try:
+            url = f"http://127.0.0.1:{server.port}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as resp:
+                body = resp.read().decode()
+                assert resp.headers["Content-Type"].startswith("text/plain")
+            assert "up_total 1" in body
+        finally:
+            server.stop()
+
+
+class TestInstallMetrics:
+    """Test the endpoint started when the worker is ready."""
+
+    def test_port_from_environment(self, monkeypatch):
+        """Test each supervised worker binds the port it is given."""
+        from celery import signals
+
+        port = free_port()
+        monkeypatch.setenv(PORT_ENV, str(port))
+        registry = MetricsRegistry()
+        registry.counter("up_total", "Up.").labels().inc()
+        app = Celery("metrics_port", broker="memory://")
+        inst = install_metrics(app, host="127.0.0.1", port=1, registry=registry)
+        try:
+            signals.worker_ready.send(sender=None)
+            url = f"http://127.0.0.1:{port}/metrics"
+            with urllib.request.urlopen(url, timeout=5) as resp:
+                assert "up_total 1" in resp.read().decode()
+        finally:
+            signals.worker_shutdown.send(sender=None)
+            inst.disconnect()
+            registry.shared.disconnect()
+
+
+def child_registry(count, rss):
+    registry = MetricsRegistry()
+    registry.counter("runs_total", "Runs.", ["task"]).labels("t").inc(count)
+    registry.histogram("runtime", "Runtime.", ["task"], buckets=(1,)).labels(
+        "t"
+    ).observe(0.5)
+    registry.gauge("rss", "RSS.").labels().set(rss)
+    registry.gauge("peak", "Peak.", multiprocess="peak").labels().set(rss)
+    return registry.snapshot()
+
+
+class TestSharedRegistry:
+    """Test values of pool children merged by the worker process."""
+
+    def test_merge_children(self, tmp_path):
+        """Test counters add up, gauges combine and exited children stay."""
+        registry = MetricsRegistry()
+        registry.counter("runs_total", "Runs.", ["task"]).labels("t").inc()
+        shared = SharedRegistry(registry, str(tmp_path))
+        shared.on_worker_init()
+
+        live = subprocess.Popen(["sleep", "60"])
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        try:
+            (tmp_path / f"{live.pid}.json").write_text(
+                json.dumps(child_registry(2, 100))
+            )
+            (tmp_path / f"{exited.pid}.json").write_text(
+                json.dumps(child_registry(4, 300))
+            )
+            for _ in range(2):
+                merged = shared.collect()
+                runs = merged.get("runs_total").labels("t")
+                assert runs.value == 7
+                assert merged.get("runtime").labels("t").count == 2
+                # Gauges of exited children only count as peaks
+                assert merged.get("rss").labels().value == 100
+                assert merged.get("peak").labels().value == 300
+            assert not (tmp_path / f"{exited.pid}.json").exists()
+            assert (tmp_path / "archive.json").exists()
+        finally:
+            live.kill()
+            live.wait()
+        assert shared.collect().get("runs_total").labels("t").value == 7
+
+    def test_child_snapshot(self, tmp_path):
+        """Test a child drops inherited values and writes its own."""
+        registry = MetricsRegistry()
+        counter = registry.counter("runs_total", "Runs.")
+        counter.labels().inc(5)
+        shared = SharedRegistry(registry, str(tmp_path), interval=60)
+        shared.on_worker_init()
+        assert shared.collect() is not registry
+        # Pretend to be a pool child of another worker process
+        shared.owner = -1
+        shared.on_process_init()
+        counter.labels().inc()
+        shared.on_process_shutdown()
+        snapshot = json.loads(next(tmp_path.glob("[0-9]*.json")).read_text())
+        assert snapshot["runs_total"]["samples"] == [[[], 1.0]]
+        assert shared.collect() is registry
+
+
+PREFORK_WORKER = """
+import sys
+from dataclasses import replace
+sys.path.insert(0, {src!r})
+from app import create_app
+from config import Config
+
+cfg = Config()
+cfg = replace(
+    cfg,
+    celery=replace(
+        cfg.celery, broker_url="filesystem://", result_backend={backend!r}
+    ),
+    worker=replace(cfg.worker, pool="prefork", preload=False),
+    metrics=replace(cfg.metrics, enabled=True, host="127.0.0.1", port={port}),
+    tasks=replace(cfg.tasks, source="config"),
+)
+app = create_app(cfg).app
+app.conf.broker_transport_options = {{
+    "data_folder_in": {queue!r}, "data_folder_out": {queue!r},
+    "control_folder": {control!r}, "polling_interval": 0.05,
+}}
+
+@app.task(name="tasks.square", shared=False)
+def square(x):
+    return x * x
+
+if __name__ == "__main__":
+    app.worker_main([
+        "worker", "--pool=prefork", "--concurrency=2", "--loglevel=warning",
+        "--without-heartbeat", "--without-mingle", "--without-gossip",
+    ])
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestPreforkWorker:
+    """Test the endpoint of a prefork worker serves its children's metrics."""
+
+    def test_scrape(self, tmp_path):
+        """Test runtime and outcomes recorded in pool children are served."""
+        port = free_port()
+        queue = tmp_path / "queue"
+        queue.mkdir()
+        (tmp_path / "results").mkdir()
+        script = tmp_path / "prefork_worker.py"
+        script.write_text(
+            textwrap.dedent(PREFORK_WORKER).format(
+                src=str(ROOT / "src"),
+                backend=f"file://{tmp_path / 'results'}",
+                port=port,
+                queue=str(queue),
+                control=str(tmp_path / "control"),
+            )
+        )
+        worker = subprocess.Popen(
+            [sys.executable, str(script)],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        expected = (
+            'celery_task_outcomes_total{task="tasks.square",outcome="SUCCESS"} 4'
+        )
+        body = ""
+        try:
+            sys.path.insert(0, str(tmp_path))
+            import prefork_worker
+
+            results = [prefork_worker.square.delay(i) for i in range(4)]
+            assert [r.get(timeout=60) for r in results] == [0, 1, 4, 9]
+            deadline = time.monotonic() + 30
+            while expected not in body and time.monotonic() < deadline:
+                time.sleep(0.2)
+                url = f"http://127.0.0.1:{port}/metrics"
+                with urllib.request.urlopen(url, timeout=5) as resp:
+                    body = resp.read().decode()
+        finally:
+            sys.path.remove(str(tmp_path))
+            sys.modules.pop("prefork_worker", None)
+            worker.terminate()
+            _, stderr = worker.communicate(timeout=30)
+
+        assert expected in body, stderr
+        assert 'celery_task_runtime_seconds_count{task="tasks.square"} 4' in body
+        assert 'celery_task_payload_bytes_count{task="tasks.square"} 4' in body
@@ -0,0 +1,210 @@
+"""Tests for the task sampling profiler."""
+
+import pstats
+import timeit
+from dataclasses import replace
+from itertools import cycle
+
+import pytest
+
+from app import create_app
+from config import Config
+from monitoring.profiler import (
+    ProfileConfig,
+    TaskProfiler,
+    collapse_stats,
+    profile_config,
+)
+from task_management import TaskDefinition
+
+_retained = []
+
+
+def leaf(n):
+    return sum(i * i for i in range(n))
+
+
+def middle(n):
+    return leaf(n) + leaf(n // 2)
+
+
+def work(n):
+    _retained.append([0] * 10000)
+    return middle(n) + leaf(n)
+
+
+def read_folded(path):
+    stacks = {}
+    for line in path.read_text().splitlines():
+        stack, value = line.rsplit(" ", 1)
+        stacks[stack] = int(value)
+    return stacks
+
+
+class TestProfileConfig:
+    """Test parsing the profile setting."""
+
+    def test_values(self):
+        """Test rates, booleans and mappings."""
+        assert ProfileConfig.from_value(None) is None
+        assert ProfileConfig.from_value(False) is None
+        assert ProfileConfig.from_value(0) is None
+        assert ProfileConfig.from_value(True) == ProfileConfig()
+        assert ProfileConfig.from_value(0.05) == ProfileConfig(rate=0.05)
+        mapping = {"rate": 1, "memory": True}
+        assert ProfileConfig.from_value(mapping) == ProfileConfig(1.0, memory=True)
+
+    def test_invalid(self):
+        """Test invalid settings are rejected."""
+        with pytest.raises(ValueError):
+            ProfileConfig.from_value(1.5)
+        with pytest.raises(ValueError):
+            ProfileConfig.from_value({"sample": 0.1})
+        with pytest.raises(ValueError):
+            ProfileConfig.from_value("often")
+
+    def test_from_task_definition(self):
+        """Test metadata takes precedence over options."""
+        task_def = TaskDefinition(
+            name="t",
+            module_path="m",
+            function_name="f",
+            options={"profile": 0.5},
+            metadata={"profile": 0.25},
+        )
+        assert profile_config(task_def).rate == 0.25
+        task_def.metadata = {}
+        assert profile_config(task_def).rate == 0.5
+
+
+class TestTaskProfiler:
+    """Test sampling and output."""
+
+    def test_sampling_rate(self, tmp_path):
+        """Test only calls below the rate are profiled."""
+        rolls = cycle([0.05, 0.5, 0.9, 0.2])
+        profiler = TaskProfiler(
+            "tasks.work",
+            str(tmp_path),
+            ProfileConfig(rate=0.25),
+            rng=lambda: next(rolls),
+        )
+        wrapped = profiler.wrap(work)
+        assert [wrapped(100) for _ in range(8)] == [work(100)] * 8
+        assert profiler.samples == 4
+        _retained.clear()
+
+    def test_writes_profiles(self, tmp_path):
+        """Test pstats and collapsed stacks are aggregated across samples."""
+        profiler = TaskProfiler("tasks.work", str(tmp_path), ProfileConfig(rate=1.0))
+        wrapped = profiler.wrap(work)
+        for _ in range(3):
+            wrapped(5000)
+        _retained.clear()
+
+        files = sorted(p.name for p in tmp_path.iterdir())
+        base = f"tasks.work.{profiler._pid}"
+        assert files == [f"{base}.folded", f"{base}.pstats"]
+
+        stats = pstats.Stats(str(tmp_path / f"{base}.pstats"))
+        calls = {func[2]: value[1] for func, value in stats.stats.items()}
+        assert calls["work"] == 3
+        assert calls["leaf"] == 9
+
+        stacks = read_folded(tmp_path / f"{base}.folded")
+        nested = [s for s in stacks if s.startswith("work (") and "middle (" in s]
+        assert nested
+        assert all(value > 0 for value in stacks.values())
+        assert not any("_lsprof" in s for s in stacks)
+
+    def test_memory_profile(self, tmp_path):
+        """Test allocations still alive after the call are recorded."""
+        profiler = TaskProfiler(
+            "tasks.work", str(tmp_path), ProfileConfig(rate=1.0, memory=True)
+        )
+        profiler.wrap(work)(10)
+        _retained.clear()
+
+        stacks = read_folded(tmp_path / f"tasks.work.{profiler._pid}.mem.folded")
+        assert max(stacks.values()) >= 10000 * 8
+        assert all("monitoring/profiler.py" not in s for s in stacks)
+
+    def test_exceptions_propagate(self, tmp_path):
+        """Test a failing sampled call still raises and is recorded."""
+        profiler = TaskProfiler("tasks.fail", str(tmp_path), ProfileConfig(rate=1.0))
+
+        def fail():
+            raise KeyError("x")
+
+        with pytest.raises(KeyError):
+            profiler.wrap(fail)()
+        assert profiler.samples == 1
+
+    def test_unsampled_overhead(self, tmp_path):
+        """Test unsampled calls cost well under a microsecond extra."""
+        wrapped = TaskProfiler(
+            "tasks.len", str(tmp_path), ProfileConfig(rate=1e-9)
+        ).wrap(len)
+        number = 100000
+        raw = min(timeit.repeat(lambda: len("x"), number=number, repeat=3))
+        sampled = min(timeit.repeat(lambda: wrapped("x"), number=number, repeat=3))
+        assert (sampled - raw) / number < 2e-6
+        assert not list(tmp_path.iterdir())
+
+
+class TestCollapseStats:
+    """Test turning a call graph into collapsed stacks."""
+
+    def test_splits_shared_callee(self):
+        """Test a callee's own time is split between its callers."""
+        a = ("m.py", 1, "a")
+        b = ("m.py", 2, "b")
+        c = ("m.py", 3, "c")
+        stats = {
+            a: (1, 1, 1.0, 10.0, {}),
+            b: (1, 1, 1.0, 4.0, {a: (1, 1, 1.0, 4.0)}),
+            # c: 8s total, 3s of it under b and 5s directly under a
+            c: (2, 2, 8.0, 8.0, {a: (1, 1, 5.0, 5.0), b: (1, 1, 3.0, 3.0)}),
+        }
+        stacks = collapse_stats(stats)
+        assert stacks["a (m.py:1)"] == 1.0
+        assert stacks["a (m.py:1);b (m.py:2)"] == 1.0
+        assert stacks["a (m.py:1);c (m.py:3)"] == 5.0
+        assert stacks["a (m.py:1);b (m.py:2);c (m.py:3)"] == 3.0
+
+
+class TestAdapterIntegration:
+    """Test tasks opt in through their definition."""
+
+    def test_profiled_task(self, tmp_path):
+        """Test the adapter wraps tasks with a profile setting only."""
+        cfg = Config()
+        task_list = (
+            {
+                "name": "tasks.profiled",
+                "module_path": "tasks.example_tasks",
+                "function_name": "add",
+                "options": {"profile": 1.0, "max_retries": 1},
+            },
+            {
+                "name": "tasks.plain",
+                "module_path": "tasks.example_tasks",
+                "function_name": "multiply",
+            },
+        )
+        cfg = replace(
+            cfg,
+            celery=replace(cfg.celery, broker_url="memory://"),
+            tasks=replace(cfg.tasks, source="config", task_list=task_list),
+            profiling=replace(cfg.profiling, directory=str(tmp_path)),
+        )
+        wrapper = create_app(cfg)
+        adapter = wrapper.adapter
+
+        assert adapter.execute("tasks.profiled", 2, 3) == 5
+        assert adapter.execute("tasks.plain", 2, 3) == 6
+        assert adapter.get_profiler("tasks.plain") is None
+        assert adapter.get_profiler("tasks.profiled").samples == 1
+        assert wrapper.app.tasks["tasks.profiled"].max_retries == 1
+        assert not hasattr(wrapper.app.tasks["tasks.profiled"], "profile")
+        assert any(p.suffix == ".folded" for p in tmp_path.iterdir())
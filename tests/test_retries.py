@@ -0,0 +1,203 @@
+"""Tests for retry policies and task option compilation."""
+
+import socket
+
+import pytest
+from celery import Celery
+
+from adapters import CeleryTaskAdapter
+from retries import (
+    RetryBudget,
+    RetryPolicy,
+    resolve_exception,
+    resolve_exceptions,
+    retry_policy,
+)
+from task_management import TaskDefinition, TaskRegistry
+
+FAILURES = {"left": 0, "calls": 0}
+
+
+def flaky(value):
+    FAILURES["calls"] += 1
+    if FAILURES["left"] > 0:
+        FAILURES["left"] -= 1
+        raise ConnectionError("downstream unavailable")
+    return value
+
+
+def definition(**kwargs):
+    return TaskDefinition(
+        name="tests.flaky", module_path="test_retries", function_name="flaky", **kwargs
+    )
+
+
+def register(task_def, **adapter_options):
+    app = Celery("retries", broker="memory://", backend="cache+memory://")
+    adapter = CeleryTaskAdapter(app, TaskRegistry(), **adapter_options)
+    assert adapter.register_task(task_def)
+    return app.tasks[task_def.name]
+
+
+class TestExceptionNames:
+    """Test exception names resolve to classes."""
+
+    def test_resolve(self):
+        """Test builtin and dotted names, and classes as is."""
+        assert resolve_exception("TimeoutError") is TimeoutError
+        assert resolve_exception("socket.timeout") is socket.timeout
+        assert resolve_exception(KeyError) is KeyError
+        assert resolve_exceptions("OSError") == (OSError,)
+        assert resolve_exceptions(None) == ()
+
+    def test_invalid(self):
+        """Test unknown names and non-exceptions are errors."""
+        for name in ("NoSuchError", "no.such.module.Error", "os.path", "len", 3):
+            with pytest.raises(ValueError):
+                resolve_exception(name)
+
+    def test_celery_autoretry(self):
+        """Test autoretry_for names reach Celery as classes."""
+        task = register(
+            definition(options={"autoretry_for": ["ConnectionError"], "max_retries": 2})
+        )
+        assert task.autoretry_for == (ConnectionError,)
+        assert task.max_retries == 2
+        assert getattr(task, "retry_policy", None) is None
+
+    def test_unresolvable_fails_registration(self):
+        """Test a misspelt exception name fails registration."""
+        app = Celery("retries", broker="memory://")
+        adapter = CeleryTaskAdapter(app, TaskRegistry())
+        task_def = definition(options={"autoretry_for": ["ConectionError"]})
+        assert not adapter.register_task(task_def)
+        assert "tests.flaky" not in adapter.get_registered_tasks()
+
+
+class TestPolicy:
+    """Test backoff, jitter and parsing."""
+
+    def test_full_jitter(self):
+        """Test delays are uniform below a doubling, capped bound."""
+        policy = RetryPolicy(on=(OSError,), backoff=2, max_delay=30)
+        assert [policy.cap(n) for n in range(6)] == [2, 4, 8, 16, 30, 30]
+        assert policy.cap(5000) == 30
+        assert policy.delay(3, rng=lambda: 0.25) == 4
+        delays = [policy.delay(2) for _ in range(200)]
+        assert all(0 <= d < 8 for d in delays)
+        assert len(set(delays)) > 100
+        assert RetryPolicy(on=(OSError,), jitter=False).delay(2) == 4
+
+    def test_named_and_default(self):
+        """Test named policies, the autoretry_for default and overrides."""
+        policies = {"downstream": {"max_retries": 5, "backoff": 2, "budget": 10}}
+        task = definition(metadata={"retry": "downstream"}, options={"max_retries": 1})
+        with pytest.raises(ValueError):
+            retry_policy(task)
+        policy = retry_policy(
+            definition(
+                metadata={"retry": "downstream"},
+                options={"autoretry_for": ["TimeoutError"]},
+            ),
+            policies,
+        )
+        assert policy.on == (TimeoutError,)
+        assert (policy.max_retries, policy.backoff, policy.budget) == (5, 2, 10)
+
+        plain = definition(options={"autoretry_for": "OSError", "max_retries": 1})
+        assert retry_policy(plain, policies) is None
+        policy = retry_policy(plain, policies, default="downstream")
+        assert (policy.on, policy.max_retries) == ((OSError,), 1)
+        assert retry_policy(definition(), policies, default="downstream") is None
+
+    def test_invalid(self):
+        """Test unknown settings and a policy without exceptions."""
+        with pytest.raises(ValueError):
+            RetryPolicy.from_value({"on": ["OSError"], "backof": 1})
+        with pytest.raises(ValueError):
+            RetryPolicy.from_value({"max_retries": 3})
+        with pytest.raises(ValueError):
+            RetryPolicy.from_value({"on": ["OSError"], "window": 0})
+
+
+class TestBudget:
+    """Test the sliding-window retry budget."""
+
+    def test_window(self):
+        """Test retries are refused once spent and allowed as they age out."""
+        now = [0.0]
+        budget = RetryBudget(3, 10, clock=lambda: now[0])
+        assert [budget.acquire() for _ in range(4)] == [True, True, True, False]
+        now[0] = 5
+        assert not budget.acquire()
+        now[0] = 10
+        assert budget.remaining == 3
+        assert budget.acquire()
+        assert budget.denied == 2
+
+
+class TestTaskRetries:
+    """Test tasks registered with a retry policy."""
+
+    def test_retries_then_succeeds(self, monkeypatch):
+        """Test matching failures retry with jittered countdowns."""
+        task = register(
+            definition(
+                metadata={"retry": {"on": ["ConnectionError"], "max_retries": 4}}
+            )
+        )
+        assert task.max_retries == 4
+        countdowns = []
+        retry = task.retry
+
+        def record(*args, **kwargs):
+            countdowns.append(kwargs["countdown"])
+            return retry(*args, **kwargs)
+
+        monkeypatch.setattr(task, "retry", record)
+        FAILURES.update(left=3, calls=0)
+        assert task.apply(args=(7,)).get() == 7
+        assert FAILURES["calls"] == 4
+        assert [c <= 2**n for n, c in enumerate(countdowns)] == [True] * 3
+
+    def test_max_retries_and_exclude(self):
+        """Test the original exception once retries or exclusions apply."""
+        task = register(
+            definition(metadata={"retry": {"on": ["OSError"], "max_retries": 2}})
+        )
+        FAILURES.update(left=5, calls=0)
+        result = task.apply(args=(1,))
+        assert isinstance(result.result, ConnectionError)
+        assert FAILURES["calls"] == 3
+
+        task = register(
+            definition(
+                metadata={"retry": {"on": ["OSError"], "exclude": "ConnectionError"}}
+            )
+        )
+        FAILURES.update(left=5, calls=0)
+        assert isinstance(task.apply(args=(1,)).result, ConnectionError)
+        assert FAILURES["calls"] == 1
+
+    def test_budget_stops_retry_storm(self):
+        """Test failures past the budget are final instead of retried."""
+        task = register(
+            definition(
+                metadata={"retry": "storm"}, options={"autoretry_for": "OSError"}
+            ),
+            retry_policies={"storm": {"max_retries": 10, "budget": 4, "window": 60}},
+        )
+        FAILURES.update(left=100, calls=0)
+        for _ in range(3):
+            task.apply(args=(1,))
+        # Four retries in total, then each call fails on its first attempt
+        assert FAILURES["calls"] == 3 + 4
+        assert task.retry_budget.denied == 3
+
+    def test_direct_call_not_retried(self):
+        """Test calling the task in-process raises straight away."""
+        task = register(definition(metadata={"retry": {"on": "OSError"}}))
+        FAILURES.update(left=1, calls=0)
+        with pytest.raises(ConnectionError):
+            task(1)
+        assert FAILURES["calls"] == 1
@@ -0,0 +1,276 @@
+"""Tests for streaming chunks of generator tasks."""
+
+import threading
+import time
+from dataclasses import replace
+
+import pytest
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+
+from app import create_app
+from config import Config
+from streaming import (
+    FileStreamBackend,
+    RedisStreamBackend,
+    StreamError,
+    StreamOptions,
+    StreamProducer,
+    StreamReader,
+    StreamRestarted,
+    StreamStalled,
+    StreamTimeout,
+    stream_generator,
+)
+from task_client import TaskClient
+
+
+def redis_backend():
+    backend = RedisStreamBackend("redis://localhost:6379/15", prefix="test-stream:")
+    try:
+        backend.client.ping()
+    except Exception:
+        pytest.skip("Redis is not available")
+    return backend
+
+
+@pytest.fixture(params=["file", "redis"])
+def backend(request, tmp_path):
+    if request.param == "file":
+        return FileStreamBackend(str(tmp_path / "streams"))
+    return redis_backend()
+
+
+def numbers(n, fail_at=None):
+    for i in range(n):
+        if i == fail_at:
+            raise RuntimeError("boom")
+        yield {"i": i}
+    return n
+
+
+class TestStreamBackend:
+    """Test the storage contract shared by the backends."""
+
+    def test_append_read_close(self, backend):
+        """Test records come back in order from any offset."""
+        backend.delete("s1")
+        for i in range(5):
+            backend.append("s1", i, {"i": i})
+        backend.close("s1", 5, {"chunks": 5})
+
+        entries = backend.read("s1", 0, count=3)
+        assert [(e.offset, e.data["i"]) for e in entries] == [(0, 0), (1, 1), (2, 2)]
+        rest = backend.read("s1", 3)
+        assert [e.offset for e in rest] == [3, 4, 5]
+        assert rest[-1].end and rest[-1].data == {"chunks": 5}
+        # Going back re-reads
+        assert backend.read("s1", 1, count=1)[0].data == {"i": 1}
+        backend.delete("s1")
+
+    def test_blocking_read(self, backend):
+        """Test read waits for a record, up to ``block`` seconds."""
+        backend.delete("s2")
+        started = time.monotonic()
+        assert backend.read("s2", 0, block=0.1) == []
+        assert time.monotonic() - started >= 0.09
+
+        timer = threading.Timer(0.05, backend.append, ("s2", 0, "late"))
+        timer.start()
+        entries = backend.read("s2", 0, block=5)
+        timer.join()
+        assert [e.data for e in entries] == ["late"]
+        backend.delete("s2")
+
+    def test_ack(self, backend):
+        """Test the consumer's offset is shared with the producer."""
+        backend.delete("s3")
+        assert backend.acked("s3") == 0
+        backend.ack("s3", 7)
+        assert backend.acked("s3") == 7
+        backend.delete("s3")
+
+    def test_restart_record(self, backend):
+        """Test a restart record continues the offsets of the stream."""
+        backend.delete("s4")
+        assert backend.next_offset("s4") == 0
+        backend.append("s4", 0, "a")
+        backend.close("s4", 1, {"error": "boom"})
+        assert backend.next_offset("s4") == 2
+        backend.restart("s4", 2, {"attempt": 1})
+        (entry,) = backend.read("s4", 2)
+        assert entry.restart and entry.data == {"attempt": 1}
+        assert backend.next_offset("s4") == 3
+        backend.delete("s4")
+
+    def test_partial_record_skipped(self, tmp_path):
+        """Test a record still being written is not returned."""
+        backend = FileStreamBackend(str(tmp_path))
+        backend.append("s", 0, "a")
+        with open(tmp_path / "s.jsonl", "a") as f:
+            f.write('{"o": 1, "d": "b')
+        assert [e.data for e in backend.read("s", 0)] == ["a"]
+
+
+class TestStreamGenerator:
+    """Test generator tasks and readers."""
+
+    def test_summary_and_chunks(self, tmp_path):
+        """Test chunks are streamed and the result is only a summary."""
+        backend = FileStreamBackend(str(tmp_path))
+        task = stream_generator(numbers, backend)
+        summary = task(4)
+
+        assert summary["chunks"] == 4
+        assert summary["result"] == 4
+        assert summary["bytes"] > 0
+        reader = StreamReader(backend, summary["stream"], timeout=1)
+        assert [chunk.data["i"] for chunk in reader] == [0, 1, 2, 3]
+        assert reader.summary == summary
+        assert reader.offset == 4
+
+    def test_failure_ends_stream(self, tmp_path):
+        """Test readers see the chunks before a failure, then the error."""
+        backend = FileStreamBackend(str(tmp_path))
+        task = stream_generator(numbers, backend)
+        with pytest.raises(RuntimeError):
+            task(5, fail_at=2)
+
+        stream = next(tmp_path.glob("*.jsonl")).stem
+        reader = StreamReader(backend, stream, timeout=1)
+        assert next(reader).data == {"i": 0}
+        assert next(reader).data == {"i": 1}
+        with pytest.raises(StreamError, match="RuntimeError: boom"):
+            next(reader)
+
+    def test_resume_from_offset(self, tmp_path):
+        """Test a new reader continues where another stopped."""
+        backend = FileStreamBackend(str(tmp_path))
+        stream = stream_generator(numbers, backend)(10)["stream"]
+
+        first = StreamReader(backend, stream, timeout=1)
+        seen = [next(first).data["i"] for _ in range(3)]
+        resumed = StreamReader(backend, stream, offset=first.offset, timeout=1)
+        seen += [chunk.data["i"] for chunk in resumed]
+        assert seen == list(range(10))
+
+    def test_retry_never_reuses_offsets(self, tmp_path):
+        """Test a retried task appends its attempt after a restart record."""
+        backend = FileStreamBackend(str(tmp_path))
+        app = Celery("streaming", broker="memory://", backend="cache+memory://")
+        task = app.task(
+            stream_generator(numbers, backend), name="tests.numbers", shared=False
+        )
+        assert task.apply((5,), {"fail_at": 3}, task_id="retried").failed()
+
+        # A reader that had read part of the failed attempt
+        reader = StreamReader(backend, "retried", timeout=1)
+        assert [next(reader).data["i"] for _ in range(2)] == [0, 1]
+        summary = task.apply((4,), task_id="retried", retries=1).get()
+        assert summary["chunks"] == 4
+
+        assert next(reader).data == {"i": 2}
+        with pytest.raises(StreamError, match="boom"):
+            next(reader)
+        follow = StreamReader(backend, "retried", offset=reader.offset, timeout=1)
+        with pytest.raises(StreamRestarted) as restarted:
+            next(follow)
+        assert restarted.value.offset == 5
+        chunks = list(follow)
+        assert [chunk.data["i"] for chunk in chunks] == [0, 1, 2, 3]
+        assert [chunk.offset for chunk in chunks] == [5, 6, 7, 8]
+        assert follow.summary == summary
+
+        # A reader from the start sees both attempts, told apart
+        fresh = StreamReader(backend, "retried", timeout=1)
+        assert len([next(fresh) for _ in range(3)]) == 3
+        with pytest.raises(StreamError):
+            next(fresh)
+
+    def test_backpressure(self, tmp_path):
+        """Test the producer never runs more than a window ahead."""
+        backend = FileStreamBackend(str(tmp_path), poll=0.001)
+        producer = StreamProducer(backend, "bp", StreamOptions(window=5))
+
+        def produce():
+            for i in range(40):
+                producer.send(i)
+            producer.close({"chunks": 40})
+
+        thread = threading.Thread(target=produce)
+        thread.start()
+        reader = StreamReader(backend, "bp", timeout=5, batch=2)
+        ahead = []
+        for chunk in reader:
+            ahead.append(producer.offset - reader.offset)
+            time.sleep(0.002)
+        thread.join()
+        assert reader.offset == 40
+        assert max(ahead) <= 5
+
+    def test_stalled_consumer(self, tmp_path):
+        """Test the producer gives up when nobody reads."""
+        backend = FileStreamBackend(str(tmp_path))
+        options = StreamOptions(window=2, timeout=0.05)
+        task = stream_generator(numbers, backend, options)
+        with pytest.raises(StreamStalled):
+            task(10)
+
+    def test_reader_timeout(self, tmp_path):
+        """Test a reader stops waiting for a silent stream."""
+        reader = StreamReader(FileStreamBackend(str(tmp_path)), "idle", timeout=0.05)
+        with pytest.raises(StreamTimeout):
+            next(reader)
+
+    def test_options(self):
+        """Test stream settings parsing."""
+        assert StreamOptions.from_value(None) == StreamOptions()
+        assert StreamOptions.from_value({"window": 3}).window == 3
+        with pytest.raises(ValueError):
+            StreamOptions.from_value({"size": 3})
+
+
+class TestClientStreaming:
+    """Test a generator task end-to-end through a worker."""
+
+    def test_stream_through_worker(self, tmp_path):
+        """Test the client iterates chunks and gets a summary result."""
+        cfg = Config()
+        task_list = (
+            {
+                "name": "tasks.process_data_stream",
+                "module_path": "tasks.example_tasks",
+                "function_name": "process_data_stream",
+                "metadata": {"stream": {"window": 2}},
+            },
+        )
+        cfg = replace(
+            cfg,
+            celery=replace(
+                cfg.celery, broker_url="memory://", result_backend="cache+memory://"
+            ),
+            tasks=replace(cfg.tasks, source="config", task_list=task_list),
+            streaming=replace(
+                cfg.streaming, backend="file", directory=str(tmp_path)
+            ),
+            worker=replace(cfg.worker, preload=False, track_memory=False),
+        )
+        wrapper = create_app(cfg)
+        client = TaskClient(wrapper.app, wrapper.adapter.stream_backend)
+        records = list(range(25))
+
+        with start_worker(wrapper.app, pool="solo", perform_ping_check=False):
+            result = client.submit(
+                "tasks.process_data_stream", {"records": records}, batch_size=10
+            )
+            chunks = list(client.stream(result, timeout=10))
+            summary = result.get(timeout=10)
+
+        assert [c.data["records"] for c in chunks] == [
+            records[:10],
+            records[10:20],
+            records[20:],
+        ]
+        assert summary["stream"] == result.id
+        assert summary["chunks"] == 3
+        assert summary["result"] == {"records": 25}
@@ -0,0 +1,316 @@
+"""Tests for the process supervisor."""
+
+import os
+import signal
+import socket
+import threading
+import time
+from dataclasses import replace
+
+import pytest
+from celery import Celery
+
+from config import Config
+from main import build_services
+from monitoring.instrumentation import PORT_ENV
+from worker import Backoff, Service, Supervisor, notify, worker_processes
+from worker.supervisor import install_ready_notification
+
+
+def ready_and_wait(delay=0.0):
+    time.sleep(delay)
+    notify("READY=1\nSTATUS=waiting")
+    signal.pause()
+
+
+def crash():
+    return 3
+
+
+def drain(path):
+    def finish(signum, frame):
+        with open(path, "w") as f:
+            f.write("drained")
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, finish)
+    notify("READY=1")
+    signal.pause()
+
+
+def ignore_term():
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    notify("READY=1")
+    while True:
+        signal.pause()
+
+
+def report_env(path, name):
+    with open(path, "w") as f:
+        f.write(os.environ.get(name, ""))
+    notify("READY=1")
+    signal.pause()
+
+
+def never_ready():
+    signal.pause()
+
+
+def listen_later(port, delay):
+    time.sleep(delay)
+    server = socket.create_server(("127.0.0.1", port))
+    while True:
+        server.accept()[0].close()
+
+
+def celery_worker():
+    app = Celery("supervised", broker="memory://", backend="cache+memory://")
+    app.conf.broker_transport_options = {"polling_interval": 0.01}
+
+    @app.task(name="tasks.noop", shared=False)
+    def noop():
+        return None
+
+    install_ready_notification()
+    app.worker_main(
+        [
+            "worker",
+            "--pool=solo",
+            "--loglevel=warning",
+            "--without-heartbeat",
+            "--without-mingle",
+            "--without-gossip",
+        ]
+    )
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_in_thread(supervisor):
+    result = {}
+    thread = threading.Thread(
+        target=lambda: result.setdefault("code", supervisor.run())
+    )
+    thread.start()
+    return thread, result
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+class TestReadiness:
+    """Test services are reported ready as soon as they are."""
+
+    def test_notify(self):
+        """Test start returns once every service sent READY=1."""
+        supervisor = Supervisor(
+            [
+                Service("fast", ready_and_wait),
+                Service("slow", ready_and_wait, (0.3,)),
+                Service("plain", never_ready, probe=None),
+            ]
+        )
+        started = time.monotonic()
+        try:
+            assert supervisor.start(timeout=10)
+            elapsed = time.monotonic() - started
+            assert 0.3 <= elapsed < 3
+            states = supervisor.states
+            assert states["fast"].status == "waiting"
+            assert states["fast"].ready_at < states["slow"].ready_at
+            assert all(s.state == "ready" for s in states.values())
+        finally:
+            supervisor.stop()
+        assert all(s.pid is None for s in supervisor.states.values())
+
+    def test_tcp_probe(self):
+        """Test a tcp:// service is ready once its port accepts."""
+        port = free_port()
+        supervisor = Supervisor(
+            [
+                Service(
+                    "listener",
+                    listen_later,
+                    (port, 0.2),
+                    probe=f"tcp://127.0.0.1:{port}",
+                )
+            ]
+        )
+        try:
+            assert supervisor.start(timeout=10)
+            state = supervisor.states["listener"]
+            assert state.ready_at - state.started_at >= 0.2
+        finally:
+            supervisor.stop()
+
+    def test_not_ready_in_time(self):
+        """Test a service that never reports ready is restarted."""
+        supervisor = Supervisor(
+            [Service("stuck", never_ready, ready_timeout=0.2, stop_timeout=1)],
+            backoff=Backoff(base=0.01),
+        )
+        try:
+            assert not supervisor.start(timeout=0.6)
+            assert supervisor.states["stuck"].restarts >= 1
+        finally:
+            supervisor.stop()
+
+    def test_celery_worker(self):
+        """Test a worker is ready once it consumes, and drains on stop."""
+        supervisor = Supervisor([Service("worker-1", celery_worker)])
+        try:
+            assert supervisor.start(timeout=30)
+            assert supervisor.states["worker-1"].status == "1 tasks registered"
+        finally:
+            supervisor.stop()
+        # Warm shutdown
+        assert supervisor.states["worker-1"].exitcode == 0
+
+
+class TestRestarts:
+    """Test crashed services are restarted with backoff."""
+
+    def test_backoff_delays(self):
+        """Test delays double up to the maximum."""
+        backoff = Backoff(base=0.5, maximum=3)
+        assert [backoff.delay(n) for n in range(6)] == [0, 0.5, 1, 2, 3, 3]
+
+    def test_crash_loop(self):
+        """Test restarts slow down while a service keeps crashing."""
+        supervisor = Supervisor(
+            [Service("crasher", crash)], backoff=Backoff(base=0.05, maximum=0.2)
+        )
+        starts = []
+        spawn = supervisor._spawn
+
+        def record(state, now):
+            starts.append(now)
+            spawn(state, now)
+
+        supervisor._spawn = record
+        thread, result = run_in_thread(supervisor)
+        wait_for(lambda: len(starts) >= 5)
+        supervisor.request_stop()
+        thread.join(10)
+
+        assert result["code"] == 0
+        assert supervisor.states["crasher"].restarts >= 4
+        gaps = [b - a for a, b in zip(starts, starts[1:])]
+        assert gaps[0] >= 0.05
+        assert gaps[1] >= 0.1
+        assert gaps[3] >= 0.2 and gaps[3] < 1
+
+    def test_restart_after_kill(self, tmp_path):
+        """Test a killed service is replaced and the status file follows."""
+        status = tmp_path / "services.status"
+        supervisor = Supervisor(
+            [Service("victim", ready_and_wait)],
+            backoff=Backoff(base=0.01),
+            status_file=str(status),
+        )
+        thread, result = run_in_thread(supervisor)
+        try:
+            wait_for(lambda: supervisor.ready)
+            pid = supervisor.states["victim"].pid
+            assert f"victim {pid} ready" in status.read_text()
+
+            os.kill(pid, signal.SIGKILL)
+            wait_for(
+                lambda: supervisor.ready and supervisor.states["victim"].pid != pid
+            )
+            assert supervisor.states["victim"].restarts == 1
+        finally:
+            supervisor.request_stop()
+            thread.join(10)
+        assert not status.exists()
+
+
+class TestDrain:
+    """Test stopping drains services before killing them."""
+
+    def test_graceful(self, tmp_path):
+        """Test SIGTERM lets a service finish."""
+        marker = tmp_path / "drained"
+        supervisor = Supervisor([Service("drainer", drain, (str(marker),))])
+        assert supervisor.start(timeout=10)
+        supervisor.stop()
+        assert marker.read_text() == "drained"
+        assert supervisor.states["drainer"].exitcode == 0
+
+    def test_kill_after_timeout(self):
+        """Test a service ignoring SIGTERM is killed after stop_timeout."""
+        supervisor = Supervisor([Service("stubborn", ignore_term, stop_timeout=0.2)])
+        assert supervisor.start(timeout=10)
+        started = time.monotonic()
+        supervisor.stop()
+        assert 0.2 <= time.monotonic() - started < 5
+        assert supervisor.states["stubborn"].exitcode == -signal.SIGKILL
+
+    def test_signal(self):
+        """Test SIGTERM to the supervisor drains and returns."""
+        supervisor = Supervisor([Service("child", ready_and_wait)])
+        previous = signal.getsignal(signal.SIGTERM), signal.getsignal(signal.SIGINT)
+        supervisor.install_signal_handlers()
+        try:
+            assert supervisor.start(timeout=10)
+            threading.Timer(0.05, os.kill, (os.getpid(), signal.SIGTERM)).start()
+            assert supervisor.run() == 0
+        finally:
+            signal.signal(signal.SIGTERM, previous[0])
+            signal.signal(signal.SIGINT, previous[1])
+        assert supervisor.states["child"].pid is None
+
+
+class TestServices:
+    """Test the services built from the config."""
+
+    def test_worker_processes(self):
+        """Test workers are sized to the machine unless configured."""
+        assert worker_processes(3, "solo") == 3
+        assert worker_processes(0, "solo") == (os.cpu_count() or 1)
+        assert worker_processes(0, "prefork") == 1
+
+    def test_build_services(self):
+        """Test one service per worker process, beat and flower."""
+        cfg = Config()
+        cfg = replace(cfg, supervisor=replace(cfg.supervisor, workers=2))
+        services = {service.name: service for service in build_services(cfg)}
+        assert list(services) == ["worker-1", "worker-2", "beat", "flower"]
+        assert "--hostname=worker2@%h" in services["worker-2"].args[0]
+        assert services["flower"].probe == "tcp://127.0.0.1:5555"
+        assert services["worker-1"].env == {}
+
+        cfg = replace(cfg, metrics=replace(cfg.metrics, enabled=True, port=9900))
+        services = {service.name: service for service in build_services(cfg)}
+        assert services["worker-1"].env == {PORT_ENV: "9900"}
+        assert services["worker-2"].env == {PORT_ENV: "9901"}
+
+        cfg = replace(cfg, supervisor=replace(cfg.supervisor, beat=False, flower=False))
+        assert [service.name for service in build_services(cfg)] == [
+            "worker-1",
+            "worker-2",
+        ]
+
+    def test_environment(self, tmp_path):
+        """Test a service's environment is set in its process."""
+        path = tmp_path / "env"
+        service = Service("env", report_env, (str(path), "X_PORT"), env={"X_PORT": "1"})
+        supervisor = Supervisor([service])
+        try:
+            assert supervisor.start(timeout=10)
+            assert path.read_text() == "1"
+        finally:
+            supervisor.stop()
+
+    def test_duplicate_names(self):
+        """Test service names must be unique."""
+        with pytest.raises(ValueError):
+            Supervisor([Service("a", crash), Service("a", crash)])
@@ -0,0 +1,214 @@
+"""Tests for per-task memory growth tracking and memory-based recycling."""
+
+import json
+import logging
+import mmap
+import os
+import subprocess
+import sys
+import textwrap
+from dataclasses import replace
+from pathlib import Path
+from types import SimpleNamespace
+
+from app import create_app
+from config import Config
+from monitoring import MetricsRegistry, SharedRegistry, TaskMemoryTracker
+from monitoring.task_memory import MB
+
+ROOT = Path(__file__).parent.parent
+
+_leak = []
+
+
+def run_task(tracker, task_id, name, allocate=0):
+    task = SimpleNamespace(name=name)
+    tracker.on_prerun(task_id=task_id, task=task)
+    if allocate:
+        # Fresh anonymous pages (the heap may reuse resident freed memory);
+        # writing makes every page resident
+        region = mmap.mmap(-1, allocate)
+        region.write(b"x" * allocate)
+        _leak.append(region)
+    tracker.on_postrun(task_id=task_id, task=task)
+
+
+def release():
+    while _leak:
+        _leak.pop().close()
+
+
+class TestTaskMemoryTracker:
+    """Test growth attribution."""
+
+    def test_attributes_growth_to_task(self):
+        """Test the leaking task accumulates growth, the clean one does not."""
+        tracker = TaskMemoryTracker(MetricsRegistry())
+        for i in range(5):
+            run_task(tracker, f"leak-{i}", "tasks.leaky", allocate=4 * MB)
+            run_task(tracker, f"clean-{i}", "tasks.clean")
+        release()
+
+        leaky = tracker.get("tasks.leaky")
+        clean = tracker.get("tasks.clean")
+        assert leaky.runs == clean.runs == 5
+        assert leaky.grew == 5
+        assert leaky.growth >= 5 * 4 * MB
+        assert leaky.max_growth >= 4 * MB
+        assert clean.growth < MB
+        assert tracker.stats()[0].name == "tasks.leaky"
+        assert "tasks.leaky" in tracker.report().splitlines()[1]
+
+    def test_metrics(self):
+        """Test growth histogram, total and RSS gauge are exported."""
+        registry = MetricsRegistry()
+        tracker = TaskMemoryTracker(registry)
+        run_task(tracker, "1", "tasks.leaky", allocate=2 * MB)
+        release()
+
+        text = registry.render()
+        assert 'celery_task_memory_growth_bytes_count{task="tasks.leaky"} 1' in text
+        assert "celery_task_memory_growth_bytes_total" in text
+        assert tracker.rss.labels().value > 0
+
+    def test_ceiling_reports_task(self, caplog):
+        """Test crossing the ceiling is reported once, with the task."""
+        tracker = TaskMemoryTracker(MetricsRegistry(), max_memory_per_child=1)
+        with caplog.at_level(logging.WARNING):
+            run_task(tracker, "1", "tasks.big")
+            run_task(tracker, "2", "tasks.big")
+        assert tracker.recycles.labels("tasks.big").value == 1
+        assert "after tasks.big; recycling" in caplog.text
+
+    def test_children_reach_worker(self, tmp_path):
+        """Test the worker process sees statistics of its pool children."""
+        registry = MetricsRegistry()
+        tracker = TaskMemoryTracker(registry)
+        shared = SharedRegistry(registry, str(tmp_path))
+        registry.shared = shared
+        shared.on_worker_init()
+        assert tracker.stats() == []
+
+        child = TaskMemoryTracker(MetricsRegistry())
+        child.record("tasks.leaky", 3 * MB, 100 * MB)
+        child.record("tasks.leaky", -MB, 99 * MB)
+        # Snapshot of a live child (any running process will do)
+        path = tmp_path / f"{os.getppid()}.json"
+        path.write_text(json.dumps(child.registry.snapshot()))
+        (stats,) = tracker.stats()
+        assert (stats.name, stats.runs, stats.grew) == ("tasks.leaky", 2, 1)
+        assert stats.growth == stats.max_growth == 3 * MB
+        assert f"celery_worker_rss_bytes {99 * MB}" in registry.collect().render()
+
+    def test_process_init_resets(self):
+        """Test a forked child starts with empty statistics."""
+        tracker = TaskMemoryTracker(MetricsRegistry())
+        run_task(tracker, "1", "tasks.clean")
+        tracker.on_process_init()
+        assert tracker.stats() == []
+
+
+class TestAppConfig:
+    """Test memory settings are applied by create_app."""
+
+    def test_memory_ceiling(self):
+        """Test the ceiling replaces count-based recycling."""
+        cfg = Config()
+        cfg = replace(
+            cfg,
+            celery=replace(cfg.celery, broker_url="memory://"),
+            worker=replace(
+                cfg.worker, max_tasks_per_child=0, max_memory_per_child=300
+            ),
+            tasks=replace(cfg.tasks, source="config"),
+        )
+        wrapper = create_app(cfg)
+        try:
+            assert wrapper.app.conf.worker_max_tasks_per_child is None
+            assert wrapper.app.conf.worker_max_memory_per_child == 300 * 1024
+            assert wrapper.memory.max_memory_per_child == 300 * MB
+        finally:
+            wrapper.memory.disconnect()
+
+
+WORKER_SCRIPT = """
+import os, sys
+from dataclasses import replace
+sys.path.insert(0, {src!r})
+from app import create_app
+from config import Config
+
+cfg = Config()
+cfg = replace(
+    cfg,
+    celery=replace(
+        cfg.celery, broker_url="filesystem://", result_backend={backend!r}
+    ),
+    worker=replace(
+        cfg.worker, pool="prefork", max_tasks_per_child=0,
+        max_memory_per_child={ceiling}, preload=False,
+    ),
+    tasks=replace(cfg.tasks, source="config"),
+)
+app = create_app(cfg).app
+app.conf.broker_transport_options = {{
+    "data_folder_in": {queue!r}, "data_folder_out": {queue!r},
+    "control_folder": {control!r}, "polling_interval": 0.05,
+}}
+_leak = []
+
+@app.task(name="tasks.leak")
+def leak(mb):
+    _leak.append(bytearray(b"x" * mb * 1024 * 1024))
+    return os.getpid()
+
+if __name__ == "__main__":
+    app.worker_main([
+        "worker", "--pool=prefork", "--concurrency=1", "--loglevel=warning",
+        "--without-heartbeat", "--without-mingle", "--without-gossip",
+    ])
+"""
+
+
+class TestMemoryRecycling:
+    """Test a prefork child is replaced once it crosses the ceiling."""
+
+    def test_prefork_child_recycled(self, tmp_path):
+        """Test growth past the ceiling recycles the child."""
+        queue = tmp_path / "queue"
+        queue.mkdir()
+        script = tmp_path / "leaky_worker.py"
+        script.write_text(
+            textwrap.dedent(WORKER_SCRIPT).format(
+                src=str(ROOT / "src"),
+                backend=f"file://{tmp_path / 'results'}",
+                ceiling=150,
+                queue=str(queue),
+                control=str(tmp_path / "control"),
+            )
+        )
+        (tmp_path / "results").mkdir()
+        worker = subprocess.Popen(
+            [sys.executable, str(script)],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            sys.path.insert(0, str(tmp_path))
+            import leaky_worker
+
+            pids = [
+                leaky_worker.leak.delay(50).get(timeout=60) for _ in range(3)
+            ]
+        finally:
+            sys.path.remove(str(tmp_path))
+            sys.modules.pop("leaky_worker", None)
+            worker.terminate()
+            _, stderr = worker.communicate(timeout=30)
+
+        # The second 50MB task pushes the child past 150MB; the third task
+        # runs in its replacement
+        assert pids[0] == pids[1] != pids[2], stderr
+        assert "after tasks.leak; recycling" in stderr
@@ -0,0 +1,216 @@
+"""Tests for trace propagation from publishers to task execution."""
+
+import json
+import time
+from dataclasses import replace
+
+import pytest
+from celery.contrib.testing.worker import start_worker
+
+from app import create_app
+from config import Config
+from monitoring.tracing import (
+    TRACEPARENT_HEADER,
+    InMemorySpanExporter,
+    JsonlSpanExporter,
+    SpanContext,
+    TaskTracing,
+    Tracer,
+    get_tracer,
+    set_tracer,
+)
+
+
+@pytest.fixture
+def traced_app():
+    """App with tracing into memory and a task that spawns a child."""
+    cfg = Config()
+    task_list = (
+        {
+            "name": "tasks.add",
+            "module_path": "tasks.example_tasks",
+            "function_name": "add",
+        },
+    )
+    cfg = replace(
+        cfg,
+        celery=replace(
+            cfg.celery, broker_url="memory://", result_backend="cache+memory://"
+        ),
+        tasks=replace(cfg.tasks, source="config", task_list=task_list),
+        tracing=replace(
+            cfg.tracing, enabled=True, sample_rate=1.0, exporter="memory"
+        ),
+        worker=replace(cfg.worker, preload=False, track_memory=False),
+    )
+    previous = get_tracer()
+    wrapper = create_app(cfg)
+    app = wrapper.app
+
+    @app.task(name="tasks.fan_out", shared=False)
+    def fan_out(x):
+        return app.send_task("tasks.add", args=(x, 1)).id
+
+    try:
+        yield wrapper
+    finally:
+        TaskTracing(get_tracer()).disconnect()
+        set_tracer(previous)
+
+
+def by_name(spans):
+    return {span.name: span for span in spans}
+
+
+class TestSpanContext:
+    """Test the traceparent header format."""
+
+    def test_round_trip(self):
+        """Test a context survives formatting and parsing."""
+        context = SpanContext("a" * 32, "b" * 16, sampled=True)
+        assert context.traceparent == f"00-{'a' * 32}-{'b' * 16}-01"
+        assert SpanContext.from_traceparent(context.traceparent) == context
+        unsampled = SpanContext.from_traceparent(f"00-{'a' * 32}-{'b' * 16}-00")
+        assert not unsampled.sampled
+
+    def test_malformed(self):
+        """Test malformed headers are ignored."""
+        assert SpanContext.from_traceparent(None) is None
+        assert SpanContext.from_traceparent("00-abc") is None
+        assert SpanContext.from_traceparent(f"01-{'a' * 32}-{'b' * 16}-01") is None
+
+
+class TestTracer:
+    """Test span creation, nesting and sampling."""
+
+    def test_nesting(self):
+        """Test spans opened inside another become its children."""
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(exporter)
+        with tracer.span("outer") as outer:
+            with tracer.span("inner") as inner:
+                assert tracer.current() is inner
+            assert tracer.current() is outer
+        assert tracer.current() is None
+
+        assert [s.name for s in exporter.spans] == ["inner", "outer"]
+        assert inner.parent_id == outer.context.span_id
+        assert inner.context.trace_id == outer.context.trace_id
+        assert outer.parent_id is None
+        assert outer.duration >= inner.duration >= 0
+
+    def test_error_status(self):
+        """Test an exception marks the span as failed."""
+        exporter = InMemorySpanExporter()
+        tracer = Tracer(exporter)
+        with pytest.raises(KeyError):
+            with tracer.span("boom"):
+                raise KeyError("x")
+        assert exporter.spans[0].status == "error"
+        assert exporter.spans[0].attributes["exception"] == "KeyError"
+
+    def test_sampling_decided_at_root(self):
+        """Test children follow the root's decision without re-sampling."""
+        exporter = InMemorySpanExporter()
+        rolls = iter([0.9, 0.1])
+        tracer = Tracer(exporter, sample_rate=0.5, rng=lambda: next(rolls))
+        with tracer.publish("tasks.add") as headers:
+            with tracer.span("child"):
+                pass
+        assert headers[TRACEPARENT_HEADER].endswith("-00")
+        assert exporter.spans == []
+
+        with tracer.publish("tasks.add") as headers:
+            pass
+        assert headers[TRACEPARENT_HEADER].endswith("-01")
+        assert [s.name for s in exporter.spans] == ["publish"]
+
+    def test_disabled(self):
+        """Test a tracer without exporter adds no headers."""
+        with Tracer().publish("tasks.add") as headers:
+            assert headers == {}
+
+    def test_jsonl_exporter(self, tmp_path):
+        """Test spans are appended one JSON object per line."""
+        path = tmp_path / "traces" / "spans.jsonl"
+        tracer = Tracer(JsonlSpanExporter(str(path)))
+        with tracer.span("a"):
+            with tracer.span("b", {"k": 1}):
+                pass
+        tracer.shutdown()
+
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["name"] for line in lines] == ["b", "a"]
+        assert lines[0]["parent_id"] == lines[1]["span_id"]
+        assert lines[0]["attributes"] == {"k": 1}
+
+
+class TestWorkerTracing:
+    """Test spans across publish, queue, execution and result write."""
+
+    def test_execute_async(self, traced_app):
+        """Test one execution produces the full span tree."""
+        app = traced_app.app
+        exporter = get_tracer().exporter
+        with start_worker(app, pool="solo", perform_ping_check=False):
+            result = traced_app.adapter.execute_async("tasks.add", 2, 3)
+            assert result.get(timeout=10) == 5
+            deadline = time.time() + 5
+            while len(exporter.spans) < 6 and time.time() < deadline:
+                time.sleep(0.01)
+
+        spans = by_name(exporter.spans)
+        assert set(spans) == {
+            "publish",
+            "task tasks.add",
+            "queue",
+            "prefetch",
+            "execute",
+            "result",
+        }
+        assert len({s.context.trace_id for s in exporter.spans}) == 1
+        publish, task = spans["publish"], spans["task tasks.add"]
+        assert publish.attributes["task_id"] == result.id
+        assert task.parent_id == publish.context.span_id
+        assert task.attributes["state"] == "SUCCESS"
+        for name in ("queue", "prefetch", "execute", "result"):
+            assert spans[name].parent_id == task.context.span_id
+            assert spans[name].duration >= 0
+        # Phases follow each other
+        assert spans["queue"].end <= spans["prefetch"].end <= spans["execute"].start
+        assert spans["execute"].end <= spans["result"].end == task.end
+
+    def test_child_task_linked(self, traced_app):
+        """Test a task published during execution is a child of it."""
+        app = traced_app.app
+        exporter = get_tracer().exporter
+        with start_worker(app, pool="solo", perform_ping_check=False):
+            child_id = app.send_task("tasks.fan_out", args=(1,)).get(timeout=10)
+            assert app.AsyncResult(child_id).get(timeout=10) == 2
+            deadline = time.time() + 5
+            while len(exporter.spans) < 12 and time.time() < deadline:
+                time.sleep(0.01)
+
+        spans = exporter.spans
+        assert len({s.context.trace_id for s in spans}) == 1
+        executes = {s.parent_id: s for s in spans if s.name == "execute"}
+        tasks = {s.name: s for s in spans if s.name.startswith("task ")}
+        parent_execute = executes[tasks["task tasks.fan_out"].context.span_id]
+        child_publish = next(
+            s
+            for s in spans
+            if s.name == "publish" and s.attributes["task_id"] == child_id
+        )
+        assert child_publish.parent_id == parent_execute.context.span_id
+        assert tasks["task tasks.add"].parent_id == child_publish.context.span_id
+
+    def test_unsampled_not_recorded(self, traced_app):
+        """Test an unsampled trace records nothing on either side."""
+        app = traced_app.app
+        tracer = get_tracer()
+        tracer.sample_rate = 0.0
+        with start_worker(app, pool="solo", perform_ping_check=False):
+            assert traced_app.adapter.execute_async("tasks.add", 1, 1).get(
+                timeout=10
+            ) == 2
+        assert tracer.exporter.spans == []
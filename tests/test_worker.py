@@ -0,0 +1,177 @@
+"""Tests for worker preloading and the fork server."""
+
+import gc
+import os
+import signal
+import sys
+import time
+import weakref
+
+import pytest
+from celery import Celery, signals
+
+from monitoring import read_memory, read_rss
+from task_management import TaskDefinition, TaskRegistry
+from worker import ForkServer, install_preload, preload, uninstall_preload
+from worker.preload import unfreeze
+
+
+def exit_with(code):
+    return code
+
+
+def sleep_forever():
+    signal.pause()
+
+
+def raise_error():
+    raise RuntimeError("boom")
+
+
+class Cycle:
+    pass
+
+
+@pytest.fixture
+def frozen():
+    """Undo gc.freeze() so the test process keeps collecting."""
+    yield
+    unfreeze()
+
+
+class TestPreload:
+    """Test preloading in the parent process."""
+
+    def test_imports_and_freezes(self, frozen):
+        """Test task modules are imported and objects frozen."""
+        sys.modules.pop("tasks.decorators", None)
+        registry = TaskRegistry()
+        registry.register(
+            TaskDefinition(
+                name="tasks.add",
+                module_path="tasks.example_tasks",
+                function_name="add",
+            )
+        )
+        registry.register(
+            TaskDefinition(
+                name="tasks.off",
+                module_path="missing.module",
+                function_name="off",
+                enabled=False,
+            )
+        )
+        app = Celery("preload_test", broker="memory://")
+
+        report = preload(app, registry, modules=["tasks.decorators", "no.such"])
+
+        assert report.modules == ["tasks.decorators", "tasks.example_tasks"]
+        assert report.failed == ["no.such"]
+        assert "tasks.decorators" in sys.modules
+        assert report.frozen > 0
+        assert gc.get_freeze_count() > 0
+        assert gc.isenabled()
+
+    def test_without_freeze(self):
+        """Test freezing can be turned off."""
+        app = Celery("preload_test", broker="memory://")
+        report = preload(app, freeze=False)
+        assert report.frozen == 0
+        assert gc.get_freeze_count() == 0
+
+    def test_signal_handlers(self, frozen):
+        """Test worker_init preloads and forks re-freeze."""
+        app = Celery("preload_test", broker="memory://")
+        other = Celery("other_app", broker="memory://")
+        install_preload(app, modules=["tasks.example_tasks"])
+        try:
+            signals.worker_init.send(sender=type("W", (), {"app": other})())
+            assert gc.get_freeze_count() == 0
+
+            signals.worker_init.send(sender=type("W", (), {"app": app})())
+            assert gc.get_freeze_count() > 0
+
+            unfreeze()
+            signals.worker_before_create_process.send(sender=None)
+            assert gc.get_freeze_count() > 0
+        finally:
+            uninstall_preload()
+
+    def test_refreeze_collects_garbage(self, frozen):
+        """Test cyclic garbage made between forks is collected, not frozen."""
+        app = Celery("preload_test", broker="memory://")
+        install_preload(app)
+        try:
+            cycle = Cycle()
+            cycle.self = cycle
+            ref = weakref.ref(cycle)
+            del cycle
+            signals.worker_before_create_process.send(sender=None)
+            assert ref() is None
+        finally:
+            uninstall_preload()
+
+
+class TestForkServer:
+    """Test forking children from the warm template."""
+
+    def test_spawn_and_wait(self):
+        """Test exit codes are reported back."""
+        server = ForkServer()
+        server.start()
+        try:
+            ok = server.spawn(exit_with, 0)
+            failed = server.spawn(exit_with, 3)
+            crashed = server.spawn(raise_error)
+            exited = server.spawn(sys.exit, None)
+            assert server.wait(ok, timeout=10) == 0
+            assert server.wait(failed, timeout=10) == 3
+            assert server.wait(crashed, timeout=10) == 1
+            assert server.wait(exited, timeout=10) == 0
+        finally:
+            server.stop()
+
+    def test_children_of_server(self):
+        """Test children are forked by the server, not by the caller."""
+        server = ForkServer()
+        server_pid = server.start()
+        try:
+            pid = server.spawn(sleep_forever)
+            with open(f"/proc/{pid}/stat") as f:
+                assert int(f.read().rsplit(")", 1)[1].split()[1]) == server_pid
+            assert server.wait(pid, timeout=0.05) is None
+
+            os.kill(pid, signal.SIGKILL)
+            assert server.wait(timeout=10) == (pid, -signal.SIGKILL)
+        finally:
+            server.stop()
+
+    def test_stop_terminates_children(self):
+        """Test stopping the server stops its children."""
+        server = ForkServer()
+        server.start()
+        pid = server.spawn(sleep_forever)
+        start = time.monotonic()
+        server.stop()
+        assert time.monotonic() - start < 5
+        assert server.pid is None
+        with pytest.raises(ProcessLookupError):
+            os.kill(pid, 0)
+        with pytest.raises(RuntimeError):
+            server.spawn(exit_with, 0)
+
+
+class TestMemory:
+    """Test /proc memory readings."""
+
+    def test_read_memory(self):
+        """Test RSS, PSS and USS of the current process."""
+        info = read_memory()
+        assert info.rss > 0
+        assert 0 < info.uss <= info.pss <= info.rss
+        assert read_rss() > 0
+
+    def test_missing_process(self):
+        """Test a missing process yields None."""
+        assert read_memory(2 ** 22 + 1) is None
+        assert read_rss(2 ** 22 + 1) is None